@@ -34,7 +34,9 @@ custom_rulebased_policies: Dict[str, type] = {}
 """Dictionary of custom rule-based policies.
 
 Mapping from policy IDs to classes (not class instances!) implementing
-`hearts_gym.policies.deterministic_policy_impl.DeterministicPolicyImpl`.
+`hearts_gym.policies.deterministic_policy_impl.DeterministicPolicyImpl`
+or, to compute actions for whole batches at once,
+`hearts_gym.policies.deterministic_policy_impl.BatchDeterministicPolicyImpl`.
 """
 
 obs_transforms: List[ObsTransform] = []
@@ -73,6 +75,20 @@ random_policy_seed = None
 
 eval_seed = seed + 1
 num_test_games = 5000
+num_parallel_test_games = 256
+"""How many test games to play at once. Actions for all of them are
+computed in batches. Only used by the unstable evaluation method.
+"""
+num_test_workers = max(utils.get_num_cpus() - 1, 1)
+"""How many Ray actors to distribute batches of test games to. Results
+are the same for any amount. Only used by the unstable
+evaluation method.
+"""
+use_batch_test_game = False
+"""Whether to simulate each batch of test games with vectorized
+operations instead of stepping each game on its own. Results are the
+same either way. Only used by the unstable evaluation method.
+"""
 eval_policy_mapping_fn = utils.create_policy_mapping(
     'one_learned_rest_random',
     LEARNED_AGENT_ID,
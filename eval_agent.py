@@ -3,10 +3,10 @@ Evaluate a local agent on a remote server.
 """
 
 from argparse import ArgumentParser, Namespace
-from json import JSONDecodeError
 from pathlib import Path
 import pickle
 import socket
+import struct
 import sys
 from typing import Any, Dict, List, Optional, Tuple
 import uuid
@@ -25,6 +25,7 @@ import configuration as conf
 from configuration import ENV_NAME, LEARNED_POLICY_ID
 from hearts_gym import HeartsEnv, utils
 from hearts_gym.server import utils as server_utils
+from hearts_gym.server.delta_observations import DeltaDecoder
 from hearts_gym.server.hearts_server import (
     Client,
     HeartsRequestHandler,
@@ -88,6 +89,32 @@ def parse_args() -> Namespace:
         default=PORT,
         help='Server port to connect to.',
     )
+    parser.add_argument(
+        '--max_batch_size',
+        type=int,
+        help=(
+            'Maximum amount of observations to receive per message. '
+            'By default, let the server decide.'
+        ),
+    )
+    parser.add_argument(
+        '--target_latency_sec',
+        type=float,
+        help=(
+            'Targeted time in seconds to compute actions for a message; '
+            'the server adapts the amount of observations per message '
+            'accordingly. By default, let the server decide.'
+        ),
+    )
+    parser.add_argument(
+        '--delta_observations',
+        type=utils.parse_bool,
+        default=True,
+        help=(
+            'Whether to receive only the changed card states of each '
+            'observation if the server supports it, saving bandwidth.'
+        ),
+    )
 
     return parser.parse_args()
 
@@ -182,6 +209,35 @@ def _receive_data_shard(
     return data
 
 
+def _receive_data_shard_into(
+        client: socket.socket,
+        buffer: memoryview,
+) -> int:
+    """Receive a message shard from the server into the given buffer in
+    a failsafe way. Return the amount of bytes received.
+
+    If the server stopped, exit the program.
+
+    Args:
+        client (socket.socket): Socket of the client.
+        buffer (memoryview): Buffer to receive the data into.
+
+    Returns:
+        int: Amount of bytes received.
+    """
+    try:
+        num_received_bytes = client.recv_into(buffer)
+    except Exception:
+        print('Unable to receive data from server.')
+        raise
+
+    if num_received_bytes == 0:
+        print('Server stopped. Exiting...')
+        sys.exit(0)
+
+    return num_received_bytes
+
+
 def _receive_msg_length(
         client: socket.socket,
         max_receive_bytes: int,
@@ -189,8 +245,10 @@ def _receive_msg_length(
     """Return the expected length of a message received from the server
     in a failsafe way.
 
-    To be more efficient, receive more data than necessary. Any
-    additional data is returned.
+    To be more efficient, receive more data than necessary, but at
+    maximum `server_utils.MAX_MSG_PREFIX_LENGTH` bytes. As all messages
+    from the server are longer, this never includes data of the next
+    message. Any additional data is returned.
 
     If the server stopped, exit the program.
 
@@ -203,15 +261,20 @@ def _receive_msg_length(
         int: Amount of bytes in the rest of the message.
         bytes: Extraneous part of message data received.
     """
-    data_shard = _receive_data_shard(client, max_receive_bytes)
+    max_prefix_len = server_utils.MAX_MSG_PREFIX_LENGTH
+    data_shard = _receive_data_shard(
+        client, min(max_receive_bytes, max_prefix_len))
     total_num_received_bytes = len(data_shard)
     data = [data_shard]
     length_end = data_shard.find(server_utils.MSG_LENGTH_SEPARATOR)
     while (
             length_end == -1
-            and total_num_received_bytes < server_utils.MAX_MSG_PREFIX_LENGTH
+            and total_num_received_bytes < max_prefix_len
     ):
-        data_shard = _receive_data_shard(client, max_receive_bytes)
+        data_shard = _receive_data_shard(
+            client,
+            min(max_receive_bytes, max_prefix_len - total_num_received_bytes),
+        )
         total_num_received_bytes += len(data_shard)
         data.append(data_shard)
         length_end = data_shard.find(server_utils.MSG_LENGTH_SEPARATOR)
@@ -249,21 +312,21 @@ def receive_data(
     """
     msg_length, data_shard = _receive_msg_length(client, max_receive_bytes)
     assert msg_length < max_total_receive_bytes, 'message is too long'
+    assert len(data_shard) <= msg_length, 'message does not match length'
 
+    # Receive directly into a mutable buffer so decoded arrays can be
+    # views into it.
+    data = bytearray(msg_length)
+    view = memoryview(data)
+    view[:len(data_shard)] = data_shard
     total_num_received_bytes = len(data_shard)
-    data = [data_shard]
     while total_num_received_bytes < msg_length:
-        data_shard = _receive_data_shard(client, max_receive_bytes)
-        total_num_received_bytes += len(data_shard)
-        data.append(data_shard)
+        total_num_received_bytes += _receive_data_shard_into(
+            client, view[total_num_received_bytes:])
 
-    assert total_num_received_bytes == msg_length, \
-        'message does not match length'
-
-    data = b''.join(data)
     try:
         data = server_utils.decode_data(data)
-    except (JSONDecodeError, zlib.error) as ex:
+    except (ValueError, struct.error, zlib.error) as ex:
         print('Failed decoding:', data)
         print('Error message:', str(ex))
         return '[See decoding error message.]'
@@ -489,7 +552,33 @@ def main() -> None:
         utils.maybe_set_up_masked_actions_model(algorithm, config)
 
         agent = utils.load_agent(algorithm, str(checkpoint_path), config)
-        server_utils.send_ok(client)
+        server_wire_version = metadata.get(
+            'wire_version', server_utils.WIRE_VERSION_JSON)
+        max_wire_version = (
+            server_utils.WIRE_VERSION
+            if args.delta_observations
+            else server_utils.WIRE_VERSION_BINARY
+        )
+        if metadata.get('accepts_client_settings', False):
+            server_utils.send_setup_ok(
+                client,
+                server_wire_version,
+                args.max_batch_size,
+                args.target_latency_sec,
+                max_wire_version,
+            )
+        else:
+            server_utils.send_setup_ok(
+                client,
+                server_wire_version,
+                max_wire_version=max_wire_version,
+            )
+        delta_decoder: Optional[DeltaDecoder] = None
+        if (
+                min(server_wire_version, max_wire_version)
+                >= server_utils.WIRE_VERSION_DELTA
+        ):
+            delta_decoder = DeltaDecoder(deck_size)
         remove_action_mask = (
             mask_actions
             and not utils.get_default(config, 'env_config', COMMON_CONFIG).get(
@@ -510,6 +599,8 @@ def main() -> None:
                 [None] * num_parallel_games
             prev_rewards: List[Optional[Reward]] = \
                 [None] * num_parallel_games
+            if delta_decoder is not None:
+                delta_decoder.reset()
 
             while True:
                 data = wait_for_data(
@@ -521,6 +612,7 @@ def main() -> None:
                 if len(data) == 0:
                     # We have no observations; send no actions.
                     server_utils.send_actions(client, [])
+                    continue
 
                 if len(data[0]) < 4:
                     (indices, obss) = zip(*data)
@@ -537,6 +629,8 @@ def main() -> None:
                 assert all(str_player_index in obs for obs in obss), \
                     'received wrong data'
                 obss = [obs[str_player_index] for obs in obss]
+                if delta_decoder is not None:
+                    delta_decoder.decode(indices, obss)
                 _transform_observations(
                     obs_transforms,
                     remove_action_mask,
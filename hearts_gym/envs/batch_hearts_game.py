@@ -0,0 +1,812 @@
+"""
+Many games of Hearts (specifically, Black Lady) simulated at once using
+vectorized array operations.
+
+See `BatchHeartsGame` for details.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .card_deck import Card
+from .hearts_game import HeartsGame
+
+
+class BatchHeartsGame:
+    """A batch of Hearts games advanced with vectorized operations.
+
+    Needs to be `reset` before being able to play.
+
+    The rules, the card state vector and the meaning of actions are
+    exactly those of `HeartsGame`; see there for a description. Instead
+    of looping over games, all games are stored as a structure of
+    arrays with the batch of games as the first axis, so that a single
+    call to `step` plays one card in every given game.
+
+    Games may be stepped separately by passing the indices of the games
+    to step. As every game of Hearts takes the same amount of actions,
+    games that are always stepped together start and end at the
+    same time.
+
+    Like `HeartsGame`, the previous values required by the reward
+    function are kept for each game (see `RewardBatch.from_batch_game`);
+    previous states are not.
+    """
+
+
+    def __init__(
+            self,
+            num_games: int,
+            *,
+            num_players: int = 4,
+            deck_size: int = 52,
+            seed: Optional[int] = None,
+            game: Optional[HeartsGame] = None,
+    ) -> None:
+        """Construct a batch of Hearts games for a fixed amount of
+        players and cards.
+
+        Args:
+            num_games (int): Amount of games to simulate at once.
+            num_players (int): Amount of players. Only used if `game`
+                is `None`.
+            deck_size (int): Amount of cards in the deck. Only used if
+                `game` is `None`.
+            seed (Optional[int]): Random number generator seed.
+            game (Optional[HeartsGame]): A game to take the amount of
+                players and the cards in the deck from.
+        """
+        assert num_games > 0, 'need to simulate at least one game'
+        # We only use this for the card layout and rules.
+        if game is None:
+            layout = HeartsGame(num_players=num_players, deck_size=deck_size)
+        else:
+            layout = game
+
+        self.num_games = num_games
+        self.num_players = layout.num_players
+        self.max_num_cards_on_hand = layout.max_num_cards_on_hand
+        self.num_states = layout.num_states
+        self.max_penalty = layout.max_penalty
+        self.card_to_index = layout.card_to_index
+
+        num_cards = len(layout.state)
+        self._index_cards = layout.get_deck_cards()
+        """Card for each index in the card state vector."""
+        assert (
+            list(map(self.card_to_index, self._index_cards))
+            == list(range(num_cards))
+        ), 'unsupported combination of deck size and number of players'
+
+        self.card_codes = np.array(
+            [card.code for card in self._index_cards], np.int64)
+        """Code (see `Card.code`) for each index in the card
+        state vector.
+        """
+        self._card_bits = np.left_shift(1, self.card_codes)
+        """Bit of each card in a card code bitmask for each index in the
+        card state vector.
+        """
+        self._code_indices = np.array(
+            list(map(self.card_to_index, map(Card.from_code, range(
+                Card.NUM_CARDS)))),
+            np.int64,
+        )
+        """Index in the card state vector for each card code."""
+        self._card_suits = np.array(
+            [card.suit for card in self._index_cards], np.int64)
+        """Suit for each index in the card state vector."""
+        self._card_penalties = np.array(
+            list(map(layout.get_penalty, self._index_cards)), np.int64)
+        """Penalty score for each index in the card state vector."""
+        self._is_penalty_card = self._card_penalties > 0
+        self._is_heart_card = self._card_suits == Card.SUIT_HEART
+        self._first_club_index = int(np.flatnonzero(
+            self._card_suits == Card.SUIT_CLUB)[0])
+
+        self._rng = np.random.default_rng(seed)
+        self._game_indices = np.arange(num_games)
+
+        self.state = np.empty((num_games, num_cards), np.int8)
+        """The state for each card in each game."""
+        self.hands = np.zeros(
+            (num_games, self.num_players, num_cards), np.bool_)
+        """For each game and player, which cards are in hand."""
+        self.table_cards = np.full(
+            (num_games, self.num_players), -1, np.int64)
+        """Indices of the cards on the table in the order they were
+        played for each game. Unused entries are -1.
+        """
+        self.num_table_cards = np.zeros(num_games, np.int64)
+        """Amount of cards on the table for each game."""
+        self._is_reset = False
+
+        # Type hints
+        self.penalties: np.ndarray
+        self.is_first_trick: np.ndarray
+        self.leading_hearts_allowed: np.ndarray
+        self.leading_player_index: np.ndarray
+        """Index of the player that lead, i.e. started, the current
+        trick for each game.
+        """
+        self.active_player_index: np.ndarray
+        """Index of the currently active player for each game."""
+        self.leading_suit: np.ndarray
+
+        self.prev_played_cards: np.ndarray
+        """Like `HeartsGame.prev_played_cards` as card indices for
+        each game.
+
+        Entries are -1 where `HeartsGame` has `None`.
+        """
+        self.prev_was_illegals: np.ndarray
+        """Like `HeartsGame.prev_was_illegals` for each game."""
+        self.prev_table_cards: np.ndarray
+        """Indices of the cards on the table in the previous trick for
+        each game. Entries are -1 if no trick has been distributed yet.
+        """
+        self.prev_leading_suit: np.ndarray
+        self.prev_leading_player_index: np.ndarray
+        self.prev_trick_winner_index: np.ndarray
+        self.prev_trick_penalty: np.ndarray
+        """Like their `HeartsGame` counterparts for each game. Entries
+        are -1 if no trick has been distributed yet.
+        """
+        self._last_hand_cards: np.ndarray
+        """Index of the card that last left the hand of each player in
+        each game; -1 if none did yet.
+        """
+
+    def _to_game_indices(
+            self,
+            game_indices: Optional[np.ndarray],
+    ) -> np.ndarray:
+        """Return the given game indices as an index array.
+
+        Args:
+            game_indices (Optional[np.ndarray]): Indices of games. If
+                `None`, return the indices of all games.
+
+        Returns:
+            np.ndarray: Indices of the games.
+        """
+        if game_indices is None:
+            return self._game_indices
+        return np.asarray(game_indices, dtype=np.intp)
+
+    def on_table_state(self, player_index: np.ndarray) -> np.ndarray:
+        """Return the states for cards put on the table by the players
+        with the given indices.
+
+        Args:
+            player_index (np.ndarray): Indices of the players that put
+                cards on the table.
+
+        Returns:
+            np.ndarray: States for cards put on the table by the
+                given players.
+        """
+        return HeartsGame.NUM_GENERAL_STATES + player_index
+
+    def in_hand_state(self, player_index: np.ndarray) -> np.ndarray:
+        """Return the states for cards in hand of the players with the
+        given indices.
+
+        Args:
+            player_index (np.ndarray): Indices of the players that have
+                the cards in hand.
+
+        Returns:
+            np.ndarray: States for cards in hand of the given players.
+        """
+        return HeartsGame.NUM_GENERAL_STATES + self.num_players + player_index
+
+    def collected_state(self, player_index: np.ndarray) -> np.ndarray:
+        """Return the states for cards collected by the players with
+        the given indices.
+
+        Args:
+            player_index (np.ndarray): Indices of the players that have
+                collected the cards.
+
+        Returns:
+            np.ndarray: States for cards collected by the given players.
+        """
+        return (
+            HeartsGame.NUM_GENERAL_STATES
+            + 2 * self.num_players
+            + player_index
+        )
+
+    def num_cards_in_hand(self) -> np.ndarray:
+        """Return how many cards each player holds in each game.
+
+        Returns:
+            np.ndarray: Amount of cards in hand of shape
+                `(num_games, num_players)`.
+        """
+        return self.hands.sum(axis=2)
+
+    def _legal_cards(
+            self,
+            game_indices: np.ndarray,
+            player_index: np.ndarray,
+    ) -> np.ndarray:
+        """Return which cards the players with the given indices are
+        allowed to play.
+
+        Args:
+            game_indices (np.ndarray): Indices of the games to query.
+            player_index (np.ndarray): Player index for each game to
+                query legal cards for.
+
+        Returns:
+            np.ndarray: Boolean array of shape
+                `(len(game_indices), num_cards)` containing which cards
+                in hand are legal to play.
+        """
+        hand = self.hands[game_indices, player_index]
+        is_leading = (
+            player_index == self.leading_player_index[game_indices]
+        )[:, None]
+        is_first_trick = self.is_first_trick[game_indices, None]
+        follows_suit = (
+            self._card_suits[None, :]
+            == self.leading_suit[game_indices, None]
+        )
+
+        legal = np.where(
+            # No hearts or queen of spades in first trick.
+            is_first_trick,
+            ~self._is_penalty_card & (is_leading | follows_suit),
+            np.where(
+                # Can't start with hearts.
+                is_leading,
+                (
+                    self.leading_hearts_allowed[game_indices, None]
+                    | ~self._is_heart_card
+                ),
+                # Must follow suit.
+                follows_suit,
+            ),
+        )
+        legal &= hand
+
+        no_legal = ~legal.any(axis=1)
+        legal[no_legal] = hand[no_legal]
+        return legal
+
+    def _cards_to_hand_positions(
+            self,
+            game_indices: np.ndarray,
+            player_index: np.ndarray,
+    ) -> np.ndarray:
+        """Return the position in the sorted hand for each card.
+
+        Args:
+            game_indices (np.ndarray): Indices of the games to query.
+            player_index (np.ndarray): Player index for each game to
+                query hand positions for.
+
+        Returns:
+            np.ndarray: Array of shape `(len(game_indices), num_cards)`
+                containing the index in hand of each card in hand of
+                the given players. Entries for cards not in hand are
+                meaningless.
+        """
+        hand = self.hands[game_indices, player_index]
+        return np.cumsum(hand, axis=1) - 1
+
+    def get_legal_action_masks(
+            self,
+            player_index: Optional[np.ndarray] = None,
+            game_indices: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Return masks of the legal actions for the given players.
+
+        Args:
+            player_index (Optional[np.ndarray]): Player index for each
+                queried game to query legal actions for. If `None`, use
+                the active players.
+            game_indices (Optional[np.ndarray]): Indices of the games to
+                query. If `None`, query all games.
+
+        Returns:
+            np.ndarray: Array of shape
+                `(len(game_indices), max_num_cards_on_hand)` containing
+                a one for each index in hand that is legal to play.
+        """
+        game_indices = self._to_game_indices(game_indices)
+        if player_index is None:
+            player_index = self.active_player_index[game_indices]
+        legal = self._legal_cards(game_indices, player_index)
+        hand_positions = \
+            self._cards_to_hand_positions(game_indices, player_index)
+
+        action_masks = np.zeros(
+            (len(game_indices), self.max_num_cards_on_hand), np.int8)
+        batch_indices, card_indices = np.nonzero(legal)
+        action_masks[
+            batch_indices,
+            hand_positions[batch_indices, card_indices],
+        ] = 1
+        return action_masks
+
+    def _play_cards(
+            self,
+            game_indices: np.ndarray,
+            card_indices: np.ndarray,
+    ) -> None:
+        """Play the given cards from the hands of the active players.
+
+        Also update the game state accordingly; however, do not
+        distribute the tricks.
+
+        Low-level version of `step` without checks.
+
+        Args:
+            game_indices (np.ndarray): Unique indices of the games to
+                play in.
+            card_indices (np.ndarray): Index of the card to play in
+                each game.
+        """
+        active_player_index = self.active_player_index[game_indices]
+
+        self.hands[game_indices, active_player_index, card_indices] = False
+        self._last_hand_cards[game_indices, active_player_index] = \
+            card_indices
+        self.table_cards[game_indices, self.num_table_cards[game_indices]] = \
+            card_indices
+        self.num_table_cards[game_indices] += 1
+        self.state[game_indices, card_indices] = \
+            self.on_table_state(active_player_index)
+
+        is_leading = \
+            active_player_index == self.leading_player_index[game_indices]
+        self.leading_suit[game_indices[is_leading]] = \
+            self._card_suits[card_indices[is_leading]]
+
+        self.active_player_index[game_indices] = \
+            (active_player_index + 1) % self.num_players
+
+    def _get_trick_winners(self, game_indices: np.ndarray) -> np.ndarray:
+        """Return the index of the player that won the trick for
+        each given game.
+
+        Args:
+            game_indices (np.ndarray): Indices of the games to query.
+
+        Returns:
+            np.ndarray: Index of the player that won the trick in
+                each given game.
+        """
+        table_cards = self.table_cards[game_indices]
+        table_suits = self._card_suits[table_cards]
+        # Card indices are ordered by rank inside a suit.
+        ranked_table_cards = np.where(
+            table_suits == self.leading_suit[game_indices, None],
+            table_cards,
+            -1,
+        )
+        max_rank_index = ranked_table_cards.argmax(axis=1)
+        return (
+            (max_rank_index + self.leading_player_index[game_indices])
+            % self.num_players
+        )
+
+    def _distribute_tricks(
+            self,
+            game_indices: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Distribute the cards on the table according to who won
+        the trick in each given game.
+        Return the indices of the winners of the tricks and the penalty
+        scores obtained by them.
+
+        Also update the game state accordingly.
+
+        Args:
+            game_indices (np.ndarray): Unique indices of the games to
+                distribute the tricks of.
+
+        Returns:
+            np.ndarray: Index of the player that won the trick for
+                each given game.
+            np.ndarray: Penalty score of the cards obtained by the
+                player that won the trick for each given game.
+        """
+        assert (
+            self.num_table_cards[game_indices] == self.num_players
+        ).all(), 'tricks must be full for distribution'
+
+        table_cards = self.table_cards[game_indices]
+        trick_winner_index = self._get_trick_winners(game_indices)
+        trick_penalty = self._card_penalties[table_cards].sum(axis=1)
+        self.penalties[game_indices, trick_winner_index] += trick_penalty
+
+        self.state[game_indices[:, None], table_cards] = \
+            self.collected_state(trick_winner_index)[:, None]
+        self.prev_table_cards[game_indices] = table_cards
+        self.table_cards[game_indices] = -1
+        self.num_table_cards[game_indices] = 0
+
+        self.prev_leading_suit[game_indices] = \
+            self.leading_suit[game_indices]
+        self.prev_leading_player_index[game_indices] = \
+            self.leading_player_index[game_indices]
+        self.leading_player_index[game_indices] = trick_winner_index
+        self.active_player_index[game_indices] = trick_winner_index
+        self.is_first_trick[game_indices] = False
+        self.prev_trick_winner_index[game_indices] = trick_winner_index
+        self.prev_trick_penalty[game_indices] = trick_penalty
+        return trick_winner_index, trick_penalty
+
+    def step(
+            self,
+            actions: np.ndarray,
+            game_indices: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Play the card at the given index in hand of the active player
+        for each given game. Return the played cards and additional
+        information.
+
+        If an action was actually illegal, play the first legal card
+        in hand.
+
+        Also update the game states accordingly.
+
+        Args:
+            actions (np.ndarray): Index in hand of the card to play for
+                each given game.
+            game_indices (Optional[np.ndarray]): Unique indices of the
+                games to step. The other games are left as they are. If
+                `None`, step all games.
+
+        Returns:
+            np.ndarray: Indices of the cards that were played.
+            np.ndarray: Whether the action was illegal and a card
+                different from the one specified by the action was
+                played for each game.
+            np.ndarray: Index of the player that won the trick for each
+                game or -1 if the trick is still ongoing.
+            np.ndarray: Penalty score of the cards obtained by the
+                player that won the trick for each game or -1 if the
+                trick is still ongoing.
+        """
+        assert self._is_reset, \
+            'please call `reset` before interacting with the game.'
+        game_indices = self._to_game_indices(game_indices)
+        actions = np.asarray(actions)
+        assert actions.shape == game_indices.shape, \
+            'need exactly one action for each game'
+        assert (self.num_table_cards[game_indices] < self.num_players).all(), \
+            'cannot play a card when trick is already full'
+
+        active_player_index = self.active_player_index[game_indices]
+        hand = self.hands[game_indices, active_player_index]
+        num_cards_in_hand = hand.sum(axis=1)
+
+        # Just play the last card for out-of-range actions.
+        is_out_of_range = (actions < 0) | (actions >= num_cards_in_hand)
+        hand_positions = \
+            self._cards_to_hand_positions(game_indices, active_player_index)
+        chosen_positions = np.where(
+            is_out_of_range, num_cards_in_hand - 1, actions)
+        chosen_cards = (
+            hand & (hand_positions == chosen_positions[:, None])
+        ).argmax(axis=1)
+
+        # Play the first legal card instead of illegal ones.
+        legal = self._legal_cards(game_indices, active_player_index)
+        is_legal = legal[np.arange(len(game_indices)), chosen_cards]
+        card_indices = np.where(is_legal, chosen_cards, legal.argmax(axis=1))
+        # An action of -1 plays the last card, just like `HeartsGame`.
+        was_illegal = ~is_legal | (is_out_of_range & (actions != -1))
+
+        # A heart was led or played without being able to follow suit.
+        self.leading_hearts_allowed[game_indices] |= (
+            is_legal
+            & self._is_heart_card[chosen_cards]
+            & (
+                (active_player_index
+                 == self.leading_player_index[game_indices])
+                | (
+                    self._card_suits[chosen_cards]
+                    != self.leading_suit[game_indices]
+                )
+            )
+        )
+
+        self._play_cards(game_indices, card_indices)
+        # Like `HeartsGame`, store these for the next active player.
+        next_active_player_index = self.active_player_index[game_indices]
+        self.prev_played_cards[game_indices, next_active_player_index] = \
+            card_indices
+        self.prev_was_illegals[game_indices, next_active_player_index] = \
+            was_illegal
+
+        trick_winner_index = np.full(len(game_indices), -1, np.int64)
+        trick_penalty = np.full(len(game_indices), -1, np.int64)
+        is_trick_full = self.num_table_cards[game_indices] == self.num_players
+        if is_trick_full.any():
+            (
+                trick_winner_index[is_trick_full],
+                trick_penalty[is_trick_full],
+            ) = self._distribute_tricks(game_indices[is_trick_full])
+        return card_indices, was_illegal, trick_winner_index, trick_penalty
+
+    def get_prev_hand_masks(
+            self,
+            game_indices: np.ndarray,
+            player_index: np.ndarray,
+    ) -> np.ndarray:
+        """Return bitmasks of the codes (see `Card.code`) of the cards
+        in hand in the previous trick for the given players, like
+        `HeartsGame.get_prev_hand_mask`.
+
+        Args:
+            game_indices (np.ndarray): Indices of the games to query.
+            player_index (np.ndarray): Player index for each game to
+                return the bitmask for.
+
+        Returns:
+            np.ndarray: Bitmask with the bit at each card's code set for
+                each game; 0 if no card left the player's hand yet.
+        """
+        hand_masks = np.bitwise_or.reduce(
+            np.where(self.hands[game_indices, player_index],
+                     self._card_bits, 0),
+            axis=1,
+        )
+        last_hand_cards = self._last_hand_cards[game_indices, player_index]
+        return np.where(
+            last_hand_cards >= 0,
+            hand_masks | self._card_bits[last_hand_cards],
+            0,
+        )
+
+    def get_prev_table_masks(self, game_indices: np.ndarray) -> np.ndarray:
+        """Return bitmasks of the codes (see `Card.code`) of the cards
+        in `self.prev_table_cards` for the given games.
+
+        Args:
+            game_indices (np.ndarray): Indices of the games to query.
+
+        Returns:
+            np.ndarray: Bitmask with the bit at each card's code set for
+                each game.
+        """
+        prev_table_cards = self.prev_table_cards[game_indices]
+        return np.bitwise_or.reduce(
+            np.where(
+                prev_table_cards >= 0,
+                self._card_bits[prev_table_cards],
+                0,
+            ),
+            axis=1,
+        )
+
+    def has_shot_the_moon(
+            self,
+            game_indices: np.ndarray,
+            player_index: np.ndarray,
+    ) -> np.ndarray:
+        """Return whether the given players have shot the moon.
+
+        Requires the final penalty scores to be computed (see
+        `self.compute_final_penalties`).
+
+        Args:
+            game_indices (np.ndarray): Indices of the games to query.
+            player_index (np.ndarray): Player index for each game to
+                query whether they shot the moon for.
+
+        Returns:
+            np.ndarray: Whether the given players have shot the moon.
+        """
+        penalties = self.penalties[game_indices]
+        batch_indices = np.arange(len(game_indices))
+        return (
+            (penalties[batch_indices, player_index] == 0)
+            & self.are_done(game_indices)
+            & (
+                penalties[batch_indices, (player_index + 1)
+                          % self.num_players]
+                == self.max_penalty
+            )
+            & (
+                penalties[batch_indices, (player_index - 1)
+                          % self.num_players]
+                == self.max_penalty
+            )
+        )
+
+    def are_done(
+            self,
+            game_indices: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Return whether each of the given games is over.
+
+        Args:
+            game_indices (Optional[np.ndarray]): Indices of the games to
+                query. If `None`, query all games.
+
+        Returns:
+            np.ndarray: Whether each of the given games is over.
+        """
+        game_indices = self._to_game_indices(game_indices)
+        return (
+            ~self.hands[game_indices].any(axis=(1, 2))
+            & (self.num_table_cards[game_indices] == 0)
+        )
+
+    def is_done(self) -> bool:
+        """Return whether all games are over.
+
+        Returns:
+            bool: Whether all games are over.
+        """
+        return bool(self.are_done().all())
+
+    def compute_final_penalties(
+            self,
+            game_indices: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Compute and return the final penalty scores of the given
+        games, taking into account shooting the moon.
+
+        Args:
+            game_indices (Optional[np.ndarray]): Unique indices of the
+                games to compute final penalties for. If `None`, compute
+                them for all games.
+
+        Returns:
+            np.ndarray: The final penalty scores of the games of shape
+                `(len(game_indices), num_players)`.
+        """
+        game_indices = self._to_game_indices(game_indices)
+        # Indexing with an array creates a copy, which we return to
+        # avoid surprises when stored penalties change.
+        penalties = self.penalties[game_indices]
+        has_shot_the_moon = penalties == self.max_penalty
+        someone_shot_the_moon = has_shot_the_moon.any(axis=1)
+        penalties[someone_shot_the_moon] = np.where(
+            has_shot_the_moon[someone_shot_the_moon],
+            0,
+            self.max_penalty,
+        )
+        self.penalties[game_indices] = penalties
+        return penalties
+
+    def compute_rankings(
+            self,
+            game_indices: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Compute and return the final rankings of the given games.
+
+        Players with the same penalty score obtain the higher (i.e.
+        better) ranking.
+
+        Requires the final penalties to be computed (see
+        `compute_final_penalties`).
+
+        Args:
+            game_indices (Optional[np.ndarray]): Indices of the games to
+                compute rankings for. If `None`, compute them for
+                all games.
+
+        Returns:
+            np.ndarray: The final rankings of the games of shape
+                `(len(game_indices), num_players)`.
+        """
+        penalties = self.penalties[self._to_game_indices(game_indices)]
+        return 1 + (
+            penalties[:, None, :] < penalties[:, :, None]
+        ).sum(axis=2)
+
+    def deal(self) -> np.ndarray:
+        """Return randomly dealt hands for each game.
+
+        Returns:
+            np.ndarray: Array of shape `(num_games, num_cards)`
+                containing the index of the player that is dealt each
+                card in each game.
+        """
+        num_cards = self.state.shape[1]
+        shuffled_cards = np.argsort(
+            self._rng.random((self.num_games, num_cards)), axis=1)
+        owners = np.empty_like(shuffled_cards)
+        owners[self._game_indices[:, None], shuffled_cards] = \
+            np.arange(num_cards) // self.max_num_cards_on_hand
+        return owners
+
+    def hand_codes_to_deals(self, hand_codes: np.ndarray) -> np.ndarray:
+        """Return the given hands as deals accepted by `reset`.
+
+        Args:
+            hand_codes (np.ndarray): Array of shape
+                `(num_games, num_players, max_num_cards_on_hand)`
+                containing the codes (see `Card.code`) of the cards in
+                each hand in each game as returned by `Deck.deal`.
+
+        Returns:
+            np.ndarray: Array of shape `(num_games, num_cards)`
+                containing the index of the player that is dealt each
+                card in each game.
+        """
+        owners = np.empty_like(self.state, dtype=np.int64)
+        owners[
+            self._game_indices[:, None, None],
+            self._code_indices[hand_codes],
+        ] = np.arange(self.num_players)[None, :, None]
+        return owners
+
+    def reset(self, deals: Optional[np.ndarray] = None) -> None:
+        """Reset the game states.
+
+        Due to the nature of the game, this also force-plays the card
+        designating the starting player.
+
+        Args:
+            deals (Optional[np.ndarray]): Array of shape
+                `(num_games, num_cards)` containing the index of the
+                player that is dealt each card in each game. If `None`,
+                deal randomly (see `deal`).
+        """
+        if deals is None:
+            deals = self.deal()
+        deals = np.asarray(deals)
+        assert deals.shape == self.state.shape, \
+            'need exactly one owner for each card in each game'
+
+        num_games = self.num_games
+        num_players = self.num_players
+        self.hands[:] = (
+            deals[:, None, :] == np.arange(num_players)[None, :, None])
+        assert (
+            self.hands.sum(axis=2) == self.max_num_cards_on_hand
+        ).all(), 'all players must have same amount of cards at start of game'
+        self.state[:] = self.in_hand_state(deals)
+        self.penalties = np.zeros((num_games, num_players), np.int64)
+        self.is_first_trick = np.ones(num_games, np.bool_)
+        self.leading_hearts_allowed = np.zeros(num_games, np.bool_)
+        self.table_cards[:] = -1
+        self.num_table_cards[:] = 0
+
+        self.prev_played_cards = np.full_like(self.penalties, -1)
+        self.prev_was_illegals = np.zeros_like(self.penalties, np.bool_)
+        self.prev_table_cards = np.full_like(self.table_cards, -1)
+        self.prev_leading_suit = np.full(num_games, -1, np.int64)
+        self.prev_leading_player_index = np.full(num_games, -1, np.int64)
+        self.prev_trick_winner_index = np.full(num_games, -1, np.int64)
+        self.prev_trick_penalty = np.full(num_games, -1, np.int64)
+        self._last_hand_cards = np.full_like(self.prev_played_cards, -1)
+
+        # The lowest club in the game designates the starting player.
+        self.leading_player_index = deals[:, self._first_club_index].copy()
+        self.active_player_index = self.leading_player_index.copy()
+        self.leading_suit = np.full(num_games, Card.SUIT_CLUB, np.int64)
+        self._play_cards(
+            self._game_indices,
+            np.full(num_games, self._first_club_index, np.int64),
+        )
+
+        self._is_reset = True
+
+    def get_hands(self, game_index: int) -> List[List[Card]]:
+        """Return the cards in hand of each player in the game with the
+        given index.
+
+        Mostly useful for debugging purposes.
+
+        Args:
+            game_index (int): Index of the game to return hands for.
+
+        Returns:
+            List[List[Card]]: Sorted cards in hand for each player.
+        """
+        return [
+            [self._index_cards[i] for i in np.flatnonzero(hand)]
+            for hand in self.hands[game_index]
+        ]
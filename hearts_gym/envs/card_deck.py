@@ -4,7 +4,9 @@ Primitive classes for classical card game decks.
 
 import bisect
 import random
-from typing import List, Union
+from typing import List, Tuple, Union
+
+import numpy as np
 
 from hearts_gym.utils.typing import Seed
 
@@ -28,7 +30,11 @@ class Card:
     ranks are compared.
     """
 
-    __slots__ = ['suit', 'rank']
+    __slots__ = ['suit', 'rank', 'code']
+
+    suit: int
+    rank: int
+    code: int
 
     NUM_SUITS = 4
 
@@ -43,43 +49,85 @@ class Card:
     # Finally, the highest-valued card with value 12 is the ace.
     MAX_RANK = 12
 
+    NUM_CARDS = NUM_SUITS * NUM_RANKS
+
     SUITS = ['C', 'D', 'H', 'S']
     RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
 
     UNICODE_SUITS = ['♣', '♢', '♡', '♠']
     UNICODE_CARDS_START = [0x1f0d1, 0x1f0c1, 0x1f0b1, 0x1f0a1]
 
-    def __init__(self, suit: int, rank: int) -> None:
-        """Construct a card with the suit and rank.
+    _interned: List['Card'] = []
+    """All cards, indexed by their code."""
+
+    def __new__(cls, suit: int, rank: int) -> 'Card':
+        """Return the card with the suit and rank.
+
+        Cards are interned, so there only ever exists a single instance
+        for each card.
 
         Args:
             suit (int): Numerical value for a suit.
             rank (int): Numerical value for a rank.
+
+        Returns:
+            Card: The card with the given suit and rank.
+        """
+        assert 0 <= suit < cls.NUM_SUITS
+        assert 0 <= rank <= cls.MAX_RANK
+        return cls._interned[suit * cls.NUM_RANKS + rank]
+
+    @classmethod
+    def _intern_all(cls) -> None:
+        """Create the single instance of each card."""
+        for suit in range(cls.NUM_SUITS):
+            for rank in range(cls.NUM_RANKS):
+                card = object.__new__(cls)
+                card.suit = suit
+                card.rank = rank
+                # Ordered like the cards themselves.
+                card.code = suit * cls.NUM_RANKS + rank
+                cls._interned.append(card)
+
+    @classmethod
+    def from_code(cls, code: int) -> 'Card':
+        """Return the card with the given code.
+
+        Args:
+            code (int): Code of the card, that is,
+                `suit * Card.NUM_RANKS + rank`.
+
+        Returns:
+            Card: The card with the given code.
         """
-        assert 0 <= suit < self.NUM_SUITS
-        assert 0 <= rank <= self.MAX_RANK
-        self.suit = suit
-        self.rank = rank
+        return cls._interned[code]
+
+    def __reduce__(self) -> Tuple[type, Tuple[int, int]]:
+        # Keep cards interned when unpickling or copying.
+        return (Card, (self.suit, self.rank))
+
+    def __hash__(self) -> int:
+        return self.code
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Card):
             return NotImplemented
 
-        return self.suit == other.suit and self.rank == other.rank
+        return self.code == other.code
 
     def __lt__(self, other: object) -> bool:
         if not isinstance(other, Card):
             return NotImplemented
 
-        return (self.suit < other.suit
-                or self.suit == other.suit and self.rank < other.rank)
+        return self.code < other.code
 
     def __le__(self, other: object) -> bool:
         if not isinstance(other, Card):
             return NotImplemented
 
-        return (self.suit < other.suit
-                or self.suit == other.suit and self.rank <= other.rank)
+        return self.code <= other.code
 
     def as_str(self, unicode_level: int = unicode_level) -> str:
         """Return self as a string.
@@ -114,6 +162,9 @@ class Card:
         return 'Card(' + str(self.suit) + ', ' + str(self.rank) + ')'
 
 
+Card._intern_all()
+
+
 class Deck:
     """A standard playing card deck."""
     MAX_SIZE = 52
@@ -146,6 +197,9 @@ class Deck:
             f'deck size must be in (0, {self.MAX_SIZE}]'
 
         self._rng = random.Random(seed)
+        # NumPy does not support all seed types, so we derive its seed.
+        self._np_rng = np.random.default_rng(
+            random.Random(seed).getrandbits(128))
         self._build_ordered = build_ordered
 
         # This many suits will have one card more than the others
@@ -177,8 +231,15 @@ class Deck:
                 )
             ]
 
+        self._update_used_codes()
         self.size = size
-        self.reset()
+        # Do not draw from `self._np_rng` here so that the first deal
+        # only depends on the seed.
+        if not build_ordered:
+            self._deck = self._rng.sample(self._used_cards, self.size)
+        else:
+            self._deck = self._used_cards.copy()
+            self.shuffle_deck()
 
     def __len__(self) -> int:
         """Return how many cards are left in the deck.
@@ -196,25 +257,50 @@ class Deck:
 
     def reset(self) -> None:
         """Re-build and shuffle the deck."""
-        self._deck = self._build_cards()
-        if self._build_ordered:
-            self.shuffle_deck()
+        self._deck = list(map(Card.from_code, self._draw_codes().tolist()))
 
-    def _build_cards(self) -> List[Card]:
-        """Return a list of cards.
+    def _draw_codes(self) -> np.ndarray:
+        """Return the codes (see `Card.code`) of a freshly built and
+        shuffled deck.
 
         Returns:
-            List[Card]: A list of cards. If `self._build_ordered`, these
-                are not shuffled.
+            np.ndarray: Codes of the cards in deck order.
         """
         if not self._build_ordered:
-            return self._rng.sample(self._used_cards, self.size)
-        return self._used_cards.copy()
+            return self._np_rng.choice(
+                self._used_codes, self.size, replace=False)
+        return self._np_rng.permutation(self._used_codes)
 
     def shuffle_deck(self) -> None:
         """Shuffle the deck."""
         self._rng.shuffle(self._deck)
 
+    def deal(self, num_hands: int) -> np.ndarray:
+        """Re-build and shuffle the deck, then deal all of its cards
+        evenly into the given amount of hands.
+
+        Cards are obtained via `reset` and `take`, so subclasses only
+        need to override those to control which cards are dealt. The
+        deck is empty afterwards.
+
+        Args:
+            num_hands (int): Into how many hands to deal the cards.
+
+        Returns:
+            np.ndarray: Codes of the cards in each hand (see
+                `Card.code`), sorted per hand. Has shape
+                `(num_hands, self.size // num_hands)`.
+        """
+        assert self.size % num_hands == 0, \
+            'cards must be dealt evenly'
+        self.reset()
+        codes = np.array(
+            [card.code for card in self.take(len(self))], np.int64)
+
+        hand_codes = codes.reshape(num_hands, -1)
+        hand_codes.sort(axis=1)
+        return hand_codes
+
     def take(self, n: int = 1) -> List[Card]:
         """Remove and return `n` cards from the deck.
 
@@ -251,3 +337,11 @@ class Deck:
                 continue
             del self._used_cards[remove_index]
             self.size -= 1
+        self._update_used_codes()
+
+    def _update_used_codes(self) -> None:
+        """Update the codes of the cards used in this deck (see
+        `Card.code`).
+        """
+        self._used_codes = np.array(
+            [card.code for card in self._used_cards], np.int64)
@@ -78,6 +78,8 @@ class HeartsEnv(MultiAgentEnv):
             mask_actions: bool = MASK_ACTIONS_DEFAULT,
             seed: GymSeed = 0,
             obs_transforms: List[ObsTransform] = [],
+            reuse_obs_buffers: bool = False,
+            track_history: Optional[bool] = None,
     ) -> None:
         """Construct a Hearts environment with a strong random seed.
 
@@ -98,6 +100,15 @@ class HeartsEnv(MultiAgentEnv):
             seed (GymSeed): Random number generator base seed.
             obs_transforms (List[ObsTransform]): Transformations to
                 apply to the observations.
+            reuse_obs_buffers (bool): Whether to write observations
+                into buffers that are reused for each player. This
+                avoids allocations, but observations returned from
+                earlier calls will change; copy them if you need to
+                keep them around.
+            track_history (Optional[bool]): Whether the game keeps
+                track of previous states. If `None`, track history only
+                if the reward function requires it (see
+                `RewardFunction.requires_history`).
         """
         seed = self.seed(seed)[0]
         if game is None:
@@ -117,6 +128,9 @@ class HeartsEnv(MultiAgentEnv):
         #       collected by player at "clockwise" index from own + 3
         self.num_observation_states = \
             self.NUM_GENERAL_OBSERVATION_STATES + self.game.num_players * 2
+        # The game keeps each player's observed card states up to date
+        # for us.
+        self.game.enable_player_views(self._build_obs_luts())
 
         # It's important that all other keys in the dictionary are
         # ordered below these ones. Otherwise the model and policies
@@ -171,8 +185,18 @@ class HeartsEnv(MultiAgentEnv):
 
         self.action_space = spaces.Discrete(self.game.max_num_cards_on_hand)
 
+        self.reuse_obs_buffers = reuse_obs_buffers
+        num_players = self.game.num_players
+        self._cards_buffers = np.empty(
+            (num_players,) + self.game.state.shape, self.game.state.dtype)
+        self._action_mask_buffers = np.empty(
+            (num_players, self.game.max_num_cards_on_hand), np.int8)
+
         from .reward_function import RewardFunction
         self.reward_function = RewardFunction(self)
+        if track_history is None:
+            track_history = self.reward_function.requires_history
+        self.game.track_history = track_history
 
     def seed(self, seed: GymSeed = None) -> List[int]:
         """Return a strong seed for this environment's random
@@ -263,6 +287,36 @@ class HeartsEnv(MultiAgentEnv):
         """
         return (player_indices - offset_from_player_index) % num_players
 
+    def _build_obs_luts(self) -> np.ndarray:
+        """Return lookup tables mapping each card state to the
+        player index-independent observation state for each player.
+
+        Returns:
+            np.ndarray: Lookup tables of shape
+                `(num_players, game.num_states)`, one row for
+                each player.
+        """
+        num_players = self.game.num_players
+        player_indices = np.arange(num_players)
+        obs_luts = np.full(
+            (num_players, self.game.num_states),
+            self.STATE_UNKNOWN,
+            self.game.state.dtype,
+        )
+
+        for player_index in range(num_players):
+            obs_lut = obs_luts[player_index]
+            offset_indices = self.get_offset_indices(
+                player_indices, player_index, num_players)
+
+            obs_lut[self.game.on_table_state(0) + player_indices] = \
+                self.on_table_state(offset_indices)
+            obs_lut[self.game.collected_state(0) + player_indices] = \
+                self.collected_state(offset_indices, num_players)
+            obs_lut[self.game.in_hand_state(player_index)] = \
+                self.STATE_ON_HAND
+        return obs_luts
+
     def _game_state_to_obs(self, player_index: int) -> Any:
         """Return all necessary game state information as a player
         index-independent observation for the player with the given
@@ -273,6 +327,10 @@ class HeartsEnv(MultiAgentEnv):
         memory. The complete history of the game is also not included in
         the state.
 
+        If `self.reuse_obs_buffers`, the returned arrays are views into
+        buffers that are overwritten by the next observation for the
+        same player.
+
         Args:
             player_index (int): Index of the player to get an
                 observation for.
@@ -281,66 +339,14 @@ class HeartsEnv(MultiAgentEnv):
             Any: The observation with all known information of the
                 given player.
         """
-        cards_state = self.game.state.copy()
-
-        lowest_on_table_state = self.game.on_table_state(0)
-        highest_on_table_state = self.game.on_table_state(
-            self.game.num_players - 1)
-
-        lowest_in_hand_state = self.game.in_hand_state(0)
-        highest_in_hand_state = self.game.in_hand_state(
-            self.game.num_players - 1)
-
-        lowest_collected_state = self.game.collected_state(0)
-        highest_collected_state = self.game.collected_state(
-            self.game.num_players - 1)
-
-        in_own_hand_state = self.game.in_hand_state(player_index)
-
-        on_table_indices = (
-            (cards_state >= lowest_on_table_state)
-            & (cards_state <= highest_on_table_state)
-        )
-        in_hand_indices = (
-            (cards_state >= lowest_in_hand_state)
-            & (cards_state <= highest_in_hand_state)
-        )
-        collected_indices = (
-            (cards_state >= lowest_collected_state)
-            & (cards_state <= highest_collected_state)
-        )
-        in_own_hand_indices = cards_state == in_own_hand_state
-        if self.game.STATE_UNKNOWN != self.STATE_UNKNOWN:
-            state_unknown_indices = cards_state == self.game.STATE_UNKNOWN
-
-        on_table_player_indices = (
-            cards_state[on_table_indices]
-            - lowest_on_table_state
-        )
-        collected_player_indices = (
-            cards_state[collected_indices]
-            - lowest_collected_state
-        )
-
-        cards_state[on_table_indices] = self.on_table_state(
-            self.get_offset_indices(
-                on_table_player_indices,
-                player_index,
-                self.game.num_players,
-            ),
-        )
-        cards_state[in_hand_indices] = self.STATE_UNKNOWN
-        cards_state[collected_indices] = self.collected_state(
-            self.get_offset_indices(
-                collected_player_indices,
-                player_index,
-                self.game.num_players,
-            ),
-            self.game.num_players,
-        )
-        cards_state[in_own_hand_indices] = self.STATE_ON_HAND
-        if self.game.STATE_UNKNOWN != self.STATE_UNKNOWN:
-            cards_state[state_unknown_indices] = self.STATE_UNKNOWN
+        player_views = self.game.player_views
+        assert player_views is not None, 'player views are not enabled'
+        player_view = player_views[player_index]
+        if self.reuse_obs_buffers:
+            cards_state = self._cards_buffers[player_index]
+            cards_state[:] = player_view
+        else:
+            cards_state = player_view.copy()
 
         obs = {
             'cards': cards_state,
@@ -351,10 +357,11 @@ class HeartsEnv(MultiAgentEnv):
 
         if self.mask_actions:
             obs = {self.OBS_KEY: obs}
-            action_mask = np.zeros(
-                self.observation_space[self.ACTION_MASK_KEY].shape)
-            legal_actions = self.game.get_legal_actions(player_index)
-            action_mask[legal_actions] = 1
+            if self.reuse_obs_buffers:
+                action_mask = self.game.legal_action_mask(
+                    player_index, self._action_mask_buffers[player_index])
+            else:
+                action_mask = self.game.legal_action_mask(player_index)
             obs[self.ACTION_MASK_KEY] = action_mask
 
         return obs
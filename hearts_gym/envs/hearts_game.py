@@ -13,6 +13,7 @@ References:
 """
 
 import bisect
+import functools
 import itertools
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -104,6 +105,7 @@ class HeartsGame:
             num_players: int = 4,
             deck_size: int = 52,
             seed: Seed = None,
+            track_history: bool = True,
     ) -> None:
         """Construct a Hearts game for a fixed amount of players and cards.
 
@@ -111,6 +113,8 @@ class HeartsGame:
             num_players (int): Amount of players.
             deck_size (int): Amount of cards in the deck.
             seed (Seed): Random number generator seed.
+            track_history (bool): Whether to keep track of previous
+                states (see `self.track_history`).
         """
         assert self.MIN_NUM_PLAYERS <= num_players <= self.MAX_NUM_PLAYERS, (
             f'number of players must be between {self.MIN_NUM_PLAYERS} and '
@@ -143,6 +147,21 @@ class HeartsGame:
 
         self.state = np.empty(deck_size, np.int8)
         """The state for each card."""
+        self.player_views: Optional[np.ndarray] = None
+        """The state for each card as viewed by each player.
+
+        `None` unless enabled via `enable_player_views`.
+        """
+        self._player_view_luts: Optional[np.ndarray] = None
+        self.track_history = track_history
+        """Whether `prev_states` is available.
+
+        History is recorded lazily as a log of card state changes from
+        which previous snapshots are reconstructed on access. Should
+        only be changed before calling `reset`.
+
+        `prev_hands` and `prev_collected` are always available.
+        """
         self.hands: List[List[Card]] = []
         self.table_cards: List[Card] = []
         self._is_reset = False
@@ -161,11 +180,6 @@ class HeartsGame:
         """Index of the currently active player."""
         self.leading_suit: int
 
-        self.prev_hands: List[List[Card]]
-        """The cards in hand in the previous trick for each player.
-
-        Entries are empty lists if no trick has been played yet.
-        """
         self.prev_played_cards: List[Optional[Card]]
         """The last card actively played by each player.
 
@@ -181,20 +195,11 @@ class HeartsGame:
         Empty if no trick has been distributed yet.
         """
 
-        self.prev_collected: List[List[Card]]
-        """All cards collected before the previous trick."""
-
         self.prev_was_illegals: List[Optional[bool]]
         """For each player, whether their previous action was illegal.
 
         Entries are `None` if no action has been taken yet.
         """
-        self.prev_states: List[Optional[np.ndarray]]
-        """State before the last action for each player.
-
-        Entries are `None` if no action has been taken yet.
-        """
-
         self.prev_was_first_trick: Optional[bool]
         """Whether the previous trick was the first one.
 
@@ -212,6 +217,130 @@ class HeartsGame:
         self.prev_trick_winner_index: Optional[int]
         self.prev_trick_penalty: Optional[int]
 
+        self._state_log: List[Tuple[Any, Any]]
+        """Indices and previous values of each card state change."""
+        self._prev_state_versions: List[Optional[int]]
+        """Length of the state log before the last action for
+        each player.
+        """
+        self._last_hand_cards: List[Optional[Card]]
+        """The card that last left the hand of each player."""
+        self._prev_collected_lengths: List[int]
+        """Amount of cards collected before the previous trick for
+        each player.
+        """
+        self._hand_code_masks: List[int]
+        """Bitmask of the codes (see `Card.code`) of the cards in hand
+        for each player.
+        """
+        self._table_code_mask: int
+        """Bitmask of the codes of the cards on the table."""
+        self._prev_table_code_mask: int
+        """Bitmask of the codes of the cards on the table in the
+        previous trick.
+        """
+
+    @property
+    def prev_hands(self) -> List[List[Card]]:
+        """The cards in hand in the previous trick for each player.
+
+        Entries are empty lists if no trick has been played yet.
+        """
+        prev_hands: List[List[Card]] = []
+        for (hand, card) in zip(self.hands, self._last_hand_cards):
+            if card is None:
+                prev_hands.append([])
+                continue
+            prev_hand = hand.copy()
+            bisect.insort(prev_hand, card)
+            prev_hands.append(prev_hand)
+        return prev_hands
+
+    @property
+    def prev_collected(self) -> List[List[Card]]:
+        """All cards collected before the previous trick."""
+        return [
+            collected[:prev_length]
+            for (collected, prev_length) in zip(
+                    self.collected, self._prev_collected_lengths)
+        ]
+
+    @property
+    def prev_states(self) -> List[Optional[np.ndarray]]:
+        """State before the last action for each player.
+
+        Entries are `None` if no action has been taken yet.
+
+        Requires `self.track_history`; for the environment, set
+        `RewardFunction.requires_history` to enable it.
+        """
+        assert self.track_history, (
+            'history tracking is disabled; set '
+            '`RewardFunction.requires_history = True` to use `prev_states`'
+        )
+        return [
+            None if version is None else self._reconstruct_state(version)
+            for version in self._prev_state_versions
+        ]
+
+    def _reconstruct_state(self, version: int) -> np.ndarray:
+        """Return the card state vector as it was when the state log had
+        the given length.
+
+        Args:
+            version (int): Length of the state log at the time of the
+                state to reconstruct.
+
+        Returns:
+            np.ndarray: The reconstructed card state vector.
+        """
+        state = self.state.copy()
+        for (state_indices, old_state) in reversed(self._state_log[version:]):
+            state[state_indices] = old_state
+        return state
+
+    def _record_prev_state(self, player_index: int) -> None:
+        """Remember the current state as the state before the action of
+        the player with the given index.
+
+        Args:
+            player_index (int): Index of the player about to act.
+        """
+        if self.track_history:
+            self._prev_state_versions[player_index] = len(self._state_log)
+
+    def _reset_history(self) -> None:
+        """Forget all previous hands, collected cards and states."""
+        self._state_log = []
+        self._prev_state_versions = [None] * self.num_players
+        self._last_hand_cards = [None] * self.num_players
+        self._prev_collected_lengths = [0] * self.num_players
+
+    def get_prev_hand_mask(self, player_index: int) -> int:
+        """Return a bitmask of the codes (see `Card.code`) of the cards
+        in `self.prev_hands` for the player with the given index.
+
+        Args:
+            player_index (int): Index of the player to return the
+                bitmask for.
+
+        Returns:
+            int: Bitmask with the bit at each card's code set.
+        """
+        card = self._last_hand_cards[player_index]
+        if card is None:
+            return 0
+        return self._hand_code_masks[player_index] | 1 << card.code
+
+    def get_prev_table_mask(self) -> int:
+        """Return a bitmask of the codes (see `Card.code`) of the cards
+        in `self.prev_table_cards`.
+
+        Returns:
+            int: Bitmask with the bit at each card's code set.
+        """
+        return self._prev_table_code_mask
+
     def card_to_index(self, card: Card) -> int:
         """Return the index in the card state vector for the given card.
 
@@ -221,11 +350,7 @@ class HeartsGame:
         Returns:
             int: Index into the card state vector.
         """
-        return (
-            card.rank
-            + self._accumulated_cards_per_suit[card.suit]
-            - self._accumulated_cards_per_suit[0]
-        )
+        return self._card_indices[card.code]
 
     def index_to_card(self, index: int) -> Card:
         """Return the card from a given index for the card state vector.
@@ -236,15 +361,65 @@ class HeartsGame:
         Returns:
             Card: Card obtained from the card state vector index.
         """
-        suit, num_accumulated = next(
-            (suit, num_cards)
-            for (suit, num_cards) in enumerate(
-                    self._accumulated_cards_per_suit,
-            )
-            if index < num_cards
+        return self._index_cards[index]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _build_card_tables(
+            cards_per_suit: Tuple[int, ...],
+    ) -> Tuple[Tuple[int, ...], Tuple[Card, ...]]:
+        """Return lookup tables from card codes to card state vector
+        indices and from card state vector indices to cards.
+
+        Tables are shared between all games with the same deck
+        configuration.
+
+        Args:
+            cards_per_suit (Tuple[int, ...]): Amount of cards in the
+                deck for each suit.
+
+        Returns:
+            Tuple[int, ...]: Card state vector index for each card code.
+            Tuple[Card, ...]: Card for each card state vector index.
+        """
+        accumulated_cards_per_suit = list(
+            itertools.accumulate(cards_per_suit))
+        card_indices = tuple(
+            card.rank
+            + accumulated_cards_per_suit[card.suit]
+            - accumulated_cards_per_suit[0]
+            for card in map(Card.from_code, range(Card.NUM_CARDS))
         )
-        rank = index - (num_accumulated - self._accumulated_cards_per_suit[0])
-        return Card(suit, rank)
+
+        index_cards = []
+        for index in range(accumulated_cards_per_suit[-1]):
+            suit, num_accumulated = next(
+                (suit, num_cards)
+                for (suit, num_cards) in enumerate(
+                        accumulated_cards_per_suit,
+                )
+                if index < num_cards
+            )
+            rank = index - (num_accumulated - accumulated_cards_per_suit[0])
+            index_cards.append(Card(suit, rank))
+        return card_indices, tuple(index_cards)
+
+    def get_deck_cards(self) -> List[Card]:
+        """Return all cards that are dealt in this game, sorted.
+
+        Returns:
+            List[Card]: Sorted cards remaining in the deck after
+                removing cards for the deck size and number of players.
+        """
+        # Removed cards always have the lowest ranks of their suit.
+        return [
+            Card(suit, rank)
+            for suit in range(Card.NUM_SUITS)
+            for rank in range(
+                    Card.NUM_RANKS - self._cards_per_suit[suit],
+                    Card.NUM_RANKS,
+            )
+        ]
 
     def on_table_state(self, player_index: int) -> int:
         """Return the state for a card put on the table by the player with the
@@ -305,12 +480,74 @@ class HeartsGame:
             state_indices = np.fromiter(map(self.card_to_index, cards))
         else:
             state_indices = self.card_to_index(cards)
+        self._set_state(state_indices, new_state)
+
+    def _set_state(
+            self,
+            state_indices: Union[List[int], int, slice, np.ndarray],
+            new_state: int,
+    ) -> None:
+        """Set the state for the cards at the given indices to the given
+        state, keeping player views up to date.
+
+        Args:
+            state_indices (Union[List[int], int, slice, np.ndarray]):
+                Indices into the card state vector to update.
+            new_state (int): New state to assign to all cards.
+        """
+        if self.track_history:
+            old_state = self.state[state_indices]
+            if isinstance(state_indices, slice):
+                old_state = old_state.copy()
+            self._state_log.append((state_indices, old_state))
         self.state[state_indices] = new_state
+        if self.player_views is not None:
+            assert self._player_view_luts is not None
+            # Transpose so the same assignment works for any index type.
+            self.player_views.T[state_indices] = \
+                self._player_view_luts[:, new_state]
+
+    def enable_player_views(self, player_view_luts: np.ndarray) -> None:
+        """Maintain the card state vector as viewed by each player in
+        `self.player_views`.
+
+        Views are updated incrementally whenever the state of a card
+        changes, so only changed cards are touched.
+
+        Args:
+            player_view_luts (np.ndarray): Lookup tables of shape
+                `(num_players, num_states)` mapping each card state to
+                the state as viewed by each player.
+        """
+        assert player_view_luts.shape == (self.num_players, self.num_states), \
+            'need one lookup table entry per player and state'
+        self._player_view_luts = player_view_luts
+        self.player_views = np.empty(
+            (self.num_players,) + self.state.shape,
+            player_view_luts.dtype,
+        )
+        if self._is_reset:
+            self.player_views[:] = player_view_luts[:, self.state]
+        else:
+            self.player_views.T[:] = player_view_luts[:, self.STATE_UNKNOWN]
 
     @staticmethod
     def get_penalty(card: Card) -> int:
         """Return the penalty score of the given card.
 
+        Args:
+            card (Card): Card to return the penalty score for.
+
+        Returns:
+            int: Penalty score of the card.
+        """
+        return _CARD_PENALTIES[card.code]
+
+    @staticmethod
+    def _compute_penalty(card: Card) -> int:
+        """Return the penalty score of the given card without using the
+        cached penalty scores.
+
         Args:
             card (Card): Card to return the penalty score for.
 
@@ -543,77 +780,91 @@ class HeartsGame:
         ]
         self._accumulated_cards_per_suit = \
             list(itertools.accumulate(self._cards_per_suit))
+        self._card_indices, self._index_cards = self._build_card_tables(
+            tuple(self._cards_per_suit))
+        self._card_index_array = np.array(self._card_indices, np.int64)
         return deck_size - len(player_removed_cards), removed_cards
 
-    @staticmethod
-    def _extract_action(
-            action_card_tuple: Union[Tuple[int, Card], Tuple[int]],
-    ) -> int:
-        """Return the action from a tuple.
-
-        Args:
-            action_card_tuple (Union[Tuple[int, Card], Tuple[int]]):
-                Tuple to extract the action from.
-
-        Returns:
-            int: Index in hand for which card to play.
-        """
-        return action_card_tuple[0]
-
-    def get_legal_actions(self, player_index: int) -> List[int]:
-        """Return all legal actions for the player with the given index.
+    def _legal_code_mask(self, player_index: int) -> int:
+        """Return a bitmask of the codes (see `Card.code`) of the cards
+        in hand the player with the given index is allowed to play.
 
         Args:
-            player_index (int): Player index to query legal actions for.
+            player_index (int): Player index to query legal cards for.
 
         Returns:
-            List[int]: Indices in hand for which cards are legal to play.
+            int: Bitmask with the bit at each legal card's code set.
         """
-        hand = self.hands[player_index]
+        hand = self._hand_code_masks[player_index]
+        is_leading = player_index == self.leading_player_index
 
-        actions: Union[List[Tuple[int, Card]], List[Tuple[int]]]
         if (
                 # No hearts or queen of spades in first trick.
                 self.is_first_trick
         ):
-            if player_index == self.leading_player_index:
-                actions = list(filter(
-                    lambda i_card: not self.has_penalty(i_card[1]),
-                    enumerate(hand),
-                ))
-            else:
-                actions = list(filter(
-                    lambda i_card: (i_card[1].suit == self.leading_suit
-                                    and not self.has_penalty(i_card[1])),
-                    enumerate(hand),
-                ))
-
+            legal = hand & ~_PENALTY_CODE_MASK
+            if not is_leading:
+                legal &= _SUIT_CODE_MASKS[self.leading_suit]
         elif (
                 # Can't start with hearts.
                 not self.leading_hearts_allowed
-                and player_index == self.leading_player_index
+                and is_leading
         ):
-            actions = list(filter(
-                lambda i_card: i_card[1].suit != Card.SUIT_HEART,
-                enumerate(hand),
-            ))
-
+            legal = hand & ~_SUIT_CODE_MASKS[Card.SUIT_HEART]
         elif (
                 # Must follow suit.
-                player_index != self.leading_player_index
+                not is_leading
         ):
-            actions = list(filter(
-                lambda i_card: i_card[1].suit == self.leading_suit,
-                enumerate(hand),
-            ))
-
+            legal = hand & _SUIT_CODE_MASKS[self.leading_suit]
         else:
-            actions = list(map(lambda x: (x,), range(len(hand))))
+            legal = hand
+
+        if legal == 0:
+            return hand
+        return legal
+
+    def legal_action_mask(
+            self,
+            player_index: int,
+            out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Return a mask of the legal actions for the player with the
+        given index.
+
+        Args:
+            player_index (int): Player index to query legal actions for.
+            out (Optional[np.ndarray]): Array of length
+                `self.max_num_cards_on_hand` to write the mask into.
+                If `None`, a new array is allocated.
+
+        Returns:
+            np.ndarray: Mask of which indices in hand are legal to play
+                with length `self.max_num_cards_on_hand`; `out` if it
+                was given.
+        """
+        legal = self._legal_code_mask(player_index)
+        hand = self.hands[player_index]
+        if out is None:
+            out = np.empty(self.max_num_cards_on_hand, np.int8)
+        out[:len(hand)] = [legal >> card.code & 1 for card in hand]
+        out[len(hand):] = 0
+        return out
 
-        actions: List[int] = list(map(self._extract_action, actions))
-        if len(actions) == 0:
-            actions = list(range(len(hand)))
-        return actions
+    def get_legal_actions(self, player_index: int) -> List[int]:
+        """Return all legal actions for the player with the given index.
+
+        Args:
+            player_index (int): Player index to query legal actions for.
+
+        Returns:
+            List[int]: Indices in hand for which cards are legal to play.
+        """
+        legal = self._legal_code_mask(player_index)
+        return [
+            i
+            for (i, card) in enumerate(self.hands[player_index])
+            if legal >> card.code & 1
+        ]
 
     def _play_card(self, card_index: int) -> Card:
         """Play and return the card at the given index in hand of the
@@ -631,8 +882,11 @@ class HeartsGame:
             Card: The card that was played.
         """
         hand = self.hands[self.active_player_index]
-        self.prev_hands[self.active_player_index] = hand.copy()
         card_to_play = hand.pop(card_index)
+        self._last_hand_cards[self.active_player_index] = card_to_play
+        card_bit = 1 << card_to_play.code
+        self._hand_code_masks[self.active_player_index] ^= card_bit
+        self._table_code_mask |= card_bit
         self.table_cards.append(card_to_play)
         self._update_state(card_to_play,
                            self.on_table_state(self.active_player_index))
@@ -669,13 +923,16 @@ class HeartsGame:
         trick_penalty = self.penalize_cards(self.table_cards)
         self.penalties[trick_winner_index] += trick_penalty
 
-        self.prev_collected[trick_winner_index] = \
-            self.collected[trick_winner_index].copy()
+        self._prev_collected_lengths[trick_winner_index] = \
+            len(self.collected[trick_winner_index])
         self.collected[trick_winner_index].extend(self.table_cards)
         self._update_state(self.table_cards,
                            self.collected_state(trick_winner_index))
-        self.prev_table_cards = self.table_cards.copy()
-        self.table_cards.clear()
+        # No need to copy as we start a new list for the next trick.
+        self.prev_table_cards = self.table_cards
+        self.table_cards = []
+        self._prev_table_code_mask = self._table_code_mask
+        self._table_code_mask = 0
 
         self.prev_leading_suit = self.leading_suit
         self.prev_leading_player_index = self.leading_player_index
@@ -716,7 +973,7 @@ class HeartsGame:
             'please call `reset` before interacting with the game.'
         assert len(self.table_cards) < self.num_players, \
             'cannot play a card when trick is already full'
-        self.prev_states[self.active_player_index] = self.state.copy()
+        self._record_prev_state(self.active_player_index)
         self.prev_leading_hearts_allowed[self.active_player_index] = \
             self.leading_hearts_allowed
         hand = self.hands[self.active_player_index]
@@ -1003,18 +1260,15 @@ class HeartsGame:
         Check the description of the `HeartsGame` class to find out how
         the starting player is chosen.
         """
-        self.deck.reset()
-        self.state[:] = self.STATE_UNKNOWN
+        self._reset_history()
+        self._set_state(slice(None), self.STATE_UNKNOWN)
         self.penalties = [0] * self.num_players
         self.is_first_trick = True
         self.leading_hearts_allowed = False
 
-        self.prev_hands = [[] for _ in range(self.num_players)]
         self.prev_played_cards = [None] * self.num_players
         self.prev_table_cards = []
-        self.prev_collected = [[] for _ in range(self.num_players)]
         self.prev_was_illegals = [None] * self.num_players
-        self.prev_states = [None] * self.num_players
         self.prev_was_first_trick = None
         self.prev_leading_hearts_allowed = [None] * self.num_players
 
@@ -1024,37 +1278,34 @@ class HeartsGame:
         self.prev_leading_player_index = None
 
         self.collected = [[] for _ in range(self.num_players)]
-        self.hands.clear()
-        for player_index in range(self.num_players):
-            hand = self.deck.take(self.max_num_cards_on_hand)
-            # Sort so we get deterministic behavior for illegal actions.
-            hand.sort()
-            self.hands.append(hand)
-            self._update_state(hand, self.in_hand_state(player_index))
-        assert all(map(
-            lambda hand: len(hand) == len(self.hands[0]),
-            self.hands,
-        )), \
+        # Hands are sorted so we get deterministic behavior for
+        # illegal actions.
+        hand_codes = self.deck.deal(self.num_players)
+        assert hand_codes.shape[1] == self.max_num_cards_on_hand, \
             'all players must have same amount of cards at start of game'
+        hand_indices = self._card_index_array[hand_codes]
+        self.hands.clear()
+        self._hand_code_masks = np.bitwise_or.reduce(
+            1 << hand_codes, axis=1).tolist()
+        for (player_index, codes) in enumerate(hand_codes.tolist()):
+            self.hands.append(list(map(Card.from_code, codes)))
+            self._set_state(
+                hand_indices[player_index], self.in_hand_state(player_index))
         self.table_cards.clear()
+        self._table_code_mask = 0
+        self._prev_table_code_mask = 0
 
-        card_index: Optional[int] = None
-        self.leading_player_index = None
-        for rank in range(
-                Card.NUM_RANKS - self._cards_per_suit[Card.SUIT_CLUB],
-                Card.NUM_RANKS,
+        # The lowest club in the game designates the starting player.
+        # As clubs have the lowest codes and hands are sorted, it is the
+        # first card in the hand of the starting player.
+        leading_player_index = int(hand_codes[:, 0].argmin())
+        if (
+                Card.from_code(hand_codes[leading_player_index, 0]).suit
+                == Card.SUIT_CLUB
         ):
-            card = Card(Card.SUIT_CLUB, rank)
-            for (player_index, hand) in enumerate(self.hands):
-                card_index = bisect.bisect_left(hand, card)
-                if card_index >= len(hand) or hand[card_index] != card:
-                    continue
-
-                self.leading_player_index = player_index
-                break
-
-            if self.leading_player_index is not None:
-                break
+            self.leading_player_index = leading_player_index
+        else:
+            self.leading_player_index = None
 
         # We went through all clubs and _still_ haven't found a
         # starting player.
@@ -1069,8 +1320,7 @@ class HeartsGame:
             'deck must be empty at start of game'
 
         self.active_player_index = self.leading_player_index
-        assert card_index is not None
-        self._play_card(card_index)
+        self._play_card(0)
         # We explicitly want the played card to still be set to `None`.
         # Refers to `self.prev_played_cards`.
         self.prev_was_illegals[self.leading_player_index] = False
@@ -1103,3 +1353,23 @@ class HeartsGame:
         output.append('yes' if self.leading_hearts_allowed else 'no')
 
         return ''.join(output)
+
+
+_CARD_PENALTIES = [
+    HeartsGame._compute_penalty(Card.from_code(code))
+    for code in range(Card.NUM_CARDS)
+]
+"""Penalty score of each card, indexed by card code."""
+_PENALTY_CODE_MASK = sum(
+    1 << code
+    for (code, penalty) in enumerate(_CARD_PENALTIES)
+    if penalty > 0
+)
+"""Bitmask of the codes of all cards with a penalty score greater
+than zero.
+"""
+_SUIT_CODE_MASKS = [
+    sum(1 << (suit * Card.NUM_RANKS + rank) for rank in range(Card.NUM_RANKS))
+    for suit in range(Card.NUM_SUITS)
+]
+"""Bitmask of the codes of all cards of each suit, indexed by suit."""
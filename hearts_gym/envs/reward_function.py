@@ -2,201 +2,295 @@
 The reward function an agent optimizes to win at Hearts.
 """
 
+from typing import Any, Callable, Optional, Sequence, Tuple
+
 import numpy as np
 
 from hearts_gym.utils.typing import Reward
+from .batch_hearts_game import BatchHeartsGame
+from .card_deck import Card
 from .hearts_env import HeartsEnv
+from .hearts_game import HeartsGame
+
+_NONE = -1
+"""Value for missing entries in `RewardBatch` arrays."""
+
+_SUIT_BITS = (1 << Card.NUM_RANKS) - 1
+"""Mask of all ranks of a suit in a card code bitmask."""
+
+_HIGHEST_RANKS = np.full(1 << Card.NUM_RANKS, _NONE, np.int64)
+"""Highest rank set in a suit's rank bits; `_NONE` if no rank is set."""
+for _rank in range(Card.NUM_RANKS):
+    _HIGHEST_RANKS[1 << _rank:1 << (_rank + 1)] = _rank
+
+_QUEEN_OF_SPADES = Card(Card.SUIT_SPADE, HeartsGame.RANK_QUEEN).code
+_HIGH_SPADES_MASK = (
+    1 << Card(Card.SUIT_SPADE, HeartsGame.RANK_QUEEN + 1).code
+    | 1 << Card(Card.SUIT_SPADE, Card.MAX_RANK).code
+)
+"""Bitmask of the king and ace of spades."""
+
+
+def _has_card(masks: Any, code: Any) -> Any:
+    """Return whether the card with the given code is in each bitmask.
+
+    Args:
+        masks (Any): Card code bitmasks.
+        code (Any): Code of the card to query.
+
+    Returns:
+        Any: Whether each bitmask contains the card.
+    """
+    return (masks >> code) & 1 != 0
+
+
+def _suit_ranks(masks: Any, suits: Any) -> Any:
+    """Return the rank bits of the given suits in each bitmask.
+
+    Args:
+        masks (Any): Card code bitmasks.
+        suits (Any): Suit to extract for each bitmask.
+
+    Returns:
+        Any: Bitmasks with the bit at `rank` set for each card of
+            the suit.
+    """
+    return (masks >> (suits * Card.NUM_RANKS)) & _SUIT_BITS
+
+
+def _scalar_where(condition: Any, x: Any, y: Any) -> Any:
+    """Scalar version of `np.where`.
+
+    Args:
+        condition (Any): Whether to return `x` or `y`.
+        x (Any): Value returned if `condition` is true.
+        y (Any): Value returned if `condition` is false.
+
+    Returns:
+        Any: `x` if `condition` is true, `y` otherwise.
+    """
+    return x if condition else y
+
+
+class RewardBatch:
+    """Information required to compute rewards, stored as arrays with
+    one entry per reward to compute.
+
+    Cards are given as their codes (see `Card.code`); collections of
+    cards as bitmasks with the bit at each card's code set. Missing
+    values are given as -1.
+
+    A batch for a single reward may also hold plain scalars instead
+    of arrays.
+    """
+
+    def __init__(
+            self,
+            player_indices: Any,
+            prev_active_player_indices: Any,
+            trick_is_over: Any,
+            was_illegal: Any,
+            played_cards: Any,
+            prev_hands: Any,
+            prev_table_cards: Any,
+            leading_suits: Any,
+            prev_leading_suits: Any,
+            prev_leading_player_indices: Any,
+            trick_winner_indices: Any,
+            trick_penalties: Any,
+            has_shot_the_moon: Any,
+    ) -> None:
+        """Construct a batch of reward information.
+
+        Args:
+            player_indices (Any): Index of the player to return the
+                reward for.
+            prev_active_player_indices (Any): Index of the previously
+                active player that took the action.
+            trick_is_over (Any): Whether the action ended the trick.
+            was_illegal (Any): `HeartsGame.prev_was_illegals` of
+                the player.
+            played_cards (Any): `HeartsGame.prev_played_cards` of
+                the player.
+            prev_hands (Any): `HeartsGame.prev_hands` of the player.
+            prev_table_cards (Any): `HeartsGame.prev_table_cards`.
+            leading_suits (Any): `HeartsGame.leading_suit`.
+            prev_leading_suits (Any): `HeartsGame.prev_leading_suit`.
+            prev_leading_player_indices (Any):
+                `HeartsGame.prev_leading_player_index`.
+            trick_winner_indices (Any):
+                `HeartsGame.prev_trick_winner_index`.
+            trick_penalties (Any): `HeartsGame.prev_trick_penalty`.
+            has_shot_the_moon (Any): Whether the player has shot
+                the moon.
+        """
+        self.player_indices = player_indices
+        self.prev_active_player_indices = prev_active_player_indices
+        self.trick_is_over = trick_is_over
+        self.was_illegal = was_illegal
+        self.played_cards = played_cards
+        self.prev_hands = prev_hands
+        self.prev_table_cards = prev_table_cards
+        self.leading_suits = leading_suits
+        self.prev_leading_suits = prev_leading_suits
+        self.prev_leading_player_indices = prev_leading_player_indices
+        self.trick_winner_indices = trick_winner_indices
+        self.trick_penalties = trick_penalties
+        self.has_shot_the_moon = has_shot_the_moon
+
+    @staticmethod
+    def _get_info(
+            game: HeartsGame,
+            player_index: int,
+            prev_active_player_index: int,
+            trick_is_over: bool,
+    ) -> Tuple[Any, ...]:
+        """Return the reward information for the given player in the
+        given game in the order of the arguments of `RewardBatch`.
+
+        Args:
+            game (HeartsGame): Game to get reward information from.
+            player_index (int): Index of the player to return the
+                reward for.
+            prev_active_player_index (int): Index of the previously
+                active player that took the action.
+            trick_is_over (bool): Whether the action ended the trick.
+
+        Returns:
+            Tuple[Any, ...]: Reward information as scalars.
+        """
+        def or_none(value: Optional[int]) -> int:
+            return _NONE if value is None else value
+
+        card = game.prev_played_cards[player_index]
+        return (
+            player_index,
+            prev_active_player_index,
+            trick_is_over,
+            bool(game.prev_was_illegals[player_index]),
+            _NONE if card is None else card.code,
+            game.get_prev_hand_mask(player_index),
+            game.get_prev_table_mask(),
+            or_none(game.leading_suit),
+            or_none(game.prev_leading_suit),
+            or_none(game.prev_leading_player_index),
+            or_none(game.prev_trick_winner_index),
+            or_none(game.prev_trick_penalty),
+            game.has_shot_the_moon(player_index),
+        )
+
+    @classmethod
+    def from_game(
+            cls,
+            game: HeartsGame,
+            player_index: int,
+            prev_active_player_index: int,
+            trick_is_over: bool,
+    ) -> 'RewardBatch':
+        """Return reward information for the given player in the given
+        game as scalars.
+
+        Args:
+            game (HeartsGame): Game to get reward information from.
+            player_index (int): Index of the player to return the
+                reward for.
+            prev_active_player_index (int): Index of the previously
+                active player that took the action.
+            trick_is_over (bool): Whether the action ended the trick.
+
+        Returns:
+            RewardBatch: Reward information for the given player.
+        """
+        return cls(*cls._get_info(
+            game, player_index, prev_active_player_index, trick_is_over))
+
+    @classmethod
+    def from_games(
+            cls,
+            games: Sequence[HeartsGame],
+            player_indices: Sequence[int],
+            prev_active_player_indices: Sequence[int],
+            trick_is_over: Sequence[bool],
+    ) -> 'RewardBatch':
+        """Return a batch of reward information for the given players in
+        the given games.
+
+        Games may be repeated to compute rewards for multiple players of
+        the same game.
+
+        Args:
+            games (Sequence[HeartsGame]): Game of each reward.
+            player_indices (Sequence[int]): Index of the player to
+                return each reward for.
+            prev_active_player_indices (Sequence[int]): Index of the
+                previously active player that took the action in
+                each game.
+            trick_is_over (Sequence[bool]): Whether the action ended the
+                trick in each game.
+
+        Returns:
+            RewardBatch: Reward information for the given players.
+        """
+        infos = zip(*map(
+            cls._get_info,
+            games,
+            player_indices,
+            prev_active_player_indices,
+            trick_is_over,
+        ))
+        return cls(*(np.array(info, np.int64) for info in infos))
+
+    @classmethod
+    def from_batch_game(
+            cls,
+            game: BatchHeartsGame,
+            game_indices: np.ndarray,
+            player_indices: np.ndarray,
+            prev_active_player_indices: np.ndarray,
+            trick_is_over: np.ndarray,
+    ) -> 'RewardBatch':
+        """Return a batch of reward information for the given players in
+        the given games of a batch of games.
+
+        Games may be repeated to compute rewards for multiple players of
+        the same game.
 
+        Args:
+            game (BatchHeartsGame): Batch of games to get reward
+                information from.
+            game_indices (np.ndarray): Index of the game of
+                each reward.
+            player_indices (np.ndarray): Index of the player to return
+                each reward for.
+            prev_active_player_indices (np.ndarray): Index of the
+                previously active player that took the action in
+                each game.
+            trick_is_over (np.ndarray): Whether the action ended the
+                trick in each game.
 
-def get_card_name(card):
-    if not card:
-        return None
-
-    if card.suit == 3:
-        # Spades
-        if card.rank == 12:
-            return 'ace_spades'
-        elif card.rank == 11:
-            return 'king_spades'
-        elif card.rank == 10:
-            return 'queen_spades'
-        elif card.rank == 9:
-            return 'jack_spades'
-        elif card.rank == 8:
-            return 'ten_spades'
-        elif card.rank == 7:
-            return 'nine_spades'
-        elif card.rank == 6:
-            return 'eight_spades'
-        elif card.rank == 5:
-            return 'seven_spades'
-        elif card.rank == 4:
-            return 'six_spades'
-        elif card.rank == 3:
-            return 'five_spades'
-        elif card.rank == 2:
-            return 'four_spades'
-        elif card.rank == 1:
-            return 'three_spades'
-        elif card.rank == 0:
-            return 'two_spades'
-    elif card.suit == 0:
-        # Clubs
-        if card.rank == 12:
-            return 'ace_clubs'
-        elif card.rank == 11:
-            return 'king_clubs'
-        elif card.rank == 10:
-            return 'queen_clubs'
-        elif card.rank == 9:
-            return 'jack_clubs'
-        elif card.rank == 8:
-            return 'ten_clubs'
-        elif card.rank == 7:
-            return 'nine_clubs'
-        elif card.rank == 6:
-            return 'eight_clubs'
-        elif card.rank == 5:
-            return 'seven_clubs'
-        elif card.rank == 4:
-            return 'six_clubs'
-        elif card.rank == 3:
-            return 'five_clubs'
-        elif card.rank == 2:
-            return 'four_clubs'
-        elif card.rank == 1:
-            return 'three_clubs'
-        elif card.rank == 0:
-            return 'two_clubs'
-    elif card.suit == 2:
-        # Hearts
-        if card.rank == 12:
-            return 'ace_hearts'
-        elif card.rank == 11:
-            return 'king_hearts'
-        elif card.rank == 10:
-            return 'queen_hearts'
-        elif card.rank == 9:
-            return 'jack_hearts'
-        elif card.rank == 8:
-            return 'ten_hearts'
-        elif card.rank == 7:
-            return 'nine_hearts'
-        elif card.rank == 6:
-            return 'eight_hearts'
-        elif card.rank == 5:
-            return 'seven_hearts'
-        elif card.rank == 4:
-            return 'six_hearts'
-        elif card.rank == 3:
-            return 'five_hearts'
-        elif card.rank == 2:
-            return 'four_hearts'
-        elif card.rank == 1:
-            return 'three_hearts'
-        elif card.rank == 0:
-            return 'two_hearts'
-    elif card.suit == 1:
-        # Diamond
-        if card.rank == 12:
-            return 'ace_diamond'
-        elif card.rank == 11:
-            return 'king_diamond'
-        elif card.rank == 10:
-            return 'queen_diamond'
-        elif card.rank == 9:
-            return 'jack_diamond'
-        elif card.rank == 8:
-            return 'ten_diamond'
-        elif card.rank == 7:
-            return 'nine_diamond'
-        elif card.rank == 6:
-            return 'eight_diamond'
-        elif card.rank == 5:
-            return 'seven_diamond'
-        elif card.rank == 4:
-            return 'six_diamond'
-        elif card.rank == 3:
-            return 'five_diamond'
-        elif card.rank == 2:
-            return 'four_diamond'
-        elif card.rank == 1:
-            return 'three_diamond'
-        elif card.rank == 0:
-            return 'two_diamond'
-    return None
-
-
-def check_relevant_cards(cards_list):
-    cards = {
-        'ace_clubs': False,  # Clubs
-        'king_clubs': False,
-        'queen_clubs': False,
-        'jack_clubs': False,
-        'ten_clubs': False,
-        'nine_clubs': False,
-        'eight_clubs': False,
-        'seven_clubs': False,
-        'six_clubs': False,
-        'five_clubs': False,
-        'four_clubs': False,
-        'three_clubs': False,
-        'two_clubs': False,
-        'ace_diamonds': False,  # Diamonds
-        'king_diamonds': False,
-        'queen_diamonds': False,
-        'jack_diamonds': False,
-        'ten_diamonds': False,
-        'nine_diamonds': False,
-        'eight_diamonds': False,
-        'seven_diamonds': False,
-        'six_diamonds': False,
-        'five_diamonds': False,
-        'four_diamonds': False,
-        'three_diamonds': False,
-        'two_diamonds': False,
-        'ace_hearts': False,  # Hearts
-        'king_hearts': False,
-        'queen_hearts': False,
-        'jack_hearts': False,
-        'ten_hearts': False,
-        'nine_hearts': False,
-        'eight_hearts': False,
-        'seven_hearts': False,
-        'six_hearts': False,
-        'five_hearts': False,
-        'four_hearts': False,
-        'three_hearts': False,
-        'two_hearts': False,
-        'ace_spades': False,  # Spades
-        'king_spades': False,
-        'queen_spades': False,
-        'jack_spades': False,
-        'ten_spades': False,
-        'nine_spades': False,
-        'eight_spades': False,
-        'seven_spades': False,
-        'six_spades': False,
-        'five_spades': False,
-        'four_spades': False,
-        'three_spades': False,
-        'two_spades': False,
-    }
-    suits = {
-        'clubs': False,  # 0
-        'diamonds': False,  # 1
-        'hearts': False,  # 2
-        'spades': False,  # 3
-    }
-    for card in cards_list:
-        card_name = get_card_name(card)
-        if card_name:
-            cards[card_name] = True
-    suits[0] = sum([card.suit == 0 for card in cards_list])
-    suits[1] = sum([card.suit == 1 for card in cards_list])
-    suits[2] = sum([card.suit == 2 for card in cards_list])
-    suits[3] = sum([card.suit == 3 for card in cards_list])
-    return cards, suits
+        Returns:
+            RewardBatch: Reward information for the given players.
+        """
+        played_cards = game.prev_played_cards[game_indices, player_indices]
+        return cls(
+            player_indices,
+            prev_active_player_indices,
+            trick_is_over,
+            game.prev_was_illegals[game_indices, player_indices],
+            np.where(
+                played_cards != _NONE,
+                game.card_codes[played_cards],
+                _NONE,
+            ),
+            game.get_prev_hand_masks(game_indices, player_indices),
+            game.get_prev_table_masks(game_indices),
+            game.leading_suit[game_indices],
+            game.prev_leading_suit[game_indices],
+            game.prev_leading_player_index[game_indices],
+            game.prev_trick_winner_index[game_indices],
+            game.prev_trick_penalty[game_indices],
+            game.has_shot_the_moon(game_indices, player_indices),
+        )
 
 
 class RewardFunction:
@@ -204,6 +298,17 @@ class RewardFunction:
     The reward function an agent optimizes to win at Hearts.
 
     Calling this returns the reward.
+
+    Rewards are computed by `_compute_rewards`, which works both for
+    batches of arrays and for single scalar rewards.
+    """
+
+    requires_history = False
+    """Whether the reward function uses `self.game.prev_states`. If not,
+    the environment disables history tracking in the game.
+
+    Set this to `True` when reading `self.game.prev_states`; all other
+    previous values are available either way.
     """
 
     def __init__(self, env: HeartsEnv):
@@ -240,150 +345,189 @@ class RewardFunction:
         Returns:
             Reward: Reward for the player with the given index.
         """
-        reward = 0
-        if self.game.prev_was_illegals[player_index]:
-            return -self.game.max_penalty * self.game.max_num_cards_on_hand
+        info = RewardBatch.from_game(
+            self.game,
+            player_index,
+            prev_active_player_index,
+            trick_is_over,
+        )
+        return int(self._compute_rewards(info, _scalar_where))
+
+    def compute_rewards(self, batch: RewardBatch) -> np.ndarray:
+        """Return the rewards for all entries in the given batch.
 
-        card = self.game.prev_played_cards[player_index]
+        See `compute_reward` for caveats regarding which player receives
+        which reward.
 
-        card_in_hands = self.game.prev_hands[player_index]
+        Args:
+            batch (RewardBatch): Information to compute the rewards
+                from. Entries may come from different games with the
+                same configuration as `self.game`.
 
-        if card is None:
-            # The agent did not take a turn until now; no information
-            # to provide.
-            return 0
+        Returns:
+            np.ndarray: Reward for each entry in the batch.
+        """
+        return self._compute_rewards(batch, np.where)
+
+    def _compute_rewards(
+            self,
+            batch: RewardBatch,
+            where: Callable[[Any, Any, Any], Any],
+    ) -> Any:
+        """Return the rewards for all entries in the given batch.
 
-        # Get card name and cards in hand and table
-        card_name = get_card_name(card)
-        table_cards, table_suits = check_relevant_cards(self.game.prev_table_cards)
-        in_hand, in_hand_suits = check_relevant_cards(card_in_hands)
+        Only uses operators and `where`, so this works on arrays as
+        well as scalars.
 
+        Args:
+            batch (RewardBatch): Information to compute the rewards
+                from.
+            where (Callable[[Any, Any, Any], Any]): Function selecting
+                between two values like `np.where`.
+
+        Returns:
+            Any: Reward for each entry in the batch.
+        """
+        max_penalty = self.game.max_penalty
+        max_reward = max_penalty * self.game.max_num_cards_on_hand
+        player_indices = batch.player_indices
+        has_card = batch.played_cards != _NONE
+        card = where(has_card, batch.played_cards, 0)
+        suit = card // Card.NUM_RANKS
+        rank = card % Card.NUM_RANKS
+        in_hand = batch.prev_hands
+        on_table = batch.prev_table_cards
+        # Missing suits are only used where they are irrelevant; just
+        # avoid negative shifts.
+        leading_suits = where(
+            batch.leading_suits != _NONE, batch.leading_suits, 0)
+        prev_leading_suits = where(
+            batch.prev_leading_suits != _NONE, batch.prev_leading_suits, 0)
+        trick_penalties = batch.trick_penalties
+
+        table_has_queen = _has_card(on_table, _QUEEN_OF_SPADES)
         # Check if ace or king of spades are in the table
-        ace_or_king = table_cards['ace_spades'] or table_cards['king_spades']
-
-        if trick_is_over:
-            reward = 0
-            if self.game.prev_trick_winner_index == player_index:
-                if table_cards['queen_spades']:
-                    reward += -1  # -self.game.max_penalty  # Punish if we won and the queen of spades was on the table
-
-            if self.game.prev_trick_winner_index == player_index:
-                if self.game.prev_trick_penalty > 0:
-                    reward += -1  # -self.game.penalties[player_index] / 2  # Punish getting hearts, depending on how many we already have
-
-            # If queen of spades was played
-            if card_name == 'queen_spades':
-                # Reward if the leading suit was not spades (got rid of it)
-                if self.game.leading_suit != 3:
-                    reward += self.game.max_penalty * self.game.max_num_cards_on_hand # self.game.max_penalty * 2
-
-                # Reward if the ace or king of spades were in the table
-                if ace_or_king:
-                    reward += self.game.max_penalty * self.game.max_num_cards_on_hand # self.game.max_penalty * 2
-            else:
-                # Punish if the ace or king of spades were in the table or
-                # spades was not the leading suit and the player has the queen
-                # in hand
-
-                if (ace_or_king or self.game.leading_suit != 3) and \
-                        in_hand['queen_spades']:
-                    reward += -1  # -self.game.max_penalty / 2
-
-            if self.game.has_shot_the_moon(player_index):
-                return self.game.max_penalty * self.game.max_num_cards_on_hand
-
-            # If we are the last player
-            if (self.game.prev_leading_player_index - 1) % 4 == player_index:
-                if self.game.prev_leading_suit == 3 and not table_cards['queen_spades']:
-                    if card_name in ('king_spades', 'ace_spades'):
-                        reward += 1  # Got rid of the king or ace - reward
-                    elif in_hand['ace_spades'] or in_hand['king_spades']:
-                        reward += -1  # didnt get rid of the king or ace - punish
-
-            if self.game.prev_leading_suit != 3:  # Spades is not the leading suit
-                if card_name in ('king_spades', 'ace_spades'):
-                    reward += 1  # Got rid of the ace or king of spades - reward
-                elif in_hand_suits[self.game.prev_leading_suit] == 0:  # We dont have to fllow
-                    if in_hand['ace_spades'] or in_hand['king_spades']:
-                        reward += -1  # Didnt get rid of the ace or king of spades - punish
-
-            # If we won the trick
-            if self.game.prev_trick_winner_index == player_index:
-
-                # Find highest card of the leading suit in the table
-                highest_rank = 0
-                for card_in_table in self.game.prev_table_cards:
-                    if card_in_table.suit == self.game.leading_suit:
-                        if card_in_table.rank > highest_rank:
-                            highest_rank = card_in_table.rank
-
-                # Find if we have either a lower or higher card that could have won
-                has_higher = False
-                has_lower = False
-                for card_in_hand in card_in_hands:
-                    if card.suit == card_in_hand.suit:
-
-                        # Check if we have a higher card of that suit in hand
-                        # We could have won by playing that
-                        if card_in_hand.rank > card.rank:
-                            has_higher = True
-
-                        # Check if we have a lower card of that suit in hand, that
-                        # is higher than the highest on the table
-                        elif card_in_hand.rank < card.rank:
-                            if card.rank > highest_rank:
-                                has_lower = True
-
-                if has_higher:
-                    reward += -1  # Could have won with higher card, punish
-                # if has_lower:
-                #     return 1   # Could have won with lower card, reward
-
-                # If the trick had no penalty
-                if self.game.prev_trick_penalty == 0:
-                    if any([hand_card.rank > card.rank for hand_card in card_in_hands if
-                            hand_card.suit == self.game.leading_suit]):
-                        reward += -1  # If we played a low card but could have used a higher card - punish
-                    elif any([hand_card.rank < card.rank for hand_card in card_in_hands if
-                              hand_card.suit == self.game.leading_suit]):
-                        reward += 1  # If we played a high card but could have used a low card - reward
-            else:  # Did not win the trick
-                reward += 2
-                leading_suit_table_cards = [other_card.rank
-                                            for other_card in self.game.prev_table_cards
-                                            if other_card.suit == self.game.prev_leading_suit]
-                winning_rank = max(leading_suit_table_cards)
-
-                leading_suit_hand_cards = [other_card.rank
-                                           for other_card in card_in_hands
-                                           if other_card.suit == self.game.prev_leading_suit
-                                           and other_card.rank < winning_rank]
-
-                if len(leading_suit_hand_cards) > 0:
-                    highest_rank_in_hand = max(leading_suit_hand_cards)
-                    if highest_rank_in_hand > card.rank:
-                        reward -= 1  # If we could have played a higher ranking card but didnt - punish
-                    elif highest_rank_in_hand <= card.rank:
-                        reward += 1  # If we couldnt have played a higher ranking card but didnt - reward
-
-                if card.suit == 2:
-                    # especially if it is a heart
-                    reward -= 2
-
-            if self.game.prev_trick_winner_index == player_index:
-                if self.game.prev_trick_penalty == 0:
-                    reward += self.game.max_penalty  # 5
-                else:
-                    assert self.game.prev_trick_penalty is not None
-                    reward += -self.game.prev_trick_penalty
-            return reward
-        else:
-            # If we are the first player
-            if self.game.prev_leading_player_index == player_index and len(self.game.prev_table_cards) == 1:
-                # Didnt open with a high card - reward
-                if card.rank < 11:
-                    reward += 11 - card.rank
-                    if card.suit == 2:
-                        # especially if it is a heart
-                        reward -= 2
-            return reward
+        ace_or_king = on_table & _HIGH_SPADES_MASK != 0
+        hand_has_queen = _has_card(in_hand, _QUEEN_OF_SPADES)
+        hand_has_ace_or_king = in_hand & _HIGH_SPADES_MASK != 0
+        played_queen = card == _QUEEN_OF_SPADES
+        played_ace_or_king = _has_card(_HIGH_SPADES_MASK, card)
+        leading_not_spades = leading_suits != Card.SUIT_SPADE
+        prev_leading_spades = batch.prev_leading_suits == Card.SUIT_SPADE
+        won_trick = batch.trick_winner_indices == player_indices
+        no_trick_penalty = trick_penalties == 0
+
+        # Trick is over
+        over_rewards = 0
+        # Punish if we won and the queen of spades was on the table
+        over_rewards -= won_trick & table_has_queen
+        # Punish getting hearts
+        over_rewards -= won_trick & (trick_penalties > 0)
+
+        # If queen of spades was played, reward if the leading suit was
+        # not spades (got rid of it) and if the ace or king of spades
+        # were in the table.
+        # Otherwise, punish if the ace or king of spades were in the
+        # table or spades was not the leading suit and the player has
+        # the queen in hand.
+        over_rewards += where(
+            played_queen,
+            max_reward * leading_not_spades + max_reward * ace_or_king,
+            where((ace_or_king | leading_not_spades) & hand_has_queen, -1, 0),
+        )
+
+        # If we are the last player and spades was leading without the
+        # queen on the table, reward getting rid of the king or ace;
+        # punish not getting rid of it.
+        is_last_player = (
+            (batch.prev_leading_player_indices - 1) % 4 == player_indices)
+        over_rewards += where(
+            is_last_player & prev_leading_spades,
+            where(
+                table_has_queen,
+                0,
+                where(
+                    played_ace_or_king,
+                    1,
+                    where(hand_has_ace_or_king, -1, 0),
+                ),
+            ),
+            0,
+        )
+
+        # If spades is not the leading suit, reward getting rid of the
+        # ace or king of spades; punish not getting rid of it if we
+        # didn't have to follow suit.
+        did_not_follow = _suit_ranks(in_hand, prev_leading_suits) == 0
+        over_rewards += where(
+            prev_leading_spades,
+            0,
+            where(
+                played_ace_or_king,
+                1,
+                where(did_not_follow & hand_has_ace_or_king, -1, 0),
+            ),
+        )
+
+        # If we won the trick
+        # Punish if we could have won with a higher card
+        won_rewards = where(
+            _suit_ranks(in_hand, suit) >> (rank + 1) != 0, -1, 0)
+        # If the trick had no penalty, punish if we played a low card
+        # but could have used a higher card; reward if we played a high
+        # card but could have used a low card.
+        leading_ranks = _suit_ranks(in_hand, leading_suits)
+        won_rewards += where(
+            no_trick_penalty,
+            where(
+                leading_ranks >> (rank + 1) != 0,
+                -1,
+                where(leading_ranks & ((1 << rank) - 1) != 0, 1, 0),
+            ),
+            0,
+        )
+        won_rewards += where(no_trick_penalty, max_penalty, -trick_penalties)
+
+        # If we did not win the trick
+        lost_rewards = 2
+        winning_ranks = _HIGHEST_RANKS[
+            _suit_ranks(on_table, prev_leading_suits)]
+        lower_ranks = (
+            _suit_ranks(in_hand, prev_leading_suits)
+            & ((1 << where(winning_ranks > 0, winning_ranks, 0)) - 1)
+        )
+        # Punish if we could have played a higher ranking card but
+        # didn't; reward if we couldn't.
+        lost_rewards += where(
+            lower_ranks != 0,
+            where(_HIGHEST_RANKS[lower_ranks] > rank, -1, 1),
+            0,
+        )
+        # Especially punish if it is a heart
+        lost_rewards -= 2 * (suit == Card.SUIT_HEART)
+
+        over_rewards += where(won_trick, won_rewards, lost_rewards)
+        over_rewards = where(
+            batch.has_shot_the_moon, max_reward, over_rewards)
+
+        # Trick is not over
+        # If we are the first player and didn't open with a high card,
+        # reward; especially if it is a heart.
+        single_table_card = (
+            (on_table != 0) & (on_table & (on_table - 1) == 0))
+        opened_low = (
+            (batch.prev_leading_player_indices == player_indices)
+            & single_table_card
+            & (rank < 11)
+        )
+        not_over_rewards = where(
+            opened_low,
+            11 - rank - 2 * (suit == Card.SUIT_HEART),
+            0,
+        )
+
+        rewards = where(batch.trick_is_over, over_rewards, not_over_rewards)
+        # The agent did not take a turn until now; no information
+        # to provide.
+        rewards = where(has_card, rewards, 0)
+        return where(batch.was_illegal, -max_reward, rewards)
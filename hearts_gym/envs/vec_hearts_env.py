@@ -3,11 +3,17 @@ Vectorized multi-agent Heats environment using multiple processes for
 additional speed.
 """
 
+import multiprocessing
+from multiprocessing.connection import Connection
 from multiprocessing.pool import ThreadPool
-from typing import Any, Iterator, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from hearts_gym import utils
+from hearts_gym.envs.batch_hearts_game import BatchHeartsGame
 from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.envs.reward_function import RewardBatch
 from hearts_gym.utils.mock_pool import MockPool
 from hearts_gym.utils.typing import (
     Action,
@@ -17,17 +23,233 @@ from hearts_gym.utils.typing import (
     MultiReward,
 )
 
+SharedArraySpec = Tuple[str, str, Tuple[int, ...], str]
+"""Key, shared memory name, shape and data type of a shared array."""
+
+NO_INDEX = -1
+"""Stored in shared arrays in place of an index that is `None`."""
+
+
+def _create_shared_array(
+        shape: Tuple[int, ...],
+        dtype: Any,
+) -> Tuple[Any, np.ndarray]:
+    """Return a new zero-filled shared memory block and an array
+    backed by it.
+
+    Args:
+        shape (Tuple[int, ...]): Shape of the array to create.
+        dtype (Any): Data type of the array to create.
+
+    Returns:
+        SharedMemory: The shared memory block backing the array.
+        np.ndarray: Array backed by the shared memory block.
+    """
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise RuntimeError(
+            'process-backed environments require Python 3.8 or newer')
+
+    num_bytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    shm = shared_memory.SharedMemory(create=True, size=num_bytes)
+    array = np.ndarray(shape, dtype, buffer=shm.buf)
+    array[...] = 0
+    return shm, array
+
+
+def _attach_shared_arrays(
+        specs: List[SharedArraySpec],
+) -> Tuple[List[Any], Dict[str, np.ndarray]]:
+    """Return the shared memory blocks and arrays described by the
+    given specifications.
+
+    Args:
+        specs (List[SharedArraySpec]): Specifications of the shared
+            arrays to attach to.
+
+    Returns:
+        List[SharedMemory]: The attached shared memory blocks.
+        Dict[str, np.ndarray]: Arrays backed by the shared memory
+            blocks by their keys.
+    """
+    from multiprocessing import shared_memory
+
+    shms = []
+    arrays = {}
+    for (key, name, shape, dtype) in specs:
+        shm = shared_memory.SharedMemory(name=name)
+        shms.append(shm)
+        arrays[key] = np.ndarray(shape, dtype, buffer=shm.buf)
+    return shms, arrays
+
+
+def _write_obs(
+        arrays: Dict[str, np.ndarray],
+        env_index: int,
+        player_index: int,
+        obs: Any,
+        mask_actions: bool,
+) -> None:
+    """Write the given observation into the shared arrays.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): Shared arrays to write to.
+        env_index (int): Index of the environment in the arrays.
+        player_index (int): Index of the player the observation is for.
+        obs (Any): Observation to write.
+        mask_actions (bool): Whether the observation contains an
+            action mask.
+    """
+    if mask_actions:
+        arrays['action_mask'][env_index, player_index] = \
+            obs[HeartsEnv.ACTION_MASK_KEY]
+        obs = obs[HeartsEnv.OBS_KEY]
+    arrays['cards'][env_index, player_index] = obs['cards']
+    arrays['leading_hearts_allowed'][env_index, player_index] = \
+        obs['leading_hearts_allowed']
+    arrays['is_ready'][env_index, player_index] = True
+
+
+def _write_legal_actions(
+        arrays: Dict[str, np.ndarray],
+        env_index: int,
+        env: HeartsEnv,
+) -> None:
+    """Write the active player and their legal actions for the given
+    environment into the shared arrays.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): Shared arrays to write to.
+        env_index (int): Index of the environment in the arrays.
+        env (HeartsEnv): Environment to query.
+    """
+    arrays['active_player_index'][env_index] = env.active_player_index
+    legal_actions = arrays['legal_actions'][env_index]
+    if env.game.is_done():
+        legal_actions[:] = 0
+    else:
+        env.game.legal_action_mask(env.active_player_index, legal_actions)
+
+
+def _run_worker(
+        conn: Connection,
+        envs: List[HeartsEnv],
+        env_offset: int,
+        specs: List[SharedArraySpec],
+) -> None:
+    """Step through the given environments as commanded via the given
+    connection, writing results into shared arrays.
+
+    Args:
+        conn (Connection): Connection to receive commands from.
+        envs (List[HeartsEnv]): Environments to act in.
+        env_offset (int): Index of the first environment in the
+            shared arrays.
+        specs (List[SharedArraySpec]): Specifications of the shared
+            arrays to write to.
+    """
+    shms, arrays = _attach_shared_arrays(specs)
+    env_slice = slice(env_offset, env_offset + len(envs))
+    arrays = {key: array[env_slice] for (key, array) in arrays.items()}
+    mask_actions = envs[0].mask_actions
+
+    try:
+        while True:
+            command, env_indices, actions = conn.recv()
+            if command == 'close':
+                break
+
+            if command == 'reset':
+                arrays['is_ready'][:] = False
+                arrays['is_all_done'][:] = False
+                for (i, env) in enumerate(envs):
+                    for (player_index, obs) in env.reset().items():
+                        _write_obs(arrays, i, player_index, obs, mask_actions)
+                    _write_legal_actions(arrays, i, env)
+
+            elif command == 'step':
+                arrays['is_ready'][env_indices] = False
+                for (i, action) in zip(env_indices.tolist(), actions):
+                    env = envs[i]
+                    obs, reward, is_done, info = env.step(
+                        {env.active_player_index: action})
+                    for (player_index, player_obs) in obs.items():
+                        _write_obs(
+                            arrays, i, player_index, player_obs, mask_actions)
+                        arrays['reward'][i, player_index] = \
+                            reward[player_index]
+                        arrays['is_done'][i, player_index] = \
+                            is_done[player_index]
+
+                    player_info = next(iter(info.values()))
+                    arrays['is_all_done'][i] = is_done['__all__']
+                    arrays['info_indices'][i] = [
+                        player_info['prev_active_player_index'],
+                        env.game.card_to_index(player_info['card']),
+                        player_info['was_illegal'],
+                        player_info['leading_player_index'],
+                        (
+                            NO_INDEX
+                            if player_info['trick_winner_index'] is None
+                            else player_info['trick_winner_index']
+                        ),
+                        (
+                            NO_INDEX
+                            if player_info['trick_penalty'] is None
+                            else player_info['trick_penalty']
+                        ),
+                    ]
+                    if is_done['__all__']:
+                        arrays['final_penalties'][i] = \
+                            player_info['final_penalties']
+                        arrays['final_rankings'][i] = \
+                            player_info['final_rankings']
+                    _write_legal_actions(arrays, i, env)
+
+            else:
+                raise ValueError(f'unknown command "{command}"')
+            conn.send(None)
+    finally:
+        del arrays
+        for shm in shms:
+            shm.close()
+        conn.close()
+
 
 class VecHeartsEnv(HeartsEnv):
     """Vectorized multi-agent Hearts environment.
 
-    The list of environments is sharded along a given number of processes.
+    The list of environments is sharded along a given number of threads
+    or processes.
+
+    When using processes, each process keeps its shard of environments
+    for the whole lifetime of this object. Only actions are sent to the
+    processes; observations, action masks, rewards and other
+    information are written into shared memory. In this case, the
+    environments returned by `get_envs` and others are _not_ updated;
+    use `get_active_player_indices` and `get_legal_actions` to query
+    the environments instead.
+
+    Alternatively, all environments may be simulated by a single
+    `BatchHeartsGame`, advancing all stepped games with vectorized
+    operations instead of stepping each environment on its own. The
+    environments only supply their decks and configuration then; just
+    like with processes, they are _not_ updated. Rewards are computed
+    via `RewardFunction.compute_rewards`.
+    """
+
+    NUM_INFO_INDICES = 6
+    """Amount of integers stored per environment for step information
+    when using processes.
     """
 
     def __init__(
             self,
             envs: List[HeartsEnv],
             num_procs: int = utils.get_num_cpus() - 1,
+            use_processes: bool = False,
+            use_batch_game: bool = False,
     ) -> None:
         """Construct a vectorized Hearts environment over the
         given environments.
@@ -36,15 +258,37 @@ class VecHeartsEnv(HeartsEnv):
             envs (List[HeartsEnv]): The environments to act in
                 in parallel.
             num_procs (int): Amount of processes to use for parallel
-                vectorized processing. If 0 or 1, do not start
-                extra processes.
+                vectorized processing. If 0 or 1 and not
+                `use_processes`, do not start extra processes. Not used
+                with `use_batch_game`.
+            use_processes (bool): Whether to use persistent worker
+                processes writing to shared memory instead of threads.
+                Requires Python 3.8 or newer.
+            use_batch_game (bool): Whether to simulate all environments
+                in a single vectorized `BatchHeartsGame` instead of
+                stepping each environment.
         """
+        assert not (use_processes and use_batch_game), \
+            'cannot use processes and a batch game at the same time'
         self.num_envs = len(envs)
         self._envs = envs
         self._first_env = envs[0]
+        self.use_processes = use_processes
+        self.use_batch_game = use_batch_game
 
-        self._pool: ThreadPool
-        if num_procs <= 1:
+        self._batch_game: Optional[BatchHeartsGame] = None
+        self._obs_luts: Optional[np.ndarray] = None
+        self._pool: Optional[ThreadPool] = None
+        self._workers: List[Tuple[multiprocessing.Process, Connection]] = []
+        self._shard_bounds: List[Tuple[int, int]] = []
+        self._shms: List[Any] = []
+        self._arrays: Dict[str, np.ndarray] = {}
+
+        if use_batch_game:
+            self._create_batch_game()
+        elif use_processes:
+            self._start_workers(max(num_procs, 1))
+        elif num_procs <= 1:
             self._pool = MockPool()
         else:
             self._pool = ThreadPool(processes=num_procs)
@@ -97,14 +341,573 @@ class VecHeartsEnv(HeartsEnv):
         """
         return self._envs
 
+    def _create_batch_game(self) -> None:
+        """Create the batch game simulating all environments."""
+        env = self._first_env
+        assert not env._obs_transforms, \
+            'observation transformations are not supported with a batch game'
+        assert not env.reward_function.requires_history, \
+            'previous states are not supported with a batch game'
+        self._batch_game = BatchHeartsGame(self.num_envs, game=env.game)
+        self._obs_luts = env._build_obs_luts()
+
+    def _start_workers(self, num_procs: int) -> None:
+        """Allocate the shared arrays and start the worker processes.
+
+        Args:
+            num_procs (int): Amount of worker processes to start.
+        """
+        env = self._first_env
+        assert not env._obs_transforms, \
+            'observation transformations are not supported with processes'
+        num_players = env.num_players
+        num_envs = self.num_envs
+        max_num_cards_on_hand = env.game.max_num_cards_on_hand
+
+        shapes: Dict[str, Tuple[Tuple[int, ...], Any]] = {
+            'cards': (
+                (num_envs, num_players) + env.game.state.shape,
+                env.game.state.dtype,
+            ),
+            'leading_hearts_allowed': ((num_envs, num_players), np.bool_),
+            'action_mask': (
+                (num_envs, num_players, max_num_cards_on_hand),
+                np.int8,
+            ),
+            'is_ready': ((num_envs, num_players), np.bool_),
+            'reward': ((num_envs, num_players), np.float64),
+            'is_done': ((num_envs, num_players), np.bool_),
+            'is_all_done': ((num_envs,), np.bool_),
+            'info_indices': ((num_envs, self.NUM_INFO_INDICES), np.int64),
+            'final_penalties': ((num_envs, num_players), np.int64),
+            'final_rankings': ((num_envs, num_players), np.int64),
+            'active_player_index': ((num_envs,), np.int64),
+            'legal_actions': ((num_envs, max_num_cards_on_hand), np.int8),
+        }
+        specs: List[SharedArraySpec] = []
+        for (key, (shape, dtype)) in shapes.items():
+            shm, array = _create_shared_array(shape, dtype)
+            self._shms.append(shm)
+            self._arrays[key] = array
+            specs.append((key, shm.name, shape, np.dtype(dtype).str))
+        # Games count as done before the first reset.
+        self._arrays['is_all_done'][:] = True
+
+        num_procs = min(num_procs, num_envs)
+        shards = np.array_split(np.arange(num_envs), num_procs)
+        for shard in shards:
+            start = int(shard[0])
+            end = int(shard[-1]) + 1
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_worker,
+                args=(child_conn, self._envs[start:end], start, specs),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._workers.append((process, parent_conn))
+            self._shard_bounds.append((start, end))
+
+    def _command_workers(
+            self,
+            command: str,
+            env_indices: Optional[np.ndarray] = None,
+            actions: Optional[np.ndarray] = None,
+    ) -> None:
+        """Send the given command to the workers and wait until they
+        are finished.
+
+        Args:
+            command (str): Command to execute.
+            env_indices (Optional[np.ndarray]): Sorted indices of the
+                environments to execute the command in. Only workers
+                holding any of them receive the command. If `None`,
+                command all workers.
+            actions (Optional[np.ndarray]): Actions to execute, one for
+                each environment in `env_indices`; each worker receives
+                only the ones for its shard.
+        """
+        commanded_conns = []
+        for ((_, conn), (start, end)) in zip(
+                self._workers, self._shard_bounds):
+            if env_indices is None:
+                shard_indices = None
+                shard_actions = None
+            else:
+                (shard_start, shard_end) = np.searchsorted(
+                    env_indices, [start, end])
+                if shard_start == shard_end:
+                    continue
+                shard_indices = env_indices[shard_start:shard_end] - start
+                shard_actions = None
+                if actions is not None:
+                    shard_actions = actions[shard_start:shard_end]
+            conn.send((command, shard_indices, shard_actions))
+            commanded_conns.append(conn)
+        for conn in commanded_conns:
+            conn.recv()
+
+    def _read_obs(self, env_index: int, player_index: int) -> Any:
+        """Return the observation stored in the shared arrays.
+
+        Args:
+            env_index (int): Index of the environment to read.
+            player_index (int): Index of the player to read the
+                observation of.
+
+        Returns:
+            Any: The stored observation.
+        """
+        arrays = self._arrays
+        obs = {
+            'cards': arrays['cards'][env_index, player_index].copy(),
+            'leading_hearts_allowed': bool(
+                arrays['leading_hearts_allowed'][env_index, player_index]),
+        }
+        if self.mask_actions:
+            obs = {
+                self.OBS_KEY: obs,
+                self.ACTION_MASK_KEY: (
+                    arrays['action_mask'][env_index, player_index].copy()),
+            }
+        return obs
+
+    def _read_step(self, env_index: int) -> Tuple[
+            MultiObservation,
+            MultiReward,
+            MultiIsDone,
+            MultiInfo,
+    ]:
+        """Return the step information stored in the shared arrays in
+        the same format as `HeartsEnv.step`.
+
+        Args:
+            env_index (int): Index of the environment to read.
+
+        Returns:
+            MultiObservation: Observations for each ready agent.
+            MultiReward: Reward values for each ready agent.
+            MultiIsDone: Whether each ready agent is done.
+            MultiInfo: Info values for each ready agent.
+        """
+        arrays = self._arrays
+        game_is_done = bool(arrays['is_all_done'][env_index])
+        (
+            prev_active_player_index,
+            card_index,
+            was_illegal,
+            leading_player_index,
+            trick_winner_index,
+            trick_penalty,
+        ) = arrays['info_indices'][env_index].tolist()
+        card = self._first_env.game.index_to_card(card_index)
+
+        obs: MultiObservation = {}
+        reward: MultiReward = {}
+        is_done: MultiIsDone = {'__all__': game_is_done}
+        info: MultiInfo = {}
+        for player_index in np.flatnonzero(arrays['is_ready'][env_index]):
+            player_index = int(player_index)
+            obs[player_index] = self._read_obs(env_index, player_index)
+            reward[player_index] = \
+                arrays['reward'][env_index, player_index].item()
+            is_done[player_index] = \
+                bool(arrays['is_done'][env_index, player_index])
+
+            player_info = {
+                'prev_active_player_index': prev_active_player_index,
+                'active_player_index': int(
+                    arrays['active_player_index'][env_index]),
+                'card': card,
+                'was_illegal': bool(was_illegal),
+                'leading_player_index': leading_player_index,
+                'trick_winner_index': (
+                    None
+                    if trick_winner_index == NO_INDEX
+                    else trick_winner_index
+                ),
+                'trick_penalty': (
+                    None
+                    if trick_penalty == NO_INDEX
+                    else trick_penalty
+                ),
+            }
+            if game_is_done:
+                player_info['final_penalties'] = \
+                    arrays['final_penalties'][env_index].tolist()
+                player_info['final_rankings'] = \
+                    arrays['final_rankings'][env_index].tolist()
+            info[player_index] = player_info
+        return obs, reward, is_done, info
+
+    def _read_batch_obs(
+            self,
+            env_indices: np.ndarray,
+            player_indices: np.ndarray,
+    ) -> List[Any]:
+        """Return the observations of the given players in the batch
+        game in the same format as `HeartsEnv.step`.
+
+        Args:
+            env_indices (np.ndarray): Index of the environment of
+                each observation.
+            player_indices (np.ndarray): Index of the player of
+                each observation.
+
+        Returns:
+            List[Any]: Observation for each given player.
+        """
+        game = self._batch_game
+        assert game is not None and self._obs_luts is not None
+        cards = self._obs_luts[
+            player_indices[:, None], game.state[env_indices]]
+        leading_hearts_allowed = \
+            game.leading_hearts_allowed[env_indices].tolist()
+        if not self.mask_actions:
+            return [
+                {'cards': cards[i], 'leading_hearts_allowed': allowed}
+                for (i, allowed) in enumerate(leading_hearts_allowed)
+            ]
+
+        action_masks = \
+            game.get_legal_action_masks(player_indices, env_indices)
+        return [
+            {
+                self.OBS_KEY: {
+                    'cards': cards[i],
+                    'leading_hearts_allowed': allowed,
+                },
+                self.ACTION_MASK_KEY: action_masks[i],
+            }
+            for (i, allowed) in enumerate(leading_hearts_allowed)
+        ]
+
+    def _step_batch_game(
+            self,
+            actions: np.ndarray,
+            env_indices: np.ndarray,
+    ) -> List[Tuple[
+        MultiObservation,
+        MultiReward,
+        MultiIsDone,
+        MultiInfo,
+    ]]:
+        """Take a step in the given environments of the batch game.
+        Return each environment's information in the same format as
+        `HeartsEnv.step`.
+
+        Args:
+            actions (np.ndarray): Action for each environment
+                to step.
+            env_indices (np.ndarray): Unique indices of the environments
+                to step.
+
+        Returns:
+            List[Tuple[
+                MultiObservation,
+                MultiReward,
+                MultiIsDone,
+                MultiInfo,
+            ]]: Environment information after stepping, one for
+                each given environment.
+        """
+        game = self._batch_game
+        assert game is not None
+        num_players = self.num_players
+        leading_player_indices = game.leading_player_index[env_indices]
+        prev_active_player_indices = game.active_player_index[env_indices]
+
+        card_indices, was_illegal, trick_winner_indices, trick_penalties = \
+            game.step(actions, env_indices)
+        if self.mask_actions and was_illegal.any():
+            print('actions should not be illegal when masking is on')
+
+        trick_is_over = trick_winner_indices != NO_INDEX
+        game_is_done = trick_is_over & game.are_done(env_indices)
+        final_penalties = game.compute_final_penalties(
+            env_indices[game_is_done]).tolist()
+        final_rankings = game.compute_rankings(
+            env_indices[game_is_done]).tolist()
+
+        # Only the next active player is ready, unless the game is
+        # over; then every player is.
+        num_ready = np.where(game_is_done, num_players, 1)
+        ready_offsets = np.cumsum(num_ready) - num_ready
+        data_indices = np.repeat(np.arange(len(env_indices)), num_ready)
+        ready_env_indices = env_indices[data_indices]
+        ready_player_indices = np.where(
+            game_is_done[data_indices],
+            np.arange(len(data_indices)) - ready_offsets[data_indices],
+            game.active_player_index[ready_env_indices],
+        )
+
+        rewards = self._first_env.reward_function.compute_rewards(
+            RewardBatch.from_batch_game(
+                game,
+                ready_env_indices,
+                ready_player_indices,
+                prev_active_player_indices[data_indices],
+                trick_is_over[data_indices],
+            ),
+        ).tolist()
+        obss = self._read_batch_obs(ready_env_indices, ready_player_indices)
+        has_empty_hand = ~game.hands[
+            ready_env_indices, ready_player_indices].any(axis=1)
+
+        data = []
+        done_index = 0
+        ready_index = 0
+        index_to_card = self._first_env.game.index_to_card
+        for (i, env_index) in enumerate(env_indices.tolist()):
+            is_done: MultiIsDone = {'__all__': bool(game_is_done[i])}
+            player_info = {
+                'prev_active_player_index': int(
+                    prev_active_player_indices[i]),
+                'active_player_index': int(
+                    game.active_player_index[env_index]),
+                'card': index_to_card(int(card_indices[i])),
+                'was_illegal': bool(was_illegal[i]),
+                'leading_player_index': int(leading_player_indices[i]),
+                'trick_winner_index': (
+                    int(trick_winner_indices[i])
+                    if trick_is_over[i]
+                    else None
+                ),
+                'trick_penalty': (
+                    int(trick_penalties[i])
+                    if trick_is_over[i]
+                    else None
+                ),
+            }
+            if game_is_done[i]:
+                player_info['final_penalties'] = final_penalties[done_index]
+                player_info['final_rankings'] = final_rankings[done_index]
+                done_index += 1
+
+            obs: MultiObservation = {}
+            reward: MultiReward = {}
+            info: MultiInfo = {}
+            for j in range(ready_index, ready_index + int(num_ready[i])):
+                player_index = int(ready_player_indices[j])
+                obs[player_index] = obss[j]
+                reward[player_index] = rewards[j]
+                is_done[player_index] = bool(has_empty_hand[j])
+                info[player_index] = player_info.copy()
+            ready_index += int(num_ready[i])
+            data.append((obs, reward, is_done, info))
+        return data
+
+    def _reset_batch_game(self) -> List[MultiObservation]:
+        """Reset the batch game with hands dealt from each environment's
+        deck and return the observations.
+
+        Returns:
+            List[MultiObservation]: Environment observation after
+                resetting, one for each environment.
+        """
+        game = self._batch_game
+        assert game is not None
+        # Deal just like `HeartsGame.reset` so games do not depend on
+        # whether a batch game is used.
+        hand_codes = np.stack([
+            env.game.deck.deal(env.num_players) for env in self._envs])
+        game.reset(game.hand_codes_to_deals(hand_codes))
+        env_indices = np.arange(self.num_envs)
+        active_player_indices = game.active_player_index
+        obss = self._read_batch_obs(env_indices, active_player_indices)
+        return [
+            {player_index: obs}
+            for (player_index, obs) in zip(
+                    active_player_indices.tolist(), obss)
+        ]
+
+    def get_active_player_indices(
+            self,
+            env_indices: Optional[List[int]] = None,
+    ) -> List[int]:
+        """Return the index of the active player for each environment.
+
+        Args:
+            env_indices (Optional[List[int]]): Indices of the
+                environments to query. If `None`, query all
+                environments.
+
+        Returns:
+            List[int]: Index of the active player for each queried
+                environment.
+        """
+        if self._batch_game is not None:
+            active_player_indices = self._batch_game.active_player_index
+            if env_indices is not None:
+                active_player_indices = active_player_indices[env_indices]
+            return active_player_indices.tolist()
+        if self.use_processes:
+            active_player_indices = self._arrays['active_player_index']
+            if env_indices is not None:
+                active_player_indices = active_player_indices[env_indices]
+            return active_player_indices.tolist()
+
+        if env_indices is None:
+            return [env.active_player_index for env in self._envs]
+        return [self._envs[i].active_player_index for i in env_indices]
+
+    def get_legal_actions(  # type: ignore[override]
+            self,
+            env_index: int,
+    ) -> List[int]:
+        """Return all legal actions for the active player in the
+        environment with the given index.
+
+        Args:
+            env_index (int): Index of the environment to query.
+
+        Returns:
+            List[int]: Indices for which cards in hand are legal to play.
+        """
+        if self._batch_game is not None:
+            return np.flatnonzero(self._batch_game.get_legal_action_masks(
+                game_indices=np.array([env_index]))[0]).tolist()
+        if self.use_processes:
+            return np.flatnonzero(
+                self._arrays['legal_actions'][env_index]).tolist()
+        return self._envs[env_index].get_legal_actions()
+
+    def get_active_observations(
+            self,
+            player_index: int,
+            env_indices: Optional[List[int]] = None,
+    ) -> Tuple[
+            np.ndarray,
+            np.ndarray,
+            np.ndarray,
+            np.ndarray,
+    ]:
+        """Return the observations of the player with the given index
+        for all environments in which it is the active player, as arrays
+        with the environments along the first axis.
+
+        Observation transforms are not applied.
+
+        Args:
+            player_index (int): Index of the player to get the
+                observations of.
+            env_indices (Optional[List[int]]): Indices of the
+                environments to consider, in order. If `None`, consider
+                all environments.
+
+        Returns:
+            np.ndarray: Indices of the environments in which the player
+                is active.
+            np.ndarray: Card states as observed by the player.
+            np.ndarray: Whether leading with a hearts card is allowed.
+            np.ndarray: Masks of legal actions.
+        """
+        if self._batch_game is not None:
+            game = self._batch_game
+            assert self._obs_luts is not None
+            if env_indices is None:
+                active_indices = np.flatnonzero(
+                    game.active_player_index == player_index)
+            else:
+                active_indices = np.asarray(env_indices, dtype=np.intp)
+                active_indices = active_indices[
+                    game.active_player_index[active_indices]
+                    == player_index
+                ]
+            return (
+                active_indices,
+                self._obs_luts[player_index][game.state[active_indices]],
+                game.leading_hearts_allowed[active_indices],
+                game.get_legal_action_masks(
+                    np.full(len(active_indices), player_index),
+                    active_indices,
+                ),
+            )
+        if self.use_processes:
+            arrays = self._arrays
+            if env_indices is None:
+                active_indices = np.flatnonzero(
+                    arrays['active_player_index'] == player_index)
+            else:
+                active_indices = np.asarray(env_indices, dtype=np.intp)
+                active_indices = active_indices[
+                    arrays['active_player_index'][active_indices]
+                    == player_index
+                ]
+            return (
+                active_indices,
+                arrays['cards'][active_indices, player_index],
+                arrays['leading_hearts_allowed'][
+                    active_indices, player_index],
+                arrays['legal_actions'][active_indices],
+            )
+
+        if env_indices is None:
+            env_indices = range(self.num_envs)
+        active_indices = np.array([
+            i
+            for i in env_indices
+            if self._envs[i].active_player_index == player_index
+        ], dtype=np.intp)
+        games = [self._envs[i].game for i in active_indices]
+        first_game = self._first_env.game
+        cards = np.empty(
+            (len(games),) + first_game.state.shape, first_game.state.dtype)
+        leading_hearts_allowed = np.empty(len(games), np.bool_)
+        action_masks = np.empty(
+            (len(games), first_game.max_num_cards_on_hand), np.int8)
+        for (i, game) in enumerate(games):
+            cards[i] = game.player_views[player_index]
+            leading_hearts_allowed[i] = game.leading_hearts_allowed
+            game.legal_action_mask(player_index, action_masks[i])
+        return active_indices, cards, leading_hearts_allowed, action_masks
+
+    def is_game_done(self) -> bool:
+        """Return whether the games in all environments are over.
+
+        As environments may be stepped separately, games are not
+        necessarily over at the same time. Games count as over before
+        the first reset.
+
+        Returns:
+            bool: Whether the games are over.
+        """
+        if self._batch_game is not None:
+            return self._batch_game.is_done()
+        if self.use_processes:
+            return bool(self._arrays['is_all_done'].all())
+        return all(env.game.is_done() for env in self._envs)
+
     def terminate_pool(self) -> None:
-        """Terminate the thread pool."""
-        self._pool.terminate()
-        self._pool.join()
+        """Terminate the thread pool or worker processes and free the
+        shared memory.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            return
+
+        for (process, conn) in self._workers:
+            try:
+                conn.send(('close', None, None))
+            except (BrokenPipeError, OSError):
+                pass
+        for (process, conn) in self._workers:
+            process.join()
+            conn.close()
+        self._workers.clear()
+
+        self._arrays.clear()
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms.clear()
 
     def step(  # type: ignore[override]
             self,
             actions: Iterator[Action],
+            env_indices: Optional[List[int]] = None,
     ) -> List[Tuple[
         MultiObservation,
         MultiReward,
@@ -116,7 +919,10 @@ class VecHeartsEnv(HeartsEnv):
 
         Args:
             actions (Iterator[Action]): Actions to execute, one for
-                each environment.
+                each environment that is stepped.
+            env_indices (Optional[List[int]]): Sorted indices of the
+                environments to step. The other environments are left
+                as they are. If `None`, step all environments.
 
         Returns:
             List[Tuple[
@@ -125,13 +931,37 @@ class VecHeartsEnv(HeartsEnv):
                 MultiIsDone,
                 MultiInfo,
             ]]: Environment information after stepping, one for
-                each environment.
+                each environment that was stepped.
         """
+        num_stepped = (
+            self.num_envs
+            if env_indices is None
+            else len(env_indices)
+        )
+        if self.use_processes or self._batch_game is not None:
+            actions = np.fromiter(actions, np.int64)
+            assert len(actions) == num_stepped, \
+                'amount of actions did not match amount of environments'
+            if env_indices is None:
+                stepped_indices = np.arange(self.num_envs)
+            else:
+                stepped_indices = np.asarray(env_indices, dtype=np.intp)
+            if self._batch_game is not None:
+                return self._step_batch_game(actions, stepped_indices)
+            self._command_workers('step', stepped_indices, actions)
+            return [self._read_step(i) for i in stepped_indices.tolist()]
+
+        assert self._pool is not None
+        envs = (
+            self._envs
+            if env_indices is None
+            else [self._envs[i] for i in env_indices]
+        )
         data = self._pool.starmap(
             lambda env, action: env.step({env.active_player_index: action}),
-            zip(self._envs, actions),
+            zip(envs, actions),
         )
-        assert len(data) == self.num_envs, \
+        assert len(data) == num_stepped, \
             'amount of actions did not match amount of environments'
         return data
 
@@ -142,4 +972,15 @@ class VecHeartsEnv(HeartsEnv):
             List[MultiObservation]: Environment observation after
                 resetting, one for each environment.
         """
+        if self._batch_game is not None:
+            return self._reset_batch_game()
+        if self.use_processes:
+            self._command_workers('reset')
+            active_player_indices = self.get_active_player_indices()
+            return [
+                {player_index: self._read_obs(i, player_index)}
+                for (i, player_index) in enumerate(active_player_indices)
+            ]
+
+        assert self._pool is not None
         return self._pool.map(lambda env: env.reset(), self._envs)
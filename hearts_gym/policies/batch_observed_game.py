@@ -0,0 +1,226 @@
+"""
+Mock games that are created from a whole batch of environmental
+observations at once.
+
+Provides the information of `hearts_gym.policies.ObservedGame` as
+arrays with the batch along the first axis.
+"""
+
+import itertools
+
+from gym.spaces import Space
+import numpy as np
+from ray.rllib.utils.typing import TensorType
+
+from hearts_gym.envs import HeartsEnv
+from hearts_gym.envs.card_deck import Card
+from hearts_gym.envs.hearts_game import HeartsGame
+
+
+class BatchObservedGame:
+    """Mock games that are created from a batch of environmental
+    observations at once.
+
+    This is the vectorized counterpart to
+    `hearts_gym.policies.ObservedGame`. Instead of lists of cards, cards
+    are given as indices into the card state vector (see `index_cards`)
+    or as boolean masks over it. Just like in the observed game, values
+    labeled with "offset" are ordered by index offset from the
+    observing player.
+
+    After `recreate_states`, the following arrays are available, with
+    the batch along the first axis:
+    - `hand_masks`: Which cards are on hand.
+    - `unknown_masks`: Which cards have not been seen yet.
+    - `hand_cards`: Indices of the cards on hand in the order of the
+      actions, padded with -1.
+    - `table_cards`: Indices of the cards on the table in the order of
+      placement, padded with -1.
+    - `offset_collected_masks`: Which cards each player collected.
+    - `offset_penalties`: Total penalty scores of each player.
+    - `leading_player_index_offsets`: Index offset of the leading
+      player or -1 for terminal observations.
+    - `leading_suits`: Suit of the first card on the table or -1 if
+      there is none.
+    - `is_first_trick` and `leading_hearts_allowed`.
+    - `legal_action_masks`: Which actions are legal.
+    """
+
+    def __init__(self, original_obs_space: Space) -> None:
+        """Construct new observed games getting observations with the
+        given original space (before preprocessing).
+
+        Args:
+            original_obs_space (Space): Observation space before
+                preprocessing of the observations to process.
+        """
+        self.deck_size = np.prod(original_obs_space['cards'].shape).item()
+        self.num_players = (
+            original_obs_space['cards'].high.item(0)
+            + 1
+            - original_obs_space['cards'].low.item(0)
+            - HeartsEnv.NUM_GENERAL_OBSERVATION_STATES
+        ) // 2
+        self.max_num_cards_on_hand = self.deck_size // self.num_players
+
+        # Cards removed to reach the desired deck size.
+        removed_cards = HeartsGame._removed_for_deck_size(self.deck_size)
+        # Cards removed so all players have the same amount.
+        player_removed_cards = HeartsGame._removed_for_num_players(
+            self.deck_size, self.num_players)
+        removed_cards.extend(player_removed_cards)
+
+        cards_per_suit = [
+            Card.NUM_RANKS - sum(
+                1
+                for _ in filter(lambda card: card.suit == suit, removed_cards)
+            )
+            for suit in range(Card.NUM_SUITS)
+        ]
+        _, self.index_cards = HeartsGame._build_card_tables(
+            tuple(cards_per_suit))
+        """Card for each index into the card state vector."""
+
+        self.card_suits = np.array(
+            [card.suit for card in self.index_cards], np.int8)
+        """Suit of the card at each index."""
+        self.card_penalties = np.array(
+            list(map(HeartsGame.get_penalty, self.index_cards)), np.int64)
+        """Penalty score of the card at each index."""
+        self.card_has_penalty = self.card_penalties > 0
+        """Whether the card at each index has a penalty score greater
+        than zero.
+        """
+        self._collected_states = np.asarray(HeartsEnv.collected_state(
+            np.arange(self.num_players), self.num_players))
+
+    def recreate_states(self, obs_batch: TensorType) -> np.ndarray:
+        """Build internal game states matching the ones given by the
+        supplied batch of observation vectors. Return which
+        observations were terminal, meaning the episode is over and no
+        action needs to be computed.
+
+        See also `hearts_gym.policies.ObservedGame.recreate_state`.
+
+        Args:
+            obs_batch (TensorType): Batch of observations to recreate
+                game states from. Expected to have possible action
+                masks stripped.
+
+        Returns:
+            np.ndarray: Whether each observation was a terminal one.
+        """
+        obs_batch = np.asarray(obs_batch)
+        batch_size = len(obs_batch)
+        num_players = self.num_players
+        cards = obs_batch[:, :self.deck_size].astype(np.int64)
+
+        self.hand_masks = cards == HeartsEnv.STATE_ON_HAND
+        self.unknown_masks = cards == HeartsEnv.STATE_UNKNOWN
+        self.offset_collected_masks = (
+            cards[:, np.newaxis, :]
+            == self._collected_states[np.newaxis, :, np.newaxis]
+        )
+        """Cards collected by each player with shape
+        `(batch_size, num_players, deck_size)`. Ordered by index offset
+        from the observing player.
+        """
+        self.offset_penalties = self.offset_collected_masks.astype(
+            np.int64) @ self.card_penalties
+        """Total penalty scores of each player. Ordered by index offset
+        from the observing player.
+        """
+
+        # Index offset of the player that put each card on the table.
+        table_offsets = cards - HeartsEnv.on_table_state(0)
+        on_table_masks = (table_offsets >= 0) & (table_offsets < num_players)
+        num_on_table = np.count_nonzero(on_table_masks, axis=1)
+        is_done = num_on_table == num_players
+
+        # Players put cards on the table in order of their index
+        # offsets, ending just before the observing player.
+        self.leading_player_index_offsets = np.where(
+            is_done, -1, (num_players - num_on_table) % num_players)
+        (rows, card_indices) = np.nonzero(on_table_masks)
+        offset_cards = np.full((batch_size, num_players), -1, np.int64)
+        offset_cards[rows, table_offsets[rows, card_indices]] = card_indices
+        placement_offsets = (
+            self.leading_player_index_offsets[:, np.newaxis]
+            + np.arange(num_players - 1)
+        ) % num_players
+        self.table_cards = np.where(
+            np.arange(num_players - 1) < num_on_table[:, np.newaxis],
+            np.take_along_axis(offset_cards, placement_offsets, axis=1),
+            -1,
+        )
+        self.leading_suits = np.where(
+            self.table_cards[:, 0] >= 0,
+            self.card_suits[self.table_cards[:, 0]],
+            -1,
+        )
+
+        num_cards_on_hand = np.count_nonzero(self.hand_masks, axis=1)
+        self.is_first_trick = \
+            num_cards_on_hand == self.max_num_cards_on_hand
+        # `leading_hearts_allowed` is one-hot encoded after the cards.
+        self.leading_hearts_allowed = obs_batch[:, self.deck_size + 1] == 1
+
+        hand_positions = np.cumsum(self.hand_masks, axis=1) - 1
+        (rows, card_indices) = np.nonzero(self.hand_masks)
+        self.hand_cards = np.full(
+            (batch_size, self.max_num_cards_on_hand), -1, np.int64)
+        self.hand_cards[rows, hand_positions[rows, card_indices]] = \
+            card_indices
+
+        legal_masks = self._legal_card_masks()
+        (rows, card_indices) = np.nonzero(legal_masks)
+        self.legal_action_masks = np.zeros(
+            (batch_size, self.max_num_cards_on_hand), np.int8)
+        """Which actions are legal for the observing player."""
+        self.legal_action_masks[
+            rows, hand_positions[rows, card_indices]] = 1
+
+        return is_done
+
+    def _legal_card_masks(self) -> np.ndarray:
+        """Return which cards are legal to play for the observing
+        player, following `hearts_gym.policies.ObservedGame`.
+
+        Returns:
+            np.ndarray: Which cards in the card state vector are legal
+                to play.
+        """
+        is_leading = (self.leading_player_index_offsets == 0)[:, np.newaxis]
+        follows_suit = (
+            self.card_suits[np.newaxis, :] == self.leading_suits[:, np.newaxis]
+        )
+        is_first_trick = self.is_first_trick[:, np.newaxis]
+        no_hearts_lead = (
+            ~self.leading_hearts_allowed[:, np.newaxis] & is_leading)
+
+        legal_masks = np.where(
+            is_first_trick,
+            (is_leading | follows_suit) & ~self.card_has_penalty,
+            np.where(
+                no_hearts_lead,
+                self.card_suits != Card.SUIT_HEART,
+                is_leading | follows_suit,
+            ),
+        )
+        legal_masks &= self.hand_masks
+        has_no_legal = ~legal_masks.any(axis=1)
+        legal_masks[has_no_legal] = self.hand_masks[has_no_legal]
+        return legal_masks
+
+    def get_legal_actions(self, batch_index: int) -> np.ndarray:
+        """Return all legal actions for the observing player of the
+        observation with the given index in the batch.
+
+        Args:
+            batch_index (int): Index of the observation in the batch.
+
+        Returns:
+            np.ndarray: Indices in hand for which cards are legal
+                to play.
+        """
+        return np.flatnonzero(self.legal_action_masks[batch_index])
@@ -1,11 +1,13 @@
 """
-A hard-coded Hearts policy implementation that yields deterministic
+Hard-coded Hearts policy implementations that yield deterministic
 actions for each state/observation.
 """
 
+import numpy as np
 from ray.rllib.utils.typing import TensorType
 
 from hearts_gym.utils.typing import Action
+from .batch_observed_game import BatchObservedGame
 from .observed_game import ObservedGame
 
 
@@ -51,3 +53,47 @@ class DeterministicPolicyImpl:
             f'please implement the `compute_action` method of class '
             f'`{self.__class__.__name__}`'
         )
+
+
+class BatchDeterministicPolicyImpl:
+    """A hard-coded Hearts policy implementation that yields
+    deterministic actions for a whole batch of states/observations
+    at once.
+
+    This is the batched counterpart to `DeterministicPolicyImpl`. The
+    policy has access to observed `games` that are built from a batch
+    of observations. Please see
+    `hearts_gym.policies.BatchObservedGame` for more information.
+
+    The observed games are expected to be updated from elsewhere.
+    """
+
+    def __init__(self, observed_games: BatchObservedGame) -> None:
+        """Construct a deterministic policy implementation that acts in
+        the given observed games.
+
+        Args:
+            observed_games (BatchObservedGame): Observed games to act in.
+        """
+        self.games = observed_games
+
+    def compute_actions(self, obs_batch: TensorType) -> np.ndarray:
+        """Compute deterministic actions for the given batch
+        of observations.
+
+        The internal observed games are expected to have been updated
+        from elsewhere. Actions for terminal observations are ignored.
+
+        Args:
+            obs_batch (TensorType): Batch of observations from the
+                environment to compute actions for. May be safely
+                ignored due to the observed games implementing more
+                sensible access to the observed data.
+
+        Returns:
+            np.ndarray: Action to execute for each observation.
+        """
+        raise NotImplementedError(
+            f'please implement the `compute_actions` method of class '
+            f'`{self.__class__.__name__}`'
+        )
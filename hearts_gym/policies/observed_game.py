@@ -6,7 +6,7 @@ Provides "normalized" information of a single observing player.
 
 import functools
 import itertools
-from typing import List, Tuple, Union
+from typing import List
 
 from gym.spaces import Space
 import numpy as np
@@ -45,6 +45,7 @@ class ObservedGame:
             - original_obs_space['cards'].low.item(0)
             - HeartsEnv.NUM_GENERAL_OBSERVATION_STATES
         ) // 2
+        self.max_num_cards_on_hand = self.deck_size // self.num_players
 
         # Cards removed to reach the desired deck size.
         removed_cards = HeartsGame._removed_for_deck_size(self.deck_size)
@@ -62,6 +63,16 @@ class ObservedGame:
         ]
         self._accumulated_cards_per_suit = \
             list(itertools.accumulate(self._cards_per_suit))
+        _, self._index_cards = HeartsGame._build_card_tables(
+            tuple(self._cards_per_suit))
+        self._card_suits = np.array(
+            [card.suit for card in self._index_cards], np.int8)
+        """Suit of the card at each index into the observation vector."""
+        self._card_has_penalty = np.array(
+            list(map(self.has_penalty, self._index_cards)), np.bool_)
+        """Whether the card at each index into the observation vector has
+        a penalty score greater than zero.
+        """
 
     def _index_to_card(self, index: int) -> Card:
         """Return the card from a given index for the
@@ -73,15 +84,7 @@ class ObservedGame:
         Returns:
             Card: Card obtained from the observation vector index.
         """
-        suit, num_accumulated = next(
-            (suit, num_cards)
-            for (suit, num_cards) in enumerate(
-                    self._accumulated_cards_per_suit,
-            )
-            if index < num_cards
-        )
-        rank = index - (num_accumulated - self._accumulated_cards_per_suit[0])
-        return Card(suit, rank)
+        return self._index_cards[index]
 
     def _cards_with_state(self, obs: TensorType, state: int) -> List[Card]:
         """Return the cards with a given state in the observation vector.
@@ -94,20 +97,8 @@ class ObservedGame:
         Returns:
             List[Card]: Cards observed with the given state.
         """
-        indices = np.argwhere(obs == state).ravel()
-        return list(map(self._index_to_card, indices))
-
-    def _cards_on_hand(self, obs: TensorType) -> List[Card]:
-        """Return the cards on hand given by the observation vector.
-
-        Args:
-            obs (TensorType): Observation vector to convert to a hand
-                of cards.
-
-        Returns:
-            List[Card]: Cards on hand of the player observing.
-        """
-        return self._cards_with_state(obs, HeartsEnv.STATE_ON_HAND)
+        index_cards = self._index_cards
+        return [index_cards[i] for i in np.flatnonzero(obs == state).tolist()]
 
     def _cards_unknown(self, obs: TensorType) -> List[Card]:
         """Return the cards that haven't been seen yet.
@@ -170,7 +161,8 @@ class ObservedGame:
         ):
             if HeartsEnv.on_table_state(index_offset) != state:
                 break
-        return (index_offset + 1) % self.num_players
+        self.leading_player_index_offset = \
+            (index_offset + 1) % self.num_players
 
     def _cards_on_table(
             self,
@@ -256,55 +248,51 @@ class ObservedGame:
         """
         return HeartsGame.has_penalty(card)
 
-    def get_legal_actions(self) -> List[int]:
-        """Return all legal actions for the observing player.
+    def legal_action_mask(self) -> np.ndarray:
+        """Return a mask of the legal actions for the observing player.
 
         Returns:
-            List[int]: Indices in hand for which cards are legal to play.
+            np.ndarray: Mask of which indices in hand are legal to play
+                with length `self.max_num_cards_on_hand`.
         """
-        actions: Union[List[Tuple[int, Card]], List[Tuple[int]]]
+        suits = self._card_suits[self._hand_indices]
+        is_leading = self.leading_player_index_offset == 0
+
         if (
                 # No hearts or queen of spades in first trick.
                 self.is_first_trick
         ):
-            if self.leading_player_index_offset == 0:
-                actions = list(filter(
-                    lambda i_card: not self.has_penalty(i_card[1]),
-                    enumerate(self.hand),
-                ))
-            else:
-                actions = list(filter(
-                    lambda i_card: (i_card[1].suit == self.leading_suit
-                                    and not self.has_penalty(i_card[1])),
-                    enumerate(self.hand),
-                ))
-
+            legal = ~self._card_has_penalty[self._hand_indices]
+            if not is_leading:
+                legal &= suits == self.leading_suit
         elif (
                 # Can't start with hearts.
                 not self.leading_hearts_allowed
-                and self.leading_player_index_offset == 0
+                and is_leading
         ):
-            actions = list(filter(
-                lambda i_card: i_card[1].suit != Card.SUIT_HEART,
-                enumerate(self.hand),
-            ))
-
+            legal = suits != Card.SUIT_HEART
         elif (
                 # Must follow suit.
-                self.leading_player_index_offset != 0
+                not is_leading
         ):
-            actions = list(filter(
-                lambda i_card: i_card[1].suit == self.leading_suit,
-                enumerate(self.hand),
-            ))
+            legal = suits == self.leading_suit
+        else:
+            legal = np.ones(len(suits), np.bool_)
 
+        action_mask = np.zeros(self.max_num_cards_on_hand, np.int8)
+        if legal.any():
+            action_mask[:len(legal)] = legal
         else:
-            actions = list(map(lambda x: (x,), range(len(self.hand))))
+            action_mask[:len(legal)] = 1
+        return action_mask
 
-        actions: List[int] = list(map(HeartsGame._extract_action, actions))
-        if len(actions) == 0:
-            actions = list(range(len(self.hand)))
-        return actions
+    def get_legal_actions(self) -> List[int]:
+        """Return all legal actions for the observing player.
+
+        Returns:
+            List[int]: Indices in hand for which cards are legal to play.
+        """
+        return np.flatnonzero(self.legal_action_mask()).tolist()
 
     def recreate_state(self, obs: TensorType) -> bool:
         """Build an internal game state matching the one given by the
@@ -324,20 +312,23 @@ class ObservedGame:
         Returns:
             bool: Whether the observation was a terminal one.
         """
-        self._compute_leading_player_index_offset(obs)
-        self.hand = self._cards_on_hand(obs)
-        self.unknown_cards = self._cards_unknown(obs)
-        self.table_cards = self._cards_on_table(obs)
-        self.offset_collected = self._cards_collected(obs)
+        cards = obs[:self.deck_size]
+        self._compute_leading_player_index_offset(cards)
+        self._hand_indices = np.flatnonzero(cards == HeartsEnv.STATE_ON_HAND)
+        self.hand = [self._index_cards[i] for i in self._hand_indices.tolist()]
+        self.unknown_cards = self._cards_unknown(cards)
+        self.table_cards = self._cards_on_table(cards)
+        self.offset_collected = self._cards_collected(cards)
         """Cards collected by each player. Ordered by index offset from
         the observing player.
         """
 
         self.is_first_trick = (
             len(self.hand)
-            == self.deck_size // self.num_players
+            == self.max_num_cards_on_hand
         )
-        self.leading_hearts_allowed = obs[self.deck_size]
+        # `leading_hearts_allowed` is one-hot encoded after the cards.
+        self.leading_hearts_allowed = obs[self.deck_size + 1] == 1
 
         self.offset_penalties = [
             sum(map(self.get_penalty, cards))
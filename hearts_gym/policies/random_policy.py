@@ -16,14 +16,40 @@ from ray.rllib.utils.typing import (
 )
 
 from hearts_gym.envs import HeartsEnv
+from .batch_observed_game import BatchObservedGame
+
+
+def sample_legal_actions(
+        rng: np.random.Generator,
+        action_masks: np.ndarray,
+) -> np.ndarray:
+    """Return an action sampled uniformly among the legal actions of
+    each row of the given action masks.
+
+    Rows without legal actions result in action 0.
+
+    Args:
+        rng (np.random.Generator): Random number generator to
+            sample with.
+        action_masks (np.ndarray): Masks of legal actions; one row
+            per observation.
+
+    Returns:
+        np.ndarray: Sampled action for each row.
+    """
+    # Find the first position where the running count of legal actions
+    # exceeds a uniformly drawn rank.
+    cum_legal = np.cumsum(action_masks, axis=1)
+    ranks = np.floor(rng.random(len(action_masks)) * cum_legal[:, -1])
+    return np.argmax(cum_legal > ranks[:, np.newaxis], axis=1)
 
 
 class RandomPolicy(Policy):
-    """A policy executing actions at random.
+    """A policy executing legal actions at random.
 
-    If action masking is not enabled, actions are sampled uniformly
-    based on the hand size. This means illegal actions may be chosen. If
-    action masking is enabled, only legal actions are chosen.
+    Actions are sampled uniformly among the legal ones. If action
+    masking is enabled, legal actions are given by the action masks.
+    Otherwise, they are reconstructed from the observations.
     """
 
     def __init__(self, *args, **kwargs) -> None:
@@ -42,19 +68,29 @@ class RandomPolicy(Policy):
                 superclass constructor.
         """
         super().__init__(*args, **kwargs)
-        seed = self.config.get('seed', None)
-        self._rng = np.random.default_rng(seed)
+        self.set_seed(self.config.get('seed', None))
 
         mask_actions = self.config.get(
             'mask_actions', HeartsEnv.MASK_ACTIONS_DEFAULT)
         self._mask_actions = mask_actions
 
+        original_space = self.observation_space.original_space
+        self._games: Optional[BatchObservedGame]
         if mask_actions:
-            original_space = self.observation_space.original_space
             action_mask_space = original_space[HeartsEnv.ACTION_MASK_KEY]
             self._action_mask_len = np.prod(action_mask_space.shape).item()
+            self._games = None
         else:
             self._action_mask_len = 0
+            self._games = BatchObservedGame(original_space)
+
+    def set_seed(self, seed: Optional[int]) -> None:
+        """Reset the random number generator with the given seed.
+
+        Args:
+            seed (Optional[int]): Random number generator seed.
+        """
+        self._rng = np.random.default_rng(seed)
 
     def _split_obs_and_mask(
             self,
@@ -75,6 +111,27 @@ class RandomPolicy(Policy):
         sans_action_mask = obs_batch[:, self._action_mask_len:]
         return sans_action_mask, action_mask
 
+    def _get_action_masks(self, obs_batch: TensorType) -> np.ndarray:
+        """Return the masks of legal actions for the given batch
+        of observations.
+
+        Args:
+            obs_batch (TensorType): Batch of observations.
+
+        Returns:
+            np.ndarray: Batch of action masks. Terminal observations
+                have no legal actions.
+        """
+        if self._mask_actions:
+            _, action_masks = self._split_obs_and_mask(obs_batch)
+            return action_masks == 1
+
+        assert self._games is not None
+        is_done = self._games.recreate_states(obs_batch)
+        action_masks = self._games.legal_action_masks == 1
+        action_masks[is_done] = False
+        return action_masks
+
     @override(Policy)
     def compute_actions(
             self,
@@ -109,28 +166,9 @@ class RandomPolicy(Policy):
         if isinstance(obs_batch, list):
             obs_batch = np.array(obs_batch)
 
-        if self._mask_actions:
-            _, action_masks = self._split_obs_and_mask(obs_batch)
-            actions = np.empty(
-                len(action_masks),
-                dtype=self.action_space.dtype,
-            )
-            # possible_actions = np.arange(action_masks.shape[-1])
-            # Currently not possible to sample from masked arrays, so we
-            # can't vectorize this.
-            for (i, action_mask) in enumerate(action_masks):
-                # legal = possible_actions[action_mask == 1]
-                # Could use np.argwhere(...).ravel()
-                legal = np.argwhere(action_mask == 1).ravel()
-                choice = self._rng.choice(legal)
-                actions[i] = choice
-        else:
-            # TODO Could calculate perfectly so we never take illegal actions.
-            on_hand_indices = obs_batch == HeartsEnv.STATE_ON_HAND
-            hand_lens = np.count_nonzero(on_hand_indices, axis=1)
-            assert isinstance(hand_lens, np.ndarray)
-            np.clip(hand_lens, 1, None, out=hand_lens)
-            actions = self._rng.integers(low=0, high=hand_lens)
+        action_masks = self._get_action_masks(obs_batch)
+        actions = sample_legal_actions(self._rng, action_masks).astype(
+            self.action_space.dtype)
 
         np.expand_dims(actions, 1)
         return actions, [], {}
@@ -178,17 +216,11 @@ class RandomPolicy(Policy):
         if isinstance(obs_batch, list):
             obs_batch = np.array(obs_batch)
 
-        if self._mask_actions:
-            _, action_masks = self._split_obs_and_mask(obs_batch)
-            num_actions = np.count_nonzero(action_masks)
-            probs = 1 / num_actions
-        else:
-            on_hand_indices = obs_batch == HeartsEnv.STATE_ON_HAND
-            hand_lens = np.count_nonzero(on_hand_indices, axis=1)
-            assert isinstance(hand_lens, np.ndarray)
-            # Prevent division by 0.
-            np.clip(hand_lens, 1, None, out=hand_lens)
-            probs = 1 / hand_lens
+        num_actions = np.count_nonzero(
+            self._get_action_masks(obs_batch), axis=1)
+        # Prevent division by 0.
+        np.clip(num_actions, 1, None, out=num_actions)
+        probs = 1 / num_actions
 
         probs = np.log(probs)
         np.expand_dims(probs, 1)
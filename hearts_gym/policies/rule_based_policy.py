@@ -20,7 +20,11 @@ from ray.rllib.utils.typing import (
 
 from hearts_gym.envs import HeartsEnv
 from hearts_gym.utils.typing import Action
-from .deterministic_policy_impl import DeterministicPolicyImpl
+from .batch_observed_game import BatchObservedGame
+from .deterministic_policy_impl import (
+    BatchDeterministicPolicyImpl,
+    DeterministicPolicyImpl,
+)
 from .observed_game import ObservedGame
 from .rule_based_policy_impl import RuleBasedPolicyImpl
 
@@ -37,8 +41,10 @@ class RuleBasedPolicy(Policy):
 
         The following policy configuration options are used:
         - "policy_impl_cls": Rule-based policy implementation to use.
-          Must subclass `DeterministicPolicyImpl`. Default
-          is `RuleBasedPolicyImpl`.
+          Must subclass `DeterministicPolicyImpl` or, to compute
+          actions for whole batches at once,
+          `BatchDeterministicPolicyImpl`. Default is
+          `RuleBasedPolicyImpl`.
         - "mask_actions": Whether action masking is enabled.
           Default is `True`.
 
@@ -58,9 +64,13 @@ class RuleBasedPolicy(Policy):
             'policy_impl_cls', RuleBasedPolicyImpl)
         assert type(policy_impl_cls) == type, \
             '`policy_impl_cls` must not be an instance, but the class itself'
-        assert issubclass(policy_impl_cls, DeterministicPolicyImpl), \
-            '`policy_impl_cls` must subclass `DeterministicPolicyImpl`'
-
+        assert issubclass(
+            policy_impl_cls,
+            (DeterministicPolicyImpl, BatchDeterministicPolicyImpl),
+        ), (
+            '`policy_impl_cls` must subclass `DeterministicPolicyImpl` or '
+            '`BatchDeterministicPolicyImpl`'
+        )
         # Set up helper variables
         original_space = self.observation_space.original_space
 
@@ -72,8 +82,18 @@ class RuleBasedPolicy(Policy):
         else:
             original_obs_space = original_space
             self._action_mask_len = 0
-        self._game = ObservedGame(original_obs_space)
-        self._policy_impl = policy_impl_cls(self._game)
+
+        self._game: Optional[ObservedGame] = None
+        self._policy_impl: Optional[DeterministicPolicyImpl] = None
+        self._batch_game: Optional[BatchObservedGame] = None
+        self._batch_policy_impl: Optional[
+            BatchDeterministicPolicyImpl] = None
+        if issubclass(policy_impl_cls, BatchDeterministicPolicyImpl):
+            self._batch_game = BatchObservedGame(original_obs_space)
+            self._batch_policy_impl = policy_impl_cls(self._batch_game)
+        else:
+            self._game = ObservedGame(original_obs_space)
+            self._policy_impl = policy_impl_cls(self._game)
 
     def _split_obs_and_mask(
             self,
@@ -106,6 +126,7 @@ class RuleBasedPolicy(Policy):
         Returns:
             Action: Which action to take. Assumed to be deterministic.
         """
+        assert self._policy_impl is not None
         return self._policy_impl.compute_action(obs)
 
     @override(Policy)
@@ -147,6 +168,19 @@ class RuleBasedPolicy(Policy):
         if self._mask_actions:
             obs_batch, _ = self._split_obs_and_mask(obs_batch)
 
+        if self._batch_policy_impl is not None:
+            assert self._batch_game is not None
+            is_done = self._batch_game.recreate_states(obs_batch)
+            actions = np.array(
+                self._batch_policy_impl.compute_actions(obs_batch),
+                dtype=self.action_space.dtype,
+            )
+            # We have terminal observations; no use to calculate
+            # actions for them.
+            actions[is_done] = 0
+            return actions, [], {}
+
+        assert self._game is not None
         actions = np.empty(len(obs_batch), dtype=self.action_space.dtype)
         for (i, obs) in enumerate(obs_batch):
             is_done = self._game.recreate_state(obs)
@@ -0,0 +1,1436 @@
+"""
+asyncio socket server to host many Hearts tables at once.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import time
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from gym.utils import seeding
+
+from hearts_gym import utils
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
+from hearts_gym.server import utils as server_utils
+from hearts_gym.server.batch_sizer import BatchSizer
+from hearts_gym.server.bot_policies import BotPolicy
+from hearts_gym.server.client import Client
+from hearts_gym.server.delta_observations import DeltaEncoder
+from hearts_gym.server.game_stats import GameStatistics
+from hearts_gym.server.hearts_server import (
+    HeartsRequestHandler,
+    HeartsServer,
+)
+from hearts_gym.server.mock_request import MockRequest
+from hearts_gym.server.utils import Address
+from hearts_gym.utils.typing import Action, GymSeed
+
+
+class AsyncClient(Client):
+    """A client seated at a table of an `AsyncHeartsServer`.
+
+    For simulated agents, `request` is a `MockRequest` and `reader` and
+    `writer` are `None`. Otherwise, `request` is `None` and `reader` and
+    `writer` are the streams of the connection.
+    """
+
+    __slots__ = [
+        'reader',
+        'writer',
+        'is_ready',
+    ]
+
+    request: Optional[MockRequest]  # type: ignore[assignment]
+
+    def __init__(
+            self,
+            player_index: int,
+            address: Address,
+            request: Optional[MockRequest] = None,
+            reader: Optional[asyncio.StreamReader] = None,
+            writer: Optional[asyncio.StreamWriter] = None,
+    ) -> None:
+        """Construct a client connected via the given streams or a
+        simulated agent acting via the given mock request.
+
+        Args:
+            player_index (int): Index of the client at its table.
+            address (Address): Address of the client.
+            request (Optional[MockRequest]): Mock request of a
+                simulated agent.
+            reader (Optional[asyncio.StreamReader]): Stream reader of
+                the connection.
+            writer (Optional[asyncio.StreamWriter]): Stream writer of
+                the connection.
+        """
+        assert (request is None) != (reader is None and writer is None), \
+            'need either a mock request or streams'
+        super().__init__(player_index, request, address)  # type: ignore
+        self.reader = reader
+        self.writer = writer
+        # Whether the client finished setting up and waiting.
+        self.is_ready = request is not None
+
+    @property
+    def is_bot(self) -> bool:
+        """Whether the client is a simulated agent."""
+        return self.request is not None
+
+    def close(self) -> None:
+        """Close the connection of the client."""
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Table:
+    """A table of players playing games in parallel in their own
+    vectorized environment.
+    """
+
+    def __init__(
+            self,
+            table_index: int,
+            envs: VecHeartsEnv,
+            max_num_games: Optional[int],
+    ) -> None:
+        """Construct an empty table.
+
+        Args:
+            table_index (int): Index identifying the table.
+            envs (VecHeartsEnv): Environments the table plays in.
+            max_num_games (Optional[int]): After how many games to
+                disconnect the table's clients. If `None`, keep
+                connected indefinitely.
+        """
+        num_players = envs.num_players
+        self.table_index = table_index
+        self.envs = envs
+        self.max_num_games = max_num_games
+        self.num_players = num_players
+
+        self.clients: Dict[int, AsyncClient] = {}
+        self.is_full = False
+        self.changed = asyncio.Condition()
+        """Notified whenever clients join, leave or become ready."""
+        self.first_join_time: Optional[float] = None
+        self.tasks: List[asyncio.Future] = []
+        """Background tasks started for the table."""
+        self.executor_futures: Set[asyncio.Future] = set()
+        """Calls for the table currently running in the executor."""
+
+        self.batch_sizers: List[Optional[BatchSizer]] = [None] * num_players
+        """Batch sizer of each client; set when the games start."""
+        self.delta_encoders = [
+            DeltaEncoder(envs.num_envs)
+            for _ in range(num_players)
+        ]
+        """Only used for clients requesting delta-encoded
+        observations.
+        """
+        self.sent_batches: List[Deque[Tuple[float, List[int]]]] = [
+            deque() for _ in range(num_players)]
+        """When the batches not yet responded to were sent to each
+        client and which environments they are about, in order.
+        """
+
+        self.needs_reset = True
+        self.num_games = 0
+        self.num_illegals = [0] * num_players
+        self.stats = GameStatistics(num_players)
+
+    def find_free_index(self) -> Optional[int]:
+        """Return the first free index or `None` if the table is full.
+
+        Returns:
+            Optional[int]: First free index or `None` if there is none.
+        """
+        return next(
+            (
+                i
+                for i in range(self.num_players)
+                if i not in self.clients
+            ),
+            None,
+        )
+
+    async def notify(self) -> None:
+        """Wake up everyone waiting for changes at the table."""
+        async with self.changed:
+            self.changed.notify_all()
+
+    def index_to_name(self, player_index: int) -> str:
+        """Return the name of the player with the given index.
+
+        Args:
+            player_index (int): Index of the player to query the
+                name for.
+
+        Returns:
+            str: Name of the player.
+        """
+        return self.clients[player_index].name
+
+
+class AsyncHeartsServer:
+    """asyncio server to host Hearts games at many tables at once.
+
+    Connecting clients are seated at the table currently being filled.
+    Once a table is full, its games start and the next clients are
+    seated at a new table. Each table plays its games in parallel in its
+    own vectorized environment; all tables are driven by a single event
+    loop without any per-client threads. Stepping the environments,
+    encoding messages and computing the actions of simulated agents
+    happens in a thread pool shared by all tables.
+
+    The protocol is the same as for `HeartsServer`, so clients do not
+    need to know which server they are connected to.
+
+    When players leave after their table is full or players have been
+    waiting for too long, simulated agents are inserted.
+    """
+
+    OK_TIMEOUT_SEC = HeartsServer.OK_TIMEOUT_SEC
+    SETUP_OK_TIMEOUT_SEC = HeartsServer.SETUP_OK_TIMEOUT_SEC
+    PRINT_INTERVAL_SEC = HeartsServer.PRINT_INTERVAL_SEC
+    RANDOM_AGENT_NAME = HeartsServer.RANDOM_AGENT_NAME
+
+    PARSE_FAIL_TOLERANCE = HeartsRequestHandler.PARSE_FAIL_TOLERANCE
+
+    def __init__(
+            self,
+            server_address: Address,
+            *,
+            num_players: int = 4,
+            deck_size: int = 52,
+            mask_actions: bool = HeartsEnv.MASK_ACTIONS_DEFAULT,
+            seed: GymSeed = None,
+            num_parallel_games: int = 1024,
+            num_procs: int = 1,
+            use_batch_game: bool = True,
+            bot_policy: Optional[BotPolicy] = None,
+            max_num_games: Optional[int] = None,
+            max_num_tables: Optional[int] = None,
+            accept_repeating_client_addresses: bool = True,
+            wait_duration_sec: Optional[int] = None,
+    ) -> None:
+        """Construct an asyncio Hearts server.
+
+        Args:
+            server_address (Address): Address and port to host the
+                server at.
+            num_players (int): Amount of players per table.
+            deck_size (int): Amount of cards in the deck.
+            mask_actions (bool): Whether to enable action masking,
+                parameterizing the action space.
+            seed (GymSeed): Random number generator base seed.
+            num_parallel_games (int): How many games to play in parallel
+                at each table.
+            num_procs (int): How many threads all tables share for
+                playing their games, encoding messages and computing
+                actions of simulated agents.
+            use_batch_game (bool): Whether to simulate the games of each
+                table in a single vectorized `BatchHeartsGame` instead of
+                stepping each game on its own.
+            bot_policy (Optional[BotPolicy]): Policy shared by all
+                simulated agents. If `None`, each simulated agent
+                acts randomly.
+            max_num_games (Optional[int]): After how many games to
+                automatically disconnect the clients of a table. If
+                `None`, keep connected indefinitely.
+            max_num_tables (Optional[int]): How many tables to host at
+                maximum at the same time. Further clients are rejected.
+                If `None`, do not limit the number of tables.
+            accept_repeating_client_addresses (bool): Whether clients
+                are allowed to connect multiple times from the same
+                address (only changing the port they connect from).
+            wait_duration_sec (Optional[int]): How long to wait after the
+                first player has joined a table until the remaining spots
+                are filled with randomly acting agents. If `None`,
+                wait indefinitely.
+        """
+        assert num_parallel_games > 0, 'must have at least one game'
+        assert num_procs > 0, 'must have at least one thread'
+        assert (
+            max_num_games is None
+            or max_num_games % num_parallel_games == 0
+        ), (
+            'maximum number of games must be divisible by number of '
+            'parallel games'
+        )
+        assert max_num_tables is None or max_num_tables > 0, \
+            'must allow at least one table'
+
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(os.getenv('LOG_LEVEL', 'NOTSET').upper())
+
+        self.server_address = server_address
+        self._num_players = num_players
+        self._deck_size = deck_size
+        self._mask_actions = mask_actions
+        self._seed = seed
+        self.num_parallel_games = num_parallel_games
+        self._use_batch_game = use_batch_game
+        self.bot_policy = bot_policy
+        self.max_num_games = max_num_games
+        self._max_num_tables = max_num_tables
+        self._accept_repeating_client_addresses = \
+            accept_repeating_client_addresses
+        self._wait_duration_sec = wait_duration_sec
+
+        self.max_receive_bytes = HeartsRequestHandler \
+            .calculate_max_receive_bytes(num_parallel_games)
+
+        self.tables: Dict[int, Table] = {}
+        self._open_table: Optional[Table] = None
+        self._num_created_tables = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connection_tasks: Set[asyncio.Future] = set()
+        self._executor = ThreadPoolExecutor(num_procs)
+
+    def print_log(self, message: str, log_level: int = logging.INFO):
+        """Print and log the given message.
+
+        Args:
+            message (str): What to print and log.
+            log_level (int): Logging level indicating the importance of
+                the log.
+        """
+        print(message)
+        self.logger.log(log_level, message)
+
+    def _create_table(self) -> Table:
+        """Return a new table with its own vectorized environment.
+
+        The environment does not start any processes or threads of its
+        own; tables share the server's thread pool instead.
+
+        Returns:
+            Table: The newly created table.
+        """
+        table_index = self._num_created_tables
+        self._num_created_tables += 1
+        seed_offset = table_index * self.num_parallel_games
+        envs = VecHeartsEnv(
+            [
+                HeartsEnv(
+                    num_players=self._num_players,
+                    deck_size=self._deck_size,
+                    mask_actions=self._mask_actions,
+                    seed=HeartsServer._add_to_seed(
+                        self._seed, seed_offset + i),
+                )
+                for i in range(self.num_parallel_games)
+            ],
+            num_procs=1,
+            use_batch_game=self._use_batch_game,
+        )
+        table = Table(table_index, envs, self.max_num_games)
+        self.tables[table_index] = table
+        self.print_log(f'Opened table {table_index}.')
+        return table
+
+    def _find_open_table(self) -> Optional[Table]:
+        """Return the table new clients are seated at, creating it if
+        necessary. Return `None` if no more tables may be opened.
+
+        Returns:
+            Optional[Table]: Table to seat new clients at.
+        """
+        if self._open_table is None or self._open_table.is_full:
+            if (
+                    self._max_num_tables is not None
+                    and len(self.tables) >= self._max_num_tables
+            ):
+                return None
+            self._open_table = self._create_table()
+        return self._open_table
+
+    def _has_client_address(self, client_address: Address) -> bool:
+        """Return whether a client with the given address is seated at
+        any table.
+
+        Note that this ignores the port portion of the address.
+
+        Args:
+            client_address (Address): Client address to query.
+
+        Returns:
+            bool: Whether the client address is already seated.
+        """
+        return any(
+            client.address[0] == client_address[0]
+            for table in self.tables.values()
+            for client in table.clients.values()
+            if not client.is_bot
+        )
+
+    def _register_client(
+            self,
+            table: Table,
+            client: AsyncClient,
+    ) -> AsyncClient:
+        """Seat the given client at the given table and return it.
+
+        If this fills the table, start its games.
+
+        Args:
+            table (Table): Table to seat the client at.
+            client (AsyncClient): Client to seat at its player index.
+
+        Returns:
+            AsyncClient: The registered client.
+        """
+        player_index = client.player_index
+        assert player_index not in table.clients, 'index is taken'
+        table.clients[player_index] = client
+        if table.first_join_time is None:
+            table.first_join_time = time.time()
+            if self._wait_duration_sec is not None:
+                table.tasks.append(asyncio.ensure_future(
+                    self._fill_after_waiting(table, table.first_join_time)))
+
+        if len(table.clients) >= table.num_players and not table.is_full:
+            table.is_full = True
+            table.tasks.append(asyncio.ensure_future(self._run_table(table)))
+        return client
+
+    def _register_bot(
+            self,
+            table: Table,
+            player_index: Optional[int] = None,
+    ) -> AsyncClient:
+        """Seat a simulated agent at the given table and return it.
+
+        Args:
+            table (Table): Table to seat the simulated agent at.
+            player_index (Optional[int]): Index to seat the simulated
+                agent at. If `None`, use the first free index.
+
+        Returns:
+            AsyncClient: The registered simulated agent.
+        """
+        if player_index is None:
+            player_index = table.find_free_index()
+        assert player_index is not None, 'table is full'
+
+        client = self._register_client(table, AsyncClient(
+            player_index,
+            ('mock-client', player_index),
+            request=MockRequest(
+                table.envs,
+                player_index,
+                seed=seeding.hash_seed(),
+                policy=self.bot_policy,
+            ),
+        ))
+        self.logger.info(
+            f'Registered bot at index {player_index} of table '
+            f'{table.table_index}.'
+        )
+        return client
+
+    def _unregister_client(
+            self,
+            table: Table,
+            client: AsyncClient,
+    ) -> None:
+        """Unregister the given client, closing its connection.
+
+        If the table is already full, replace the client with a
+        simulated agent.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to unregister.
+        """
+        if not client.is_registered:
+            return
+        client.is_registered = False
+        client.close()
+
+        player_index = client.player_index
+        if table.clients.get(player_index) is client:
+            del table.clients[player_index]
+            if table.is_full:
+                self._register_bot(table, player_index)
+            elif len(table.clients) == 0:
+                table.first_join_time = None
+        asyncio.ensure_future(table.notify())
+
+    async def _fill_after_waiting(
+            self,
+            table: Table,
+            first_join_time: float,
+    ) -> None:
+        """Fill the remaining spots of the given table with randomly
+        acting agents after the waiting duration has passed.
+
+        Args:
+            table (Table): Table to fill.
+            first_join_time (float): When the first player joined the
+                table. If the table was left empty in the meantime, do
+                not fill it.
+        """
+        assert self._wait_duration_sec is not None
+        await asyncio.sleep(self._wait_duration_sec)
+        if table.is_full or table.first_join_time != first_join_time:
+            return
+
+        while not table.is_full:
+            self._register_bot(table)
+        self.print_log(
+            f'Filled remaining spots of table {table.table_index} with bots.')
+        await table.notify()
+
+    async def _send(
+            self,
+            table: Table,
+            client: AsyncClient,
+            data: Any,
+    ) -> bool:
+        """Send the given data to the given client, handling failure
+        cases. Return whether the message was correctly sent.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to send the data to.
+            data (Any): Data to send to the client. Encoded if not
+                already in bytes.
+
+        Returns:
+            bool: Whether the data was correctly sent to the client.
+        """
+        if client.is_bot:
+            return True
+        assert client.writer is not None
+
+        try:
+            if not isinstance(data, bytes):
+                data = server_utils.encode_data(data, client.wire_version)
+            client.writer.write(data)
+            await client.writer.drain()
+            return True
+        except Exception:
+            self.logger.warning(f'Lost client {client.address}.')
+            self._unregister_client(table, client)
+            return False
+
+    async def _receive_exactly(
+            self,
+            table: Table,
+            client: AsyncClient,
+            num_bytes: int,
+            timeout_sec: float,
+    ) -> Optional[bytes]:
+        """Return the given amount of bytes received from the given
+        client or `None` if something went wrong.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to receive the data from.
+            num_bytes (int): How many bytes to receive.
+            timeout_sec (float): How long to wait for the data
+                at maximum.
+
+        Returns:
+            Optional[bytes]: The data received or `None` if there was
+                an error.
+        """
+        assert client.reader is not None
+        try:
+            return await asyncio.wait_for(
+                client.reader.readexactly(num_bytes), timeout_sec)
+        except asyncio.TimeoutError:
+            self.logger.warning(
+                f'Client {client.address} did not respond in time.')
+        except Exception:
+            self.logger.warning(f'Lost client {client.address}.')
+        self._unregister_client(table, client)
+        return None
+
+    async def _receive_message(
+            self,
+            table: Table,
+            client: AsyncClient,
+            max_num_bytes: int,
+            timeout_sec: float,
+    ) -> Optional[bytes]:
+        """Return a length-prefixed message received from the given
+        client without its prefix or `None` if something went wrong.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to receive the message from.
+            max_num_bytes (int): Maximum allowed length of the message.
+            timeout_sec (float): How long to wait for the message
+                at maximum.
+
+        Returns:
+            Optional[bytes]: The message received or `None` if there
+                was an error.
+        """
+        assert client.reader is not None
+        try:
+            prefix = await asyncio.wait_for(
+                client.reader.readuntil(server_utils.MSG_LENGTH_SEPARATOR),
+                timeout_sec,
+            )
+            msg_length = int(prefix[:-len(server_utils.MSG_LENGTH_SEPARATOR)])
+        except asyncio.TimeoutError:
+            self.logger.warning(
+                f'Client {client.address} did not respond in time.')
+            self._unregister_client(table, client)
+            return None
+        except (ValueError, asyncio.LimitOverrunError):
+            await self._send(
+                table,
+                client,
+                (
+                    f'Please prefix messages with unknown length with '
+                    f'only their length and '
+                    f'"{server_utils.MSG_LENGTH_SEPARATOR.decode()}".'
+                ),
+            )
+            self.logger.warning(
+                f'Client {client.address} sent garbled message length. '
+                f'Closing connection...'
+            )
+            self._unregister_client(table, client)
+            return None
+        except Exception:
+            self.logger.warning(f'Lost client {client.address}.')
+            self._unregister_client(table, client)
+            return None
+
+        if msg_length > max_num_bytes:
+            await self._send(
+                table, client, 'Declared message length is too long.')
+            self.logger.warning(
+                f'Client {client.address} declared too long message. '
+                f'Closing connection...'
+            )
+            self._unregister_client(table, client)
+            return None
+
+        return await self._receive_exactly(
+            table, client, msg_length, timeout_sec)
+
+    async def _receive_ok(
+            self,
+            table: Table,
+            client: AsyncClient,
+            timeout_sec: Optional[float] = None,
+            negotiate_wire_version: bool = False,
+    ) -> bool:
+        """Wait for an 'OK' message from the given client. Return
+        whether the message was correctly received.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to receive the 'OK' from.
+            timeout_sec (Optional[float]): How long to wait at maximum.
+                If `None`, use `AsyncHeartsServer.OK_TIMEOUT_SEC`.
+            negotiate_wire_version (bool): Whether to also accept a
+                `server_utils.BINARY_OK_MSG`, switching the client to
+                binary messages, or a `server_utils.SETTINGS_OK_MSG`
+                followed by the client's settings.
+
+        Returns:
+            bool: Whether the message was correctly received in the
+                allowed time frame.
+        """
+        if client.is_bot:
+            return True
+        if timeout_sec is None:
+            timeout_sec = self.OK_TIMEOUT_SEC
+
+        data = await self._receive_exactly(
+            table, client, len(server_utils.OK_MSG), timeout_sec)
+        if data is None:
+            return False
+        if data == server_utils.OK_MSG:
+            return True
+        if negotiate_wire_version and data == server_utils.BINARY_OK_MSG:
+            client.wire_version = server_utils.WIRE_VERSION_BINARY
+            return True
+        if negotiate_wire_version and data == server_utils.SETTINGS_OK_MSG:
+            data = await self._receive_exactly(
+                table, client, server_utils.CLIENT_SETTINGS.size, timeout_sec)
+            if data is None:
+                return False
+            client.apply_settings(data)
+            self.logger.info(
+                f'Client {client.address} uses wire protocol version '
+                f'{client.wire_version}, maximum batch size '
+                f'{client.max_batch_size} and target latency '
+                f'{client.target_latency_sec}.'
+            )
+            return True
+
+        await self._send(
+            table,
+            client,
+            (
+                f'Please respond with "{server_utils.OK_MSG.decode()}"; '
+                f'closing connection...'
+            ),
+        )
+        self._unregister_client(table, client)
+        return False
+
+    async def _send_and_receive_ok(
+            self,
+            table: Table,
+            client: AsyncClient,
+            data: Any,
+    ) -> bool:
+        """Send the given data to the given client and wait for an 'OK'
+        message. Return whether both were successful.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to communicate with.
+            data (Any): Data to send to the client.
+
+        Returns:
+            bool: Whether the data was sent and the 'OK'
+                correctly received.
+        """
+        return (
+            await self._send(table, client, data)
+            and await self._receive_ok(table, client)
+        )
+
+    async def _receive_name(self, table: Table, client: AsyncClient) -> bool:
+        """Wait for a message containing a name from the given client.
+        Return whether the client should stay connected.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to receive the name from.
+
+        Returns:
+            bool: Whether the client should stay connected.
+        """
+        data = await self._receive_message(
+            table, client, Client.MAX_NAME_BYTES, self.OK_TIMEOUT_SEC)
+        if data is None:
+            return False
+        # We assume the client does not want to set a name.
+        if data == server_utils.OK_MSG:
+            return True
+        if data == self.RANDOM_AGENT_NAME:
+            player_index = client.player_index
+            self._unregister_client(table, client)
+            if not table.is_full:
+                self._register_bot(table, player_index)
+            return False
+
+        client.set_unique_name(data, (
+            other_client.name
+            for other_client in table.clients.values()
+            if other_client is not client
+        ))
+
+        self.logger.info(
+            f'Client {client.address} is now called "{client.name}".')
+        return True
+
+    async def _send_hello(self, table: Table, client: AsyncClient) -> bool:
+        """Send a greeting and server metadata message to the given
+        client. Return whether the client is still connected.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to send hello to.
+
+        Returns:
+            bool: Whether the client is still connected.
+        """
+        num_clients = len(table.clients)
+        message = (
+            f'{client.name} connected to table {table.table_index}; '
+            f'{num_clients}/{table.num_players} players connected'
+        )
+        if num_clients < table.num_players:
+            message = message + '...'
+        else:
+            message = message + '!'
+        if not await self._send_and_receive_ok(table, client, message):
+            return False
+
+        metadata = HeartsServer.create_metadata(
+            client.player_index,
+            table.envs,
+            self.max_num_games,
+            self.num_parallel_games,
+        )
+        return (
+            await self._send(table, client, metadata)
+            and await self._receive_ok(
+                table, client, self.SETUP_OK_TIMEOUT_SEC, True)
+        )
+
+    async def _wait_for_players(
+            self,
+            table: Table,
+            client: AsyncClient,
+    ) -> bool:
+        """Let the given client wait until its table is full. During the
+        waiting, send a message whenever the number of players changes
+        and periodically otherwise. Return whether the client is still
+        connected.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client that waits.
+
+        Returns:
+            bool: Whether the client is still connected.
+        """
+        num_clients = len(table.clients)
+        while client.is_registered and not table.is_full:
+            prev_num_clients = num_clients
+            try:
+                async with table.changed:
+                    await asyncio.wait_for(
+                        table.changed.wait_for(
+                            lambda: (
+                                table.is_full
+                                or len(table.clients) != prev_num_clients
+                            ),
+                        ),
+                        self.PRINT_INTERVAL_SEC,
+                    )
+            except asyncio.TimeoutError:
+                if not await self._send_and_receive_ok(
+                        table, client, 'Waiting for more players...'):
+                    return False
+                continue
+
+            num_clients = len(table.clients)
+            message = f'{num_clients}/{table.num_players} players connected'
+            if table.is_full:
+                message = message + '!'
+            else:
+                message = message + '...'
+            if not await self._send_and_receive_ok(table, client, message):
+                return False
+        return client.is_registered
+
+    def _accept_connection(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+    ) -> None:
+        """Start handling a newly connected client in a task that is
+        cancelled when the server is closed.
+
+        Args:
+            reader (asyncio.StreamReader): Stream reader of the
+                connection.
+            writer (asyncio.StreamWriter): Stream writer of the
+                connection.
+        """
+        task = asyncio.ensure_future(self._handle_connection(reader, writer))
+        self._connection_tasks.add(task)
+        task.add_done_callback(self._connection_tasks.discard)
+
+    async def _handle_connection(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+    ) -> None:
+        """Seat a newly connected client and set it up.
+
+        Args:
+            reader (asyncio.StreamReader): Stream reader of the
+                connection.
+            writer (asyncio.StreamWriter): Stream writer of the
+                connection.
+        """
+        address = writer.get_extra_info('peername')
+        if (
+                not self._accept_repeating_client_addresses
+                and self._has_client_address(address)
+        ):
+            self.logger.warning(
+                f'Rejected {address}; address is already connected.')
+            writer.close()
+            return
+
+        table = self._find_open_table()
+        if table is None:
+            self.logger.warning(
+                f'Rejected {address}; maximum number of tables reached.')
+            writer.close()
+            return
+
+        player_index = table.find_free_index()
+        assert player_index is not None, 'open table is full'
+        client = self._register_client(table, AsyncClient(
+            player_index, address, reader=reader, writer=writer))
+        self.print_log(
+            f'Registered {address} at index {client.player_index} of '
+            f'table {table.table_index}.'
+        )
+        await table.notify()
+
+        if (
+                not await self._receive_name(table, client)
+                or not await self._send_hello(table, client)
+                or not await self._wait_for_players(table, client)
+        ):
+            return
+
+        client.is_ready = True
+        await table.notify()
+
+    async def _run_in_executor(
+            self,
+            table: Table,
+            func: Callable[..., Any],
+            *args: Any,
+    ) -> Any:
+        """Return the result of calling the given function with the
+        given arguments in the server's thread pool.
+
+        The call is remembered among the table's executor futures and
+        is shielded from cancellation so the table is only closed after
+        it finished.
+
+        Args:
+            table (Table): Table the call is made for.
+            func (Callable[..., Any]): Function to call.
+            *args (Any): Arguments to call the function with.
+
+        Returns:
+            Any: Return value of the call.
+        """
+        future = asyncio.get_event_loop().run_in_executor(
+            self._executor, func, *args)
+        table.executor_futures.add(future)
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                table.executor_futures.discard(future)
+
+    async def _compute_bot_actions(
+            self,
+            table: Table,
+            client: AsyncClient,
+            env_indices: Optional[List[int]] = None,
+    ) -> List[Action]:
+        """Return the actions of the given simulated agent.
+
+        Args:
+            table (Table): Table the simulated agent is seated at.
+            client (AsyncClient): Simulated agent to compute the
+                actions of.
+            env_indices (Optional[List[int]]): Sorted indices of the
+                environments to act in. If `None`, act in all
+                environments the simulated agent is active in.
+
+        Returns:
+            List[Action]: Action for each environment the simulated agent
+                is active in.
+        """
+        assert client.request is not None, 'expected a simulated agent'
+        actions = await self._run_in_executor(
+            table, client.request.compute_actions, env_indices)
+        return actions.tolist()
+
+    def _get_default_actions(
+            self,
+            table: Table,
+            env_indices: List[int],
+    ) -> List[Action]:
+        """Return the first legal action for each of the given
+        environments.
+
+        Args:
+            table (Table): Table the environments belong to.
+            env_indices (List[int]): Sorted indices of the environments.
+
+        Returns:
+            List[Action]: Default action for each environment.
+        """
+        envs = table.envs
+        if not envs.mask_actions:
+            return [0] * len(env_indices)
+        return [envs.get_legal_actions(i)[0] for i in env_indices]
+
+    async def _receive_batch(
+            self,
+            table: Table,
+            client: AsyncClient,
+            env_indices: List[int],
+    ) -> Optional[List[Action]]:
+        """Receive and parse the client's response to a batch of
+        observations sent to it.
+
+        If the message is malformed, the client may send a corrected
+        one. This is only waited for while no later batch is in flight;
+        otherwise, the next message may be the response to that batch.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to receive the actions from.
+            env_indices (List[int]): Indices of the environments the
+                batch of observations was about.
+
+        Returns:
+            Optional[List[Action]]: Actions contained in the message, a
+                default if it was malformed or `None` if the client was
+                replaced with a simulated agent.
+        """
+        player_index = client.player_index
+        timeout_sec = HeartsRequestHandler.get_action_timeout_sec(client)
+        num_fails = 0
+        while True:
+            data = await self._receive_message(
+                table, client, self.max_receive_bytes, timeout_sec)
+            if data is None:
+                return None
+
+            try:
+                actions = server_utils.decode_actions(data)
+                if len(actions) != len(env_indices):
+                    raise ValueError('wrong amount of actions')
+            except Exception:
+                self.logger.warning('Error parsing data; ignoring...')
+            else:
+                return actions
+
+            num_fails += 1
+            if not await self._send(
+                    table,
+                    client,
+                    (
+                        f'Actions were malformed. Please submit at maximum '
+                        f'{self.max_receive_bytes} bytes which are your '
+                        f'actions (a comma-separated list of integers, one '
+                        f'for each observation) as a string. Do not encode '
+                        f'the message in any other form.'
+                    ),
+            ):
+                return None
+            if (
+                    num_fails > self.PARSE_FAIL_TOLERANCE
+                    or len(table.sent_batches[player_index]) > 0
+            ):
+                break
+
+        # The client may have lost track of these observations.
+        table.delta_encoders[player_index].invalidate(env_indices)
+        return self._get_default_actions(table, env_indices)
+
+    async def _receive_actions(
+            self,
+            table: Table,
+            player_index: int,
+    ) -> List[Action]:
+        """Receive and parse the actions of the client with the given
+        index at the given table in response to all batches of
+        observations sent to it.
+
+        Upon error, replace the client with a simulated agent and use
+        its actions instead.
+
+        Args:
+            table (Table): Table to receive the actions at.
+            player_index (int): Index of the client to receive the
+                actions from.
+
+        Returns:
+            List[Action]: Actions of the client, sorted by environment
+                indices.
+        """
+        sent_batches = table.sent_batches[player_index]
+        client = table.clients[player_index]
+        # Simulated agents compute their actions in-process.
+        if client.is_bot:
+            sent_batches.clear()
+            return await self._compute_bot_actions(table, client)
+
+        actions: List[Action] = []
+        prev_receive_time = 0.0
+        while len(sent_batches) > 0:
+            (sent_time, env_indices) = sent_batches.popleft()
+            client = table.clients[player_index]
+            if client.is_bot:
+                actions.extend(await self._compute_bot_actions(
+                    table, client, env_indices))
+                continue
+
+            batch_actions = await self._receive_batch(
+                table, client, env_indices)
+            if batch_actions is None:
+                # The client was replaced; let the simulated agent act.
+                sent_batches.appendleft((sent_time, env_indices))
+                continue
+            actions.extend(batch_actions)
+
+            # The client only starts working on a batch once it
+            # responded to the previous one.
+            receive_time = time.perf_counter()
+            batch_sizer = table.batch_sizers[player_index]
+            if batch_sizer is not None:
+                batch_sizer.update(
+                    len(env_indices),
+                    receive_time - max(sent_time, prev_receive_time),
+                )
+            prev_receive_time = receive_time
+        return actions
+
+    def _encode_batches(
+            self,
+            table: Table,
+            client: AsyncClient,
+            records: List[Tuple],
+    ) -> List[Tuple[List[int], bytes]]:
+        """Return the given records for the given client split into
+        batches and encoded as messages.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to encode the records for.
+            records (List[Tuple]): Environment information for the
+                client, each prefixed with the environment's index.
+
+        Returns:
+            List[Tuple[List[int], bytes]]: Indices of the environments
+                each batch is about and its encoded message.
+        """
+        player_index = client.player_index
+        if client.wire_version >= server_utils.WIRE_VERSION_DELTA:
+            records = table.delta_encoders[player_index].encode(
+                records, player_index)
+        batch_sizer = table.batch_sizers[player_index]
+        if batch_sizer is None:
+            batches = [records]
+        else:
+            batches = batch_sizer.split(records)
+
+        return [
+            (
+                [record[0] for record in batch],
+                HeartsRequestHandler.encode_data(
+                    batch, client.wire_version, self.logger),
+            )
+            for batch in batches
+        ]
+
+    async def _send_batches(
+            self,
+            table: Table,
+            client: AsyncClient,
+            records: List[Tuple],
+    ) -> None:
+        """Send the given records to the given client, split into
+        batches for clients that sent settings.
+
+        Args:
+            table (Table): Table the client is seated at.
+            client (AsyncClient): Client to send the records to.
+            records (List[Tuple]): Environment information for the
+                client, each prefixed with the environment's index.
+        """
+        batches = await self._run_in_executor(
+            table, self._encode_batches, table, client, records)
+        sent_batches = table.sent_batches[client.player_index]
+        # Remember all batches first so that a simulated agent replacing
+        # the client acts in all of them.
+        sent_time = time.perf_counter()
+        for (env_indices, _) in batches:
+            sent_batches.append((sent_time, env_indices))
+        for (_, encoded_batch) in batches:
+            if not await self._send(table, client, encoded_batch):
+                return
+
+    async def _distribute_return_data(
+            self,
+            table: Table,
+            return_data: List[Any],
+    ) -> None:
+        """Distribute the given data among the clients of the given
+        table, sending each client the data meant for it.
+
+        Args:
+            table (Table): Table whose clients to send the data to.
+            return_data (List[Any]): Environment information received
+                from the parallely processed environments.
+        """
+        distributed_data: List[List[Tuple]] = [
+            [] for _ in range(table.num_players)]
+        active_player_indices = table.envs.get_active_player_indices()
+        for (i, (data, active_player_index)) in enumerate(zip(
+                return_data, active_player_indices)):
+            if isinstance(data, tuple):
+                distributed_data[active_player_index].append((i,) + data)
+            else:
+                distributed_data[active_player_index].append((i, data))
+
+        await asyncio.gather(*(
+            self._send_batches(
+                table, client, distributed_data[player_index])
+            for (player_index, client) in list(table.clients.items())
+            if not client.is_bot
+        ))
+
+    def _order_player_actions(
+            self,
+            table: Table,
+            player_actions: List[List[Action]],
+    ) -> List[Action]:
+        """Return the given actions for each player at the given table,
+        sorted so each action matches the corresponding environment.
+
+        Args:
+            table (Table): Table the actions were received at.
+            player_actions (List[List[Action]]): List of actions for
+                each player, sorted by player indices.
+
+        Returns:
+            List[Action]: Actions sorted so the order corresponds to the
+                order of environments.
+        """
+        offsets = [0] * len(player_actions)
+        actions = []
+        for active_player_index in table.envs.get_active_player_indices():
+            offset = offsets[active_player_index]
+            offsets[active_player_index] += 1
+            actions.append(player_actions[active_player_index][offset])
+        return actions
+
+    async def _finish_games(
+            self,
+            table: Table,
+            return_data: List[Tuple],
+    ) -> None:
+        """Update the statistics of the given table with the finished
+        games and send the final data and results to its clients.
+
+        Args:
+            table (Table): Table whose games are finished.
+            return_data (List[Tuple]): Environment information received
+                from the finished environments.
+        """
+        table.needs_reset = True
+        table.num_games += self.num_parallel_games
+
+        for (_, _, _, info) in return_data:
+            single_info = HeartsRequestHandler.get_single_info(info)
+            table.stats.add_game(
+                single_info['final_penalties'],
+                single_info['final_rankings'],
+            )
+
+        self.print_log(
+            f'Table {table.table_index} num games: {table.num_games}')
+        results_table = utils.create_results_table(
+            table.stats.total_penalties,
+            table.stats.total_placements,
+            table.index_to_name,
+            table.num_illegals,
+            table.stats.get_extra_columns(),
+        )
+        self.logger.info(
+            f'Table {table.table_index} results:\n{results_table}')
+        encoded_results_table = server_utils.encode_data(
+            '\n' + results_table)
+
+        return_data = [(i,) + data for (i, data) in enumerate(return_data)]
+        clients = [
+            client
+            for client in table.clients.values()
+            if not client.is_bot
+        ]
+        wire_versions = list(set(client.wire_version for client in clients))
+        encoded_return_data: Dict[int, bytes] = dict(zip(
+            wire_versions,
+            await asyncio.gather(*(
+                self._run_in_executor(
+                    table,
+                    HeartsRequestHandler.encode_data,
+                    return_data,
+                    wire_version,
+                    self.logger,
+                )
+                for wire_version in wire_versions
+            )),
+        ))
+
+        await asyncio.gather(*(
+            self._send(
+                table, client, encoded_return_data[client.wire_version])
+            for client in clients
+        ))
+        await asyncio.gather(*(
+            self._receive_ok(table, client)
+            for client in clients
+        ))
+        await asyncio.gather(*(
+            self._send_and_receive_ok(table, client, encoded_results_table)
+            for client in clients
+            if client.is_registered
+        ))
+
+    async def _run_table(self, table: Table) -> None:
+        """Play games at the given full table until it is done.
+
+        Args:
+            table (Table): Table to play at.
+        """
+        async with table.changed:
+            await table.changed.wait_for(lambda: all(
+                client.is_ready or not client.is_registered
+                for client in table.clients.values()
+            ))
+        self.print_log(f'Starting game loop at table {table.table_index}...')
+        table.batch_sizers = [
+            HeartsRequestHandler.create_batch_sizer(
+                table.clients[i], self.num_parallel_games)
+            for i in range(table.num_players)
+        ]
+
+        envs = table.envs
+        try:
+            while not (
+                    HeartsRequestHandler.is_done(
+                        table.num_games, table.max_num_games)
+                    or all(
+                        client.is_bot
+                        for client in table.clients.values()
+                    )
+            ):
+                if table.needs_reset:
+                    init_return_data = await self._run_in_executor(
+                        table, envs.reset)
+                    for client in table.clients.values():
+                        if client.request is not None:
+                            client.request.reset_states()
+                    for delta_encoder in table.delta_encoders:
+                        delta_encoder.reset()
+                    table.needs_reset = False
+                    await self._distribute_return_data(
+                        table, init_return_data)
+
+                player_actions = await asyncio.gather(*(
+                    self._receive_actions(table, player_index)
+                    for player_index in range(table.num_players)
+                ))
+                actions = self._order_player_actions(table, player_actions)
+                return_data = await self._run_in_executor(
+                    table, envs.step, actions)
+
+                for (_, _, is_done, info) in return_data:
+                    HeartsRequestHandler.count_illegal(
+                        table.num_illegals, info)
+
+                if not is_done['__all__']:
+                    await self._distribute_return_data(table, return_data)
+                    continue
+
+                await self._finish_games(table, return_data)
+        finally:
+            if table.executor_futures:
+                # Do not terminate the environments while they are
+                # still in use.
+                await asyncio.wait(table.executor_futures)
+            self._close_table(table)
+
+    async def _cancel_table(self, table: Table) -> None:
+        """Cancel all tasks of the given table, wait for them to finish
+        and close the table.
+
+        Args:
+            table (Table): Table to cancel.
+        """
+        for task in table.tasks:
+            task.cancel()
+        await asyncio.gather(*table.tasks, return_exceptions=True)
+        self._close_table(table)
+
+    def _close_table(self, table: Table) -> None:
+        """Disconnect all clients of the given table and remove it.
+
+        Args:
+            table (Table): Table to close.
+        """
+        if self.tables.pop(table.table_index, None) is None:
+            return
+        self.print_log(f'Closing table {table.table_index}...')
+        for client in list(table.clients.values()):
+            client.is_registered = False
+            client.close()
+        table.clients.clear()
+        table.envs.terminate_pool()
+        if self._open_table is table:
+            self._open_table = None
+
+    async def start(self) -> None:
+        """Start accepting clients."""
+        (host, port) = self.server_address
+        self._server = await asyncio.start_server(
+            self._accept_connection, host, port)
+        self.print_log(f'Server started on {self.server_address}.')
+
+    async def serve(self) -> None:
+        """Accept clients and play games until cancelled."""
+        await self.start()
+        try:
+            await asyncio.get_event_loop().create_future()
+        finally:
+            await self.close()
+
+    def serve_forever(self) -> None:
+        """Accept clients and play games until interrupted."""
+        loop = asyncio.get_event_loop()
+        task = asyncio.ensure_future(self.serve())
+        try:
+            loop.run_until_complete(task)
+        finally:
+            task.cancel()
+            loop.run_until_complete(
+                asyncio.gather(task, return_exceptions=True))
+
+    async def close(self) -> None:
+        """Stop accepting clients, cancel all running tasks and close
+        all tables.
+        """
+        if self._server is not None:
+            self._server.close()
+        connection_tasks = list(self._connection_tasks)
+        for task in connection_tasks:
+            task.cancel()
+        await asyncio.gather(*connection_tasks, return_exceptions=True)
+        for table in list(self.tables.values()):
+            await self._cancel_table(table)
+        self._executor.shutdown(wait=False)
+
+    def server_close(self) -> None:
+        """Stop accepting clients and close all tables.
+
+        Tasks are not cancelled; prefer `close` while the event loop
+        is running.
+        """
+        if self._server is not None:
+            self._server.close()
+        for table in list(self.tables.values()):
+            self._close_table(table)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,93 @@
+"""
+Adaptive batch sizes for sending observations to clients.
+"""
+
+from typing import List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class BatchSizer:
+    """Adapt the amount of observations sent per message to a client
+    so the client responds in a targeted amount of time.
+
+    Starts with a small batch size that is increased from measured
+    response times, similar to a slow start, so slow clients do not
+    time out before the first measurement.
+    """
+
+    INITIAL_BATCH_SIZE = 64
+    MAX_GROWTH = 2.0
+    """Factor the batch size may grow by at maximum per update."""
+    SMOOTHING = 0.5
+    """Weight of a new measurement when updating the batch size."""
+
+    def __init__(
+            self,
+            max_batch_size: int,
+            target_latency_sec: float,
+            initial_batch_size: Optional[int] = None,
+    ) -> None:
+        """Construct a batch sizer.
+
+        Args:
+            max_batch_size (int): Amount of observations to send per
+                message at maximum.
+            target_latency_sec (float): Targeted time in seconds for the
+                client to respond to a message.
+            initial_batch_size (Optional[int]): Amount of observations
+                to send per message before the first measurement. If
+                `None`, use `BatchSizer.INITIAL_BATCH_SIZE`.
+        """
+        assert max_batch_size > 0, 'maximum batch size must be positive'
+        assert target_latency_sec > 0, 'target latency must be positive'
+        if initial_batch_size is None:
+            initial_batch_size = self.INITIAL_BATCH_SIZE
+
+        self.max_batch_size = max_batch_size
+        self.target_latency_sec = target_latency_sec
+        self._batch_size = float(
+            min(max(initial_batch_size, 1), max_batch_size))
+
+    @property
+    def batch_size(self) -> int:
+        """Amount of observations to send per message."""
+        return int(round(self._batch_size))
+
+    def update(self, num_observations: int, latency_sec: float) -> None:
+        """Update the batch size with a measured response time.
+
+        Args:
+            num_observations (int): Amount of observations the client
+                responded to.
+            latency_sec (float): Time in seconds it took from sending
+                the observations until receiving the response.
+        """
+        if num_observations == 0 or latency_sec <= 0:
+            return
+
+        estimate = num_observations * self.target_latency_sec / latency_sec
+        estimate = min(estimate, self.MAX_GROWTH * self._batch_size)
+        batch_size = (
+            (1 - self.SMOOTHING) * self._batch_size
+            + self.SMOOTHING * estimate
+        )
+        self._batch_size = min(max(batch_size, 1.0), self.max_batch_size)
+
+    def split(self, data: List[T]) -> List[List[T]]:
+        """Return the given data split into batches of the current
+        batch size. Empty data results in a single empty batch.
+
+        Args:
+            data (List[T]): Data to split.
+
+        Returns:
+            List[List[T]]: Batches of the data in order.
+        """
+        batch_size = self.batch_size
+        if len(data) <= batch_size:
+            return [data]
+        return [
+            data[i:i + batch_size]
+            for i in range(0, len(data), batch_size)
+        ]
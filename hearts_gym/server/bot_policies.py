@@ -0,0 +1,208 @@
+"""
+Vectorized policies for simulated agents hosted by the server.
+
+Policies receive the observations of all games a simulated agent is
+active in as arrays and return all actions at once.
+"""
+
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hearts_gym import utils
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.policies.random_policy import sample_legal_actions
+
+
+class BotPolicy:
+    """A vectorized policy for simulated agents.
+
+    Observations are given as arrays with the games along the
+    first axis. Recurrent states are given and returned as lists of
+    arrays with the games along the first axis.
+    """
+
+    def get_initial_state(self) -> List[np.ndarray]:
+        """Return the initial recurrent state for a single game.
+
+        Returns:
+            List[np.ndarray]: Initial recurrent state. Empty if the
+                policy is not recurrent.
+        """
+        return []
+
+    def compute_actions(
+            self,
+            cards: np.ndarray,
+            leading_hearts_allowed: np.ndarray,
+            action_masks: np.ndarray,
+            state_batches: List[np.ndarray],
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Return an action for each of the given observations.
+
+        Args:
+            cards (np.ndarray): Card states as observed by the agent;
+                one row per game.
+            leading_hearts_allowed (np.ndarray): Whether leading with
+                a hearts card is allowed in each game.
+            action_masks (np.ndarray): Mask of legal actions; one row
+                per game.
+            state_batches (List[np.ndarray]): Recurrent state of each
+                game, batched like the result of `get_initial_state`.
+
+        Returns:
+            np.ndarray: Action for each game.
+            List[np.ndarray]: Updated recurrent state of each game.
+        """
+        raise NotImplementedError('please implement `compute_actions`')
+
+
+class RandomBotPolicy(BotPolicy):
+    """A vectorized policy executing legal actions at random."""
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """Construct a randomly acting policy.
+
+        Args:
+            seed (Optional[int]): Random number generator seed for
+                action sampling.
+        """
+        self._rng = np.random.default_rng(seed)
+
+    def compute_actions(
+            self,
+            cards: np.ndarray,
+            leading_hearts_allowed: np.ndarray,
+            action_masks: np.ndarray,
+            state_batches: List[np.ndarray],
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        return sample_legal_actions(self._rng, action_masks), []
+
+
+class RLlibBotPolicy(BotPolicy):
+    """A vectorized policy wrapping an RLlib policy, for example a
+    `hearts_gym.policies.RuleBasedPolicy` or a policy of an agent loaded
+    from a checkpoint.
+
+    Observations are preprocessed and filtered like RLlib's rollout
+    workers do before passing them to the wrapped policy. Observation
+    transforms are not applied. Calls to the wrapped policy are
+    serialized, so a single instance may be shared by multiple
+    simulated agents.
+    """
+
+    def __init__(
+            self,
+            policy: Any,
+            preprocessor: Any,
+            mask_actions: bool,
+            obs_filter: Optional[Callable[..., np.ndarray]] = None,
+            initial_state: Optional[List[Any]] = None,
+    ) -> None:
+        """Construct a policy wrapping the given RLlib policy.
+
+        Args:
+            policy (Any): RLlib policy to compute actions with.
+            preprocessor (Any): RLlib preprocessor for the observation
+                space of the environment.
+            mask_actions (bool): Whether the wrapped policy expects
+                observations containing action masks.
+            obs_filter (Optional[Callable[..., np.ndarray]]): RLlib
+                observation filter to apply after preprocessing. If
+                `None`, do not filter.
+            initial_state (Optional[List[Any]]): Initial recurrent
+                state for a single game. If `None`, query the
+                wrapped policy.
+        """
+        if initial_state is None:
+            initial_state = policy.get_initial_state()
+
+        self.policy = policy
+        self.preprocessor = preprocessor
+        self.mask_actions = mask_actions
+        self.obs_filter = obs_filter
+        self._initial_state = [np.asarray(state) for state in initial_state]
+        self._lock = Lock()
+
+    @classmethod
+    def from_agent(cls, agent: Any, policy_id: str) -> 'RLlibBotPolicy':
+        """Return a policy wrapping the policy with the given ID of the
+        given agent, using the preprocessor and observation filter of
+        its local worker.
+
+        Args:
+            agent (Any): Reinforcement learning trainer/agent.
+            policy_id (str): ID of the policy to wrap.
+
+        Returns:
+            RLlibBotPolicy: Policy computing actions like the agent.
+        """
+        worker = agent.workers.local_worker()
+        mask_actions = agent.config['env_config'].get(
+            'mask_actions', HeartsEnv.MASK_ACTIONS_DEFAULT)
+        return cls(
+            agent.get_policy(policy_id),
+            worker.preprocessors[policy_id],
+            mask_actions,
+            worker.filters[policy_id],
+            utils.get_initial_state(agent, policy_id),
+        )
+
+    def get_initial_state(self) -> List[np.ndarray]:
+        return self._initial_state
+
+    def _preprocess(
+            self,
+            cards: np.ndarray,
+            leading_hearts_allowed: np.ndarray,
+            action_masks: np.ndarray,
+    ) -> np.ndarray:
+        """Return the given observations preprocessed and filtered.
+
+        Args:
+            cards (np.ndarray): Card states as observed by the agent;
+                one row per game.
+            leading_hearts_allowed (np.ndarray): Whether leading with
+                a hearts card is allowed in each game.
+            action_masks (np.ndarray): Mask of legal actions; one row
+                per game.
+
+        Returns:
+            np.ndarray: Batch of preprocessed observations.
+        """
+        obs_batch = []
+        for (game_cards, game_leading_hearts_allowed, action_mask) in zip(
+                cards, leading_hearts_allowed, action_masks):
+            obs: Dict[str, Any] = {
+                'cards': game_cards,
+                'leading_hearts_allowed': bool(game_leading_hearts_allowed),
+            }
+            if self.mask_actions:
+                obs = {
+                    HeartsEnv.OBS_KEY: obs,
+                    HeartsEnv.ACTION_MASK_KEY: action_mask,
+                }
+
+            preprocessed = self.preprocessor.transform(obs)
+            if self.obs_filter is not None:
+                preprocessed = self.obs_filter(preprocessed, update=False)
+            obs_batch.append(preprocessed)
+        return np.stack(obs_batch)
+
+    def compute_actions(
+            self,
+            cards: np.ndarray,
+            leading_hearts_allowed: np.ndarray,
+            action_masks: np.ndarray,
+            state_batches: List[np.ndarray],
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        obs_batch = self._preprocess(
+            cards, leading_hearts_allowed, action_masks)
+        with self._lock:
+            actions, state_batches, _ = self.policy.compute_actions(
+                obs_batch, state_batches)
+        return (
+            np.asarray(actions).reshape(-1),
+            [np.asarray(state) for state in state_batches],
+        )
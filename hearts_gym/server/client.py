@@ -1,7 +1,12 @@
 import re
-from typing import Optional
+from typing import Iterable, Optional
 
-from hearts_gym.server.utils import Address, Request
+from hearts_gym.server.utils import (
+    Address,
+    decode_client_settings,
+    Request,
+    WIRE_VERSION_JSON,
+)
 
 
 class Client:
@@ -10,6 +15,10 @@ class Client:
         'request',
         'address',
         'is_registered',
+        'wire_version',
+        'max_batch_size',
+        'target_latency_sec',
+        'sent_settings',
         '_name',
     ]
 
@@ -28,6 +37,13 @@ class Client:
         self.request = request
         self.address = address
         self.is_registered = True
+        # Negotiated during setup.
+        self.wire_version = WIRE_VERSION_JSON
+        self.max_batch_size: Optional[int] = None
+        self.target_latency_sec: Optional[float] = None
+        # Only clients that sent settings accept observations split
+        # over several messages.
+        self.sent_settings = False
 
         self._name = 'Player ' + str(player_index + 1)
 
@@ -80,3 +96,33 @@ class Client:
         if name is None:
             return
         self._name = name
+
+    def set_unique_name(self, name: bytes, other_names: Iterable[str]) -> None:
+        """Set the name to the given new one, numbering it if another
+        client already has the same name.
+
+        Args:
+            name (bytes): New name to set.
+            other_names (Iterable[str]): Names of the other clients.
+        """
+        other_names = set(other_names)
+        self.set_name(name)
+        i = 2
+        while self.name in other_names:
+            self.set_name(name + f' ({i})'.encode())
+            i += 1
+
+    def apply_settings(self, data: bytes) -> None:
+        """Apply the settings the client sent after
+        `hearts_gym.server.utils.SETTINGS_OK_MSG`.
+
+        Args:
+            data (bytes): Encoded settings without
+                `hearts_gym.server.utils.SETTINGS_OK_MSG`.
+        """
+        (
+            self.wire_version,
+            self.max_batch_size,
+            self.target_latency_sec,
+        ) = decode_client_settings(data)
+        self.sent_settings = True
@@ -0,0 +1,231 @@
+"""
+Delta encoding of observed card states for clients using
+`hearts_gym.server.utils.WIRE_VERSION_DELTA`.
+
+Instead of the whole card state vector, an observation only contains
+the indices and new states of the cards that changed since the last
+observation of the same game sent to the same client. Full card state
+vectors (keyframes) are sent for the first observation of each game,
+periodically and whenever the server is unsure whether the client
+received the previous observation.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.utils.typing import Observation
+
+CARDS_KEY = 'cards'
+"""Key of the card state vector in an observation."""
+INDICES_KEY = 'indices'
+"""Key of the changed card indices in a delta-encoded card state."""
+STATES_KEY = 'states'
+"""Key of the changed card states in a delta-encoded card state."""
+
+
+def _get_cards_container(obs: Observation) -> Dict[str, Any]:
+    """Return the dictionary containing the card state vector in the
+    given observation.
+
+    Args:
+        obs (Observation): Observation, possibly containing an
+            action mask.
+
+    Returns:
+        Dict[str, Any]: Dictionary containing the card states.
+    """
+    return obs[HeartsEnv.OBS_KEY] if HeartsEnv.OBS_KEY in obs else obs
+
+
+def _replace_cards(obs: Observation, cards: Any) -> Observation:
+    """Return a shallow copy of the given observation with the card
+    state vector replaced by the given value.
+
+    Args:
+        obs (Observation): Observation, possibly containing an
+            action mask.
+        cards (Any): Value to put in place of the card states.
+
+    Returns:
+        Observation: Copy of the observation with replaced card states.
+    """
+    obs = dict(obs)
+    if HeartsEnv.OBS_KEY in obs:
+        obs[HeartsEnv.OBS_KEY] = _replace_cards(obs[HeartsEnv.OBS_KEY], cards)
+    else:
+        obs[CARDS_KEY] = cards
+    return obs
+
+
+class DeltaEncoder:
+    """Delta-encode the card states of observations sent to a single
+    client.
+    """
+
+    KEYFRAME_INTERVAL = 8
+    """After how many delta-encoded observations of a game to send the
+    full card states again.
+    """
+
+    def __init__(
+            self,
+            num_envs: int,
+            keyframe_interval: Optional[int] = None,
+    ) -> None:
+        """Construct a delta encoder for the given amount of games.
+
+        Args:
+            num_envs (int): Amount of games played in parallel.
+            keyframe_interval (Optional[int]): After how many
+                delta-encoded observations of a game to send the full
+                card states again. If `None`, use
+                `DeltaEncoder.KEYFRAME_INTERVAL`.
+        """
+        if keyframe_interval is None:
+            keyframe_interval = self.KEYFRAME_INTERVAL
+        assert keyframe_interval >= 0, \
+            'keyframe interval must not be negative'
+
+        self.keyframe_interval = keyframe_interval
+        self._num_envs = num_envs
+        self._cards: Optional[np.ndarray] = None
+        """Card states last sent for each game."""
+        self._has_cards = np.zeros(num_envs, np.bool_)
+        self._num_deltas = np.zeros(num_envs, np.int64)
+        """Amount of delta-encoded observations since the last keyframe
+        for each game.
+        """
+
+    def reset(self) -> None:
+        """Send keyframes for all games from now on, for example because
+        new games started.
+        """
+        self._has_cards[:] = False
+
+    def invalidate(self, env_indices: List[int]) -> None:
+        """Send keyframes for the games with the given indices next,
+        resynchronizing the client.
+
+        Args:
+            env_indices (Sequence[int]): Indices of the games the client may
+                not have received the last observations of.
+        """
+        self._has_cards[env_indices] = False
+
+    def encode(self, data: List[Any], player_index: int) -> List[Any]:
+        """Return the given records for the client with the given index
+        with their observations delta-encoded.
+
+        Each record starts with the index of its game and the
+        observations of the ready players. Only the client's own
+        observation is kept.
+
+        Args:
+            data (List[Any]): Records to send to the client.
+            player_index (int): Index of the client.
+
+        Returns:
+            List[Any]: Records with delta-encoded observations.
+        """
+        if len(data) == 0:
+            return data
+
+        observations = [record[1][player_index] for record in data]
+        env_indices = np.array([record[0] for record in data], np.intp)
+        cards = np.stack([
+            _get_cards_container(obs)[CARDS_KEY]
+            for obs in observations
+        ])
+        if self._cards is None:
+            self._cards = np.zeros(
+                (self._num_envs,) + cards.shape[1:], cards.dtype)
+
+        is_keyframe = (
+            ~self._has_cards[env_indices]
+            | (self._num_deltas[env_indices] >= self.keyframe_interval)
+        )
+        is_changed = cards != self._cards[env_indices]
+        is_changed[is_keyframe] = True
+        self._cards[env_indices] = cards
+        self._has_cards[env_indices] = True
+        self._num_deltas[env_indices] = np.where(
+            is_keyframe, 0, self._num_deltas[env_indices] + 1)
+
+        (rows, card_indices) = np.nonzero(is_changed)
+        splits = np.cumsum(np.count_nonzero(is_changed, axis=1))[:-1]
+        changed_indices = np.split(card_indices.astype(np.uint8), splits)
+        changed_states = np.split(cards[rows, card_indices], splits)
+
+        return [
+            (
+                record[0],
+                {
+                    player_index: _replace_cards(obs, {
+                        INDICES_KEY: indices,
+                        STATES_KEY: states,
+                    }),
+                },
+            ) + tuple(record[2:])
+            for (record, obs, indices, states) in zip(
+                    data, observations, changed_indices, changed_states)
+        ]
+
+
+class DeltaDecoder:
+    """Reconstruct full card states from delta-encoded observations
+    received by a client.
+    """
+
+    def __init__(self, deck_size: int) -> None:
+        """Construct a delta decoder.
+
+        Args:
+            deck_size (int): Amount of cards in the deck.
+        """
+        self.deck_size = deck_size
+        self._cards: Dict[int, np.ndarray] = {}
+        """Reconstructed card states for each game."""
+
+    def reset(self) -> None:
+        """Forget all card states, for example because new
+        games started.
+        """
+        self._cards.clear()
+
+    def decode(
+            self,
+            env_indices: Sequence[int],
+            observations: List[Observation],
+    ) -> None:
+        """Replace delta-encoded card states in the given observations
+        with full card states in-place.
+
+        Observations that are not delta-encoded are kept as they are.
+
+        Args:
+            env_indices (Sequence[int]): Indices of the games the
+                observations belong to.
+            observations (List[Observation]): Observations to decode.
+        """
+        for (env_index, obs) in zip(env_indices, observations):
+            container = _get_cards_container(obs)
+            delta_cards = container[CARDS_KEY]
+            if not isinstance(delta_cards, dict):
+                self._cards[env_index] = np.array(delta_cards)
+                continue
+
+            indices = np.asarray(delta_cards[INDICES_KEY], np.intp)
+            states = np.asarray(delta_cards[STATES_KEY])
+            cards = self._cards.get(env_index)
+            if cards is None:
+                if len(indices) != self.deck_size:
+                    raise ValueError(
+                        f'received changed card states for game {env_index} '
+                        f'without knowing its previous card states'
+                    )
+                cards = np.empty(self.deck_size, states.dtype)
+                self._cards[env_index] = cards
+            cards[indices] = states
+            container[CARDS_KEY] = cards.copy()
@@ -0,0 +1,205 @@
+"""
+Streaming statistics over the results of games played on the server.
+
+Results are aggregated as they arrive, so memory usage does not grow
+with the number of games played. Raw results may optionally be
+appended to a file in JSON Lines format.
+"""
+
+import json
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class GameStatistics:
+    """Running statistics over the final penalties and rankings of
+    finished games.
+
+    Tracks, for each player, the total and the running mean and
+    variance of penalties (using Welford's algorithm), a histogram of
+    rankings and an Elo rating updated after every game.
+    """
+
+    CONFIDENCE_Z = 1.959963984540054
+    """Standard score of the two-sided 95% confidence interval."""
+    INITIAL_RATING = 1500.0
+    """Elo rating each player starts with."""
+    RATING_K = 16.0
+    """Maximum change of a player's Elo rating per game."""
+    FLUSH_INTERVAL = 1024
+    """After how many games to append buffered raw results to the
+    results file.
+    """
+
+    def __init__(
+            self,
+            num_players: int,
+            results_path: Optional[str] = None,
+            flush_interval: Optional[int] = None,
+    ) -> None:
+        """Construct empty statistics for the given amount of players.
+
+        Args:
+            num_players (int): Amount of players.
+            results_path (Optional[str]): File to append the raw final
+                penalties and rankings of each game to. If `None`, raw
+                results are not kept.
+            flush_interval (Optional[int]): After how many games to
+                append buffered raw results to the results file. If
+                `None`, use `GameStatistics.FLUSH_INTERVAL`.
+        """
+        if flush_interval is None:
+            flush_interval = self.FLUSH_INTERVAL
+        assert flush_interval > 0, 'flush interval must be positive'
+
+        self.num_players = num_players
+        self.results_path = results_path
+        self.flush_interval = flush_interval
+        self._buffered_results: List[str] = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all results, flushing buffered raw results first."""
+        self.flush()
+        self.num_games = 0
+        self._penalty_totals = np.zeros(self.num_players, np.int64)
+        self._penalty_means = np.zeros(self.num_players, np.float64)
+        self._penalty_sq_diffs = np.zeros(self.num_players, np.float64)
+        """Sums of squared differences from the running means."""
+        self._placements = np.zeros(
+            (self.num_players, self.num_players), np.int64)
+        self._ratings = np.full(
+            self.num_players, self.INITIAL_RATING, np.float64)
+
+    def add_game(
+            self,
+            final_penalties: List[int],
+            final_rankings: List[int],
+    ) -> None:
+        """Add the results of a finished game.
+
+        Args:
+            final_penalties (List[int]): Penalty of each player, sorted
+                by player index.
+            final_rankings (List[int]): Ranking of each player starting
+                at 1, sorted by player index.
+        """
+        penalties = np.asarray(final_penalties, np.int64)
+        rankings = np.asarray(final_rankings, np.int64)
+        assert penalties.shape == rankings.shape == (self.num_players,), \
+            'results must contain one entry for each player'
+
+        self.num_games += 1
+        self._penalty_totals += penalties
+        delta = penalties - self._penalty_means
+        self._penalty_means += delta / self.num_games
+        self._penalty_sq_diffs += delta * (penalties - self._penalty_means)
+        self._placements[np.arange(self.num_players), rankings - 1] += 1
+        self._update_ratings(rankings)
+
+        if self.results_path is not None:
+            self._buffered_results.append(json.dumps({
+                'penalties': penalties.tolist(),
+                'rankings': rankings.tolist(),
+            }))
+            if len(self._buffered_results) >= self.flush_interval:
+                self.flush()
+
+    def _update_ratings(self, rankings: np.ndarray) -> None:
+        """Update each player's Elo rating by treating the game as a
+        match against each opponent.
+
+        Args:
+            rankings (np.ndarray): Ranking of each player starting
+                at 1, sorted by player index.
+        """
+        if self.num_players < 2:
+            return
+
+        rating_diffs = (
+            self._ratings[np.newaxis, :] - self._ratings[:, np.newaxis])
+        expected_scores = 1 / (1 + 10 ** (rating_diffs / 400))
+        # 1 for a win, 0.5 for a tie and 0 for a loss.
+        scores = (
+            np.sign(rankings[np.newaxis, :] - rankings[:, np.newaxis]) + 1
+        ) / 2
+        score_diffs = scores - expected_scores
+        np.fill_diagonal(score_diffs, 0)
+        self._ratings += (
+            self.RATING_K / (self.num_players - 1) * score_diffs.sum(axis=1))
+
+    def flush(self) -> None:
+        """Append buffered raw results to the results file."""
+        if self.results_path is None or len(self._buffered_results) == 0:
+            return
+
+        with open(self.results_path, 'a') as results_file:
+            results_file.write('\n'.join(self._buffered_results) + '\n')
+        self._buffered_results.clear()
+
+    @property
+    def total_penalties(self) -> List[int]:
+        """Total penalties for each player, sorted by player index."""
+        return self._penalty_totals.tolist()
+
+    @property
+    def total_placements(self) -> List[List[int]]:
+        """Total amount of each ranking sorted by ranking for each
+        player, sorted by player index.
+        """
+        return self._placements.tolist()
+
+    @property
+    def penalty_means(self) -> List[float]:
+        """Mean penalty for each player, sorted by player index."""
+        return self._penalty_means.tolist()
+
+    @property
+    def penalty_variances(self) -> List[float]:
+        """Sample variance of penalties for each player, sorted by
+        player index.
+        """
+        if self.num_games < 2:
+            return [math.nan] * self.num_players
+        return (self._penalty_sq_diffs / (self.num_games - 1)).tolist()
+
+    @property
+    def penalty_confidence_radii(self) -> List[float]:
+        """Radius of the 95% confidence interval around the mean
+        penalty for each player, sorted by player index.
+        """
+        if self.num_games < 2:
+            return [math.nan] * self.num_players
+        return [
+            self.CONFIDENCE_Z * math.sqrt(variance / self.num_games)
+            for variance in self.penalty_variances
+        ]
+
+    @property
+    def ratings(self) -> List[float]:
+        """Elo rating of each player, sorted by player index."""
+        return self._ratings.tolist()
+
+    def get_extra_columns(self) -> List[Tuple[str, List[str]]]:
+        """Return columns for `hearts_gym.utils.create_results_table`
+        summarizing statistics beyond the totals.
+
+        Returns:
+            List[Tuple[str, List[str]]]: Header and values, sorted by
+                player index, of each column.
+        """
+        return [
+            (
+                'mean penalty',
+                [
+                    f'{mean:.2f} +/- {radius:.2f}'
+                    for (mean, radius) in zip(
+                            self.penalty_means,
+                            self.penalty_confidence_radii,
+                    )
+                ],
+            ),
+            ('Elo', [f'{rating:.0f}' for rating in self.ratings]),
+        ]
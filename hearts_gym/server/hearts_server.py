@@ -2,10 +2,13 @@
 TCP socket server to host Hearts games.
 """
 
+import bisect
+import itertools
 import logging
 import math
 from multiprocessing.pool import ThreadPool
 import os
+import queue
 import socket
 from socketserver import BaseRequestHandler, BaseServer, TCPServer
 from threading import RLock, Thread
@@ -20,6 +23,7 @@ from hearts_gym.envs.hearts_env import HeartsEnv
 from hearts_gym.utils.typing import (
     Action,
     GymSeed,
+    Info,
     MultiInfo,
     MultiIsDone,
     MultiObservation,
@@ -27,7 +31,13 @@ from hearts_gym.utils.typing import (
 )
 from hearts_gym.envs.hearts_game import HeartsGame
 from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
+from hearts_gym.server import metrics
 from hearts_gym.server import utils as server_utils
+from hearts_gym.server.batch_sizer import BatchSizer
+from hearts_gym.server.bot_policies import BotPolicy
+from hearts_gym.server.delta_observations import DeltaEncoder
+from hearts_gym.server.game_stats import GameStatistics
+from hearts_gym.server.metrics import MetricsServer, ServerMetrics
 from hearts_gym.server.mock_request import MockRequest
 from hearts_gym.server.client import Client
 from hearts_gym.server.utils import Address, Request
@@ -101,7 +111,14 @@ class HeartsServer(TCPServer):
             seed: GymSeed = None,
             num_parallel_games: int = 1024,
             num_procs: int = utils.get_num_cpus() - 1,
+            use_processes: bool = False,
+            use_batch_game: bool = False,
+            num_game_groups: int = 1,
+            bot_policy: Optional[BotPolicy] = None,
             max_num_games: Optional[int] = None,
+            report_interval: Optional[int] = None,
+            results_path: Optional[str] = None,
+            metrics_address: Optional[Address] = None,
             accept_repeating_client_addresses: bool = True,
             wait_duration_sec: Optional[int] = None,
             bind_and_activate: bool = True,
@@ -128,12 +145,39 @@ class HeartsServer(TCPServer):
             num_parallel_games (int): How many games to play in parallel.
                 This is also approximately the batch size for the
                 observations times four. The batch size may be anywhere
-                between zero and this number.
+                between zero and this number; clients receive it in
+                smaller batches adapted to their response times.
             num_procs (int): How many processes to use for playing the
                 parallel games.
+            use_processes (bool): Whether to play the parallel games in
+                persistent worker processes communicating via shared
+                memory instead of threads. Requires Python 3.8 or newer.
+            use_batch_game (bool): Whether to simulate the games of each
+                group in a single vectorized `BatchHeartsGame` instead
+                of stepping each game on its own. `num_procs` is not
+                used then.
+            num_game_groups (int): Into how many independent groups to
+                partition the parallel games. The processes are divided
+                among the groups. Independent of groups, games are
+                stepped as soon as their active player responded, so
+                slow clients only hold up the games they are active in.
+            bot_policy (Optional[BotPolicy]): Policy shared by all
+                simulated agents. If `None`, each simulated agent
+                acts randomly.
             max_num_games (Optional[int]): After how many games to
                 automatically disconnect all clients. If `None`, keep
                 connected indefinitely.
+            report_interval (Optional[int]): After how many games to
+                print the results table. Clients still receive it after
+                each batch of parallel games. If `None`, print it after
+                each batch of parallel games.
+            results_path (Optional[str]): File to append the raw
+                results of each game to in JSON Lines format. If
+                `None`, raw results are not kept.
+            metrics_address (Optional[Address]): Address and port to
+                serve metrics at over HTTP in the Prometheus text
+                format. If `None`, metrics are collected but
+                not served.
             accept_repeating_client_addresses (bool): Whether clients
                 are allowed to connect multiple times from the same
                 address (only changing the port they connect from).
@@ -146,6 +190,10 @@ class HeartsServer(TCPServer):
         """
         assert num_parallel_games > 0, 'must have at least one game'
         assert num_procs > 0, 'must have at least one process'
+        assert 0 < num_game_groups <= num_parallel_games, (
+            'must have at least one game group and at maximum as many '
+            'groups as parallel games'
+        )
         assert (
             max_num_games is None
             or max_num_games % num_parallel_games == 0
@@ -153,6 +201,8 @@ class HeartsServer(TCPServer):
             'maximum number of games must be divisible by number of '
             'parallel games'
         )
+        assert report_interval is None or report_interval > 0, \
+            'report interval must be positive'
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(os.getenv('LOG_LEVEL', 'NOTSET').upper())
@@ -169,36 +219,54 @@ class HeartsServer(TCPServer):
         self._wait_duration_sec = wait_duration_sec
         self._max_num_clients = num_players
 
-        # TODO Allow setting max batch size per client
         self.num_parallel_games = num_parallel_games
         self.max_num_games = max_num_games
+        self.report_interval = report_interval
+        self.bot_policy = bot_policy
 
         self._client_change_lock = RLock()
-        self._waiter_threads: Dict[int, Thread] = {}
+        self._first_join_time: Optional[float] = None
+        """When the first client joined the waiting room."""
+        self._last_lobby_message_time = 0.0
+        self._num_announced_clients = 0
+        """Number of connected players last sent to waiting clients."""
 
         self.clients: Dict[int, Client] = {}
 
         self.is_closed = False
         self.needs_reset = True
         self.num_games = 0
-        self.stats: List[Tuple[List[int], List[int]]] = []
+        self.stats = GameStatistics(num_players, results_path)
+        self.metrics = ServerMetrics()
+        self._metrics_server: Optional[MetricsServer] = None
         self.num_illegals: List[int] = [0] * num_players
-        self.total_penalties = [0] * num_players
-        self.total_placements = [[0] * num_players for _ in range(num_players)]
-
-        self.envs = VecHeartsEnv(
-            [
-                HeartsEnv(
-                    num_players=num_players,
-                    deck_size=deck_size,
-                    game=game,
-                    mask_actions=mask_actions,
-                    seed=self._add_to_seed(seed, i),
-                )
-                for i in range(self.num_parallel_games)
-            ],
-            num_procs=num_procs,
-        )
+
+        envs = [
+            HeartsEnv(
+                num_players=num_players,
+                deck_size=deck_size,
+                game=game,
+                mask_actions=mask_actions,
+                seed=self._add_to_seed(seed, i),
+            )
+            for i in range(self.num_parallel_games)
+        ]
+        group_num_procs = max(num_procs // num_game_groups, 1)
+        self.env_groups: List[VecHeartsEnv] = []
+        """Independent groups of environments, in order."""
+        self.group_offsets: List[int] = []
+        """Index of the first environment of each group."""
+        for group in np.array_split(
+                np.arange(self.num_parallel_games), num_game_groups):
+            start = int(group[0])
+            end = int(group[-1]) + 1
+            self.env_groups.append(VecHeartsEnv(
+                envs[start:end],
+                num_procs=group_num_procs,
+                use_processes=use_processes,
+                use_batch_game=use_batch_game,
+            ))
+            self.group_offsets.append(start)
 
         super().__init__(
             server_address,
@@ -206,6 +274,9 @@ class HeartsServer(TCPServer):
             bind_and_activate,
         )
         self.print_log(f'Server started on {server_address}.')
+        if metrics_address is not None:
+            self._metrics_server = MetricsServer(self.metrics, metrics_address)
+            self.print_log(f'Serving metrics on {metrics_address}.')
 
     def print_log(self, message: str, log_level: int = logging.INFO):
         """Print and log the given message.
@@ -218,6 +289,18 @@ class HeartsServer(TCPServer):
         print(message)
         self.logger.log(log_level, message)
 
+    @staticmethod
+    def client_labels(client: Client) -> metrics.Labels:
+        """Return the metrics labels identifying the given client.
+
+        Args:
+            client (Client): Client to get labels for.
+
+        Returns:
+            metrics.Labels: Player index and name of the client.
+        """
+        return (('player', str(client.player_index)), ('client', client.name))
+
     @staticmethod
     def _add_to_seed(seed: GymSeed, integer: int) -> GymSeed:
         """Return the seed with an integer added to it.
@@ -295,6 +378,20 @@ class HeartsServer(TCPServer):
             None,
         )
 
+    def get_client(self, player_index: int) -> Client:
+        """Return the client at the given index.
+
+        If the client is being replaced, wait until that is done.
+
+        Args:
+            player_index (int): Index of the client to return.
+
+        Returns:
+            Client: The client at the given index.
+        """
+        with self._client_change_lock:
+            return self.clients[player_index]
+
     def register_client(
             self,
             request: Request,
@@ -354,9 +451,10 @@ class HeartsServer(TCPServer):
 
         client = self.register_client(
             MockRequest(
-                self.envs.get_envs(),
+                self.env_groups[0],
                 client_index,
                 seed=seeding.hash_seed(),
+                policy=self.bot_policy,
             ),
             ('mock-client', client_index),
             client_index,
@@ -387,15 +485,20 @@ class HeartsServer(TCPServer):
                 simulated agent.
         """
         with self._client_change_lock:
+            # The client may already have been unregistered by another
+            # thread communicating with it.
+            if not client.is_registered:
+                return
             client_index = client.player_index
 
             self.shutdown_request(client.request)  # type: ignore[attr-defined]
             client.is_registered = False
             del self.clients[client_index]
-            if client_index in self._waiter_threads:
-                del self._waiter_threads[client_index]
 
             if replace_with_bot:
+                if not isinstance(client.request, MockRequest):
+                    self.metrics.increment(
+                        metrics.BOT_REPLACEMENTS, self.client_labels(client))
                 self.register_bot(client_index)
 
     def _receive_shard(
@@ -433,6 +536,8 @@ class HeartsServer(TCPServer):
             if data == b'' or data is None:
                 raise ValueError('received empty data')
         except socket.timeout:
+            self.metrics.increment(
+                metrics.TIMEOUTS, self.client_labels(client))
             request.settimeout(prev_timeout)
             self.send_failable(client, client_error_msg)
             self.logger.warning(
@@ -445,6 +550,8 @@ class HeartsServer(TCPServer):
             return None
 
         request.settimeout(prev_timeout)
+        self.metrics.increment(
+            metrics.RECEIVED_BYTES, self.client_labels(client), len(data))
         return data
 
     def _receive_msg_length(
@@ -639,26 +746,63 @@ class HeartsServer(TCPServer):
             return True
 
         with self._client_change_lock:
-            client.set_name(data)
-            other_names = [
+            client.set_unique_name(data, (
                 other_client.name
                 for other_client in self.clients.values()
                 if other_client is not client
-            ]
-            i = 2
-            while client.name in other_names:
-                client.set_name(data + f' ({i})'.encode())
-                i += 1
+            ))
 
         self.logger.info(
             f'Client {client.address} is now called "{client.name}".')
         return True
 
+    def _receive_exactly(
+            self,
+            client: Client,
+            num_bytes: int,
+            timeout_sec: int,
+            replace_with_bot: bool,
+            client_error_msg: str,
+    ) -> Optional[bytes]:
+        """Return the given amount of bytes received from the client in
+        a failsafe way. If something went wrong, return `None`.
+
+        Args:
+            client (Client): Client to receive the data from.
+            num_bytes (int): How many bytes to receive.
+            timeout_sec (int): How long to wait for each message shard
+                at maximum.
+            replace_with_bot (bool): Whether to replace a lost client
+                with a simulated agent.
+            client_error_msg (str): Error message to send to the client
+                upon failure.
+
+        Returns:
+            Optional[bytes]: The data received or `None` if there was
+                an error.
+        """
+        total_num_received_bytes = 0
+        data = []
+        while total_num_received_bytes < num_bytes:
+            data_shard = self._receive_shard(
+                client,
+                num_bytes - total_num_received_bytes,
+                timeout_sec,
+                replace_with_bot,
+                client_error_msg,
+            )
+            if data_shard is None:
+                return None
+            total_num_received_bytes += len(data_shard)
+            data.append(data_shard)
+        return b''.join(data)
+
     def _receive_ok(
             self,
             client: Client,
             timeout_sec: Optional[int],
             replace_with_bot: bool,
+            negotiate_wire_version: bool = False,
     ) -> bool:
         """Wait for an 'OK' message from the given client. Return
         whether the message was correctly received.
@@ -672,6 +816,10 @@ class HeartsServer(TCPServer):
                 `None`, use `HeartsServer.OK_TIMEOUT_SEC`.
             replace_with_bot (bool): Whether to replace a lost client
                 with a simulated agent.
+            negotiate_wire_version (bool): Whether to also accept a
+                `server_utils.BINARY_OK_MSG`, switching the client to
+                binary messages, or a `server_utils.SETTINGS_OK_MSG`
+                followed by the client's settings.
 
         Returns:
             bool: Whether the message was correctly received in the
@@ -679,39 +827,44 @@ class HeartsServer(TCPServer):
         """
         if timeout_sec is None:
             timeout_sec = self.OK_TIMEOUT_SEC
+        client_error_msg = (
+            f'Please respond with "{server_utils.OK_MSG.decode()}"; '
+            f'closing connection...'
+        )
 
-        data_shard = self._receive_shard(
+        data = self._receive_exactly(
             client,
             len(server_utils.OK_MSG),
             timeout_sec,
             replace_with_bot,
-            (
-                f'Please respond with "{server_utils.OK_MSG.decode()}"; '
-                f'closing connection...'
-            ),
+            client_error_msg,
         )
-        if data_shard is None:
+        if data is None:
             return False
-        total_num_received_bytes = len(data_shard)
-        data = [data_shard]
-        while total_num_received_bytes < len(server_utils.OK_MSG):
-            data_shard = self._receive_shard(
+        if data == server_utils.OK_MSG:
+            return True
+        if negotiate_wire_version and data == server_utils.BINARY_OK_MSG:
+            client.wire_version = server_utils.WIRE_VERSION_BINARY
+            self.logger.info(
+                f'Client {client.address} uses binary messages.')
+            return True
+        if negotiate_wire_version and data == server_utils.SETTINGS_OK_MSG:
+            data = self._receive_exactly(
                 client,
-                len(server_utils.OK_MSG) - total_num_received_bytes,
+                server_utils.CLIENT_SETTINGS.size,
                 timeout_sec,
                 replace_with_bot,
-                (
-                    f'Please respond with "{server_utils.OK_MSG.decode()}"; '
-                    f'closing connection...'
-                ),
+                client_error_msg,
             )
-            if data_shard is None:
+            if data is None:
                 return False
-            total_num_received_bytes += len(data_shard)
-            data.append(data_shard)
-
-        data = b''.join(data)
-        if data == server_utils.OK_MSG:
+            client.apply_settings(data)
+            self.logger.info(
+                f'Client {client.address} uses wire protocol version '
+                f'{client.wire_version}, maximum batch size '
+                f'{client.max_batch_size} and target latency '
+                f'{client.target_latency_sec}.'
+            )
             return True
 
         self.send_failable(
@@ -764,6 +917,31 @@ class HeartsServer(TCPServer):
         """
         return self._receive_ok(client, timeout_sec, True)
 
+    def receive_setup_ok(
+            self,
+            client: Client,
+            timeout_sec: Optional[int] = None,
+    ) -> bool:
+        """Wait for an 'OK' message from the given client after it
+        received the server metadata. Return whether the message was
+        correctly received.
+
+        The message also negotiates the wire protocol version and other
+        settings used for the client.
+
+        Args:
+            client (Client): Client to receive the 'OK' from.
+            timeout_sec (Optional[int]): How long to wait at maximum. If
+                `None`, use `HeartsServer.SETUP_OK_TIMEOUT_SEC`.
+
+        Returns:
+            bool: Whether the message was correctly received in the
+                allowed time frame.
+        """
+        if timeout_sec is None:
+            timeout_sec = self.SETUP_OK_TIMEOUT_SEC
+        return self._receive_ok(client, timeout_sec, False, True)
+
     def _send_hello(
             self,
             client: Client,
@@ -793,18 +971,45 @@ class HeartsServer(TCPServer):
         if not self.receive_ok(client):
             return
 
-        env = self.envs[0]
-        metadata = {
-            'player_index': client.player_index,
-            'num_players': env.num_players,
-            'deck_size': env.deck_size,
-            'mask_actions': env.mask_actions,
-            'max_num_games': self.max_num_games,
-            'num_parallel_games': self.num_parallel_games,
-        }
-
+        metadata = self.create_metadata(
+            client.player_index,
+            self.env_groups[0],
+            self.max_num_games,
+            self.num_parallel_games,
+        )
         self.send_failable(client, metadata)
-        self.receive_ok(client, self.SETUP_OK_TIMEOUT_SEC)
+        self.receive_setup_ok(client)
+
+    @staticmethod
+    def create_metadata(
+            player_index: int,
+            envs: VecHeartsEnv,
+            max_num_games: Optional[int],
+            num_parallel_games: int,
+    ) -> Dict[str, Any]:
+        """Return the server metadata sent to a client during setup.
+
+        Args:
+            player_index (int): Index of the client.
+            envs (VecHeartsEnv): Environments the client plays in.
+            max_num_games (Optional[int]): After how many games the
+                client is disconnected.
+            num_parallel_games (int): How many games are played
+                in parallel.
+
+        Returns:
+            Dict[str, Any]: Server metadata.
+        """
+        return {
+            'player_index': player_index,
+            'num_players': envs.num_players,
+            'deck_size': envs.deck_size,
+            'mask_actions': envs.mask_actions,
+            'max_num_games': max_num_games,
+            'num_parallel_games': num_parallel_games,
+            'wire_version': server_utils.WIRE_VERSION,
+            'accepts_client_settings': True,
+        }
 
     def _send_failable(
             self,
@@ -828,8 +1033,10 @@ class HeartsServer(TCPServer):
         """
         try:
             if not isinstance(data, bytes):
-                data = server_utils.encode_data(data)
+                data = server_utils.encode_data(data, client.wire_version)
             client.request.sendall(data)
+            self.metrics.increment(
+                metrics.SENT_BYTES, self.client_labels(client), len(data))
             return True
         except Exception:
             self.logger.warning(f'Lost client {client.address}.')
@@ -872,120 +1079,127 @@ class HeartsServer(TCPServer):
         """
         return self._send_failable(client, data, True)
 
-    def fill_most_remaining(self) -> None:
-        """Fill most remaining free spots with randomly acting agents,
-        keeping one spot free.
-        """
+    def fill_remaining(self) -> None:
+        """Fill all remaining free spots with simulated agents."""
         with self._client_change_lock:
             client_index = self.find_free_index()
-            while len(self.clients) < self._max_num_clients - 1:
+            while client_index is not None:
                 self.register_bot(client_index)
                 client_index = self.find_free_index()
 
-    def _wait_for_players(
+    def _broadcast_to_waiting(
             self,
-            client: Client,
-            is_first_client: bool,
+            message: str,
+            skipped_client: Optional[Client] = None,
     ) -> None:
-        """Let the given client wait until enough clients have connected.
-        During the waiting, periodically send messages.
-
-        Supposed to be started in a new thread.
+        """Send the given message to all waiting clients and wait for
+        their 'OK' messages.
 
-        See also `self._start_waiter_thread`.
+        Messages are sent to all clients before waiting for any answer,
+        so the clients respond concurrently. Clients failing to respond
+        are unregistered.
 
         Args:
-            client (Client): Client that waits.
-            is_first_client (bool): Whether this is the first client
-                that connected.
+            message (str): Message to send.
+            skipped_client (Optional[Client]): Client not to send the
+                message to.
         """
-        max_num_clients = self._max_num_clients
-        num_clients = len(self.clients)
-
-        start_time = time.time()
-        last_print_time = start_time
-        while not self.is_closed and client.is_registered:
-            prev_num_clients = num_clients
-            num_clients = len(self.clients)
-
-            if prev_num_clients != num_clients:
-                message = f'{num_clients}/{max_num_clients} players connected'
-                if num_clients >= max_num_clients:
-                    self.send_failable(client, message + '!')
-                    self.receive_ok(client)
-                    break
-                send_success = self.send_failable(client, message + '...')
+        self._last_lobby_message_time = time.time()
+        with self._client_change_lock:
+            clients = [
+                client
+                for client in self.clients.values()
                 if (
-                        not send_success
-                        or not self.receive_ok(client)
-                ):
-                    break
-
-            time.sleep(0.1)
-            curr_time = time.time()
-
-            if (
-                    self._wait_duration_sec is not None
-                    and is_first_client
-                    and curr_time - start_time > self._wait_duration_sec
-            ):
-                self.fill_most_remaining()
-
-                def simulate_client():
-                    with server_utils.create_client() as client:
-                        client.connect(self.server_address)
-                        server_utils.send_name(
-                            client, self.RANDOM_AGENT_NAME.decode())
-                        time.sleep(self.PRINT_INTERVAL_SEC)
-
-                Thread(target=simulate_client).start()
+                        client is not skipped_client
+                        and not isinstance(client.request, MockRequest)
+                )
+            ]
+        clients = [
+            client
+            for client in clients
+            if self.send_failable(client, message)
+        ]
+        for client in clients:
+            self.receive_ok(client)
 
-                self.print_log('Filled remaining spots with bots.')
-                break
+    def _update_lobby(self, new_client: Optional[Client] = None) -> None:
+        """Send the number of connected players to all waiting clients
+        whenever it changed and start the game loop once all spots
+        are filled.
 
-            if curr_time - last_print_time < self.PRINT_INTERVAL_SEC:
-                continue
+        Args:
+            new_client (Optional[Client]): Client that just joined and
+                already knows the number of connected players.
+        """
+        max_num_clients = self._max_num_clients
+        while self._num_announced_clients != len(self.clients):
+            num_clients = len(self.clients)
+            self._num_announced_clients = num_clients
+            message = f'{num_clients}/{max_num_clients} players connected'
+            if num_clients >= max_num_clients:
+                message = message + '!'
+            else:
+                message = message + '...'
+            self._broadcast_to_waiting(message, new_client)
+            # Only skip the new client until the number changes again.
+            new_client = None
+
+        if len(self.clients) == 0:
+            self._first_join_time = None
+        elif len(self.clients) >= max_num_clients:
+            self._start_game_loop()
+
+    def _start_game_loop(self) -> None:
+        """Play with the connected clients until they are disconnected
+        and reset the waiting room afterwards.
+        """
+        self.print_log('Starting game loop...')
+        client = next(iter(self.clients.values()))
+        try:
+            self.finish_request(
+                client.request,  # type: ignore[arg-type]
+                client.address,
+            )
+        except Exception:
+            self.handle_error(
+                client.request,  # type: ignore[arg-type]
+                client.address,
+            )
+        finally:
+            self._num_announced_clients = len(self.clients)
+            self._first_join_time = None
 
-            self.print_log('Waiting...', logging.DEBUG)
-            last_print_time = curr_time
-            send_success = self.send_failable(
-                client, 'Waiting for more players...')
-            if (
-                    not send_success
-                    or not self.receive_ok(client)
-            ):
-                break
+    def service_actions(self) -> None:
+        """Fill the waiting room with simulated agents once the first
+        client waited long enough and periodically send messages to
+        waiting clients.
 
-    def _start_waiter_thread(
-            self,
-            client: Client,
-    ) -> None:
-        """Let the given client wait until enough clients have connected in
-        another thread.
+        Called by `serve_forever` between requests and at least every
+        poll interval.
+        """
+        if self.is_closed or self._first_join_time is None:
+            return
 
-        See also `self._wait_for_players`.
+        curr_time = time.time()
+        if (
+                self._wait_duration_sec is not None
+                and curr_time - self._first_join_time
+                > self._wait_duration_sec
+        ):
+            self.fill_remaining()
+            self.print_log('Filled remaining spots with bots.')
+            self._update_lobby()
+            return
 
-        Args:
-            client (Client): Client that should wait.
-        """
-        if not client.is_registered:
+        if (
+                curr_time - self._last_lobby_message_time
+                < self.PRINT_INTERVAL_SEC
+        ):
             return
-        self.logger.info(f'Starting waiter thread for {client.address}...')
-        with self._client_change_lock:
-            thread = Thread(
-                target=self._wait_for_players,
-                args=(client, len(self.clients) == 1),
-            )
-            self._waiter_threads[client.player_index] = thread
-        thread.start()
-        self.logger.info('Thread started.')
 
-    def _join_waiters(self) -> None:
-        """Block until all waiter threads have completed."""
-        for thread in self._waiter_threads.values():
-            thread.join()
-        # No need to worry about locking anymore.
-        self._waiter_threads.clear()
+        self.print_log('Waiting...', logging.DEBUG)
+        self._broadcast_to_waiting('Waiting for more players...')
+        self._update_lobby()
 
     def process_request(  # type: ignore[override]
             self,
@@ -1001,36 +1215,27 @@ class HeartsServer(TCPServer):
 
         self.print_log(
             f'Registered {client_address} at index {client.player_index}.')
+        if self._first_join_time is None:
+            self._first_join_time = time.time()
 
-        successful = self.receive_name(client)
-        if not successful:
-            return
-
-        if client.is_registered:
+        if self.receive_name(client) and client.is_registered:
             self._send_hello(client)
 
-        if len(self.clients) < self._max_num_clients:
-            self._start_waiter_thread(client)
-            return
-
-        self._join_waiters()
+        self._update_lobby(client)
 
-        # We lost a client while joining threads.
-        if len(self.clients) < self._max_num_clients:
-            with self._client_change_lock:
-                for client in self.clients.values():
-                    self._start_waiter_thread(client)
-            return
-
-        self.print_log('Starting game loop...')
-        self.finish_request(
-            client.request,  # type: ignore[arg-type]
-            client.address,
-        )
+    def terminate_pools(self) -> None:
+        """Terminate the thread pools or worker processes of all
+        environment groups.
+        """
+        for envs in self.env_groups:
+            envs.terminate_pool()
 
     def server_close(self) -> None:
         self.is_closed = True
-        self._join_waiters()
+        self.stats.flush()
+        if self._metrics_server is not None:
+            self._metrics_server.server_close()
+            self._metrics_server = None
         super().server_close()
 
 
@@ -1053,6 +1258,10 @@ class HeartsRequestHandler(BaseRequestHandler):
     PARSE_FAIL_TOLERANCE = 2
     ACTION_TIMEOUT_SEC = 1
     OK_TIMEOUT_SEC = 2
+    TARGET_LATENCY_SEC = 0.25
+    """Targeted time for clients to respond to a batch of observations
+    if they did not set their own.
+    """
 
     @staticmethod
     def calculate_max_receive_bytes(num_parallel_games: int) -> int:
@@ -1074,252 +1283,480 @@ class HeartsRequestHandler(BaseRequestHandler):
         self.server: HeartsServer
         self.max_receive_bytes = \
             self.calculate_max_receive_bytes(self.server.num_parallel_games)
-        self._max_shard_receive_bytes = min(
-            self.max_receive_bytes,
-            server_utils.MAX_RECEIVE_BYTES,
-        )
         self.max_prefix_len = (
             len(str(self.max_receive_bytes))
             + len(server_utils.MSG_LENGTH_SEPARATOR)
         )
+        # Messages are received into these; they are reused every round.
+        self._receive_buffers = [
+            bytearray(self.max_prefix_len + self.max_receive_bytes)
+            for _ in range(len(self.server.clients))
+        ]
+        # Start and end of bytes in each buffer that were received
+        # along with the previous message and belong to the next ones.
+        self._pending_bytes = [(0, 0)] * len(self.server.clients)
         for client in self.server.clients.values():
-            client.request.settimeout(self.ACTION_TIMEOUT_SEC)
+            client.request.settimeout(self.get_action_timeout_sec(client))
+
+        clients = self.server.clients
+        num_players = len(clients)
+        self._batch_sizers = [
+            self.create_batch_sizer(
+                clients[i], self.server.num_parallel_games)
+            for i in range(num_players)
+        ]
+        # When the batches not yet responded to were sent to each player
+        # and which environments they are about, in order. `None` stops
+        # the player's receiver.
+        self._sent_batches: List[
+            'queue.Queue[Optional[Tuple[float, List[int]]]]'
+        ] = [queue.Queue() for _ in range(num_players)]
+        # Responses to batches in the order they arrived: the index of
+        # the responding player, the indices of the environments and
+        # the actions for them. If the actions are `None`, the
+        # simulated agent of the player has to act instead.
+        self._responses: \
+            'queue.Queue[Tuple[int, List[int], Optional[List[Action]]]]' = \
+            queue.Queue()
+        # Held while sending to a player so that sending batches, error
+        # messages and waiting for corrected actions do not interleave.
+        self._player_locks = [RLock() for _ in range(num_players)]
+        # Only used for clients requesting delta-encoded observations.
+        self._delta_encoders = [
+            DeltaEncoder(self.server.num_parallel_games)
+            for _ in range(num_players)
+        ]
 
-        num_players = len(self.server.clients)
         self._communicators = ThreadPool(processes=num_players)
+        # Each player's responses are received on their own, so games
+        # only wait for the player whose turn it is in them.
+        self._receivers = [
+            Thread(target=self._receive_batches, args=(i,), daemon=True)
+            for i in range(num_players)
+        ]
+        for receiver in self._receivers:
+            receiver.start()
+        # Data waiting to be sent to each player once it responded to
+        # all batches sent to it, so observations are not split into
+        # ever smaller messages.
+        self._pending_data: List[List[Any]] = [[] for _ in range(num_players)]
+        # Amount of games each player still has to act in.
+        self._num_unanswered = [0] * num_players
+        self._final_return_data: List[Optional[Tuple[
+            MultiObservation,
+            MultiReward,
+            MultiIsDone,
+            MultiInfo,
+        ]]] = [None] * self.server.num_parallel_games
+        self._num_unfinished_games = 0
 
-    def _replace_with_bot(self, player_index: int) -> Tuple[Client, bytes]:
-        """Replace the client at the given index with a randomly acting
-        agent. Return the replacement client and its actions.
+    @staticmethod
+    def get_action_timeout_sec(client: Client) -> float:
+        """Return how long to wait for the given client to respond to a
+        batch of observations.
 
         Args:
-            player_index (int): Which player/client to replace.
+            client (Client): Client to wait for.
 
         Returns:
-            Client: Client to receive data from in the future.
-            bytes: Random actions in message form.
+            float: Timeout in seconds.
         """
-        client = self.server.clients[player_index]
-        self.server.unregister_client(client, True)
-        # Get random actions from newly registered bot.
-        client = self.server.clients[player_index]
-        assert isinstance(client.request, MockRequest), \
-            'replacing with bot failed'
-        data = client.request.get_actions()
-        return client, data
+        timeout_sec = float(HeartsRequestHandler.ACTION_TIMEOUT_SEC)
+        if client.target_latency_sec is not None:
+            timeout_sec = max(timeout_sec, 2 * client.target_latency_sec)
+        return timeout_sec
+
+    @staticmethod
+    def create_batch_sizer(
+            client: Client,
+            num_parallel_games: int,
+    ) -> Optional[BatchSizer]:
+        """Return a batch sizer respecting the given client's settings.
+
+        Clients that did not send settings expect all observations in a
+        single message, so they do not get a batch sizer.
+
+        Args:
+            client (Client): Client to send batches of observations to.
+            num_parallel_games (int): How many games are played
+                in parallel.
+
+        Returns:
+            Optional[BatchSizer]: Batch sizer for the client or `None`
+                if the client did not send settings.
+        """
+        if not client.sent_settings:
+            return None
+
+        max_batch_size = num_parallel_games
+        if client.max_batch_size is not None:
+            max_batch_size = min(max_batch_size, client.max_batch_size)
+        target_latency_sec = client.target_latency_sec
+        if target_latency_sec is None:
+            target_latency_sec = HeartsRequestHandler.TARGET_LATENCY_SEC
+        return BatchSizer(max_batch_size, target_latency_sec)
+
+    def _split_by_group(
+            self,
+            env_indices: List[int],
+    ) -> Iterator[Tuple[int, List[int]]]:
+        """Return an iterator over the groups of environments the given
+        environments belong to, in order.
+
+        Args:
+            env_indices (List[int]): Sorted indices of environments
+                among all parallel games.
+
+        Returns:
+            Iterator[Tuple[int, List[int]]]: Index of each group and
+                the indices of the given environments within it.
+        """
+        group_offsets = self.server.group_offsets
+        start = 0
+        while start < len(env_indices):
+            group_index = bisect.bisect_right(
+                group_offsets, env_indices[start]) - 1
+            if group_index + 1 < len(group_offsets):
+                end = bisect.bisect_left(
+                    env_indices, group_offsets[group_index + 1], start)
+            else:
+                end = len(env_indices)
+            offset = group_offsets[group_index]
+            yield (group_index, [i - offset for i in env_indices[start:end]])
+            start = end
 
     def _receive_shard(
             self,
-            player_index: int,
             client: Client,
-    ) -> Tuple[Client, bytes, bool]:
-        """Return a message received from the client in a failsafe way.
+            buffer: memoryview,
+    ) -> Optional[int]:
+        """Receive a message shard from the client into the given buffer
+        in a failsafe way. Return the amount of bytes received or `None`
+        if there was an error.
 
         Args:
-            player_index (int): Which player we are getting the
-                message from.
             client (Client): Client to receive the data from.
+            buffer (memoryview): Buffer to receive the data into.
 
         Returns:
-            Client: The original client or its replacement.
-            bytes: The message or a default if there was an error.
-            bool: Whether the message was received without an error.
+            Optional[int]: Amount of bytes received or `None` if there
+                was an error.
         """
         try:
-            data = client.request.recv(self._max_shard_receive_bytes)
-            if data == b'' or data is None:
+            num_received_bytes = client.request.recv_into(buffer)
+            if num_received_bytes == 0:
                 raise ValueError('received empty data')
+        except socket.timeout:
+            self.server.metrics.increment(
+                metrics.TIMEOUTS, self.server.client_labels(client))
+            self.server.print_log(
+                f'Client {client.address} did not respond in time.',
+                logging.WARNING,
+            )
+            return None
         except Exception:
             self.server.print_log(
                 f'Lost client {client.address}.', logging.WARNING)
-            client, data = self._replace_with_bot(player_index)
-            return client, data, False
+            return None
 
-        return client, data, True
+        self.server.metrics.increment(
+            metrics.RECEIVED_BYTES,
+            self.server.client_labels(client),
+            num_received_bytes,
+        )
+        return num_received_bytes
 
-    def _receive_msg_length(
+    def _reject_client(
             self,
             player_index: int,
             client: Client,
-    ) -> Tuple[Client, int, bytes]:
-        """Return the expected length of a message received from the
-        client in a failsafe way.
+            message: str,
+    ) -> None:
+        """Send the given message to the client and replace it with a
+        simulated agent.
 
-        To be more efficient, receive more data than necessary. Any
-        additional data is returned.
+        Args:
+            player_index (int): Which player/client to replace.
+            client (Client): Client to replace.
+            message (str): Message explaining why the client
+                is replaced.
+        """
+        with self._player_locks[player_index]:
+            self.server.send_failable(client, message)
+        self.server.unregister_client(client, True)
+
+    def _receive_message(
+            self,
+            player_index: int,
+            client: Client,
+    ) -> Optional[memoryview]:
+        """Return a length-prefixed message received from the client in
+        a failsafe way.
+
+        The message is received into a preallocated buffer for the
+        client without intermediate copies; the returned view is only
+        valid until the next message is received. As clients may send
+        messages for several batches in quick succession, data received
+        beyond the message is kept for the next call.
+
+        Upon error, replace the client with a simulated agent and
+        return `None` instead.
 
         Args:
             player_index (int): Which player we are getting the
                 message from.
-            client (Client): Client to receive the data from.
+            client (Client): Client to receive the message from.
 
         Returns:
-            Client: The original client or its replacement.
-            int: Amount of bytes in the rest of the message or a default
-                if there was an error.
-            bytes: Extraneous part of message data or a default if there
-                was an error.
+            Optional[memoryview]: The message without its length prefix
+                or `None` if the client was replaced.
         """
-        client, data_shard, successful = self._receive_shard(
-            player_index, client)
-        total_num_received_bytes = len(data_shard)
-        data = [data_shard]
-        length_end = data_shard.find(server_utils.MSG_LENGTH_SEPARATOR)
-        while (
-                successful
-                and length_end == -1
-                and total_num_received_bytes < self.max_prefix_len
-        ):
-            client, data_shard, successful = self._receive_shard(
-                player_index, client)
-            total_num_received_bytes = len(data_shard)
-            data.append(data_shard)
-            length_end = data_shard.find(server_utils.MSG_LENGTH_SEPARATOR)
-
-        if not successful:
-            total_num_received_bytes = len(data_shard)
-            data = [data_shard]
-
-        if length_end == -1:
-            self.server.send_failable(
-                client,
-                (
-                    f'Please prefix actions with their length and '
-                    f'"{server_utils.MSG_LENGTH_SEPARATOR.decode()}".'
+        buffer = self._receive_buffers[player_index]
+        view = memoryview(buffer)
+        (pending_start, pending_end) = self._pending_bytes[player_index]
+        self._pending_bytes[player_index] = (0, 0)
+        total_num_received_bytes = pending_end - pending_start
+        if total_num_received_bytes > 0:
+            buffer[:total_num_received_bytes] = \
+                buffer[pending_start:pending_end]
+        length_end = buffer.find(
+            server_utils.MSG_LENGTH_SEPARATOR, 0, total_num_received_bytes)
+        while length_end == -1:
+            if total_num_received_bytes >= self.max_prefix_len:
+                self.server.logger.warning(
+                    f'Client {client.address} did not send action length. '
+                    f'Closing connection...'
                 )
-            )
-            self.server.logger.warning(
-                f'Client {client.address} did not send action length. '
-                f'Closing connection...'
-            )
-            client, data_shard = self._replace_with_bot(player_index)
+                self._reject_client(
+                    player_index,
+                    client,
+                    (
+                        f'Please prefix actions with their length and '
+                        f'"{server_utils.MSG_LENGTH_SEPARATOR.decode()}".'
+                    ),
+                )
+                return None
 
-            total_num_received_bytes = len(data_shard)
-            data = [data_shard]
-            length_end = data_shard.find(server_utils.MSG_LENGTH_SEPARATOR)
+            num_received_bytes = self._receive_shard(
+                client, view[total_num_received_bytes:])
+            if num_received_bytes is None:
+                self.server.unregister_client(client, True)
+                return None
+            length_end = buffer.find(
+                server_utils.MSG_LENGTH_SEPARATOR,
+                total_num_received_bytes,
+                total_num_received_bytes + num_received_bytes,
+            )
+            total_num_received_bytes += num_received_bytes
 
-        length_end += total_num_received_bytes - len(data_shard)
-        data = b''.join(data)
         try:
-            msg_length = int(data[:length_end])
+            msg_length = int(buffer[:length_end])
         except ValueError:
-            self.server.send_failable(
+            self.server.logger.warning(
+                f'Client {client.address} sent garbled action length. '
+                f'Closing connection...'
+            )
+            self._reject_client(
+                player_index,
                 client,
                 (
                     f'Please prefix actions with only their length and '
                     f'"{server_utils.MSG_LENGTH_SEPARATOR.decode()}".'
-                )
+                ),
             )
+            return None
+
+        msg_start = length_end + len(server_utils.MSG_LENGTH_SEPARATOR)
+        msg_end = msg_start + msg_length
+        while total_num_received_bytes < min(msg_end, len(buffer)):
+            num_received_bytes = self._receive_shard(
+                client, view[total_num_received_bytes:msg_end])
+            if num_received_bytes is None:
+                self.server.unregister_client(client, True)
+                return None
+            total_num_received_bytes += num_received_bytes
+
+        if total_num_received_bytes < msg_end:
             self.server.logger.warning(
-                f'Client {client.address} sent garbled action length. '
-                f'Closing connection...'
+                f'Client {client.address} declared different actions '
+                f'length. Closing connection...'
             )
-            client, data = self._replace_with_bot(player_index)
+            self._reject_client(
+                player_index,
+                client,
+                'Actions had a different length than declared.',
+            )
+            return None
 
-            total_num_received_bytes = len(data)
-            length_end = data.find(server_utils.MSG_LENGTH_SEPARATOR)
+        self._pending_bytes[player_index] = \
+            (msg_end, total_num_received_bytes)
+        return view[msg_start:msg_end]
 
-        extra_data = data[length_end + len(server_utils.MSG_LENGTH_SEPARATOR):]
+    def _get_default_actions(self, env_indices: List[int]) -> List[Action]:
+        """Return the first legal action for each of the given
+        environments.
 
-        return client, msg_length, extra_data
+        Args:
+            env_indices (List[int]): Sorted indices of the environments
+                among all parallel games.
 
-    def _parse_message(
+        Returns:
+            List[Action]: Default action for each environment.
+        """
+        if not self.server.env_groups[0].mask_actions:
+            return [0] * len(env_indices)
+
+        actions: List[Action] = []
+        for (group_index, group_env_indices) in self._split_by_group(
+                env_indices):
+            envs = self.server.env_groups[group_index]
+            actions.extend(
+                envs.get_legal_actions(i)[0] for i in group_env_indices)
+        return actions
+
+    def _parse_batch(
             self,
             player_index: int,
             client: Client,
-    ) -> List[Action]:
-        """Parse a message received by the given client.
+            env_indices: List[int],
+    ) -> Optional[List[Action]]:
+        """Parse a message received by the given client in response to
+        a batch of observations sent to it.
+
+        If the message is malformed, the client may send a corrected
+        one. This is only waited for while no later batch is in flight;
+        otherwise, the next message may be the response to that batch.
 
         Args:
             player_index (int): Which player we are getting the
                 message from.
             client (Client): Client to receive the message from.
+            env_indices (List[int]): Indices of the environments the
+                batch of observations was about.
 
         Returns:
-            List[Action]: Actions contained in the message or a default
-                if there was an error.
+            Optional[List[Action]]: Actions contained in the message, a
+                default if it was malformed or `None` if the client was
+                replaced with a simulated agent.
         """
-        for _ in range(self.PARSE_FAIL_TOLERANCE + 1):
-            client, msg_length, data_shard = self._receive_msg_length(
-                player_index, client)
-
-            successful = True
-            total_num_received_bytes = len(data_shard)
-            data = [data_shard]
-            while (
-                    successful
-                    and total_num_received_bytes < msg_length
-            ):
-                client, data_shard, successful = self._receive_shard(
-                    player_index, client)
-                total_num_received_bytes += len(data_shard)
-                data.append(data_shard)
-
-            if successful and total_num_received_bytes != msg_length:
-                self.server.send_failable(
-                    client,
-                    'Actions had a different length than declared.',
-                )
-                self.server.logger.warning(
-                    f'Client {client.address} declared different actions '
-                    f'length. Closing connection...'
-                )
-                client, data_shard = self._replace_with_bot(player_index)
-                successful = False
-
-            if not successful:
-                data_shard = data_shard.partition(
-                    server_utils.MSG_LENGTH_SEPARATOR)[2]
-                total_num_received_bytes = len(data_shard)
-                data = [data_shard]
+        # Simulated agents compute their actions in-process.
+        if isinstance(client.request, MockRequest):
+            return None
 
-            data = b''.join(data)
+        message = self._receive_message(player_index, client)
+        num_fails = 0
+        while message is not None:
+            # Actions are small, so copying them is cheap.
+            data = message.tobytes()
 
             self.server.logger.debug(f'Received data:\n{data.decode()}')
             try:
-                actions = server_utils.decode_actions(data)
+                with self.server.metrics.time_phase('decode'):
+                    actions = server_utils.decode_actions(data)
+                if len(actions) != len(env_indices):
+                    raise ValueError('wrong amount of actions')
             except Exception:
                 self.server.logger.warning('Error parsing data; ignoring...')
                 self.server.logger.warning(f'Data that errored:\n{str(data)}')
+            else:
+                return actions
+
+            num_fails += 1
+            # While we hold the lock, no further batches are sent.
+            with self._player_locks[player_index]:
                 self.server.send_failable_replacing(
                     client,
                     (
                         f'Actions were malformed. Please submit at maximum '
                         f'{self.max_receive_bytes} bytes which are your '
-                        f'actions (a comma-separated list of integers) as a '
-                        f'string. Do not encode the message in any other '
-                        f'form. To submit no action, submit just a comma.'
+                        f'actions (a comma-separated list of integers, one '
+                        f'for each observation) as a string. Do not encode '
+                        f'the message in any other form.'
                     ),
                 )
-                continue
-            return actions
+                if (
+                        num_fails > self.PARSE_FAIL_TOLERANCE
+                        or not self._sent_batches[player_index].empty()
+                ):
+                    break
+                message = self._receive_message(player_index, client)
 
-        if not self.server.envs.mask_actions:
-            return [
-                0
-                for env in self.server.envs
-                if env.active_player_index == player_index
-            ]
-        return [
-            env.get_legal_actions()[0]
-            for env in self.server.envs
-            if env.active_player_index == player_index
-        ]
+        if not client.is_registered:
+            return None
 
-    def _parse_messages(self) -> List[List[Action]]:
-        """Receive and parse messages for each client in parallel.
-        Return the parsed actions.
+        # The client may have lost track of these observations.
+        with self._player_locks[player_index]:
+            self._delta_encoders[player_index].invalidate(env_indices)
+        return self._get_default_actions(env_indices)
 
-        Returns:
-            List[List[Action]]: Actions contained in the messages.
+    def _receive_batches(self, player_index: int) -> None:
+        """Receive the responses to the batches sent to the player with
+        the given index until stopped. Responses are collected in
+        `self._responses`.
+
+        Args:
+            player_index (int): Which player we are getting the
+                responses from.
         """
-        num_players = len(self.server.clients)
-        clients = self.server.clients
+        sent_batches = self._sent_batches[player_index]
+        prev_receive_time = 0.0
+        while True:
+            batch = sent_batches.get()
+            if batch is None:
+                return
+            (sent_time, env_indices) = batch
+
+            client = self.server.get_client(player_index)
+            actions = self._parse_batch(player_index, client, env_indices)
+            if actions is not None:
+                # The client only starts working on a batch once it
+                # responded to the previous one.
+                receive_time = time.perf_counter()
+                response_time = \
+                    receive_time - max(sent_time, prev_receive_time)
+                batch_sizer = self._batch_sizers[player_index]
+                if batch_sizer is not None:
+                    with self._player_locks[player_index]:
+                        batch_sizer.update(len(env_indices), response_time)
+                self.server.metrics.observe(
+                    metrics.ROUND_TRIP_SECONDS,
+                    response_time,
+                    self.server.client_labels(client),
+                )
+                prev_receive_time = receive_time
+            self._responses.put((player_index, env_indices, actions))
 
-        return self._communicators.starmap(
-            self._parse_message,
-            ((i, clients[i]) for i in range(num_players)),
-        )
+    def _compute_bot_actions(
+            self,
+            player_index: int,
+            env_indices: List[int],
+    ) -> List[Action]:
+        """Return the actions of the simulated agent at the given index
+        for the given environments.
+
+        Args:
+            player_index (int): Index of the simulated agent.
+            env_indices (List[int]): Sorted indices of the environments
+                among all parallel games. The simulated agent must be
+                the active player in all of them.
+
+        Returns:
+            List[Action]: Action for each environment.
+        """
+        client = self.server.get_client(player_index)
+        assert isinstance(client.request, MockRequest), \
+            'expected a simulated agent'
+
+        actions: List[Action] = []
+        with self.server.metrics.time_phase('bot'):
+            for (group_index, group_env_indices) in self._split_by_group(
+                    env_indices):
+                client.request.set_envs(self.server.env_groups[group_index])
+                actions.extend(client.request.compute_actions(
+                    group_env_indices).tolist())
+        assert len(actions) == len(env_indices), \
+            'simulated agent is not active in all environments'
+        return actions
 
     @staticmethod
     def _tree_map(func: Callable[[Any], Any], tree: Any) -> Any:
@@ -1379,21 +1816,56 @@ class HeartsRequestHandler(BaseRequestHandler):
             )
         return data
 
-    def _encode_data(self, data: Any) -> bytes:
+    @staticmethod
+    def encode_data(
+            data: Any,
+            wire_version: int,
+            logger: logging.Logger,
+    ) -> bytes:
         """Return the given data encoded as a message between client
         and server.
 
         Args:
             data (Any): Data to encode for sending.
+            wire_version (int): Wire protocol version the receiving
+                client supports.
+            logger (logging.Logger): Logger to log the data with when
+                debugging.
 
         Returns:
             bytes: Encoded data.
         """
-        self.server.logger.debug(f'Data before tree map:\n{data}')
-        data = self._tree_map(self._to_primitive, data)
-        self.server.logger.debug(f'Data after tree map:\n{data}')
+        to_primitive = HeartsRequestHandler._to_primitive
+        if wire_version >= server_utils.WIRE_VERSION_BINARY:
+            # Avoid the tree map; binary messages keep NumPy data as is.
+            encoded_data = server_utils.encode_binary_data(
+                data, to_primitive, wire_version)
+            if encoded_data is not None:
+                return encoded_data
+
+        # Formatting the data is expensive, so avoid it if possible.
+        is_debug = logger.isEnabledFor(logging.DEBUG)
+        if is_debug:
+            logger.debug(f'Data before tree map:\n{data}')
+        data = HeartsRequestHandler._tree_map(to_primitive, data)
+        if is_debug:
+            logger.debug(f'Data after tree map:\n{data}')
         return server_utils.encode_data(data)
 
+    def _encode_data(self, data: Any, wire_version: int) -> bytes:
+        """Return the given data encoded as a message between client
+        and server.
+
+        Args:
+            data (Any): Data to encode for sending.
+            wire_version (int): Wire protocol version the receiving
+                client supports.
+
+        Returns:
+            bytes: Encoded data.
+        """
+        return self.encode_data(data, wire_version, self.server.logger)
+
     def _send_shard(
             self,
             player_index: int,
@@ -1411,6 +1883,10 @@ class HeartsRequestHandler(BaseRequestHandler):
         """Send the given data to the client corresponding to the
         given index.
 
+        For clients that sent settings, the data is split into batches
+        according to the client's response times. Each batch is sent as
+        its own message.
+
         Args:
             player_index (int): Index of the client the shard should be
                 sent towards.
@@ -1425,13 +1901,43 @@ class HeartsRequestHandler(BaseRequestHandler):
                 ]],
             ]): Data to send to the client.
         """
-        data: bytes = self._encode_data(data)
-        self.server.logger.debug(f'Sending to {player_index}:\n{str(data)}')
-        client = self.server.clients[player_index]
-        self.server.send_failable_replacing(client, data)
+        client = self.server.get_client(player_index)
+        # Simulated agents do not need to receive any data.
+        if isinstance(client.request, MockRequest):
+            self._responses.put(
+                (player_index, [record[0] for record in data], None))
+            return
+
+        with self._player_locks[player_index]:
+            if client.wire_version >= server_utils.WIRE_VERSION_DELTA:
+                with self.server.metrics.time_phase('encode'):
+                    data = self._delta_encoders[player_index].encode(
+                        data, player_index)
+            batch_sizer = self._batch_sizers[player_index]
+            if batch_sizer is None:
+                batches = [data]
+            else:
+                batches = batch_sizer.split(data)
+
+            for batch in batches:
+                env_indices = [record[0] for record in batch]
+                # The client may have been replaced while sending.
+                if not client.is_registered:
+                    self._responses.put((player_index, env_indices, None))
+                    continue
+
+                with self.server.metrics.time_phase('encode'):
+                    encoded_batch = self._encode_data(
+                        batch, client.wire_version)
+                self.server.logger.debug(
+                    f'Sending to {player_index}:\n{str(encoded_batch)}')
+                self._sent_batches[player_index].put(
+                    (time.perf_counter(), env_indices))
+                self.server.send_failable_replacing(client, encoded_batch)
 
     def _distribute_return_data(
             self,
+            env_indices: List[int],
             return_data: Union[
                 List[MultiObservation],
                 List[Tuple[
@@ -1443,12 +1949,19 @@ class HeartsRequestHandler(BaseRequestHandler):
             ],
     ) -> None:
         """Distribute the given data among the connected clients.
-        Send the partitioned data to each client in parallel.
+        Send the partitioned data to each client that responded to all
+        batches sent to it in parallel. For the other clients, keep
+        their data until they did.
 
         Distributing means to partition the data so that each client
-        receives the data meant for it.
+        receives the data meant for it. The data is indexed by the
+        position of each environment among all parallel games. Clients
+        that are not the active player in any of the environments do
+        not receive a message.
 
         Args:
+            env_indices (List[int]): Sorted indices of the environments
+                the data was received from.
             return_data (Union[
                 List[MultiObservation],
                 List[Tuple[
@@ -1460,58 +1973,67 @@ class HeartsRequestHandler(BaseRequestHandler):
             ]): Environment information received from the parallely
                 processed environments.
         """
-        num_players = len(self.server.clients)
-        distributed_data: List[List[
-            Union[
-                Tuple[
-                    int,
-                    MultiObservation,
-                ],
-                Tuple[
-                    int,
-                    MultiObservation,
-                    MultiReward,
-                    MultiIsDone,
-                    MultiInfo,
-                ],
-            ],
-        ]] = [[] for _ in range(num_players)]
-
-        for (i, (data, env)) in enumerate(zip(return_data, self.server.envs)):
-            active_player_index = env.active_player_index
-            active_player_data = distributed_data[active_player_index]
+        active_player_indices: List[int] = []
+        for (group_index, group_env_indices) in self._split_by_group(
+                env_indices):
+            envs = self.server.env_groups[group_index]
+            active_player_indices.extend(
+                envs.get_active_player_indices(group_env_indices))
+
+        for (i, data, active_player_index) in zip(
+                env_indices, return_data, active_player_indices):
+            active_player_data = self._pending_data[active_player_index]
             if isinstance(data, tuple):
                 active_player_data.append((i,) + data)
             else:
                 active_player_data.append((i, data))
 
-        self._communicators.starmap(
-            self._send_shard,
-            enumerate(distributed_data),
-        )
+        shards = []
+        for (player_index, data) in enumerate(self._pending_data):
+            if len(data) == 0:
+                continue
+            # Clients that are still busy only receive full batches
+            # so they stay busy without getting ever smaller ones.
+            batch_sizer = self._batch_sizers[player_index]
+            if (
+                    self._num_unanswered[player_index] > 0
+                    and (batch_sizer is None
+                         or len(data) < batch_sizer.batch_size)
+            ):
+                continue
+            # Keep the data sorted by environment indices.
+            data.sort(key=lambda record: record[0])
+            shards.append((player_index, data))
+            self._pending_data[player_index] = []
+            self._num_unanswered[player_index] += len(data)
+        self._communicators.starmap(self._send_shard, shards)
 
-    def _order_player_actions(
-            self,
-            player_actions: List[List[Action]],
-    ) -> Iterator[Action]:
-        """Return an iterator over the given actions for each player,
-        sorted so each action matches the corresponding environment.
+    @staticmethod
+    def get_single_info(info: MultiInfo) -> Info:
+        """Return the information of the given step that is the same
+        for all players.
 
         Args:
-            player_actions (List[List[Action]]): List of actions for
-                each player, sorted by player indices.
+            info (MultiInfo): Information of an environment step.
 
         Returns:
-            Iterator[Action]: Flattened iterator over the actions,
-                sorted so the order corresponds to the order
-                of environments.
+            Info: Information of the first player.
+        """
+        return info[next(iter(info.keys()))]
+
+    @staticmethod
+    def count_illegal(num_illegals: List[int], info: MultiInfo) -> None:
+        """Count an illegal action for the player that acted in the
+        given step if its action was illegal.
+
+        Args:
+            num_illegals (List[int]): Amount of illegal actions of each
+                player; updated in-place.
+            info (MultiInfo): Information of an environment step.
         """
-        offsets = [0] * len(player_actions)
-        for env in self.server.envs:
-            active_player_index = env.active_player_index
-            offset = offsets[active_player_index]
-            offsets[active_player_index] += 1
-            yield player_actions[active_player_index][offset]
+        single_info = HeartsRequestHandler.get_single_info(info)
+        num_illegals[single_info['prev_active_player_index']] += \
+            single_info['was_illegal']
 
     @staticmethod
     def is_done(num_games: int, max_num_games: Optional[int]) -> bool:
@@ -1532,8 +2054,8 @@ class HeartsRequestHandler(BaseRequestHandler):
             self.is_done(self.server.num_games, self.server.max_num_games)
             # When we only have simulated agents left, we can just quit.
             or all(
-                isinstance(client.request, MockRequest)
-                for client in self.server.clients.values()
+                isinstance(self.server.get_client(i).request, MockRequest)
+                for i in range(len(self._sent_batches))
             )
         )
 
@@ -1549,136 +2071,272 @@ class HeartsRequestHandler(BaseRequestHandler):
         """
         return self.server.clients[player_index].name
 
-    def handle(self) -> None:
-        self.server.num_games = 0
-        self.server.stats.clear()
-        num_players = len(self.server.clients)
-        for i in range(num_players):
-            self.server.num_illegals[i] = 0
-            self.server.total_penalties[i] = 0
-            self.server.total_placements[i] = [0] * num_players
-
-        envs = self.server.envs
-        clients = self.server.clients
-
-        while not self._is_done():
-            if self.server.needs_reset:
-                init_return_data: List[MultiObservation] = envs.reset()
-                self.server.needs_reset = False
+    def _reset_groups(self) -> None:
+        """Reset all groups of environments and send the initial
+        observations to the clients.
+        """
+        for delta_encoder in self._delta_encoders:
+            delta_encoder.reset()
+        for player_index in range(len(self._sent_batches)):
+            request = self.server.get_client(player_index).request
+            if isinstance(request, MockRequest):
+                request.reset_states()
+        init_return_data: List[MultiObservation] = []
+        for envs in self.server.env_groups:
+            init_return_data.extend(envs.reset())
+        self.server.needs_reset = False
+        self._final_return_data = [None] * self.server.num_parallel_games
+        self._num_unfinished_games = self.server.num_parallel_games
+        self._num_unanswered = [0] * len(self._num_unanswered)
+        self._distribute_return_data(
+            list(range(self.server.num_parallel_games)), init_return_data)
+
+    def _step_games(
+            self,
+            env_indices: List[int],
+            actions: List[Action],
+    ) -> List[Tuple[
+        MultiObservation,
+        MultiReward,
+        MultiIsDone,
+        MultiInfo,
+    ]]:
+        """Step the given environments with the given actions and return
+        the results.
 
-                self._distribute_return_data(init_return_data)
-                del init_return_data
+        Args:
+            env_indices (List[int]): Sorted indices of the environments
+                to step among all parallel games.
+            actions (List[Action]): Action for each environment.
 
-            player_actions = self._parse_messages()
-            actions_iter = self._order_player_actions(player_actions)
+        Returns:
+            List[Tuple[
+                MultiObservation,
+                MultiReward,
+                MultiIsDone,
+                MultiInfo,
+            ]]: Environment information for each environment.
+        """
+        return_data: List[Tuple[
+            MultiObservation,
+            MultiReward,
+            MultiIsDone,
+            MultiInfo,
+        ]] = []
+        actions_iter = iter(actions)
+        with self.server.metrics.time_phase('step'):
+            for (group_index, group_env_indices) in self._split_by_group(
+                    env_indices):
+                return_data.extend(self.server.env_groups[group_index].step(
+                    itertools.islice(actions_iter, len(group_env_indices)),
+                    group_env_indices,
+                ))
+        return return_data
 
+    def _finish_step(
+            self,
+            env_indices: List[int],
             return_data: List[Tuple[
                 MultiObservation,
                 MultiReward,
                 MultiIsDone,
                 MultiInfo,
-            ]] = envs.step(actions_iter)
-
-            for data in return_data:
-                obs, reward, is_done, info = data
-                # return_data = {
-                #     'obs': obs,
-                #     'reward': reward,
-                #     'is_done': is_done,
-                #     'info': info,
-                # }
-                first_key = next(iter(info.keys()))
-                single_info = info[first_key]
-                prev_active_player_index = \
-                    single_info['prev_active_player_index']
-                self.server.num_illegals[prev_active_player_index] += \
-                    single_info['was_illegal']
-
-            game_is_done = is_done['__all__']
-            if not game_is_done:
-                self._distribute_return_data(return_data)
-                continue
+            ]],
+    ) -> None:
+        """Send the data of the given stepped environments to the
+        clients unless their games are over; in that case, keep it until
+        all games are over.
 
-            self.server.needs_reset = True
-            self.server.num_games += self.server.num_parallel_games
+        Args:
+            env_indices (List[int]): Sorted indices of the environments
+                that were stepped.
+            return_data (List[Tuple[
+                MultiObservation,
+                MultiReward,
+                MultiIsDone,
+                MultiInfo,
+            ]]): Environment information for each environment.
+        """
+        running_env_indices: List[int] = []
+        running_return_data: List[Tuple[
+            MultiObservation,
+            MultiReward,
+            MultiIsDone,
+            MultiInfo,
+        ]] = []
+        for (i, data) in zip(env_indices, return_data):
+            obs, reward, is_done, info = data
+            # return_data = {
+            #     'obs': obs,
+            #     'reward': reward,
+            #     'is_done': is_done,
+            #     'info': info,
+            # }
+            self.count_illegal(self.server.num_illegals, info)
+
+            if is_done['__all__']:
+                self._final_return_data[i] = data
+                self._num_unfinished_games -= 1
+            else:
+                running_env_indices.append(i)
+                running_return_data.append(data)
 
-            for data in return_data:
-                _, _, _, info = data
-                first_key = next(iter(info.keys()))
-                single_info = info[first_key]
-                final_penalties = single_info['final_penalties']
-                final_rankings = single_info['final_rankings']
+        self._distribute_return_data(running_env_indices, running_return_data)
 
-                self.server.stats.append((
-                    final_penalties,
-                    final_rankings,
-                ))
-                for (i, penalty) in enumerate(final_penalties):
-                    self.server.total_penalties[i] += penalty
-                for (i, ranking) in enumerate(final_rankings):
-                    self.server.total_placements[i][ranking - 1] += 1
-
-            self.server.print_log(f'Num games: {self.server.num_games}')
-            if self.server.num_parallel_games == 1:
-                if 2 not in final_rankings:
-                    winner_indices = [
-                        i
-                        for (i, ranking) in enumerate(final_rankings)
-                        if ranking == 1
-                    ]
-                    self.server.print_log(f'Winners: {winner_indices}')
-                else:
-                    self.server.print_log(f'Winner: {final_rankings.index(1)}')
+    def _collect_responses(self) -> Tuple[List[int], List[Action]]:
+        """Wait for responses to the batches sent and return all that
+        are available, computing actions for simulated agents.
+
+        Returns:
+            List[int]: Sorted indices of the environments responded to.
+            List[Action]: Action for each environment.
+        """
+        responses = [self._responses.get()]
+        while True:
+            try:
+                responses.append(self._responses.get_nowait())
+            except queue.Empty:
+                break
+
+        env_actions: List[Tuple[int, Action]] = []
+        for (player_index, env_indices, actions) in responses:
+            if actions is None:
+                actions = self._compute_bot_actions(player_index, env_indices)
+            self._num_unanswered[player_index] -= len(env_indices)
+            env_actions.extend(zip(env_indices, actions))
+        env_actions.sort()
+        return (
+            [env_index for (env_index, _) in env_actions],
+            [action for (_, action) in env_actions],
+        )
 
+    def _finish_games(self) -> None:
+        """Update the statistics with the finished games and send the
+        final data of all groups and the results to the clients.
+        """
+        num_players = len(self.server.clients)
+        clients = self.server.clients
+
+        stats = self.server.stats
+        self.server.needs_reset = True
+        prev_num_games = self.server.num_games
+        self.server.num_games += self.server.num_parallel_games
+
+        return_data: List[Tuple[
+            MultiObservation,
+            MultiReward,
+            MultiIsDone,
+            MultiInfo,
+        ]] = [
+            data
+            for data in self._final_return_data
+            if data is not None
+        ]
+        for data in return_data:
+            _, _, _, info = data
+            single_info = self.get_single_info(info)
+            final_penalties = single_info['final_penalties']
+            final_rankings = single_info['final_rankings']
+
+            stats.add_game(final_penalties, final_rankings)
+
+        self.server.print_log(f'Num games: {self.server.num_games}')
+        if self.server.num_parallel_games == 1:
+            if 2 not in final_rankings:
+                winner_indices = [
+                    i
+                    for (i, ranking) in enumerate(final_rankings)
+                    if ranking == 1
+                ]
+                self.server.print_log(f'Winners: {winner_indices}')
+            else:
+                self.server.print_log(f'Winner: {final_rankings.index(1)}')
+
+        results_table = utils.create_results_table(
+            stats.total_penalties,
+            stats.total_placements,
+            self._index_to_name,
+            self.server.num_illegals,
+            stats.get_extra_columns(),
+        )
+        report_interval = self.server.report_interval
+        if (
+                report_interval is None
+                or (prev_num_games // report_interval
+                    != self.server.num_games // report_interval)
+                or self._is_done()
+        ):
             self.server.logger.info(
-                f'Total penalties: {self.server.total_penalties}')
+                f'Total penalties: {stats.total_penalties}')
             self.server.logger.info(
-                f'Total placements: {self.server.total_placements}')
-            results_table = utils.create_results_table(
-                self.server.total_penalties,
-                self.server.total_placements,
-                self._index_to_name,
-                self.server.num_illegals,
-            )
+                f'Total placements: {stats.total_placements}')
             print(results_table)
-            results_table: bytes = server_utils.encode_data(
-                '\n' + results_table)
+            stats.flush()
+        results_table: bytes = server_utils.encode_data(
+            '\n' + results_table)
+
+        # All games' final data is sent at once so clients see the same
+        # protocol no matter when each game ended.
+        return_data: List[Tuple[  # type: ignore[no-redef]
+            int,
+            MultiObservation,
+            MultiReward,
+            MultiIsDone,
+            MultiInfo,
+        ]] = [(i,) + data for (i, data) in enumerate(return_data)]
+        with self.server.metrics.time_phase('encode'):
+            encoded_return_data: Dict[int, bytes] = {
+                wire_version: self._encode_data(return_data, wire_version)
+                for wire_version in set(
+                        clients[i].wire_version for i in range(num_players))
+            }
+        self.server.logger.debug('Return data:', encoded_return_data)
+
+        self._communicators.map(
+            lambda client: self.server.send_failable_replacing(
+                client, encoded_return_data[client.wire_version]),
+            (clients[i] for i in range(num_players)),
+        )
+        self._communicators.map(
+            lambda client: self.server.receive_ok_replacing(
+                client, self.OK_TIMEOUT_SEC),
+            (clients[i] for i in range(num_players)),
+        )
+        self._communicators.map(
+            lambda client: self.server.send_failable_replacing(
+                client, results_table),
+            (clients[i] for i in range(num_players)),
+        )
+        self._communicators.map(
+            lambda client: self.server.receive_ok_replacing(
+                client, self.OK_TIMEOUT_SEC),
+            (clients[i] for i in range(num_players)),
+        )
 
-            return_data: List[Tuple[  # type: ignore[no-redef]
-                int,
-                MultiObservation,
-                MultiReward,
-                MultiIsDone,
-                MultiInfo,
-            ]] = [(i,) + data for (i, data) in enumerate(return_data)]
-            return_data: bytes = (  # type: ignore[no-redef]
-                self._encode_data(return_data)
-            )
-            self.server.logger.debug('Return data:', return_data)
+    def handle(self) -> None:
+        self.server.num_games = 0
+        self.server.stats.reset()
+        num_players = len(self.server.clients)
+        for i in range(num_players):
+            self.server.num_illegals[i] = 0
 
-            self._communicators.map(
-                lambda client: self.server.send_failable_replacing(
-                    client, return_data),
-                (clients[i] for i in range(num_players)),
-            )
-            self._communicators.map(
-                lambda client: self.server.receive_ok_replacing(
-                    client, self.OK_TIMEOUT_SEC),
-                (clients[i] for i in range(num_players)),
-            )
-            self._communicators.map(
-                lambda client: self.server.send_failable_replacing(
-                    client, results_table),
-                (clients[i] for i in range(num_players)),
-            )
-            self._communicators.map(
-                lambda client: self.server.receive_ok_replacing(
-                    client, self.OK_TIMEOUT_SEC),
-                (clients[i] for i in range(num_players)),
-            )
+        while not self._is_done():
+            if self.server.needs_reset:
+                self._reset_groups()
+
+            # Step games as soon as their active player answered, no
+            # matter whether other players are still busy.
+            (env_indices, actions) = self._collect_responses()
+            return_data = self._step_games(env_indices, actions)
+            self._finish_step(env_indices, return_data)
+
+            if self._num_unfinished_games == 0:
+                self._finish_games()
 
     def finish(self) -> None:
         self.server.print_log('Finishing...')
+        for sent_batches in self._sent_batches:
+            sent_batches.put(None)
         self._communicators.terminate()
         self._communicators.join()
         self.server.needs_reset = True
@@ -1686,9 +2344,13 @@ class HeartsRequestHandler(BaseRequestHandler):
         clients = self.server.clients
 
         # Clean up all requests.
-        for client in clients.values():
+        for client in list(clients.values()):
             self.server.shutdown_request(  # type: ignore[attr-defined]
                 client.request)
+        # Receivers waiting for a client stop once its request is
+        # shut down.
+        for receiver in self._receivers:
+            receiver.join()
 
         clients.clear()
 
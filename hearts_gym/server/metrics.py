@@ -0,0 +1,283 @@
+"""
+Server metrics exposed in the Prometheus text exposition format.
+
+`ServerMetrics` collects counters and histograms from any thread;
+`MetricsServer` serves them over HTTP so they can be scraped or simply
+fetched while the server is running.
+"""
+
+import bisect
+import contextlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from hearts_gym.server.utils import Address
+
+Labels = Tuple[Tuple[str, str], ...]
+
+SENT_BYTES = 'hearts_server_sent_bytes_total'
+RECEIVED_BYTES = 'hearts_server_received_bytes_total'
+TIMEOUTS = 'hearts_server_timeouts_total'
+BOT_REPLACEMENTS = 'hearts_server_bot_replacements_total'
+ROUND_TRIP_SECONDS = 'hearts_server_round_trip_seconds'
+PHASE_SECONDS = 'hearts_server_phase_seconds'
+
+COUNTER_HELP = {
+    SENT_BYTES: 'Bytes sent to clients.',
+    RECEIVED_BYTES: 'Bytes received from clients.',
+    TIMEOUTS: 'Messages clients did not send in time.',
+    BOT_REPLACEMENTS: 'Clients replaced by simulated agents.',
+}
+"""Names and descriptions of all counters."""
+HISTOGRAM_HELP = {
+    ROUND_TRIP_SECONDS: (
+        'Time clients take to respond to a batch of observations, '
+        'counted from when they could start working on it.'
+    ),
+    PHASE_SECONDS: (
+        'Time spent encoding observations, decoding actions, computing '
+        'actions of simulated agents and stepping environments.'
+    ),
+}
+"""Names and descriptions of all histograms."""
+
+
+def _format_labels(labels: Labels) -> str:
+    """Return the given labels formatted for the exposition format.
+
+    Args:
+        labels (Labels): Pairs of label names and values.
+
+    Returns:
+        str: Formatted labels including braces or the empty string if
+            there are no labels.
+    """
+    if len(labels) == 0:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            name,
+            value
+            .replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for (name, value) in labels
+    ) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Return the given sample value formatted for the exposition
+    format.
+
+    Args:
+        value (float): Value to format.
+
+    Returns:
+        str: Formatted value.
+    """
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value % 1 else str(int(value))
+
+
+class Histogram:
+    """Counts of observed values in cumulative buckets."""
+
+    __slots__ = ['upper_bounds', 'bucket_counts', 'sum', 'count']
+
+    def __init__(self, upper_bounds: Sequence[float]) -> None:
+        """Construct an empty histogram.
+
+        Args:
+            upper_bounds (Sequence[float]): Sorted inclusive upper
+                bounds of the buckets, not including infinity.
+        """
+        self.upper_bounds = tuple(upper_bounds)
+        self.bucket_counts = [0] * (len(self.upper_bounds) + 1)
+        """Non-cumulative count of each bucket; the last one is for
+        values above all upper bounds.
+        """
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add the given value to the histogram.
+
+        Args:
+            value (float): Observed value.
+        """
+        self.bucket_counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def format(self, name: str, labels: Labels) -> List[str]:
+        """Return the exposition format lines for the histogram.
+
+        Args:
+            name (str): Name of the histogram.
+            labels (Labels): Labels of the histogram.
+
+        Returns:
+            List[str]: Lines describing the histogram.
+        """
+        lines = []
+        cumulative_count = 0
+        for (upper_bound, bucket_count) in zip(
+                self.upper_bounds + (float('inf'),),
+                self.bucket_counts,
+        ):
+            cumulative_count += bucket_count
+            bucket_labels = labels + (('le', _format_value(upper_bound)),)
+            lines.append(
+                f'{name}_bucket{_format_labels(bucket_labels)} '
+                f'{cumulative_count}'
+            )
+        lines.append(
+            f'{name}_sum{_format_labels(labels)} {_format_value(self.sum)}')
+        lines.append(f'{name}_count{_format_labels(labels)} {self.count}')
+        return lines
+
+
+class ServerMetrics:
+    """Thread-safe collection of the server's counters and histograms."""
+
+    LATENCY_BUCKETS = (
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+        0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    )
+    """Upper bounds in seconds of the buckets of all histograms."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {
+            name: {} for name in COUNTER_HELP
+        }
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {
+            name: {} for name in HISTOGRAM_HELP
+        }
+
+    def increment(
+            self,
+            name: str,
+            labels: Labels = (),
+            amount: float = 1,
+    ) -> None:
+        """Increase the counter with the given name and labels.
+
+        Args:
+            name (str): Name of the counter.
+            labels (Labels): Pairs of label names and values.
+            amount (float): By how much to increase the counter.
+        """
+        with self._lock:
+            counter = self._counters[name]
+            counter[labels] = counter.get(labels, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Add a value to the histogram with the given name and labels.
+
+        Args:
+            name (str): Name of the histogram.
+            value (float): Observed value.
+            labels (Labels): Pairs of label names and values.
+        """
+        with self._lock:
+            histograms = self._histograms[name]
+            histogram = histograms.get(labels)
+            if histogram is None:
+                histogram = Histogram(self.LATENCY_BUCKETS)
+                histograms[labels] = histogram
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def time_phase(self, phase: str) -> Iterator[None]:
+        """Observe how long the enclosed code takes in the phase
+        histogram.
+
+        Args:
+            phase (str): Name of the phase.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(
+                PHASE_SECONDS,
+                time.perf_counter() - start_time,
+                (('phase', phase),),
+            )
+
+    def format(self) -> str:
+        """Return all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Text describing all metrics.
+        """
+        lines = []
+        with self._lock:
+            for (name, counter) in self._counters.items():
+                lines.append(f'# HELP {name} {COUNTER_HELP[name]}')
+                lines.append(f'# TYPE {name} counter')
+                lines.extend(
+                    f'{name}{_format_labels(labels)} {_format_value(value)}'
+                    for (labels, value) in counter.items()
+                )
+            for (name, histograms) in self._histograms.items():
+                lines.append(f'# HELP {name} {HISTOGRAM_HELP[name]}')
+                lines.append(f'# TYPE {name} histogram')
+                for (labels, histogram) in histograms.items():
+                    lines.extend(histogram.format(name, labels))
+        return '\n'.join(lines) + '\n'
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    server: 'MetricsServer'
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] not in ['/', '/metrics']:
+            self.send_error(404)
+            return
+
+        body = self.server.metrics.format().encode()
+        self.send_response(200)
+        self.send_header(
+            'Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Scrapes are frequent; do not clutter the server output.
+        pass
+
+
+class MetricsServer(ThreadingMixIn, HTTPServer):
+    """HTTP server serving metrics at `/metrics` from a
+    background thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, metrics: ServerMetrics, address: Address) -> None:
+        """Construct and start a metrics server.
+
+        Args:
+            metrics (ServerMetrics): Metrics to serve.
+            address (Address): Address and port to serve the metrics at.
+        """
+        self.metrics = metrics
+        super().__init__(address, _MetricsRequestHandler)
+        self._thread: Optional[Thread] = Thread(
+            target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def server_close(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        super().server_close()
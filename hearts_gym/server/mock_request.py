@@ -1,74 +1,157 @@
 """
 Client request acting like a socket.
 
-"Sends" random actions to the server.
+"Sends" actions computed by a vectorized policy to the server.
 """
 
-import random
 import socket
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from hearts_gym import HeartsEnv
+import numpy as np
+
+from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
 from hearts_gym.server import utils as server_utils
-from hearts_gym.utils.typing import Seed
+from hearts_gym.server.bot_policies import BotPolicy, RandomBotPolicy
 
 
 class MockRequest(socket.socket):
     """Client request acting like a socket.
 
-    "Sends" random actions to the server, simulating a randomly acting
-    client agent.
+    "Sends" actions computed by a vectorized policy to the server,
+    simulating a client agent. By default, the agent acts randomly.
+
+    Servers may also query the actions directly as an array using
+    `compute_actions`, avoiding encoding and parsing them.
+
+    Recurrent policy states are kept per environment and must be reset
+    using `reset_states` whenever the environments are reset.
     """
 
     def __init__(
             self,
-            envs: List[HeartsEnv],
+            envs: VecHeartsEnv,
             player_index: int,
-            seed: Seed = None,
+            seed: Optional[int] = None,
+            policy: Optional[BotPolicy] = None,
     ) -> None:
         """Construct a mock request interacting with the
         given environments.
 
         Args:
-            envs (List[HeartsEnv]): Environments the clients acts in.
+            envs (VecHeartsEnv): Environments the clients acts in.
             player_index (int): Index of the client in the environment.
-            seed (Seed): Random number generator seed for action sampling.
+            seed (Optional[int]): Random number generator seed for
+                action sampling. Only used if `policy` is `None`.
+            policy (Optional[BotPolicy]): Policy to compute actions
+                with. If `None`, act randomly.
         """
+        if policy is None:
+            policy = RandomBotPolicy(seed)
+
         self._envs = envs
         self._player_index = player_index
-        self._rng = random.Random(seed)
+        self.policy = policy
+        self._states: Dict[VecHeartsEnv, List[np.ndarray]] = {}
 
         self._ok_msg = server_utils.OK_MSG
 
+    def set_envs(self, envs: VecHeartsEnv) -> None:
+        """Set the environments the client acts in from now on.
+
+        Args:
+            envs (VecHeartsEnv): Environments the clients acts in.
+        """
+        self._envs = envs
+
+    def reset_states(self) -> None:
+        """Reset the recurrent policy states in all environments."""
+        self._states.clear()
+
+    def _get_states(self) -> List[np.ndarray]:
+        """Return the recurrent policy states in the environments the
+        client acts in, initializing them if necessary.
+
+        Returns:
+            List[np.ndarray]: Recurrent policy state of
+                each environment.
+        """
+        states = self._states.get(self._envs)
+        if states is None:
+            states = [
+                np.repeat(state[np.newaxis], self._envs.num_envs, axis=0)
+                for state in self.policy.get_initial_state()
+            ]
+            self._states[self._envs] = states
+        return states
+
     def sendall(self, bytes: bytes, flags: int = 0) -> None:
         """Overridden with NOP for API compatibility."""
         pass
 
-    def get_actions(self) -> bytes:
-        """Return random legal action for the environments the client
-        interacts with.
+    def compute_actions(
+            self,
+            env_indices: Optional[List[int]] = None,
+    ) -> np.ndarray:
+        """Return actions for all environments the client is the
+        active player in, in order of the environments.
 
         Args:
-            bufsize (int): Ignored.
-            flags (int): Ignored.
+            env_indices (Optional[List[int]]): Indices of the
+                environments to consider, in order. If `None`, consider
+                all environments.
 
         Returns:
-            bytes: Random legal actions.
+            np.ndarray: Actions computed by the policy.
+        """
+        (
+            active_indices,
+            cards,
+            leading_hearts_allowed,
+            action_masks,
+        ) = self._envs.get_active_observations(
+            self._player_index, env_indices)
+        if len(active_indices) == 0:
+            return active_indices
+
+        states = self._get_states()
+        actions, state_batches = self.policy.compute_actions(
+            cards,
+            leading_hearts_allowed,
+            action_masks,
+            [state[active_indices] for state in states],
+        )
+        for (state, state_batch) in zip(states, state_batches):
+            state[active_indices] = state_batch
+        return actions
+
+    def get_actions(self) -> bytes:
+        """Return actions for the environments the client interacts
+        with in message form.
+
+        Returns:
+            bytes: Actions computed by the policy or the 'OK' message
+                if the game is over.
         """
         # Also catches an uninitialized game.
-        if self._envs[0].game.is_done():
+        if self._envs.is_game_done():
             return self._ok_msg
 
-        actions = [
-            self._rng.choice(env.get_legal_actions())
-            for env in self._envs
-            if env.active_player_index == self._player_index
-        ]
-        return server_utils.encode_actions(actions)
+        return server_utils.encode_actions(self.compute_actions().tolist())
 
     def recv(self, bufsize: int, flags: int = 0) -> bytes:
         return self.get_actions()
 
+    def recv_into(  # type: ignore[override]
+            self,
+            buffer: memoryview,
+            nbytes: int = 0,
+            flags: int = 0,
+    ) -> int:
+        data = self.get_actions()
+        num_bytes = len(data)
+        buffer[:num_bytes] = data
+        return num_bytes
+
     def settimeout(self, value: Optional[float]) -> None:
         """Overridden with NOP for API compatibility."""
         pass
@@ -4,9 +4,11 @@ Utilities for client-server interaction.
 
 import json
 import socket
-from typing import Any, List, Optional, Tuple
+import struct
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
 import zlib
 
+import numpy as np
 from ray.rllib.utils.typing import TensorType
 
 from hearts_gym.utils.typing import Action
@@ -15,6 +17,44 @@ Request = socket.socket
 Address = Tuple[str, int]
 
 OK_MSG = b'__OK'
+BINARY_OK_MSG = b'__B1'
+"""Sent instead of `OK_MSG` after setup to request binary messages.
+Has the same length as `OK_MSG`.
+"""
+SETTINGS_OK_MSG = b'__S1'
+"""Sent instead of `OK_MSG` after setup to configure the client's
+settings, which follow as `CLIENT_SETTINGS`. Has the same length
+as `OK_MSG`.
+"""
+CLIENT_SETTINGS = struct.Struct('!BId')
+"""Settings a client sends after `SETTINGS_OK_MSG`.
+
+Contains the requested wire protocol version, the maximum amount of
+observations per message (0 for no limit) and the targeted time in
+seconds to respond to a message (0 for the server default).
+"""
+
+WIRE_VERSION_JSON = 0
+"""Wire protocol version of zlib-compressed JSON messages."""
+WIRE_VERSION_BINARY = 1
+"""Wire protocol version of binary messages with packed arrays."""
+WIRE_VERSION_DELTA = 2
+"""Wire protocol version of binary messages with delta-encoded card
+states (see `hearts_gym.server.delta_observations`). Can only be
+requested via `CLIENT_SETTINGS`.
+"""
+WIRE_VERSION = WIRE_VERSION_DELTA
+"""Newest supported wire protocol version."""
+
+BINARY_MAGIC = b'HGB'
+BINARY_HEADER = struct.Struct('!3sBII')
+"""Header of binary messages.
+
+Contains `BINARY_MAGIC`, the wire protocol version, the number of
+records and the byte length of the layout following the header.
+"""
+BINARY_ALIGNMENT = 8
+"""Alignment in bytes of the arrays in binary messages."""
 
 MSG_LENGTH_SEPARATOR = b';'
 ACTION_SEPARATOR = b','
@@ -90,35 +130,346 @@ def decode_actions(data: bytes) -> List[Action]:
     return list(map(int, data.split(ACTION_SEPARATOR)))
 
 
-def encode_data(data: Any) -> bytes:
+def _pad_length(length: int) -> int:
+    """Return how many bytes to pad the given length with to reach
+    `BINARY_ALIGNMENT`.
+
+    Args:
+        length (int): Length to pad.
+
+    Returns:
+        int: Amount of padding bytes.
+    """
+    return -length % BINARY_ALIGNMENT
+
+
+_PACKABLE_TYPES = (np.ndarray, np.generic, int, float, type(None))
+"""Leaf types that are packed as they are in binary messages."""
+
+
+def _flatten_record(
+        record: Any,
+        leaves: List[Any],
+        to_primitive: Optional[Callable[[Any], Any]],
+) -> Any:
+    """Return the structure of the given record with each leaf replaced
+    by its index in `leaves`. The leaves are appended to `leaves`.
+
+    Args:
+        record (Any): Tree-like to flatten.
+        leaves (List[Any]): List to append the leaves to.
+        to_primitive (Optional[Callable[[Any], Any]]): Function to
+            convert leaves that are not NumPy data or Python scalars.
+            Converted leaves are flattened further.
+
+    Returns:
+        Any: JSON-compatible structure of the record.
+    """
+    if isinstance(record, dict):
+        return {str(key): _flatten_record(value, leaves, to_primitive)
+                for (key, value) in record.items()}
+    if isinstance(record, (list, tuple)):
+        return [_flatten_record(value, leaves, to_primitive)
+                for value in record]
+    if to_primitive is not None and not isinstance(record, _PACKABLE_TYPES):
+        record = to_primitive(record)
+        if isinstance(record, (dict, list, tuple)):
+            return _flatten_record(record, leaves, None)
+    leaves.append(record)
+    return len(leaves) - 1
+
+
+def _pack_column(
+        values: Sequence[Any],
+) -> Optional[Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]]:
+    """Return the given leaf values stacked into a single array or
+    `None` if they cannot be stacked.
+
+    Scalar values may be `None`; these are replaced by zero and marked
+    in an additional mask.
+
+    One-dimensional arrays of differing lengths (ragged arrays) are
+    concatenated instead and their lengths returned separately.
+
+    Args:
+        values (Sequence[Any]): Leaf values of the same position in
+            each record.
+
+    Returns:
+        np.ndarray: Values stacked along a new first axis or, for
+            ragged arrays, concatenated along the first axis.
+        Optional[np.ndarray]: Mask of which values are `None`, or
+            `None` if no value is `None`.
+        Optional[np.ndarray]: Lengths of ragged arrays, or `None` if
+            the arrays are not ragged.
+    """
+    first = values[0]
+    is_none = None
+    lengths = None
+    if isinstance(first, np.ndarray):
+        if not all(
+                isinstance(value, np.ndarray)
+                and value.dtype == first.dtype
+                for value in values
+        ):
+            return None
+        if all(value.shape == first.shape for value in values):
+            column = np.stack(values)
+        elif all(value.ndim == 1 for value in values):
+            column = np.concatenate(values)
+            lengths = np.array([len(value) for value in values])
+            lengths = lengths.astype(np.min_scalar_type(lengths.max()))
+        else:
+            return None
+    else:
+        if any(isinstance(value, (str, bytes)) for value in values):
+            return None
+        is_none = np.array([value is None for value in values])
+        if is_none.any():
+            values = [0 if value is None else value for value in values]
+        else:
+            is_none = None
+        column = np.asarray(values)
+        if column.ndim != 1:
+            return None
+
+    if column.dtype.kind not in 'biuf':
+        return None
+    return column, is_none, lengths
+
+
+def encode_binary_data(
+        data: Any,
+        to_primitive: Optional[Callable[[Any], Any]] = None,
+        wire_version: int = WIRE_VERSION_BINARY,
+) -> Optional[bytes]:
+    """Return the given data encoded as a binary message from server to
+    client or `None` if it cannot be encoded that way.
+
+    Only non-empty lists of records with equal structure can be
+    encoded. The leaf values at the same position in each record are
+    packed into one contiguous array with the records along the
+    first axis. Starting with `WIRE_VERSION_DELTA`, one-dimensional
+    arrays of differing lengths are packed as well.
+
+    Args:
+        data (Any): Data to encode for sending.
+        to_primitive (Optional[Callable[[Any], Any]]): Function to
+            convert leaves that are not NumPy data or Python scalars.
+        wire_version (int): Wire protocol version the receiving client
+            supports.
+
+    Returns:
+        Optional[bytes]: Encoded data, prefixed with the length of the
+            data and a `MSG_LENGTH_SEPARATOR`.
+    """
+    if not isinstance(data, list) or len(data) == 0:
+        return None
+    records = data
+
+    leaves: List[Any] = []
+    structure = _flatten_record(records[0], leaves, to_primitive)
+    record_leaves = [leaves]
+    for record in records[1:]:
+        leaves = []
+        if _flatten_record(record, leaves, to_primitive) != structure:
+            return None
+        record_leaves.append(leaves)
+
+    columns: List[
+        Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]
+    ] = []
+    # Index and data type of lengths of each ragged column.
+    ragged_columns = []
+    for values in zip(*record_leaves):
+        packed_column = _pack_column(values)
+        if packed_column is None:
+            return None
+        lengths = packed_column[2]
+        if lengths is not None:
+            if wire_version < WIRE_VERSION_DELTA:
+                return None
+            ragged_columns.append([len(columns), lengths.dtype.str])
+        columns.append(packed_column)
+
+    layout = {
+        'structure': structure,
+        'columns': [
+            [
+                column.dtype.str,
+                list(column.shape[1:]),
+                is_none is not None,
+            ]
+            for (column, is_none, _) in columns
+        ],
+    }
+    if ragged_columns:
+        layout['ragged'] = ragged_columns
+        version = WIRE_VERSION_DELTA
+    else:
+        version = WIRE_VERSION_BINARY
+    layout = json.dumps(layout, separators=(',', ':')).encode()
+    layout += b' ' * _pad_length(BINARY_HEADER.size + len(layout))
+
+    data = [
+        BINARY_HEADER.pack(BINARY_MAGIC, version, len(records), len(layout)),
+        layout,
+    ]
+    for (column, is_none, lengths) in columns:
+        arrays = [
+            array
+            for array in [is_none, lengths, column]
+            if array is not None
+        ]
+        for array in arrays:
+            array_data = np.ascontiguousarray(array).tobytes()
+            data.append(array_data)
+            data.append(bytes(_pad_length(len(array_data))))
+    return prefix_data(b''.join(data))
+
+
+def _build_record(structure: Any, values: Sequence[Any]) -> Any:
+    """Return a record built from the given structure, replacing leaf
+    indices by the corresponding value.
+
+    Args:
+        structure (Any): JSON-compatible structure of the record.
+        values (Sequence[Any]): Leaf values of the record.
+
+    Returns:
+        Any: The rebuilt record.
+    """
+    if isinstance(structure, dict):
+        return {key: _build_record(value, values)
+                for (key, value) in structure.items()}
+    if isinstance(structure, list):
+        return [_build_record(value, values) for value in structure]
+    return values[structure]
+
+
+def _decode_binary_data(data: Union[bytes, bytearray]) -> List[Any]:
+    """Return the given binary message decoded into a list of records.
+
+    Tuples and dictionary keys are decoded like JSON would (as lists
+    and strings, respectively). Scalars are decoded as Python values;
+    array leaves are views into `data`.
+
+    Args:
+        data (Union[bytes, bytearray]): Received data to decode.
+
+    Returns:
+        List[Any]: Decoded records.
+    """
+    (_, version, num_records, layout_length) = \
+        BINARY_HEADER.unpack_from(data)
+    if version not in [WIRE_VERSION_BINARY, WIRE_VERSION_DELTA]:
+        raise ValueError(f'unsupported wire protocol version {version}')
+    offset = BINARY_HEADER.size
+    layout = json.loads(bytes(data[offset:offset + layout_length]))
+    offset += layout_length
+    ragged_length_dtypes = {
+        column_index: np.dtype(dtype)
+        for (column_index, dtype) in layout.get('ragged', [])
+    }
+
+    def read_array(dtype: np.dtype, count: int) -> np.ndarray:
+        nonlocal offset
+        array = np.frombuffer(data, dtype, count, offset)
+        offset += array.nbytes + _pad_length(array.nbytes)
+        return array
+
+    columns: List[Any] = []
+    for (i, (dtype, shape, is_nullable)) in enumerate(layout['columns']):
+        if is_nullable:
+            is_none = read_array(np.dtype(np.bool_), num_records)
+        if i in ragged_length_dtypes:
+            lengths = read_array(ragged_length_dtypes[i], num_records)
+            column = read_array(np.dtype(dtype), int(lengths.sum()))
+            columns.append(np.split(column, np.cumsum(lengths)[:-1]))
+            continue
+
+        count = num_records * int(np.prod(shape, dtype=np.int64))
+        column = read_array(np.dtype(dtype), count)
+        if len(shape) > 0:
+            columns.append(column.reshape([num_records] + shape))
+            continue
+
+        column = column.tolist()
+        if is_nullable:
+            for i in np.flatnonzero(is_none).tolist():
+                column[i] = None
+        columns.append(column)
+
+    structure = layout['structure']
+    return [
+        _build_record(structure, values)
+        for values in zip(*columns)
+    ]
+
+
+def _to_json(data: Any) -> Any:
+    """Return the given NumPy data converted to a JSON-compatible type.
+
+    Used for data that could not be encoded as a binary message.
+
+    Args:
+        data (Any): Data JSON does not support natively.
+
+    Returns:
+        Any: JSON-compatible representation of `data`.
+    """
+    if isinstance(data, (np.ndarray, np.generic)):
+        return data.tolist()
+    raise TypeError(
+        f'Object of type {data.__class__.__name__} is not JSON serializable')
+
+
+def encode_data(data: Any, wire_version: int = WIRE_VERSION_JSON) -> bytes:
     """Return the given data encoded as a message from server to client.
 
+    With binary wire protocol versions, data is encoded as a binary
+    message if possible (see `encode_binary_data`). Everything else is
+    encoded as zlib-compressed JSON.
+
     Args:
         data (Any): Data to encode for sending.
+        wire_version (int): Wire protocol version the receiving client
+            supports.
 
     Returns:
         bytes: Encoded data, prefixed with the length of the data and
             a `MSG_LENGTH_SEPARATOR`.
     """
-    data: str = json.dumps(data, separators=(',', ':'))
+    if wire_version >= WIRE_VERSION_BINARY:
+        binary_data = encode_binary_data(data, wire_version=wire_version)
+        if binary_data is not None:
+            return binary_data
+
+    data: str = json.dumps(data, separators=(',', ':'), default=_to_json)
     data: bytes = data.encode()
     data: bytes = zlib.compress(data)
     data: bytes = prefix_data(data)
     return data
 
 
-def decode_data(data: bytes) -> Any:
+def decode_data(data: Union[bytes, bytearray]) -> Any:
     """Return the given data decoded from a message from server
     to client.
 
     It is assumed that the data has been stripped of its prefix.
 
+    Both JSON and binary messages are supported. Arrays in binary
+    messages are only writable if `data` is.
+
     Args:
-        data (bytes): Received data to decode.
+        data (Union[bytes, bytearray]): Received data to decode.
 
     Returns:
         Any: Decoded data.
     """
+    if data[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        return _decode_binary_data(data)
+
     data: bytes = zlib.decompress(data)
     data: str = data.decode()
     data: Any = json.loads(data)
@@ -152,6 +503,106 @@ def send_name(client: socket.socket, name: Optional[str]) -> None:
         raise
 
 
+def encode_client_settings(
+        wire_version: int,
+        max_batch_size: Optional[int],
+        target_latency_sec: Optional[float],
+) -> bytes:
+    """Return the given client settings encoded as a message.
+
+    Args:
+        wire_version (int): Wire protocol version to request.
+        max_batch_size (Optional[int]): Maximum amount of observations
+            to receive per message. If `None`, do not limit.
+        target_latency_sec (Optional[float]): Targeted time in seconds
+            to respond to a message. If `None`, use the server default.
+
+    Returns:
+        bytes: Settings message including `SETTINGS_OK_MSG`.
+    """
+    return SETTINGS_OK_MSG + CLIENT_SETTINGS.pack(
+        wire_version,
+        0 if max_batch_size is None else max_batch_size,
+        0.0 if target_latency_sec is None else target_latency_sec,
+    )
+
+
+def decode_client_settings(
+        data: bytes,
+) -> Tuple[int, Optional[int], Optional[float]]:
+    """Parse client settings from the given message data.
+
+    It is assumed that the data has been stripped of
+    `SETTINGS_OK_MSG`. Invalid settings are replaced by their defaults.
+
+    Args:
+        data (bytes): The message received.
+
+    Returns:
+        int: Requested wire protocol version.
+        Optional[int]: Maximum amount of observations per message or
+            `None` if not limited.
+        Optional[float]: Targeted time in seconds to respond to a
+            message or `None` to use the server default.
+    """
+    (wire_version, max_batch_size, target_latency_sec) = \
+        CLIENT_SETTINGS.unpack(data)
+    wire_version = min(wire_version, WIRE_VERSION)
+    if max_batch_size <= 0:
+        max_batch_size = None
+    # Also catches NaN.
+    if not target_latency_sec > 0:
+        target_latency_sec = None
+    return wire_version, max_batch_size, target_latency_sec
+
+
+def send_setup_ok(
+        client: socket.socket,
+        server_wire_version: int,
+        max_batch_size: Optional[int] = None,
+        target_latency_sec: Optional[float] = None,
+        max_wire_version: int = WIRE_VERSION,
+) -> None:
+    """Send an 'OK' message from the client to the server after
+    setting up, requesting the newest wire protocol version supported
+    by both.
+
+    Only pass settings if the server metadata contains
+    `accepts_client_settings`. Servers supporting `WIRE_VERSION_DELTA`
+    always accept settings.
+
+    Args:
+        client (socket.socket): Socket of the client.
+        server_wire_version (int): Newest wire protocol version the
+            server supports.
+        max_batch_size (Optional[int]): Maximum amount of observations
+            to receive per message. If `None`, do not limit.
+        target_latency_sec (Optional[float]): Targeted time in seconds
+            to respond to a message. If `None`, use the server default.
+        max_wire_version (int): Newest wire protocol version to
+            request. Pass `WIRE_VERSION_BINARY` to receive observations
+            without delta encoding.
+    """
+    wire_version = min(server_wire_version, max_wire_version, WIRE_VERSION)
+    if (
+            max_batch_size is not None
+            or target_latency_sec is not None
+            or wire_version >= WIRE_VERSION_DELTA
+    ):
+        ok_msg = encode_client_settings(
+            wire_version, max_batch_size, target_latency_sec)
+    elif wire_version >= WIRE_VERSION_BINARY:
+        ok_msg = BINARY_OK_MSG
+    else:
+        ok_msg = OK_MSG
+
+    try:
+        client.sendall(ok_msg)
+    except Exception:
+        print('Unable to send data to server.')
+        raise
+
+
 def send_actions(client: socket.socket, actions: TensorType) -> None:
     """Send the given actions from the client to the server.
 
@@ -11,7 +11,7 @@ import ray
 from ray.rllib.agents.trainer import COMMON_CONFIG
 from ray.rllib.agents.dqn.dqn import DEFAULT_CONFIG as DQN_DEFAULT_CONFIG
 from ray.rllib.models import MODEL_DEFAULTS, ModelCatalog
-from ray.rllib.models.preprocessors import get_preprocessor
+from ray.rllib.models.preprocessors import Preprocessor, get_preprocessor
 from ray.rllib.utils.framework import (
     try_import_jax,
     try_import_tf,
@@ -51,6 +51,7 @@ __all__ = [
     'get_num_gpus',
     'get_num_cpus',
     'get_spaces',
+    'create_preprocessor',
     'to_preprocessed_obs_space',
     'get_preprocessed_obs_space',
     'create_agent',
@@ -519,6 +520,19 @@ def get_spaces(
     return (env.observation_space, env.action_space)
 
 
+def create_preprocessor(obs_space: Space) -> Preprocessor:
+    """Return RLlib's default preprocessor for the given
+    observation space.
+
+    Args:
+        obs_space (Space): Observation space to preprocess.
+
+    Returns:
+        Preprocessor: Preprocessor for the observation space.
+    """
+    return get_preprocessor(obs_space)(obs_space)
+
+
 def to_preprocessed_obs_space(obs_space: Space) -> Space:
     """Return the given observation space in RLlib-preprocessed form.
 
@@ -528,7 +542,7 @@ def to_preprocessed_obs_space(obs_space: Space) -> Space:
     Returns:
         Space: Preprocessed observation space.
     """
-    prep = get_preprocessor(obs_space)(obs_space)
+    prep = create_preprocessor(obs_space)
     return prep.observation_space
 
 
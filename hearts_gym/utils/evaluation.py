@@ -6,9 +6,10 @@ import contextlib
 import itertools
 import os
 import pickle
+import random
 from tempfile import NamedTemporaryFile
 import time
-from typing import Any, Callable, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 import numpy as np
 import ray
@@ -19,18 +20,20 @@ from ray.rllib.rollout import RolloutSaver
 from ray.rllib.utils.spaces import space_utils
 from ray.rllib.utils.typing import (
     List,
+    ModelWeights,
     PolicyID,
     TensorType,
     TrainerConfigDict,
 )
 from ray.tune.trainable import Trainable
+from ray.util import ActorPool
 
 from . import common as utils
 from hearts_gym.utils.typing import (
     AgentId,
+    GymSeed,
     Info,
     MultiInfo,
-    MultiIsDone,
     Reward,
 )
 
@@ -232,9 +235,9 @@ def compute_actions(self,
     actions, states, infos = policy.compute_actions(
         obs_batch,
         state,
-        prev_action,
-        prev_reward,
-        info,
+        prev_action_batch=prev_action,
+        prev_reward_batch=prev_reward,
+        info_batch=info,
         clip_actions=self.config["clip_actions"],
         explore=explore)
 
@@ -346,85 +349,412 @@ def _eval_stable(
     )
 
 
-def _eval_unstable(
+def _uses_attention(model_config: Dict[str, Any]) -> bool:
+    """Return whether the given model configuration describes a model
+    with attention.
+
+    Args:
+        model_config (Dict[str, Any]): RLlib model configuration.
+
+    Returns:
+        bool: Whether the model uses attention.
+    """
+    return (
+        utils.get_default(model_config, 'use_attention', MODEL_DEFAULTS)
+        or (
+            (
+                utils.get_default(
+                    model_config, 'custom_model', MODEL_DEFAULTS)
+                is not None
+            )
+            and model_config.get('custom_model', '').endswith('_attn')
+        )
+    )
+
+
+def _derive_seed(base_seed: GymSeed, *keys: Any) -> GymSeed:
+    """Return a seed derived from the given base seed and keys.
+
+    Derived seeds only depend on their arguments, so, for example, each
+    test game is dealt the same cards no matter which other games are
+    played alongside it or which worker plays it.
+
+    Args:
+        base_seed (GymSeed): Random number generator base seed for
+            evaluation. If `None`, the derived seed is `None` as well.
+        *keys (Any): Values identifying what the seed is for.
+
+    Returns:
+        GymSeed: Seed derived from the base seed and keys.
+    """
+    if base_seed is None:
+        return None
+    return random.Random(
+        ':'.join(map(str, (base_seed,) + keys))).getrandbits(63)
+
+
+def _seed_policies(
+        agent: Trainable,
+        eval_config: TrainerConfigDict,
+        base_seed: GymSeed,
+        first_game_index: int,
+) -> None:
+    """Reseed the random number generators of the agent's policies for
+    the batch of test games starting at the given index.
+
+    Only policies with a `set_seed` method (such as
+    `hearts_gym.policies.RandomPolicy`) are reseeded.
+
+    Args:
+        agent (Trainable): Reinforcement learning trainer/agent.
+        eval_config (TrainerConfigDict): RLlib evaluation configuration.
+        base_seed (GymSeed): Random number generator base seed
+            for evaluation.
+        first_game_index (int): Index of the first test game in
+            the batch.
+    """
+    multiagent_config = utils.get_default(
+        eval_config, 'multiagent', COMMON_CONFIG)
+    policies_config = utils.get_default(
+        multiagent_config, 'policies', COMMON_CONFIG['multiagent'])
+    for policy_id in policies_config:
+        set_seed = getattr(agent.get_policy(policy_id), 'set_seed', None)
+        if set_seed is not None:
+            set_seed(_derive_seed(
+                base_seed, 'policy', policy_id, first_game_index))
+
+
+def _play_test_games(
         agent: Trainable,
         env_name: str,
         eval_config: TrainerConfigDict,
-        num_test_games: int,
+        game_indices: range,
         learned_agent_id: int,
-) -> EvalResults:
+        use_batch_game: bool = False,
+) -> Tuple[List[int], List[List[int]], int, int]:
+    """Play the test games with the given indices concurrently and
+    return their accumulated results.
+
+    All games are played in lockstep on a vectorized environment. In
+    each step, observations are grouped by the policy acting on them
+    so each policy computes the actions for all of its games in a
+    single batch.
+
+    Environments and policies are seeded from the evaluation seed and
+    the game indices, so results only depend on which games
+    are played.
+
+    Args:
+        agent (Trainable): Reinforcement learning trainer/agent.
+        env_name (str): Name of the registered environment to play in.
+        eval_config (TrainerConfigDict): RLlib evaluation configuration.
+        game_indices (range): Indices of the test games to play. Used
+            to seed each game's environment.
+        learned_agent_id (int): Player index of the agent to count
+            actions and illegal actions for.
+        use_batch_game (bool): Whether to simulate the games in a
+            single vectorized `BatchHeartsGame`.
+
+    Returns:
+        List[int]: Total penalties for each player, sorted by
+            player index.
+        List[List[int]]: Total amount of each ranking sorted by ranking
+            for each player, sorted by player index.
+        int: Amount of actions taken by the learned agent.
+        int: Amount of illegal actions taken by the learned agent.
+    """
+    # Import here to avoid a circular import.
+    from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
+
     num_players = _get_num_players(eval_config)
     eval_policy_mapping_fn = \
         eval_config['multiagent']['policy_mapping_fn']
+    model_config = utils.get_default(eval_config, 'model', COMMON_CONFIG)
+    uses_attention = _uses_attention(model_config)
+    total_penalties = [0] * num_players
+    total_placements = [[0] * num_players for _ in range(num_players)]
+    num_actions = 0
+    num_illegal = 0
 
-    (
-        total_penalties,
-        total_placements,
-        num_actions,
-        num_illegal,
-        test_start_time,
-    ) = _setup_eval_vars(num_players)
+    make_env = utils.get_registered_env(env_name)
+    env_config = utils.get_default(eval_config, 'env_config', COMMON_CONFIG)
+    base_seed = env_config.get('seed', None)
+    _seed_policies(agent, eval_config, base_seed, game_indices.start)
+    env = VecHeartsEnv(
+        [
+            make_env({
+                **env_config,
+                'seed': _derive_seed(base_seed, game_index),
+            })
+            for game_index in game_indices
+        ],
+        num_procs=1,
+        use_batch_game=use_batch_game,
+    )
+    num_games = len(game_indices)
 
-    # TODO use batching for more speed; see `eval_agent.py`
+    initial_states = get_initial_states(
+        agent, eval_policy_mapping_fn, num_players)
+    states = [
+        [list(state) for state in initial_states]
+        for _ in range(num_games)
+    ]
+    prev_actions: List[List[Optional[TensorType]]] = [
+        [None] * num_players for _ in range(num_games)
+    ]
+    prev_rewards: List[List[Optional[Reward]]] = [
+        [None] * num_players for _ in range(num_games)
+    ]
 
-    model_config = utils.get_default(eval_config, 'model', COMMON_CONFIG)
-    make_env = utils.get_registered_env(env_name)
-    env = make_env(utils.get_default(eval_config, 'env_config', COMMON_CONFIG))
-
-    for i in range(num_test_games):
-        states = get_initial_states(
-            agent, eval_policy_mapping_fn, num_players)
-        prev_actions: List[Optional[TensorType]] = [None] * num_players
-        prev_rewards: List[Optional[Reward]] = [None] * num_players
-
-        obs = env.reset()
-        is_done: MultiIsDone = {'__all__': False}
-        while not is_done['__all__']:
-            assert len(obs) == 1, 'encountered multiple ready agents'
-            agent_id = next(iter(obs.keys()))
+    multi_obss = env.reset()
+    is_done = False
+    while not is_done:
+        agent_ids = env.get_active_player_indices()
+        game_indices_per_policy: Dict[PolicyID, List[int]] = {}
+        for (i, agent_id) in enumerate(agent_ids):
             policy_id = eval_policy_mapping_fn(agent_id)
-            action, state, _ = agent.compute_action(
-                obs[agent_id],
-                states[agent_id],
-                prev_actions[agent_id],
-                prev_rewards[agent_id],
+            game_indices_per_policy.setdefault(policy_id, []).append(i)
+
+        actions: List[TensorType] = [None] * num_games
+        for (policy_id, indices) in game_indices_per_policy.items():
+            indexed_agent_ids = [(i, agent_ids[i]) for i in indices]
+            batch_prev_actions = [
+                prev_actions[i][agent_id]
+                for (i, agent_id) in indexed_agent_ids
+            ]
+            batch_prev_rewards = [
+                prev_rewards[i][agent_id]
+                for (i, agent_id) in indexed_agent_ids
+            ]
+            policy_actions, new_states, _ = compute_actions(
+                agent,
+                [
+                    multi_obss[i][agent_id]
+                    for (i, agent_id) in indexed_agent_ids
+                ],
+                [states[i][agent_id] for (i, agent_id) in indexed_agent_ids],
+                (
+                    batch_prev_actions
+                    if None not in batch_prev_actions
+                    else None
+                ),
+                (
+                    batch_prev_rewards
+                    if None not in batch_prev_rewards
+                    else None
+                ),
                 policy_id=policy_id,
                 full_fetch=True,
             )
-            info: MultiInfo
-            obs, reward, is_done, info = env.step({agent_id: action})
 
-            if (
-                    utils.get_default(
-                        model_config, 'use_attention', MODEL_DEFAULTS)
-                    or (
-                        (
-                            utils.get_default(
-                                model_config, 'custom_model', MODEL_DEFAULTS)
-                            is not None
-                        )
-                        and model_config.get(
-                            'custom_model', '').endswith('_attn')
-                    )
+            for ((i, agent_id), action, state) in zip(
+                    indexed_agent_ids,
+                    policy_actions,
+                    new_states,
             ):
-                for (i, prev_state) in enumerate(states[agent_id]):
-                    states[agent_id][i] = np.vstack((prev_state[1:], state[i]))
-            else:
-                states[agent_id] = state
-            prev_actions[agent_id] = action
-            next_agent_id = env.active_player_index
-            prev_rewards[next_agent_id] = reward[next_agent_id]
-
-            info: Info = info[next(iter(info.keys()))]
-            if info['prev_active_player_index'] != learned_agent_id:
+                actions[i] = action
+                prev_actions[i][agent_id] = action
+                if uses_attention:
+                    prev_state = states[i][agent_id]
+                    for (j, new_state) in enumerate(state):
+                        prev_state[j] = np.vstack(
+                            (prev_state[j][1:], new_state))
+                else:
+                    states[i][agent_id] = state
+
+        multi_obss = []
+        multi_info: MultiInfo
+        for (i, (obs, reward, is_dones, multi_info)) in enumerate(
+                env.step(actions)):
+            multi_obss.append(obs)
+            for (agent_id, agent_reward) in reward.items():
+                prev_rewards[i][agent_id] = agent_reward
+
+            info: Info = multi_info[next(iter(multi_info.keys()))]
+            if info['prev_active_player_index'] == learned_agent_id:
+                num_actions += 1
+                num_illegal += info['was_illegal']
+
+            # All games take the same amount of steps.
+            is_done = is_dones['__all__']
+            if not is_done:
                 continue
-            num_actions += 1
-            num_illegal += info['was_illegal']
+            for (j, penalty) in enumerate(info['final_penalties']):
+                total_penalties[j] += penalty
+            for (j, ranking) in enumerate(info['final_rankings']):
+                total_placements[j][ranking - 1] += 1
 
-        for (i, penalty) in enumerate(info['final_penalties']):
+    env.terminate_pool()
+    return total_penalties, total_placements, num_actions, num_illegal
+
+
+@ray.remote(num_cpus=1)
+class _EvalWorker:
+    """A Ray actor playing batches of test games with its own copy of
+    an agent.
+    """
+
+    def __init__(
+            self,
+            agent_cls: type,
+            eval_config: TrainerConfigDict,
+            weights: ModelWeights,
+            filters: Dict[PolicyID, Any],
+    ) -> None:
+        """Construct an evaluation worker with a copy of the agent
+        given by its class, configuration, weights and
+        observation filters.
+
+        Args:
+            agent_cls (type): Trainer class of the agent.
+            eval_config (TrainerConfigDict): RLlib evaluation
+                configuration.
+            weights (ModelWeights): Weights of each of the
+                agent's policies.
+            filters (Dict[PolicyID, Any]): Observation filters of each
+                of the agent's policies.
+        """
+        self.eval_config = {
+            **eval_config,
+            # Workers play on a single CPU each.
+            'num_workers': 0,
+            'num_gpus': 0,
+        }
+        self.agent = utils.create_agent(agent_cls, self.eval_config)
+        self.agent.set_weights(weights)
+        self.agent.workers.local_worker().sync_filters(filters)
+
+    def play_test_games(
+            self,
+            env_name: str,
+            game_indices: range,
+            learned_agent_id: int,
+            use_batch_game: bool,
+    ) -> Tuple[List[int], List[List[int]], int, int]:
+        """Play the test games with the given indices and return their
+        accumulated results.
+
+        See `_play_test_games`.
+        """
+        return _play_test_games(
+            self.agent,
+            env_name,
+            self.eval_config,
+            game_indices,
+            learned_agent_id,
+            use_batch_game,
+        )
+
+
+def _play_test_games_remotely(
+        agent: Trainable,
+        env_name: str,
+        eval_config: TrainerConfigDict,
+        game_index_batches: List[range],
+        learned_agent_id: int,
+        num_workers: int,
+        use_batch_game: bool,
+) -> Iterator[Tuple[List[int], List[List[int]], int, int]]:
+    """Play the given batches of test games on multiple Ray actors and
+    return the accumulated results of each batch in the order the
+    batches finish.
+
+    Args:
+        agent (Trainable): Reinforcement learning trainer/agent.
+        env_name (str): Name of the registered environment to play in.
+        eval_config (TrainerConfigDict): RLlib evaluation configuration.
+        game_index_batches (List[range]): Indices of the test games of
+            each batch.
+        learned_agent_id (int): Player index of the agent to count
+            actions and illegal actions for.
+        num_workers (int): Amount of actors to play on.
+        use_batch_game (bool): Whether to simulate the games of each
+            batch in a single vectorized `BatchHeartsGame`.
+
+    Returns:
+        Iterator[Tuple[List[int], List[List[int]], int, int]]: Results
+            of each batch as returned by `_play_test_games`.
+    """
+    weights = ray.put(agent.get_weights())
+    filters = agent.workers.local_worker().get_filters()
+    workers = [
+        _EvalWorker.remote(  # type: ignore[attr-defined]
+            type(agent), eval_config, weights, filters)
+        for _ in range(min(num_workers, len(game_index_batches)))
+    ]
+    try:
+        yield from ActorPool(workers).map_unordered(
+            lambda worker, game_indices: worker.play_test_games.remote(
+                env_name, game_indices, learned_agent_id, use_batch_game),
+            game_index_batches,
+        )
+    finally:
+        for worker in workers:
+            ray.kill(worker)
+
+
+def _eval_unstable(
+        agent: Trainable,
+        env_name: str,
+        eval_config: TrainerConfigDict,
+        num_test_games: int,
+        learned_agent_id: int,
+        num_parallel_games: int,
+        num_workers: int,
+        use_batch_game: bool,
+) -> EvalResults:
+    num_players = _get_num_players(eval_config)
+    (
+        total_penalties,
+        total_placements,
+        num_actions,
+        num_illegal,
+        test_start_time,
+    ) = _setup_eval_vars(num_players)
+
+    # Batches only depend on `num_parallel_games`, so results are the
+    # same no matter how many workers play them.
+    game_index_batches = [
+        range(start, min(start + num_parallel_games, num_test_games))
+        for start in range(0, num_test_games, num_parallel_games)
+    ]
+    batch_results: Iterable[Tuple[List[int], List[List[int]], int, int]]
+    if num_workers <= 1:
+        batch_results = (
+            _play_test_games(
+                agent,
+                env_name,
+                eval_config,
+                game_indices,
+                learned_agent_id,
+                use_batch_game,
+            )
+            for game_indices in game_index_batches
+        )
+    else:
+        batch_results = _play_test_games_remotely(
+            agent,
+            env_name,
+            eval_config,
+            game_index_batches,
+            learned_agent_id,
+            num_workers,
+            use_batch_game,
+        )
+
+    for (
+            penalties,
+            placements,
+            num_batch_actions,
+            num_batch_illegal,
+    ) in batch_results:
+        for (i, penalty) in enumerate(penalties):
             total_penalties[i] += penalty
-        for (i, ranking) in enumerate(info['final_rankings']):
-            total_placements[i][ranking - 1] += 1
+        for (i, player_placements) in enumerate(placements):
+            for (j, num_placements) in enumerate(player_placements):
+                total_placements[i][j] += num_placements
+        num_actions += num_batch_actions
+        num_illegal += num_batch_illegal
 
     test_duration = time.perf_counter() - test_start_time
     return (
@@ -443,7 +773,38 @@ def evaluate(
         eval_config: TrainerConfigDict,
         num_test_games: int,
         learned_agent_id: int,
+        num_parallel_games: int = 256,
+        num_workers: int = 1,
+        use_batch_game: bool = False,
 ) -> EvalResults:
+    """Play the given amount of test games and return the
+    accumulated results.
+
+    Args:
+        use_stable_method (bool): Whether to use RLlib's rollout
+            implementation instead of the faster re-implementation.
+        agent (Trainable): Reinforcement learning trainer/agent.
+        env_name (str): Name of the registered environment to play in.
+        eval_config (TrainerConfigDict): RLlib evaluation configuration.
+        num_test_games (int): Amount of games to play.
+        learned_agent_id (int): Player index of the agent to count
+            actions and illegal actions for.
+        num_parallel_games (int): How many games to play at once,
+            computing actions for all of them in batches. Only used by
+            the re-implementation.
+        num_workers (int): Amount of Ray actors to distribute batches
+            of games to. Results do not depend on this. If 1 or less,
+            play all games in this process. Only used by
+            the re-implementation.
+        use_batch_game (bool): Whether to simulate each batch of games
+            in a single vectorized `BatchHeartsGame`. Results do not
+            depend on this. Only used by the re-implementation.
+
+    Returns:
+        EvalResults: Total penalties and placements of each player,
+            amount of actions and illegal actions of the learned agent
+            and the duration of the evaluation in seconds.
+    """
     # Unstable method is a faster, re-implemented version. That may
     # sometimes even offer better support.
     if use_stable_method:
@@ -461,6 +822,9 @@ def evaluate(
             eval_config,
             num_test_games,
             learned_agent_id,
+            num_parallel_games,
+            num_workers,
+            use_batch_game,
         )
 
 
@@ -482,6 +846,7 @@ def create_results_table(
         total_placements: List[List[int]],
         policy_mapping_fn: Callable[[AgentId], PolicyID],
         num_illegals: Optional[List[int]] = None,
+        extra_columns: Optional[List[Tuple[str, List[Any]]]] = None,
 ) -> str:
     """Return a string table summarizing the given results.
 
@@ -492,6 +857,12 @@ def create_results_table(
             sorted by ranking for each player, sorted by player index.
         policy_mapping_fn (Callable[[AgentId], PolicyID]): Function
             mapping agent IDs to policy IDs.
+        num_illegals (Optional[List[int]]): Amount of illegal actions
+            for each player, sorted by player index. If `None`, the
+            column is omitted.
+        extra_columns (Optional[List[Tuple[str, List[Any]]]]): Header
+            and values, sorted by player index, of additional columns
+            to append.
 
     Returns:
         str: Table-formatted string summarizing the given results.
@@ -504,6 +875,9 @@ def create_results_table(
     header.append('total penalty')
     if num_illegals is not None:
         header.append('# illegal actions')
+    if extra_columns is None:
+        extra_columns = []
+    header.extend(column_header for (column_header, _) in extra_columns)
 
     longest_agent_name = max(map(_strlen, agent_names))
     longest_placements = [
@@ -518,6 +892,10 @@ def create_results_table(
     if num_illegals is not None:
         longest_num_illegals = max(map(_strlen, num_illegals))
         longest_in_cols.append(longest_num_illegals)
+    longest_in_cols.extend(
+        max(map(_strlen, column_values))
+        for (_, column_values) in extra_columns
+    )
     longest_in_cols: List[int] = list(map(max, zip(  # type: ignore[arg-type]
         longest_in_cols,
         map(_strlen, header),
@@ -548,6 +926,7 @@ def create_results_table(
     ]
     if num_illegals is not None:
         table_values.append(num_illegals)
+    table_values.extend(column_values for (_, column_values) in extra_columns)
 
     for row in zip(*table_values):
         name, placements = row[:2]
@@ -47,6 +47,10 @@ class MockPool(ThreadPool):
         """Overridden with NOP for API compatibility."""
         pass
 
+    def join(self) -> None:
+        """Overridden with NOP for API compatibility."""
+        pass
+
     def map_async(  # type: ignore[override]
             self,
             func: Callable,
@@ -4,8 +4,12 @@ Start a server for remote agent evaluation.
 
 import argparse
 import logging
+from typing import Optional
 
 from hearts_gym import HeartsEnv, utils
+from hearts_gym.policies import RuleBasedPolicy
+from hearts_gym.server.async_hearts_server import AsyncHeartsServer
+from hearts_gym.server.bot_policies import BotPolicy, RLlibBotPolicy
 from hearts_gym.server.hearts_server import (
     HeartsServer,
     HeartsRequestHandler,
@@ -54,7 +58,40 @@ def parse_args():
         '--num_procs',
         default=utils.get_num_cpus() - 1,
         type=int,
-        help='How many processes to use for playing the parallel games.',
+        help=(
+            'How many processes to use for playing the parallel games '
+            '(threads shared by all tables when using asyncio).'
+        ),
+    )
+    parser.add_argument(
+        '--use_processes',
+        default=False,
+        type=utils.parse_bool,
+        help=(
+            'Whether to play the parallel games in worker processes '
+            'instead of threads (requires Python 3.8 or newer; not when '
+            'using asyncio).'
+        ),
+    )
+    parser.add_argument(
+        '--use_batch_game',
+        default=None,
+        type=utils.parse_bool,
+        help=(
+            'Whether to simulate the parallel games with vectorized '
+            'operations instead of stepping each game on its own. By '
+            'default, only when using asyncio.'
+        ),
+    )
+    parser.add_argument(
+        '--num_game_groups',
+        default=1,
+        type=int,
+        help=(
+            'Into how many groups to partition the parallel games. Each '
+            'group gets its share of the processes (not when using '
+            'asyncio).'
+        ),
     )
     parser.add_argument(
         '--max_num_games',
@@ -73,11 +110,66 @@ def parse_args():
             'Whether clients can connect from the same address more than once.'
         ),
     )
+    parser.add_argument(
+        '--report_interval',
+        default=None,
+        type=int,
+        help=(
+            'After how many games to print the results (not when using '
+            'asyncio). By default, print them after each batch of parallel '
+            'games.'
+        ),
+    )
+    parser.add_argument(
+        '--results_path',
+        default=None,
+        type=str,
+        help=(
+            'File to append the raw results of each game to in JSON Lines '
+            'format (not when using asyncio). By default, raw results are '
+            'not kept.'
+        ),
+    )
+    parser.add_argument(
+        '--metrics_port',
+        default=None,
+        type=int,
+        help=(
+            'Port to serve metrics at over HTTP in the Prometheus text '
+            'format (not when using asyncio). By default, do not serve '
+            'metrics.'
+        ),
+    )
+    parser.add_argument(
+        '--use_asyncio',
+        default=False,
+        type=utils.parse_bool,
+        help=(
+            'Whether to serve any number of concurrent tables from a '
+            'single asyncio event loop.'
+        ),
+    )
+    parser.add_argument(
+        '--max_num_tables',
+        default=None,
+        type=int,
+        help=(
+            'How many tables to host at the same time when using asyncio. '
+            'By default, do not limit the number of tables.'
+        ),
+    )
     parser.add_argument(
         '--wait_duration_sec',
         default=None,
         type=int,
-        help='How long to wait until filling with randomly acting agents.',
+        help='How long to wait until filling with simulated agents.',
+    )
+    parser.add_argument(
+        '--bot_policy',
+        default='random',
+        type=str,
+        choices=['random', 'rule_based'],
+        help='Policy the simulated agents act with.',
     )
 
     parser.add_argument(
@@ -96,10 +188,115 @@ def parse_args():
     return parser.parse_args()
 
 
+def create_bot_policy(
+        name: str,
+        num_players: int,
+        deck_size: int,
+        mask_actions: bool,
+) -> Optional[BotPolicy]:
+    """Return the policy for simulated agents with the given name.
+
+    Args:
+        name (str): Name of the policy.
+        num_players (int): Amount of players in the game.
+        deck_size (int): Amount of cards in the deck.
+        mask_actions (bool): Whether action masking is enabled.
+
+    Returns:
+        Optional[BotPolicy]: Policy for simulated agents or `None` for
+            randomly acting agents.
+    """
+    if name == 'random':
+        return None
+
+    assert name == 'rule_based', f'unknown bot policy "{name}"'
+    env = HeartsEnv(
+        num_players=num_players,
+        deck_size=deck_size,
+        mask_actions=mask_actions,
+    )
+    preprocessor = utils.create_preprocessor(env.observation_space)
+    policy = RuleBasedPolicy(
+        preprocessor.observation_space,
+        env.action_space,
+        {'mask_actions': mask_actions},
+    )
+    return RLlibBotPolicy(policy, preprocessor, mask_actions)
+
+
+def check_asyncio_args(args: argparse.Namespace) -> None:
+    """Raise an error if the given arguments use options the
+    asyncio-based server does not support.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    assert not args.use_processes, \
+        '`--use_processes` is not supported when using asyncio'
+    assert args.num_game_groups == 1, \
+        '`--num_game_groups` is not supported when using asyncio'
+    assert args.report_interval is None, \
+        '`--report_interval` is not supported when using asyncio'
+    assert args.results_path is None, \
+        '`--results_path` is not supported when using asyncio'
+    assert args.metrics_port is None, \
+        '`--metrics_port` is not supported when using asyncio'
+
+
+def serve_asyncio(
+        args: argparse.Namespace,
+        bot_policy: Optional[BotPolicy],
+) -> None:
+    """Run an asyncio-based server for remote agent evaluation until
+    interrupted.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        bot_policy (Optional[BotPolicy]): Policy for simulated agents or
+            `None` for randomly acting agents.
+    """
+    check_asyncio_args(args)
+    server = AsyncHeartsServer(
+        (args.server_address, args.port),
+        num_players=args.num_players,
+        deck_size=args.deck_size,
+        mask_actions=args.mask_actions,
+        seed=args.seed,
+        num_parallel_games=args.num_parallel_games,
+        num_procs=args.num_procs,
+        use_batch_game=args.use_batch_game,
+        bot_policy=bot_policy,
+        max_num_games=args.max_num_games,
+        max_num_tables=args.max_num_tables,
+        accept_repeating_client_addresses=(
+            args.accept_repeating_client_addresses
+        ),
+        wait_duration_sec=args.wait_duration_sec,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 def main() -> None:
     """Start a server for remote agent evaluation."""
     args = parse_args()
     logging.basicConfig()
+    bot_policy = create_bot_policy(
+        args.bot_policy,
+        args.num_players,
+        args.deck_size,
+        args.mask_actions,
+    )
+    if args.use_batch_game is None:
+        args.use_batch_game = args.use_asyncio
+    if args.use_asyncio:
+        serve_asyncio(args, bot_policy)
+        return
+
     with HeartsServer(
             (args.server_address, args.port),
             HeartsRequestHandler,
@@ -109,7 +306,18 @@ def main() -> None:
             seed=args.seed,
             num_parallel_games=args.num_parallel_games,
             num_procs=args.num_procs,
+            use_processes=args.use_processes,
+            use_batch_game=args.use_batch_game,
+            num_game_groups=args.num_game_groups,
+            bot_policy=bot_policy,
             max_num_games=args.max_num_games,
+            report_interval=args.report_interval,
+            results_path=args.results_path,
+            metrics_address=(
+                None
+                if args.metrics_port is None
+                else (args.server_address, args.metrics_port)
+            ),
             accept_repeating_client_addresses=(
                 args.accept_repeating_client_addresses
             ),
@@ -120,7 +328,7 @@ def main() -> None:
         except Exception:
             pass
         finally:
-            server.envs.terminate_pool()
+            server.terminate_pools()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+import asyncio
+import random
+import socket
+import threading
+import unittest
+
+import numpy as np
+
+from hearts_gym.server import utils as server_utils
+from hearts_gym.server.async_hearts_server import AsyncHeartsServer
+
+
+class TestAsyncHeartsServer(unittest.TestCase):
+    NUM_PARALLEL_GAMES = 4
+    MAX_NUM_GAMES = 8
+
+    def receive_data(self, client):
+        prefix = b''
+        while not prefix.endswith(server_utils.MSG_LENGTH_SEPARATOR):
+            prefix += client.recv(1)
+        data = bytearray(int(prefix[:-1]))
+        view = memoryview(data)
+        num_received_bytes = 0
+        while num_received_bytes < len(data):
+            num_received_bytes += client.recv_into(view[num_received_bytes:])
+        return server_utils.decode_data(data)
+
+    def wait_for_data(self, client):
+        data = self.receive_data(client)
+        while isinstance(data, str):
+            server_utils.send_ok(client)
+            data = self.receive_data(client)
+        return data
+
+    def play(self, port, seed, num_finished_games, max_batch_size=None):
+        rng = random.Random(seed)
+        with socket.create_connection(('127.0.0.1', port), 10) as client:
+            server_utils.send_name(client, 'test')
+            metadata = self.wait_for_data(client)
+            str_player_index = str(metadata['player_index'])
+            server_utils.send_setup_ok(
+                client, metadata['wire_version'], max_batch_size)
+
+            num_games = 0
+            while num_games < metadata['max_num_games']:
+                while True:
+                    data = self.wait_for_data(client)
+                    if len(data) > 0 and len(data[0]) == 5 \
+                       and data[0][3]['__all__']:
+                        break
+                    if max_batch_size is not None:
+                        self.assertLessEqual(len(data), max_batch_size)
+                    actions = [
+                        rng.choice(np.flatnonzero(
+                            obs[str_player_index]['action_mask']).tolist())
+                        for (_, obs, *_) in data
+                    ]
+                    server_utils.send_actions(client, actions)
+                server_utils.send_ok(client)
+                num_games += metadata['num_parallel_games']
+                num_finished_games.append(num_games)
+            # Acknowledge the results table.
+            self.receive_data(client)
+            server_utils.send_ok(client)
+
+    def start_server(self, **kwargs):
+        server = AsyncHeartsServer(
+            ('127.0.0.1', 0),
+            mask_actions=True,
+            seed=0,
+            num_parallel_games=self.NUM_PARALLEL_GAMES,
+            max_num_games=self.MAX_NUM_GAMES,
+            wait_duration_sec=1,
+            **kwargs,
+        )
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(server.start())
+        port = server._server.sockets[0].getsockname()[1]
+        server_thread = threading.Thread(target=loop.run_forever)
+        server_thread.start()
+        return server, loop, server_thread, port
+
+    def stop_server(self, server, loop, server_thread):
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(60)
+        loop.call_soon_threadsafe(loop.stop)
+        server_thread.join()
+        loop.close()
+
+    def test_concurrent_tables(self):
+        for use_batch_game in [False, True]:
+            self.assert_tables_finish(
+                use_batch_game, [None, None, 1, 3, None])
+
+    def assert_tables_finish(self, use_batch_game, max_batch_sizes):
+        (server, loop, server_thread, port) = self.start_server(
+            use_batch_game=use_batch_game)
+
+        # Five clients result in one full table and one table filled
+        # with bots.
+        num_finished_games = [[] for _ in max_batch_sizes]
+        clients = [
+            threading.Thread(
+                target=self.play,
+                args=(port, i, num_finished_games[i], max_batch_size),
+            )
+            for (i, max_batch_size) in enumerate(max_batch_sizes)
+        ]
+        try:
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join(60)
+                self.assertFalse(client.is_alive())
+        finally:
+            self.stop_server(server, loop, server_thread)
+
+        for client_num_finished_games in num_finished_games:
+            self.assertEqual(
+                client_num_finished_games,
+                list(range(
+                    self.NUM_PARALLEL_GAMES,
+                    self.MAX_NUM_GAMES + 1,
+                    self.NUM_PARALLEL_GAMES,
+                )),
+            )
+        self.assertEqual(len(server.tables), 0)
+
+    def test_reject_repeating_client_addresses(self):
+        (server, loop, server_thread, port) = self.start_server(
+            accept_repeating_client_addresses=False)
+        try:
+            with socket.create_connection(('127.0.0.1', port), 10) as client:
+                server_utils.send_name(client, 'test')
+                # Greeting
+                self.assertIsInstance(self.receive_data(client), str)
+
+                with socket.create_connection(
+                        ('127.0.0.1', port), 10) as other_client:
+                    self.assertEqual(other_client.recv(1), b'')
+        finally:
+            self.stop_server(server, loop, server_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
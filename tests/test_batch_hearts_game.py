@@ -0,0 +1,129 @@
+import random
+import unittest
+
+import numpy as np
+
+from hearts_gym.envs.batch_hearts_game import BatchHeartsGame
+from hearts_gym.envs.hearts_game import HeartsGame
+from hearts_gym.envs.reward_function import RewardBatch
+
+
+class TestBatchHeartsGame(unittest.TestCase):
+    def get_deals(self, games):
+        deals = []
+        for game in games:
+            owners = np.empty(len(game.state), np.int64)
+            for (player_index, hand) in enumerate(game.hands):
+                owners[list(map(game.card_to_index, hand))] = player_index
+            # The starting card was already force-played.
+            owners[game.card_to_index(game.table_cards[0])] = \
+                game.leading_player_index
+            deals.append(owners)
+        return np.array(deals)
+
+    def assert_games_equal(self, games, batch_game):
+        for (game_index, game) in enumerate(games):
+            self.assertTrue(np.array_equal(
+                game.state, batch_game.state[game_index]))
+            self.assertEqual(game.hands, batch_game.get_hands(game_index))
+            self.assertEqual(game.penalties,
+                             batch_game.penalties[game_index].tolist())
+            self.assertEqual(game.active_player_index,
+                             batch_game.active_player_index[game_index])
+            self.assertEqual(game.leading_hearts_allowed,
+                             batch_game.leading_hearts_allowed[game_index])
+
+            legal_actions = game.get_legal_actions(game.active_player_index)
+            action_mask = batch_game.get_legal_action_masks()[game_index]
+            self.assertEqual(legal_actions,
+                             np.flatnonzero(action_mask).tolist())
+
+            for player_index in range(game.num_players):
+                info = RewardBatch.from_game(game, player_index, 0, False)
+                batch_info = RewardBatch.from_batch_game(
+                    batch_game,
+                    np.array([game_index]),
+                    np.array([player_index]),
+                    np.array([0]),
+                    np.array([False]),
+                )
+                self.assertEqual(
+                    vars(info),
+                    {
+                        key: value.item()
+                        for (key, value) in vars(batch_info).items()
+                    },
+                )
+
+    def test_same_games(self):
+        rng = random.Random(0)
+        num_games = 16
+        games = [HeartsGame(seed=seed) for seed in range(num_games)]
+        batch_game = BatchHeartsGame(num_games, seed=0)
+
+        for _ in range(3):
+            for game in games:
+                game.reset()
+            batch_game.reset(self.get_deals(games))
+            self.assert_games_equal(games, batch_game)
+
+            while not all(game.is_done() for game in games):
+                self.assertFalse(batch_game.is_done())
+                self.assertEqual(
+                    batch_game.are_done().tolist(),
+                    [game.is_done() for game in games],
+                )
+                # Step a random subset of the unfinished games.
+                unfinished_indices = [
+                    i for (i, game) in enumerate(games) if not game.is_done()]
+                game_indices = sorted(rng.sample(
+                    unfinished_indices,
+                    rng.randint(1, len(unfinished_indices)),
+                ))
+                # Also test illegal and out-of-range actions.
+                actions = [
+                    rng.randrange(-2, games[0].max_num_cards_on_hand + 1)
+                    for _ in game_indices
+                ]
+                results = batch_game.step(
+                    np.array(actions), np.array(game_indices))
+                for (i, (game_index, action)) in enumerate(
+                        zip(game_indices, actions)):
+                    game = games[game_index]
+                    card, was_illegal, trick_winner_index, trick_penalty = \
+                        game.play_card(action)
+                    self.assertEqual(game.card_to_index(card),
+                                     results[0][i])
+                    self.assertEqual(was_illegal, results[1][i])
+                    if trick_winner_index is None:
+                        self.assertEqual(results[2][i], -1)
+                        self.assertEqual(results[3][i], -1)
+                    else:
+                        self.assertEqual(trick_winner_index, results[2][i])
+                        self.assertEqual(trick_penalty, results[3][i])
+
+                    if game.is_done():
+                        self.assertEqual(
+                            game.compute_final_penalties(),
+                            batch_game.compute_final_penalties(
+                                [game_index])[0].tolist(),
+                        )
+                        self.assertEqual(
+                            game.compute_rankings(),
+                            batch_game.compute_rankings(
+                                [game_index])[0].tolist(),
+                        )
+                self.assert_games_equal(games, batch_game)
+
+            self.assertTrue(batch_game.is_done())
+
+    def test_random_deals(self):
+        batch_game = BatchHeartsGame(8, seed=0)
+        batch_game.reset()
+        self.assertTrue((batch_game.num_cards_in_hand().sum(axis=1)
+                         == len(batch_game.state[0]) - 1).all())
+        while not batch_game.is_done():
+            batch_game.step(np.zeros(batch_game.num_games, np.int64))
+        final_penalties = batch_game.compute_final_penalties()
+        self.assertTrue((final_penalties.sum(axis=1) > 0).all())
+        self.assertTrue((batch_game.compute_rankings() >= 1).all())
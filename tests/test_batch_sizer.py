@@ -0,0 +1,45 @@
+import unittest
+
+from hearts_gym.server.batch_sizer import BatchSizer
+
+
+class TestBatchSizer(unittest.TestCase):
+    def test_adapts_to_latency(self):
+        batch_sizer = BatchSizer(1024, 0.1, 64)
+        self.assertEqual(batch_sizer.batch_size, 64)
+
+        # A fast client may receive more, but not arbitrarily
+        # much more at once.
+        batch_sizer.update(64, 0.001)
+        self.assertEqual(batch_sizer.batch_size, 96)
+        for _ in range(20):
+            batch_sizer.update(batch_sizer.batch_size, 0.001)
+        self.assertEqual(batch_sizer.batch_size, 1024)
+
+        # A client taking 1 ms per observation should receive
+        # 100 observations.
+        for _ in range(20):
+            batch_sizer.update(
+                batch_sizer.batch_size, batch_sizer.batch_size * 0.001)
+        self.assertEqual(batch_sizer.batch_size, 100)
+
+        for _ in range(20):
+            batch_sizer.update(batch_sizer.batch_size, 10)
+        self.assertEqual(batch_sizer.batch_size, 1)
+
+        batch_sizer.update(0, 10)
+        batch_sizer.update(1, 0)
+        self.assertEqual(batch_sizer.batch_size, 1)
+
+    def test_split(self):
+        batch_sizer = BatchSizer(4, 0.1, 4)
+        self.assertEqual(batch_sizer.split([]), [[]])
+        self.assertEqual(batch_sizer.split([0, 1, 2]), [[0, 1, 2]])
+        self.assertEqual(
+            batch_sizer.split(list(range(10))),
+            [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+import unittest
+
+import numpy as np
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
+from hearts_gym.server.bot_policies import RandomBotPolicy, RLlibBotPolicy
+from hearts_gym.server.mock_request import MockRequest
+
+
+def flatten(obs):
+    # Like RLlib's preprocessing.
+    columns = []
+    if HeartsEnv.OBS_KEY in obs:
+        columns.append(obs[HeartsEnv.ACTION_MASK_KEY])
+        obs = obs[HeartsEnv.OBS_KEY]
+    leading_hearts_allowed = np.zeros(2)
+    leading_hearts_allowed[int(obs['leading_hearts_allowed'])] = 1
+    columns.extend([obs['cards'], leading_hearts_allowed])
+    return np.concatenate(columns).astype(np.float32)
+
+
+class RecordingPolicy:
+    """Counts its calls in its recurrent state."""
+
+    def __init__(self):
+        self.obs_batches = []
+        self.state_batches = []
+
+    def get_initial_state(self):
+        return [np.zeros(1)]
+
+    def compute_actions(self, obs_batch, state_batches):
+        self.obs_batches.append(obs_batch)
+        self.state_batches.append(state_batches)
+        return np.arange(len(obs_batch)), [state_batches[0] + 1], {}
+
+
+class CountingBotPolicy(RandomBotPolicy):
+    """Counts its calls per game in its recurrent state."""
+
+    def get_initial_state(self):
+        return [np.zeros(1)]
+
+    def compute_actions(
+            self,
+            cards,
+            leading_hearts_allowed,
+            action_masks,
+            state_batches,
+    ):
+        actions, _ = super().compute_actions(
+            cards, leading_hearts_allowed, action_masks, state_batches)
+        return actions, [state_batches[0] + 1]
+
+
+class TestBotPolicies(unittest.TestCase):
+    def test_random_actions_are_legal(self):
+        rng = np.random.default_rng(0)
+        action_masks = (rng.random((256, 13)) < 0.3).astype(np.int8)
+        action_masks[:, 12] = 1
+        cards = np.zeros((256, 52), np.int8)
+        leading_hearts_allowed = np.zeros(256, np.bool_)
+
+        policy = RandomBotPolicy(0)
+        chosen = np.zeros_like(action_masks)
+        for _ in range(64):
+            actions, state_batches = policy.compute_actions(
+                cards, leading_hearts_allowed, action_masks, [])
+            self.assertEqual(state_batches, [])
+            self.assertEqual(actions.shape, (256,))
+            self.assertTrue(np.all(
+                action_masks[np.arange(256), actions] == 1))
+            chosen[np.arange(256), actions] = 1
+        # All legal actions are eventually sampled.
+        self.assertTrue(np.array_equal(chosen, action_masks))
+
+        actions, _ = policy.compute_actions(
+            cards[:0], leading_hearts_allowed[:0], action_masks[:0], [])
+        self.assertEqual(len(actions), 0)
+
+    def test_rllib_preprocessing(self):
+        cards = np.array([[0, 1, 2], [3, 4, 5]], np.int8)
+        leading_hearts_allowed = np.array([True, False])
+        action_masks = np.array([[1, 0], [0, 1]], np.int8)
+
+        preprocessor = SimpleNamespace(transform=flatten)
+
+        for mask_actions in [True, False]:
+            wrapped_policy = RecordingPolicy()
+            policy = RLlibBotPolicy(
+                wrapped_policy,
+                preprocessor,
+                mask_actions,
+                lambda obs, update: 2 * obs,
+            )
+            (initial_state,) = policy.get_initial_state()
+            state_batches = [np.stack([initial_state] * 2)]
+            actions, state_batches = policy.compute_actions(
+                cards, leading_hearts_allowed, action_masks, state_batches)
+            self.assertEqual(actions.tolist(), [0, 1])
+            self.assertEqual(state_batches[0].tolist(), [[1], [1]])
+
+            expected = [[0, 1, 2, 0, 1], [3, 4, 5, 1, 0]]
+            if mask_actions:
+                expected = [[1, 0] + expected[0], [0, 1] + expected[1]]
+            (obs_batch,) = wrapped_policy.obs_batches
+            self.assertEqual((obs_batch / 2).tolist(), expected)
+            ((state_batch,),) = wrapped_policy.state_batches
+            self.assertEqual(state_batch.tolist(), [[0], [0]])
+
+    def test_mock_request_states(self):
+        envs = VecHeartsEnv(
+            [HeartsEnv(mask_actions=True, seed=seed) for seed in range(8)],
+            num_procs=1,
+        )
+        envs.reset()
+        player_index = envs.get_active_player_indices()[0]
+        is_active = (
+            np.array(envs.get_active_player_indices()) == player_index)
+
+        request = MockRequest(envs, player_index, 0, CountingBotPolicy(0))
+        for num_calls in [1, 2]:
+            actions = request.compute_actions()
+            self.assertEqual(len(actions), np.count_nonzero(is_active))
+            (states,) = request._get_states()
+            self.assertEqual(
+                states[:, 0].tolist(), (num_calls * is_active).tolist())
+
+        request.reset_states()
+        (states,) = request._get_states()
+        self.assertEqual(states[:, 0].tolist(), [0] * len(envs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import random
+import unittest
+
+import numpy as np
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
+from hearts_gym.server import utils as server_utils
+from hearts_gym.server.delta_observations import (
+    DeltaDecoder,
+    DeltaEncoder,
+    INDICES_KEY,
+)
+
+
+class TestDeltaObservations(unittest.TestCase):
+    def strip_prefix(self, data):
+        return data.partition(server_utils.MSG_LENGTH_SEPARATOR)[2]
+
+    def distribute(self, envs, return_data):
+        distributed_data = [[] for _ in range(envs.num_players)]
+        for (i, (data, active_player_index)) in enumerate(
+                zip(return_data, envs.get_active_player_indices())):
+            # Only keep the observations.
+            if isinstance(data, tuple):
+                data = data[0]
+            distributed_data[active_player_index].append((i, data))
+        return distributed_data
+
+    def test_round_trip(self):
+        rng = random.Random(0)
+        for mask_actions in [True, False]:
+            envs = VecHeartsEnv(
+                [
+                    HeartsEnv(mask_actions=mask_actions, seed=seed)
+                    for seed in range(8)
+                ],
+                num_procs=1,
+            )
+            encoders = [
+                DeltaEncoder(len(envs), keyframe_interval=3)
+                for _ in range(envs.num_players)
+            ]
+            decoders = [
+                DeltaDecoder(envs.deck_size)
+                for _ in range(envs.num_players)
+            ]
+
+            return_data = envs.reset()
+            while True:
+                distributed_data = self.distribute(envs, return_data)
+                for (player_index, data) in enumerate(distributed_data):
+                    if len(data) == 0:
+                        continue
+                    encoded = server_utils.encode_data(
+                        encoders[player_index].encode(data, player_index),
+                        server_utils.WIRE_VERSION_DELTA,
+                    )
+                    received = server_utils.decode_data(
+                        self.strip_prefix(encoded))
+
+                    indices = [record[0] for record in received]
+                    obss = [
+                        record[1][str(player_index)]
+                        for record in received
+                    ]
+                    decoders[player_index].decode(indices, obss)
+                    for (record, obs) in zip(data, obss):
+                        expected_obs = record[1][player_index]
+                        if mask_actions:
+                            self.assertTrue(np.array_equal(
+                                obs[HeartsEnv.ACTION_MASK_KEY],
+                                expected_obs[HeartsEnv.ACTION_MASK_KEY],
+                            ))
+                            obs = obs[HeartsEnv.OBS_KEY]
+                            expected_obs = expected_obs[HeartsEnv.OBS_KEY]
+                        self.assertTrue(np.array_equal(
+                            obs['cards'], expected_obs['cards']))
+                        self.assertEqual(
+                            obs['leading_hearts_allowed'],
+                            expected_obs['leading_hearts_allowed'],
+                        )
+
+                if envs.is_game_done():
+                    break
+                actions = [
+                    rng.choice(envs.get_legal_actions(i))
+                    for i in range(len(envs))
+                ]
+                return_data = envs.step(iter(actions))
+            envs.terminate_pool()
+
+    def test_keyframes(self):
+        env = HeartsEnv(mask_actions=False, seed=0)
+        obs = env.reset()
+        player_index = env.active_player_index
+        data = [(0, obs)]
+        encoder = DeltaEncoder(1, keyframe_interval=1)
+
+        def num_changed(data):
+            (record,) = encoder.encode(data, player_index)
+            return len(record[1][player_index]['cards'][INDICES_KEY])
+
+        self.assertEqual(num_changed(data), env.deck_size)
+        self.assertEqual(num_changed(data), 0)
+        # Periodic keyframe.
+        self.assertEqual(num_changed(data), env.deck_size)
+        encoder.invalidate([0])
+        self.assertEqual(num_changed(data), env.deck_size)
+        self.assertEqual(num_changed(data), 0)
+        encoder.reset()
+        self.assertEqual(num_changed(data), env.deck_size)
+
+        (record,) = DeltaEncoder(1).encode(data, player_index)
+        obs = record[1][player_index]
+        obs['cards'][INDICES_KEY] = obs['cards'][INDICES_KEY][:1]
+        with self.assertRaises(ValueError):
+            DeltaDecoder(env.deck_size).decode([0], [obs])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+import random
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+import numpy as np
+import ray
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.policies import RandomPolicy
+from hearts_gym.utils import evaluation
+
+ENV_NAME = 'Hearts-v0'
+NUM_TEST_GAMES = 12
+
+
+def flatten(obs):
+    # Like RLlib's preprocessing.
+    action_mask = obs[HeartsEnv.ACTION_MASK_KEY]
+    obs = obs[HeartsEnv.OBS_KEY]
+    leading_hearts_allowed = np.zeros(2, np.float32)
+    leading_hearts_allowed[int(obs['leading_hearts_allowed'])] = 1
+    return np.concatenate([
+        np.asarray(action_mask, np.float32),
+        np.asarray(obs['cards'], np.float32),
+        leading_hearts_allowed,
+    ])
+
+
+def no_filter(obs, update):
+    return obs
+
+
+class LastLegalPolicy:
+    def __init__(self, obs_space, action_space, config):
+        self.action_mask_len = action_space.n
+
+    def get_initial_state(self):
+        return []
+
+    def compute_actions(self, obs_batch, state_batches, **kwargs):
+        actions = np.array([
+            np.flatnonzero(obs[:self.action_mask_len])[-1]
+            for obs in obs_batch
+        ])
+        return actions, [], {}
+
+
+class FakeWorker:
+    def __init__(self, policy_ids):
+        self.preprocessors = {
+            policy_id: SimpleNamespace(transform=flatten)
+            for policy_id in policy_ids
+        }
+        self.filters = {policy_id: no_filter for policy_id in policy_ids}
+
+    def get_filters(self):
+        return dict(self.filters)
+
+    def sync_filters(self, new_filters):
+        assert new_filters.keys() == self.filters.keys()
+        self.filters.update(new_filters)
+
+
+class FakeAgent:
+    def __init__(self, config):
+        self.config = config
+        # Build policies from their specs like RLlib does.
+        self.policies = {
+            policy_id: policy_cls(obs_space, action_space, policy_config)
+            for (
+                    policy_id,
+                    (policy_cls, obs_space, action_space, policy_config),
+            ) in config['multiagent']['policies'].items()
+        }
+        worker = FakeWorker(self.policies.keys())
+        self.workers = SimpleNamespace(local_worker=lambda: worker)
+
+    def get_policy(self, policy_id):
+        return self.policies[policy_id]
+
+    def get_weights(self):
+        return {policy_id: [] for policy_id in self.policies}
+
+    def set_weights(self, weights):
+        assert weights.keys() == self.policies.keys()
+
+
+class TestEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.env = HeartsEnv(mask_actions=True)
+
+    def create_agent(self, use_random_policy):
+        return FakeAgent(config=self.create_eval_config(use_random_policy))
+
+    def create_eval_config(self, use_random_policy=False):
+        obs_space = SimpleNamespace(original_space=self.env.observation_space)
+        policy_config = {'mask_actions': True}
+        learned_policy_cls = (
+            RandomPolicy if use_random_policy else LastLegalPolicy)
+        return {
+            'env_config': {'mask_actions': True, 'seed': 0},
+            'clip_actions': False,
+            'multiagent': {
+                'policies': {
+                    'learned': (
+                        learned_policy_cls,
+                        obs_space,
+                        self.env.action_space,
+                        policy_config,
+                    ),
+                    'other': (
+                        LastLegalPolicy,
+                        obs_space,
+                        self.env.action_space,
+                        policy_config,
+                    ),
+                },
+                'policy_mapping_fn': lambda agent_id: (
+                    'learned' if agent_id == 0 else 'other'),
+            },
+        }
+
+    def eval_unstable(
+            self,
+            agent,
+            num_parallel_games,
+            num_workers,
+            use_batch_game=False,
+    ):
+        return evaluation._eval_unstable(
+            agent,
+            ENV_NAME,
+            agent.config,
+            NUM_TEST_GAMES,
+            0,
+            num_parallel_games,
+            num_workers,
+            use_batch_game,
+        )[:4]
+
+    def test_batched_games(self):
+        eval_config = self.create_eval_config()
+        single_results = [
+            evaluation._play_test_games(
+                self.create_agent(False),
+                ENV_NAME,
+                eval_config,
+                range(i, i + 1),
+                0,
+            )
+            for i in range(NUM_TEST_GAMES)
+        ]
+        (penalties, placements, num_actions, num_illegal) = \
+            evaluation._play_test_games(
+                self.create_agent(False),
+                ENV_NAME,
+                eval_config,
+                range(NUM_TEST_GAMES),
+                0,
+            )
+
+        self.assertEqual(
+            penalties,
+            [sum(player_penalties) for player_penalties in zip(*(
+                results[0] for results in single_results
+            ))],
+        )
+        self.assertEqual(
+            placements,
+            [
+                [sum(num_placements) for num_placements in zip(*(
+                    results[1][i] for results in single_results
+                ))]
+                for i in range(len(placements))
+            ],
+        )
+        self.assertEqual(
+            num_actions, sum(results[2] for results in single_results))
+        self.assertEqual(
+            num_illegal, sum(results[3] for results in single_results))
+        self.assertEqual(
+            [sum(player_placements) for player_placements in placements],
+            [NUM_TEST_GAMES] * len(placements),
+        )
+        self.assertEqual(num_illegal, 0)
+
+        for num_parallel_games in [1, 5]:
+            for use_batch_game in [False, True]:
+                self.assertEqual(
+                    self.eval_unstable(
+                        self.create_agent(False),
+                        num_parallel_games,
+                        1,
+                        use_batch_game,
+                    ),
+                    (penalties, placements, num_actions, num_illegal),
+                )
+
+    def test_num_workers(self):
+        def play_test_games_remotely(
+                agent,
+                env_name,
+                eval_config,
+                game_index_batches,
+                learned_agent_id,
+                num_workers,
+                use_batch_game,
+        ):
+            # Finish batches in arbitrary order on fresh agents.
+            game_index_batches = game_index_batches.copy()
+            rng.shuffle(game_index_batches)
+            for game_indices in game_index_batches:
+                yield evaluation._play_test_games(
+                    self.create_agent(True),
+                    env_name,
+                    eval_config,
+                    game_indices,
+                    learned_agent_id,
+                    use_batch_game,
+                )
+
+        rng = random.Random(0)
+        results = self.eval_unstable(self.create_agent(True), 5, 1)
+        with mock.patch.object(
+                evaluation,
+                '_play_test_games_remotely',
+                play_test_games_remotely,
+        ):
+            for num_workers in [2, 3]:
+                self.assertEqual(
+                    self.eval_unstable(
+                        self.create_agent(True), 5, num_workers),
+                    results,
+                )
+
+    def test_remote_workers(self):
+        results = self.eval_unstable(self.create_agent(True), 5, 1)
+        # Play on actual `_EvalWorker` actors in the driver process.
+        ray.init(local_mode=True, num_cpus=3)
+        try:
+            for num_workers in [2, 3]:
+                self.assertEqual(
+                    self.eval_unstable(
+                        self.create_agent(True), 5, num_workers),
+                    results,
+                )
+        finally:
+            ray.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+
+from hearts_gym.server.game_stats import GameStatistics
+
+
+class TestGameStatistics(unittest.TestCase):
+    def test_running_statistics(self):
+        rng = np.random.default_rng(0)
+        penalties = rng.integers(0, 27, (100, 4))
+        rankings = np.argsort(np.argsort(penalties, axis=1), axis=1) + 1
+
+        stats = GameStatistics(4)
+        for (game_penalties, game_rankings) in zip(penalties, rankings):
+            stats.add_game(game_penalties.tolist(), game_rankings.tolist())
+
+        self.assertEqual(stats.num_games, 100)
+        self.assertEqual(stats.total_penalties, penalties.sum(0).tolist())
+        self.assertTrue(np.allclose(stats.penalty_means, penalties.mean(0)))
+        self.assertTrue(np.allclose(
+            stats.penalty_variances, penalties.var(0, ddof=1)))
+        for (i, placements) in enumerate(stats.total_placements):
+            self.assertEqual(
+                placements,
+                np.bincount(rankings[:, i] - 1, minlength=4).tolist(),
+            )
+
+        # Players with lower penalties win more often.
+        best_player = int(np.argmin(penalties.sum(0)))
+        worst_player = int(np.argmax(penalties.sum(0)))
+        self.assertGreater(
+            stats.ratings[best_player], stats.ratings[worst_player])
+        self.assertAlmostEqual(
+            sum(stats.ratings), 4 * GameStatistics.INITIAL_RATING)
+
+        stats.reset()
+        self.assertEqual(stats.num_games, 0)
+        self.assertEqual(stats.total_penalties, [0] * 4)
+
+    def test_results_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            results_path = os.path.join(tmp_dir, 'results.jsonl')
+            stats = GameStatistics(2, results_path, flush_interval=2)
+
+            stats.add_game([0, 26], [1, 2])
+            self.assertFalse(os.path.exists(results_path))
+            stats.add_game([13, 13], [1, 1])
+            stats.add_game([26, 0], [2, 1])
+            stats.flush()
+
+            with open(results_path, 'r') as results_file:
+                results = [json.loads(line) for line in results_file]
+            self.assertEqual(results, [
+                {'penalties': [0, 26], 'rankings': [1, 2]},
+                {'penalties': [13, 13], 'rankings': [1, 1]},
+                {'penalties': [26, 0], 'rankings': [2, 1]},
+            ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -131,6 +131,55 @@ class TestCommon(unittest.TestCase):
                               cmp_state)
                         raise
 
+    def assert_obs_matches_game(self, env, obs, player_index):
+        game = env.game
+        num_players = game.num_players
+        expected_cards = np.full_like(game.state, env.STATE_UNKNOWN)
+        for (card_index, state) in enumerate(game.state):
+            for other_index in range(num_players):
+                offset = (other_index - player_index) % num_players
+                if state == game.on_table_state(other_index):
+                    expected_cards[card_index] = env.on_table_state(offset)
+                elif state == game.collected_state(other_index):
+                    expected_cards[card_index] = env.collected_state(
+                        offset, num_players)
+            if state == game.in_hand_state(player_index):
+                expected_cards[card_index] = env.STATE_ON_HAND
+
+        expected_mask = np.zeros(game.max_num_cards_on_hand, np.int8)
+        expected_mask[game.get_legal_actions(player_index)] = 1
+
+        self.assertTrue(np.array_equal(obs[env.OBS_KEY]['cards'],
+                                       expected_cards))
+        self.assertEqual(obs[env.OBS_KEY]['leading_hearts_allowed'],
+                         game.leading_hearts_allowed)
+        self.assertEqual(obs[env.ACTION_MASK_KEY].dtype, np.int8)
+        self.assertTrue(np.array_equal(obs[env.ACTION_MASK_KEY],
+                                       expected_mask))
+
+    def test_obs_buffers(self):
+        envs = [
+            HeartsEnv(seed=0, mask_actions=True),
+            HeartsEnv(seed=0, mask_actions=True, reuse_obs_buffers=True),
+        ]
+        rng = random.Random(0)
+        for env in envs:
+            env.reset()
+
+        while not envs[0].game.is_done():
+            action = rng.choice(envs[0].get_legal_actions())
+            for env in envs:
+                active_player_index = env.active_player_index
+                multi_obs, _, _, _ = env.step({active_player_index: action})
+                for (player_index, obs) in multi_obs.items():
+                    self.assert_obs_matches_game(env, obs, player_index)
+
+        reused_obs = envs[1]._game_state_to_obs(0)
+        self.assertIs(
+            reused_obs[HeartsEnv.OBS_KEY]['cards'].base,
+            envs[1]._game_state_to_obs(0)[HeartsEnv.OBS_KEY]['cards'].base,
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,9 @@
+import pickle
 import random
 import unittest
 
+import numpy as np
+
 from hearts_gym.envs.card_deck import Card
 from hearts_gym.envs.hearts_game import HeartsGame
 
@@ -33,6 +36,38 @@ class TestCommon(unittest.TestCase):
             card_index = game.card_to_index(card)
             self.assertEqual(card_index, i)
 
+    def test_cards_interned(self):
+        game = HeartsGame()
+        cards = [
+            Card(suit, rank)
+            for suit in range(Card.NUM_SUITS)
+            for rank in range(Card.NUM_RANKS)
+        ]
+        self.assertEqual(cards, sorted(cards))
+        self.assertEqual(len(set(cards)), len(cards))
+        for card in cards:
+            self.assertIs(Card(card.suit, card.rank), card)
+            self.assertIs(pickle.loads(pickle.dumps(card)), card)
+            self.assertIs(Card.from_code(card.code), card)
+            self.assertEqual(game.get_penalty(card),
+                             game._compute_penalty(card))
+            self.assertIs(game.index_to_card(game.card_to_index(card)), card)
+
+    def test_deal_reproducible(self):
+        games = [HeartsGame(seed=0), HeartsGame(seed=0), HeartsGame(seed=1)]
+        for _ in range(10):
+            for game in games:
+                game.reset()
+            self.assertEqual(games[0].hands, games[1].hands)
+            self.assertNotEqual(games[0].hands, games[2].hands)
+            for hand in games[0].hands:
+                self.assertEqual(hand, sorted(hand))
+            dealt_cards = sorted(
+                games[0].table_cards
+                + [card for hand in games[0].hands for card in hand]
+            )
+            self.assertEqual(dealt_cards, games[0].get_deck_cards())
+
     def test_states_ordered(self):
         game = HeartsGame()
 
@@ -189,6 +224,115 @@ class TestCommon(unittest.TestCase):
         print(total_penalties)
         print(total_placements)
 
+    def test_player_views_randomly(self):
+        seed = 0
+
+        game = HeartsGame(seed=seed)
+        rng = random.Random(seed + 1)
+        np_rng = np.random.default_rng(seed)
+        player_view_luts = np_rng.integers(
+            0, 100, (game.num_players, game.num_states), dtype=np.int8)
+        game.enable_player_views(player_view_luts)
+
+        for ep in range(100):
+            game.reset()
+            self.assertTrue(np.array_equal(
+                game.player_views, player_view_luts[:, game.state]))
+            while not game.is_done():
+                game.play_card(rng.randint(0, 13))
+                self.assertTrue(np.array_equal(
+                    game.player_views, player_view_luts[:, game.state]))
+
+    def test_history_randomly(self):
+        seed = 0
+
+        game = HeartsGame(seed=seed)
+        rng = random.Random(seed + 1)
+
+        for ep in range(100):
+            game.reset()
+            prev_hands = [[] for _ in range(game.num_players)]
+            prev_hands[game.leading_player_index] = sorted(
+                game.hands[game.leading_player_index]
+                + game.table_cards
+            )
+            prev_collected = [[] for _ in range(game.num_players)]
+            prev_states = [None] * game.num_players
+            while not game.is_done():
+                player_index = game.active_player_index
+                hand = game.hands[player_index].copy()
+                collected = [cards.copy() for cards in game.collected]
+                state = game.state.copy()
+
+                _, _, trick_winner_index, _ = game.play_card(
+                    rng.randint(0, 13))
+                prev_hands[player_index] = hand
+                prev_states[player_index] = state
+                if trick_winner_index is not None:
+                    prev_collected[trick_winner_index] = \
+                        collected[trick_winner_index]
+
+                self.assertEqual(game.prev_hands, prev_hands)
+                self.assertEqual(game.prev_collected, prev_collected)
+                for (prev_state, expected) in zip(
+                        game.prev_states, prev_states):
+                    if expected is None:
+                        self.assertIsNone(prev_state)
+                    else:
+                        self.assertTrue(
+                            np.array_equal(prev_state, expected))
+
+    def test_masks_randomly(self):
+        rng = random.Random(0)
+        for seed in range(25):
+            game = HeartsGame(seed=seed)
+            for _ in range(2):
+                game.reset()
+                while not game.is_done():
+                    # Also test illegal and out-of-range actions.
+                    game.play_card(
+                        rng.randrange(-1, game.max_num_cards_on_hand + 1))
+
+                    self.assertEqual(
+                        game.get_prev_table_mask(),
+                        sum(1 << card.code for card in game.prev_table_cards),
+                    )
+                    for player_index in range(game.num_players):
+                        expected_mask = np.zeros(
+                            game.max_num_cards_on_hand, np.int8)
+                        expected_mask[
+                            game.get_legal_actions(player_index)] = 1
+                        self.assertTrue(np.array_equal(
+                            game.legal_action_mask(player_index),
+                            expected_mask,
+                        ))
+                        out = np.ones(game.max_num_cards_on_hand, np.int8)
+                        self.assertIs(
+                            game.legal_action_mask(player_index, out), out)
+                        self.assertTrue(np.array_equal(out, expected_mask))
+                        self.assertEqual(
+                            game.get_prev_hand_mask(player_index),
+                            sum(
+                                1 << card.code
+                                for card in game.prev_hands[player_index]
+                            ),
+                        )
+
+    def test_history_disabled(self):
+        game = HeartsGame(seed=0, track_history=False)
+        tracked_game = HeartsGame(seed=0)
+        game.reset()
+        tracked_game.reset()
+        while not game.is_done():
+            game.play_card(0)
+            tracked_game.play_card(0)
+            self.assertEqual(game.prev_hands, tracked_game.prev_hands)
+            self.assertEqual(
+                game.prev_collected, tracked_game.prev_collected)
+        self.assertEqual(len(game._state_log), 0)
+        with self.assertRaises(AssertionError):
+            game.prev_states
+
     def test_hand_sorted(self):
         game = HeartsGame(seed=0)
         game.reset()
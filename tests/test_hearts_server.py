@@ -0,0 +1,203 @@
+import logging
+import queue
+import socket
+import threading
+import time
+from types import SimpleNamespace
+import unittest
+
+from hearts_gym.server import metrics
+from hearts_gym.server import utils as server_utils
+from hearts_gym.server.client import Client
+from hearts_gym.server.delta_observations import DeltaEncoder
+from hearts_gym.server.hearts_server import HeartsRequestHandler, HeartsServer
+from hearts_gym.server.metrics import ServerMetrics
+from hearts_gym.server.mock_request import MockRequest
+
+
+class TestHeartsRequestHandler(unittest.TestCase):
+    def create_handler(self, num_parallel_games):
+        # Avoid setting up a whole server.
+        handler = HeartsRequestHandler.__new__(HeartsRequestHandler)
+        handler.max_receive_bytes = \
+            handler.calculate_max_receive_bytes(num_parallel_games)
+        handler.max_prefix_len = (
+            len(str(handler.max_receive_bytes))
+            + len(server_utils.MSG_LENGTH_SEPARATOR)
+        )
+        handler._receive_buffers = [
+            bytearray(handler.max_prefix_len + handler.max_receive_bytes)]
+        handler._pending_bytes = [(0, 0)]
+        handler.server = SimpleNamespace(
+            metrics=ServerMetrics(),
+            client_labels=HeartsServer.client_labels,
+        )
+        return handler
+
+    def create_parsing_handler(self, num_parallel_games):
+        handler = self.create_handler(num_parallel_games)
+        handler._sent_batches = [queue.Queue()]
+        handler._player_locks = [threading.RLock()]
+        handler._delta_encoders = [DeltaEncoder(num_parallel_games)]
+        handler.server.logger = logging.getLogger(__name__)
+        handler.server.send_failable_replacing = \
+            lambda client, data: True
+        handler.server.env_groups = [SimpleNamespace(mask_actions=False)]
+        handler.server.group_offsets = [0]
+        return handler
+
+    def test_receive_message_in_shards(self):
+        handler = self.create_handler(512)
+        (server_socket, client_socket) = socket.socketpair()
+        with server_socket, client_socket:
+            server_socket.settimeout(5)
+            client = Client(0, server_socket, ('test', 0))
+
+            for actions in [[], [0], list(range(13)) * 40]:
+                data = server_utils.encode_actions(actions)
+
+                def send_slowly():
+                    for i in range(0, len(data), 7):
+                        client_socket.sendall(data[i:i + 7])
+                        time.sleep(0.001)
+
+                sender = threading.Thread(target=send_slowly)
+                sender.start()
+                message = handler._receive_message(0, client)
+                sender.join()
+
+                self.assertEqual(
+                    server_utils.decode_actions(message.tobytes()),
+                    actions,
+                )
+                self.assertIs(message.obj, handler._receive_buffers[0])
+
+    def test_receive_consecutive_messages(self):
+        handler = self.create_handler(16)
+        (server_socket, client_socket) = socket.socketpair()
+        with server_socket, client_socket:
+            server_socket.settimeout(5)
+            client = Client(0, server_socket, ('test', 0))
+
+            all_actions = [[3], [], [1, 2, 3, 4], [0] * 16, [12]]
+            data = b''.join(
+                server_utils.encode_actions(actions)
+                for actions in all_actions
+            )
+            client_socket.sendall(data)
+            for actions in all_actions:
+                message = handler._receive_message(0, client)
+                self.assertEqual(
+                    server_utils.decode_actions(message.tobytes()),
+                    actions,
+                )
+            self.assertIn(
+                f'{metrics.RECEIVED_BYTES}{{player="0",client="Player 1"}} '
+                f'{len(data)}',
+                handler.server.metrics.format().splitlines(),
+            )
+
+    def test_parse_retries_without_batches_in_flight(self):
+        handler = self.create_parsing_handler(16)
+        (server_socket, client_socket) = socket.socketpair()
+        with server_socket, client_socket:
+            server_socket.settimeout(5)
+            client = Client(0, server_socket, ('test', 0))
+
+            client_socket.sendall(
+                server_utils.encode_actions([1])
+                + server_utils.encode_actions([2, 3])
+            )
+            self.assertEqual(
+                handler._parse_batch(0, client, [4, 5]), [2, 3])
+
+    def test_parse_keeps_messages_of_batches_in_flight(self):
+        handler = self.create_parsing_handler(16)
+        (server_socket, client_socket) = socket.socketpair()
+        with server_socket, client_socket:
+            server_socket.settimeout(5)
+            client = Client(0, server_socket, ('test', 0))
+
+            handler._sent_batches[0].put((0.0, [6]))
+            client_socket.sendall(
+                server_utils.encode_actions([1])
+                + server_utils.encode_actions([2])
+            )
+            self.assertEqual(
+                handler._parse_batch(0, client, [4, 5]), [0, 0])
+            self.assertEqual(
+                handler._parse_batch(0, client, [6]), [2])
+
+    def test_split_only_for_clients_with_settings(self):
+        client = Client(0, None, ('test', 0))
+        self.assertIsNone(HeartsRequestHandler.create_batch_sizer(client, 512))
+
+        client.apply_settings(server_utils.encode_client_settings(
+            server_utils.WIRE_VERSION, 100, None,
+        )[len(server_utils.SETTINGS_OK_MSG):])
+        self.assertEqual(
+            HeartsRequestHandler.get_action_timeout_sec(client),
+            HeartsRequestHandler.ACTION_TIMEOUT_SEC,
+        )
+        batch_sizer = HeartsRequestHandler.create_batch_sizer(client, 512)
+        self.assertEqual(batch_sizer.max_batch_size, 100)
+        self.assertGreater(len(batch_sizer.split(list(range(512)))), 1)
+
+
+class TestHeartsServer(unittest.TestCase):
+    def receive_message(self, sock):
+        prefix = b''
+        while not prefix.endswith(server_utils.MSG_LENGTH_SEPARATOR):
+            prefix += sock.recv(1)
+        msg_length = int(prefix[:-len(server_utils.MSG_LENGTH_SEPARATOR)])
+        data = b''
+        while len(data) < msg_length:
+            data += sock.recv(msg_length - len(data))
+        return server_utils.decode_data(data)
+
+    def test_fill_with_bots_in_process(self):
+        with HeartsServer(
+                ('127.0.0.1', 0),
+                HeartsRequestHandler,
+                num_parallel_games=1,
+                num_procs=1,
+                wait_duration_sec=0,
+        ) as server:
+            started_num_clients = []
+            server._start_game_loop = lambda: started_num_clients.append(
+                len(server.clients))
+
+            (server_socket, client_socket) = socket.socketpair()
+            with server_socket, client_socket:
+                server_socket.settimeout(5)
+                client_socket.settimeout(5)
+                messages = []
+
+                def run_client():
+                    server_utils.send_name(client_socket, 'test')
+                    # Hello, metadata and the number of connected players.
+                    for _ in range(3):
+                        messages.append(self.receive_message(client_socket))
+                        server_utils.send_ok(client_socket)
+
+                client_thread = threading.Thread(target=run_client)
+                client_thread.start()
+                server.process_request(server_socket, ('test', 0))
+                self.assertEqual(len(server.clients), 1)
+                self.assertEqual(started_num_clients, [])
+
+                time.sleep(0.01)
+                server.service_actions()
+                client_thread.join()
+                self.assertEqual(started_num_clients, [4])
+                self.assertFalse(isinstance(
+                    server.clients[0].request, MockRequest))
+                for i in range(1, 4):
+                    self.assertIsInstance(
+                        server.clients[i].request, MockRequest)
+                self.assertEqual(messages[-1], '4/4 players connected!')
+            server.terminate_pools()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from urllib.request import urlopen
+import unittest
+
+from hearts_gym.server import metrics
+from hearts_gym.server.metrics import MetricsServer, ServerMetrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_format(self):
+        server_metrics = ServerMetrics()
+        labels = (('player', '0'), ('client', 'say "hi"'))
+        server_metrics.increment(metrics.SENT_BYTES, labels, 100)
+        server_metrics.increment(metrics.SENT_BYTES, labels, 28)
+        for latency in [0.003, 0.02, 100.0]:
+            server_metrics.observe(metrics.ROUND_TRIP_SECONDS, latency, labels)
+
+        lines = server_metrics.format().splitlines()
+        formatted_labels = 'player="0",client="say \\"hi\\""'
+        self.assertIn('# TYPE hearts_server_sent_bytes_total counter', lines)
+        self.assertIn(
+            f'hearts_server_sent_bytes_total{{{formatted_labels}}} 128',
+            lines,
+        )
+        self.assertIn(
+            '# TYPE hearts_server_round_trip_seconds histogram', lines)
+        for (upper_bound, count) in [
+                ('0.001', 0),
+                ('0.005', 1),
+                ('0.025', 2),
+                ('10', 2),
+                ('+Inf', 3),
+        ]:
+            self.assertIn(
+                f'hearts_server_round_trip_seconds_bucket'
+                f'{{{formatted_labels},le="{upper_bound}"}} {count}',
+                lines,
+            )
+        self.assertIn(
+            f'hearts_server_round_trip_seconds_count{{{formatted_labels}}} 3',
+            lines,
+        )
+
+    def test_server(self):
+        server_metrics = ServerMetrics()
+        with server_metrics.time_phase('step'):
+            pass
+        metrics_server = MetricsServer(server_metrics, ('127.0.0.1', 0))
+        try:
+            port = metrics_server.server_address[1]
+            with urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+                body = response.read().decode()
+        finally:
+            metrics_server.server_close()
+        self.assertIn(
+            'hearts_server_phase_seconds_count{phase="step"} 1', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import random
+import unittest
+
+import numpy as np
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.policies.batch_observed_game import BatchObservedGame
+from hearts_gym.policies.observed_game import ObservedGame
+
+
+class TestObservedGame(unittest.TestCase):
+    def flatten(self, obs):
+        # Like RLlib's preprocessing.
+        leading_hearts_allowed = np.zeros(2, np.float32)
+        leading_hearts_allowed[int(obs['leading_hearts_allowed'])] = 1
+        return np.concatenate([
+            np.asarray(obs['cards'], np.float32),
+            leading_hearts_allowed,
+        ])
+
+    def collect_observations(self, seed):
+        rng = random.Random(seed)
+        env = HeartsEnv(mask_actions=False, seed=seed)
+        obs_batch = []
+        legal_actions = []
+        multi_obs = env.reset()
+        while True:
+            player_index = env.game.active_player_index
+            obs_batch.append(self.flatten(multi_obs[player_index]))
+            legal_actions.append(env.get_legal_actions())
+            action = rng.choice(legal_actions[-1])
+            (multi_obs, _, is_done, _) = env.step({player_index: action})
+            if is_done['__all__']:
+                break
+        return env, np.stack(obs_batch), legal_actions
+
+    def test_matches_observed_game(self):
+        for seed in range(4):
+            (env, obs_batch, legal_actions) = self.collect_observations(
+                seed)
+            game = ObservedGame(env.observation_space)
+            games = BatchObservedGame(env.observation_space)
+
+            is_done = games.recreate_states(obs_batch)
+            self.assertFalse(is_done.any())
+            for (i, obs) in enumerate(obs_batch):
+                self.assertFalse(game.recreate_state(obs))
+                index_cards = games.index_cards
+
+                hand = [
+                    index_cards[card_index]
+                    for card_index in games.hand_cards[i]
+                    if card_index >= 0
+                ]
+                self.assertEqual(hand, game.hand)
+                table_cards = [
+                    index_cards[card_index]
+                    for card_index in games.table_cards[i]
+                    if card_index >= 0
+                ]
+                self.assertEqual(table_cards, game.table_cards)
+                self.assertEqual(
+                    games.leading_player_index_offsets[i],
+                    game.leading_player_index_offset,
+                )
+                self.assertEqual(
+                    games.offset_penalties[i].tolist(),
+                    game.offset_penalties,
+                )
+                self.assertEqual(
+                    games.is_first_trick[i], game.is_first_trick)
+                self.assertEqual(
+                    games.leading_hearts_allowed[i],
+                    game.leading_hearts_allowed,
+                )
+                self.assertEqual(
+                    games.get_legal_actions(i).tolist(),
+                    game.get_legal_actions(),
+                )
+                self.assertTrue(np.array_equal(
+                    games.legal_action_masks[i], game.legal_action_mask()))
+                self.assertEqual(
+                    games.get_legal_actions(i).tolist(),
+                    legal_actions[i],
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+import unittest
+
+import numpy as np
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.policies import RandomPolicy
+
+
+class TestRandomPolicy(unittest.TestCase):
+    def flatten(self, obs, mask_actions):
+        # Like RLlib's preprocessing.
+        if mask_actions:
+            action_mask = obs[HeartsEnv.ACTION_MASK_KEY]
+            obs = obs[HeartsEnv.OBS_KEY]
+        leading_hearts_allowed = np.zeros(2, np.float32)
+        leading_hearts_allowed[int(obs['leading_hearts_allowed'])] = 1
+        columns = [
+            np.asarray(obs['cards'], np.float32),
+            leading_hearts_allowed,
+        ]
+        if mask_actions:
+            columns.insert(0, np.asarray(action_mask, np.float32))
+        return np.concatenate(columns)
+
+    def create_policy(self, env, mask_actions):
+        return RandomPolicy(
+            SimpleNamespace(original_space=env.observation_space),
+            env.action_space,
+            {'seed': 0, 'mask_actions': mask_actions},
+        )
+
+    def test_actions_are_legal(self):
+        for mask_actions in [True, False]:
+            env = HeartsEnv(mask_actions=mask_actions, seed=0)
+            policy = self.create_policy(env, mask_actions)
+            for _ in range(2):
+                multi_obs = env.reset()
+                while True:
+                    player_index = env.game.active_player_index
+                    obs_batch = np.stack([
+                        self.flatten(multi_obs[player_index], mask_actions)
+                    ] * 64)
+                    legal_actions = env.get_legal_actions()
+
+                    actions, _, _ = policy.compute_actions(obs_batch)
+                    self.assertEqual(actions.shape, (64,))
+                    self.assertTrue(set(actions) <= set(legal_actions))
+                    if len(legal_actions) > 1:
+                        self.assertGreater(len(set(actions)), 1)
+
+                    log_probs = policy.compute_log_likelihoods(
+                        actions, obs_batch)
+                    self.assertTrue(np.allclose(
+                        log_probs, -np.log(len(legal_actions))))
+
+                    (multi_obs, _, is_done, _) = env.step(
+                        {player_index: actions[0]})
+                    if is_done['__all__']:
+                        break
+
+    def test_set_seed(self):
+        env = HeartsEnv(mask_actions=True, seed=0)
+        policy = self.create_policy(env, True)
+        obs = env.reset()[env.game.active_player_index]
+        obs_batch = np.stack([self.flatten(obs, True)] * 64)
+
+        policy.set_seed(1)
+        actions, _, _ = policy.compute_actions(obs_batch)
+        policy.compute_actions(obs_batch)
+        policy.set_seed(1)
+        seeded_actions, _, _ = policy.compute_actions(obs_batch)
+        self.assertEqual(actions.tolist(), seeded_actions.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from hearts_gym import HeartsEnv
+from hearts_gym.envs.reward_function import RewardBatch
+
+
+class TestRewardFunction(unittest.TestCase):
+    def play_randomly(self, env, rng):
+        """Play a game, yielding the arguments of each reward that
+        is computed.
+        """
+        game = env.game
+        env.reset()
+        while not game.is_done():
+            active_player_index = game.active_player_index
+            if rng.random() < 0.1:
+                action = rng.randrange(0, game.max_num_cards_on_hand)
+            else:
+                action = rng.choice(
+                    game.get_legal_actions(active_player_index))
+            _, _, trick_winner_index, _ = game.play_card(action)
+
+            if game.is_done():
+                player_indices = range(game.num_players)
+            else:
+                player_indices = [game.active_player_index]
+            for player_index in player_indices:
+                yield (
+                    player_index,
+                    active_player_index,
+                    trick_winner_index is not None,
+                )
+
+    def test_same_rewards(self):
+        # Computed with the original, non-vectorized implementation.
+        expected_sum = -25776
+        expected_square_sum = 9654462
+        expected_len = 1080
+
+        env = HeartsEnv(seed=0)
+        rng = random.Random(0)
+        rewards = []
+        for _ in range(20):
+            rewards.extend(
+                env.reward_function(*args)
+                for args in self.play_randomly(env, rng)
+            )
+
+        self.assertEqual(len(rewards), expected_len)
+        self.assertEqual(sum(rewards), expected_sum)
+        self.assertEqual(sum(reward * reward for reward in rewards),
+                         expected_square_sum)
+
+    def test_batch_matches_single(self):
+        env = HeartsEnv(seed=0)
+        rng = random.Random(0)
+        reward_function = env.reward_function
+        for _ in range(20):
+            for args in self.play_randomly(env, rng):
+                # Also compute rewards for other players.
+                all_args = [
+                    (player_index,) + args[1:]
+                    for player_index in range(env.game.num_players)
+                ]
+                batch = RewardBatch.from_games(
+                    [env.game] * len(all_args), *zip(*all_args))
+                self.assertEqual(
+                    reward_function.compute_rewards(batch).tolist(),
+                    [reward_function(*args) for args in all_args],
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import unittest
+
+import numpy as np
+
+from hearts_gym import HeartsEnv
+from hearts_gym.server import utils as server_utils
+
+
+class TestServerUtils(unittest.TestCase):
+    def strip_prefix(self, data):
+        length_end = data.find(server_utils.MSG_LENGTH_SEPARATOR)
+        msg_length = int(data[:length_end])
+        data = data[length_end + len(server_utils.MSG_LENGTH_SEPARATOR):]
+        self.assertEqual(len(data), msg_length)
+        return data
+
+    def assert_same_tree(self, tree, expected):
+        if isinstance(tree, np.ndarray):
+            tree = tree.tolist()
+        if isinstance(expected, dict):
+            self.assertEqual(list(tree.keys()), list(expected.keys()))
+            for (key, value) in expected.items():
+                self.assert_same_tree(tree[key], value)
+        elif isinstance(expected, list):
+            self.assertEqual(len(tree), len(expected))
+            for (value, expected_value) in zip(tree, expected):
+                self.assert_same_tree(value, expected_value)
+        else:
+            self.assertEqual(tree, expected)
+            self.assertIs(type(tree), type(expected))
+
+    def test_binary_round_trip(self):
+        env = HeartsEnv(mask_actions=True, seed=0)
+        obs = env.reset()
+        records = []
+        for i in range(16):
+            action = env.get_legal_actions()[0]
+            (obs, reward, is_done, info) = env.step(
+                {env.active_player_index: action})
+            info = {
+                key: {
+                    info_key: (
+                        (value.suit, value.rank)
+                        if info_key == 'card'
+                        else value
+                    )
+                    for (info_key, value) in value.items()
+                }
+                for (key, value) in info.items()
+            }
+            # Make records comparable with each other.
+            records.append((
+                i,
+                {'0': obs[env.active_player_index]},
+                {'0': reward[env.active_player_index]},
+                {'__all__': is_done['__all__']},
+                {'0': info[env.active_player_index]},
+            ))
+
+        encoded = server_utils.encode_data(
+            records, server_utils.WIRE_VERSION_BINARY)
+        data = self.strip_prefix(encoded)
+        self.assertEqual(
+            data[:len(server_utils.BINARY_MAGIC)],
+            server_utils.BINARY_MAGIC,
+        )
+        decoded = server_utils.decode_data(bytearray(data))
+
+        def to_primitive(value):
+            if isinstance(value, np.ndarray):
+                return value.tolist()
+            return value
+
+        expected = json.loads(json.dumps(records, default=to_primitive))
+        self.assert_same_tree(decoded, expected)
+
+        cards = decoded[0][1]['0'][HeartsEnv.OBS_KEY]['cards']
+        self.assertEqual(cards.dtype, np.int8)
+        self.assertTrue(cards.flags.writeable)
+
+    def test_binary_fallback(self):
+        for data in [
+                'message',
+                {'player_index': 0},
+                [],
+                [(0, 'a'), (1, 'b')],
+                [(0, np.zeros(3)), (1, np.zeros(4))],
+                [{'a': 0}, {'b': 0}],
+        ]:
+            encoded = server_utils.encode_data(
+                data, server_utils.WIRE_VERSION_BINARY)
+            self.assertEqual(
+                encoded,
+                server_utils.encode_data(data, server_utils.WIRE_VERSION_JSON),
+            )
+
+        data = [(0, None, 1.5, True, None), (1, None, -2.0, False, 3)]
+        decoded = server_utils.decode_data(self.strip_prefix(
+            server_utils.encode_data(data, server_utils.WIRE_VERSION_BINARY)))
+        self.assertEqual(decoded, [list(record) for record in data])
+
+    def test_ragged_round_trip(self):
+        data = [
+            (0, np.arange(3, dtype=np.uint8), 1.5),
+            (1, np.arange(0, dtype=np.uint8), None),
+            (2, np.arange(5, dtype=np.uint8), 2.0),
+        ]
+        encoded = self.strip_prefix(server_utils.encode_data(
+            data, server_utils.WIRE_VERSION_DELTA))
+        self.assertEqual(
+            encoded[:len(server_utils.BINARY_MAGIC)],
+            server_utils.BINARY_MAGIC,
+        )
+        decoded = server_utils.decode_data(encoded)
+        self.assert_same_tree(decoded, [
+            [0, [0, 1, 2], 1.5],
+            [1, [], None],
+            [2, [0, 1, 2, 3, 4], 2.0],
+        ])
+
+    def test_client_settings(self):
+        encoded = server_utils.encode_client_settings(
+            server_utils.WIRE_VERSION_BINARY, 32, 0.5)
+        self.assertEqual(
+            encoded[:len(server_utils.OK_MSG)],
+            server_utils.SETTINGS_OK_MSG,
+        )
+        data = encoded[len(server_utils.OK_MSG):]
+        self.assertEqual(len(data), server_utils.CLIENT_SETTINGS.size)
+        self.assertEqual(
+            server_utils.decode_client_settings(data),
+            (server_utils.WIRE_VERSION_BINARY, 32, 0.5),
+        )
+
+        data = server_utils.encode_client_settings(
+            255, None, float('nan'))[len(server_utils.OK_MSG):]
+        self.assertEqual(
+            server_utils.decode_client_settings(data),
+            (server_utils.WIRE_VERSION, None, None),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
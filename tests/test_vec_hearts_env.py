@@ -0,0 +1,215 @@
+import random
+import unittest
+
+import numpy as np
+
+from hearts_gym.envs.hearts_env import HeartsEnv
+from hearts_gym.envs.vec_hearts_env import VecHeartsEnv
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None  # type: ignore[assignment]
+
+
+class TestVecHeartsEnv(unittest.TestCase):
+    def create_vec_env(
+            self,
+            num_envs,
+            mask_actions,
+            use_processes,
+            use_batch_game=False,
+    ):
+        return VecHeartsEnv(
+            [
+                HeartsEnv(mask_actions=mask_actions, seed=seed)
+                for seed in range(num_envs)
+            ],
+            num_procs=2,
+            use_processes=use_processes,
+            use_batch_game=use_batch_game,
+        )
+
+    def get_backends(self):
+        # Pairs of `use_processes` and `use_batch_game`.
+        backends = [(False, False), (False, True)]
+        if shared_memory is not None:
+            backends.append((True, False))
+        return backends
+
+    def assert_obs_equal(self, obs, other_obs):
+        self.assertEqual(obs.keys(), other_obs.keys())
+        for (key, value) in obs.items():
+            if isinstance(value, dict):
+                self.assert_obs_equal(value, other_obs[key])
+            elif isinstance(value, np.ndarray):
+                self.assertTrue(np.array_equal(value, other_obs[key]))
+            else:
+                self.assertEqual(value, other_obs[key])
+
+    def assert_multi_obs_equal(self, multi_obs, other_multi_obs):
+        self.assertEqual(multi_obs.keys(), other_multi_obs.keys())
+        for (player_index, obs) in multi_obs.items():
+            self.assert_obs_equal(obs, other_multi_obs[player_index])
+
+    def assert_active_observations_match(self, envs, multi_obss):
+        active_player_indices = envs.get_active_player_indices()
+        for player_index in range(envs.num_players):
+            (
+                env_indices,
+                cards,
+                leading_hearts_allowed,
+                action_masks,
+            ) = envs.get_active_observations(player_index)
+            self.assertEqual(env_indices.tolist(), [
+                i
+                for (i, active_player_index) in enumerate(
+                        active_player_indices)
+                if active_player_index == player_index
+            ])
+            for (i, env_index) in enumerate(env_indices):
+                obs = multi_obss[env_index][player_index]
+                self.assertTrue(np.array_equal(
+                    action_masks[i], obs[HeartsEnv.ACTION_MASK_KEY]))
+                obs = obs[HeartsEnv.OBS_KEY]
+                self.assertTrue(np.array_equal(cards[i], obs['cards']))
+                self.assertEqual(
+                    leading_hearts_allowed[i], obs['leading_hearts_allowed'])
+
+    def test_active_observations(self):
+        rng = random.Random(0)
+        for (use_processes, use_batch_game) in self.get_backends():
+            envs = self.create_vec_env(
+                5, True, use_processes, use_batch_game)
+            try:
+                multi_obss = envs.reset()
+                while not envs.is_game_done():
+                    self.assert_active_observations_match(envs, multi_obss)
+                    actions = [
+                        rng.choice(envs.get_legal_actions(i))
+                        for i in range(len(envs))
+                    ]
+                    multi_obss = [
+                        obs
+                        for (obs, _, _, _) in envs.step(iter(actions))
+                    ]
+            finally:
+                envs.terminate_pool()
+
+    def test_step_subsets(self):
+        rng = random.Random(0)
+        for (use_processes, use_batch_game) in self.get_backends():
+            envs = self.create_vec_env(
+                5, True, use_processes, use_batch_game)
+            single_envs = [
+                HeartsEnv(mask_actions=True, seed=seed) for seed in range(5)]
+            try:
+                envs.reset()
+                for env in single_envs:
+                    env.reset()
+                while not envs.is_game_done():
+                    unfinished_indices = [
+                        i
+                        for (i, env) in enumerate(single_envs)
+                        if not env.game.is_done()
+                    ]
+                    env_indices = sorted(rng.sample(
+                        unfinished_indices,
+                        min(rng.randint(1, 3), len(unfinished_indices)),
+                    ))
+                    active_player_index = \
+                        envs.get_active_player_indices([env_indices[0]])[0]
+                    active_indices = envs.get_active_observations(
+                        active_player_index, env_indices)[0]
+                    self.assertEqual(active_indices.tolist(), [
+                        i
+                        for i in env_indices
+                        if (single_envs[i].active_player_index
+                            == active_player_index)
+                    ])
+
+                    actions = [
+                        rng.choice(envs.get_legal_actions(i))
+                        for i in env_indices
+                    ]
+                    data = envs.step(iter(actions), env_indices)
+                    self.assertEqual(len(data), len(env_indices))
+                    for (i, action, (obs, reward, is_done, info)) in zip(
+                            env_indices, actions, data):
+                        env = single_envs[i]
+                        (other_obs, other_reward, other_is_done,
+                         other_info) = env.step(
+                             {env.active_player_index: action})
+                        self.assert_multi_obs_equal(obs, other_obs)
+                        self.assertEqual(reward, other_reward)
+                        self.assertEqual(is_done, other_is_done)
+                        self.assertEqual(info, other_info)
+                    self.assertEqual(
+                        envs.get_active_player_indices(),
+                        [env.active_player_index for env in single_envs],
+                    )
+                self.assertTrue(all(
+                    env.game.is_done() for env in single_envs))
+            finally:
+                envs.terminate_pool()
+
+    @unittest.skipIf(shared_memory is None, 'requires Python 3.8 or newer')
+    def test_processes_match_threads(self):
+        self.assert_backend_matches_threads(True, False)
+
+    def test_batch_game_matches_threads(self):
+        self.assert_backend_matches_threads(False, True)
+
+    def assert_backend_matches_threads(self, use_processes, use_batch_game):
+        rng = random.Random(0)
+        for mask_actions in [True, False]:
+            thread_envs = self.create_vec_env(5, mask_actions, False)
+            process_envs = self.create_vec_env(
+                5, mask_actions, use_processes, use_batch_game)
+            try:
+                self.assertTrue(process_envs.is_game_done())
+                for _ in range(2):
+                    thread_obs = thread_envs.reset()
+                    process_obs = process_envs.reset()
+                    for (obs, other_obs) in zip(thread_obs, process_obs):
+                        self.assert_multi_obs_equal(obs, other_obs)
+
+                    while not thread_envs.is_game_done():
+                        self.assertFalse(process_envs.is_game_done())
+                        self.assertEqual(
+                            thread_envs.get_active_player_indices(),
+                            process_envs.get_active_player_indices(),
+                        )
+                        for i in range(len(thread_envs)):
+                            self.assertEqual(
+                                thread_envs.get_legal_actions(i),
+                                process_envs.get_legal_actions(i),
+                            )
+
+                        if mask_actions:
+                            actions = [
+                                rng.choice(thread_envs.get_legal_actions(i))
+                                for i in range(len(thread_envs))
+                            ]
+                        else:
+                            # Also test illegal and out-of-range actions.
+                            actions = [
+                                rng.randrange(
+                                    -1, thread_envs.action_space.n + 1)
+                                for _ in range(len(thread_envs))
+                            ]
+                        thread_data = thread_envs.step(iter(actions))
+                        process_data = process_envs.step(iter(actions))
+                        for (data, other_data) in zip(
+                                thread_data, process_data):
+                            obs, reward, is_done, info = data
+                            (other_obs, other_reward, other_is_done,
+                             other_info) = other_data
+                            self.assert_multi_obs_equal(obs, other_obs)
+                            self.assertEqual(reward, other_reward)
+                            self.assertEqual(is_done, other_is_done)
+                            self.assertEqual(info, other_info)
+                    self.assertTrue(process_envs.is_game_done())
+            finally:
+                thread_envs.terminate_pool()
+                process_envs.terminate_pool()
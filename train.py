@@ -175,6 +175,9 @@ def main() -> None:
         eval_config,
         conf.num_test_games,
         LEARNED_AGENT_ID,
+        conf.num_parallel_test_games,
+        conf.num_test_workers,
+        conf.use_batch_test_game,
     )
 
     print('testing took', test_duration, 'seconds')